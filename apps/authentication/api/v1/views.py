@@ -34,6 +34,7 @@ class CustomObtainAuthToken(ObtainAuthToken):
 
     permission_classes = [AllowAny]
     serializer_class = CustomAuthTokenSerializer
+    query_budgets = {"post": 3}
 
 
 # region @extend_schema
@@ -56,6 +57,7 @@ class LogoutAPIView(APIView):
 
     permission_classes = [IsAuthenticated]
     serializer_class = None
+    query_budgets = {"post": 2}
 
     @staticmethod
     def post(request: Request) -> Response:
@@ -0,0 +1,177 @@
+import hashlib
+import uuid
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import router
+from prometheus_client import Counter
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from apps.core.cache import LRUCache
+from apps.users.models import User
+
+token_auth_cache_lookups = Counter(
+    "token_auth_cache_lookups_total",
+    "Token authentication cache lookups by result.",
+    ["result"],
+)
+
+
+class TokenCache:
+    """
+    Cache of token -> user resolutions: a bounded in-process LRU cache with TTL
+    backed by a shared cache (see `TOKEN_AUTH_CACHE` setting).
+
+    Invalidation is immediate in every process: each token has a version
+    in the shared cache which is changed by `invalidate()`, and resolutions
+    are used just while they were cached with the current version of their
+    token. In-process entries save fetching the user from the shared cache,
+    their version is still checked on every hit. The version is read before
+    the token is resolved from the database, so a resolution made while
+    the token is invalidated is never used. Without a shared cache nothing
+    is cached, and the in-process cache is refused, as other processes would
+    not see invalidations.
+
+    Just the primary key and `user_fields` of users are cached (e.g. not
+    password hashes), users are rebuilt from them with other fields deferred,
+    so profile fields are always loaded from the database when they are used.
+    Entries are invalidated by `apps.authentication.signals` when the token is
+    deleted (e.g. on logout, including `QuerySet.delete()`) or any of
+    `user_fields` of its user changes, including `User.objects...update()`.
+    Changes which send no signals (raw SQL, `QuerySet._raw_delete()`) must call
+    `invalidate_user()` themselves.
+    """
+
+    key_prefix = "token-auth:"
+    # Fields which authentication and permissions of cached users depend on.
+    user_fields = ("is_active", "role", "is_superuser", "is_staff")
+
+    def __init__(self) -> None:
+        self._local: Optional[LRUCache] = None
+
+    @property
+    def options(self) -> dict:
+        return settings.TOKEN_AUTH_CACHE
+
+    @property
+    def local(self) -> LRUCache:
+        if self._local is None:
+            if self.options["TTL"] > 0 and not self.options["SHARED_CACHE"]:
+                raise ImproperlyConfigured(
+                    "TOKEN_AUTH_CACHE requires SHARED_CACHE if TTL is not 0, "
+                    "otherwise other processes keep invalidated tokens."
+                )
+            self._local = LRUCache(self.options["MAX_SIZE"], self.options["TTL"])
+        return self._local
+
+    @property
+    def shared(self):
+        alias = self.options["SHARED_CACHE"]
+        return caches[alias] if alias else None
+
+    def get(self, key: str) -> Tuple[Optional[User], Optional[str]]:
+        """
+        Returns the cached user of the token and the current version of
+        the token. On misses the user is None, and the version is passed
+        to `set()` with the user resolved from the database.
+        """
+        local, shared = self.local, self.shared
+        if shared is None:
+            token_auth_cache_lookups.labels(result="miss").inc()
+            return None, None
+        entry_key, version_key = self.shared_key(key), self.version_key(key)
+        entry = local.get(key)
+        if entry is not None:
+            version = shared.get(version_key)
+            if version is not None and entry[1] == version:
+                token_auth_cache_lookups.labels(result="local_hit").inc()
+                return self.build_user(entry[0]), version
+            local.delete(key)
+        else:
+            values = shared.get_many([entry_key, version_key])
+            entry, version = values.get(entry_key), values.get(version_key)
+            if version is not None and entry is not None and entry[1] == version:
+                token_auth_cache_lookups.labels(result="shared_hit").inc()
+                local.set(key, entry)
+                return self.build_user(entry[0]), version
+        if version is None:
+            shared.add(version_key, uuid.uuid4().hex, self.options["SHARED_TTL"])
+            version = shared.get(version_key)
+        token_auth_cache_lookups.labels(result="miss").inc()
+        return None, version
+
+    def set(self, key: str, user: User, version: Optional[str]) -> None:
+        if self.shared is None or version is None:
+            return
+        fields = ("id", *self.user_fields)
+        entry = ({field: getattr(user, field) for field in fields}, version)
+        self.local.set(key, entry)
+        self.shared.set(self.shared_key(key), entry, timeout=self.options["SHARED_TTL"])
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        """
+        Invalidates entries of the tokens in every process by changing
+        their versions.
+        """
+        keys = list(keys)
+        for key in keys:
+            self.local.delete(key)
+        if self.shared is not None and keys:
+            self.shared.set_many(
+                {self.version_key(key): uuid.uuid4().hex for key in keys},
+                timeout=self.options["SHARED_TTL"],
+            )
+
+    def invalidate_user(self, user_id) -> None:
+        """
+        Invalidates entries of all tokens of the user.
+        """
+        self.local.delete_matching(lambda entry: entry[0]["id"] == user_id)
+        self.invalidate(
+            Token.objects.filter(user_id=user_id).values_list("key", flat=True)
+        )
+
+    def reset(self) -> None:
+        """
+        Drops the in-process cache, it is created again with the current settings.
+        """
+        self._local = None
+
+    def build_user(self, values: dict) -> User:
+        """
+        Returns the user with the cached values, other fields are deferred.
+        """
+        # `Model.from_db()` takes values in the order of the model fields.
+        names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+        return User.from_db(
+            router.db_for_read(User), names, [values[name] for name in names]
+        )
+
+    def shared_key(self, key: str) -> str:
+        # Tokens are not used as cache keys as they are.
+        return self.key_prefix + hashlib.sha256(key.encode()).hexdigest()
+
+    def version_key(self, key: str) -> str:
+        return f"{self.key_prefix}version:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication which resolves tokens to users by `token_cache`,
+    the database is queried just on cache misses. Inactive users and invalid
+    tokens are never cached.
+    """
+
+    def authenticate_credentials(self, key: str) -> Tuple[User, Token]:
+        user, version = token_cache.get(key)
+        if user is not None:
+            return user, Token(key=key, user=user)
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, version)
+        return user, token
@@ -0,0 +1,67 @@
+from typing import Callable
+
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from apps.authentication.authentication import token_cache
+from apps.users.models import User
+from apps.users.signals import users_updated
+
+# Changes of these fields affect authentication or permissions of cached users.
+AUTH_FIELDS = set(token_cache.user_fields)
+
+
+def invalidate(invalidation: Callable[[], None]) -> None:
+    """
+    Runs the invalidation at once and, within a transaction, again after
+    commit, so tokens resolved from the database before the commit are not
+    cached with the current versions.
+    """
+    invalidation()
+    if connection.in_atomic_block:
+        transaction.on_commit(invalidation)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance: Token, **kwargs) -> None:
+    # The primary key of the instance is cleared after deletion.
+    key = instance.key
+    invalidate(lambda: token_cache.invalidate([key]))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(
+    sender, instance: User, created: bool, update_fields=None, **kwargs
+) -> None:
+    """
+    Invalidates cached tokens of the user unless the save could not change
+    the fields which authentication depends on (e.g. just `last_login`
+    is updated on login).
+    """
+    if created or (update_fields is not None and not AUTH_FIELDS & update_fields):
+        return
+    user_id = instance.pk
+    invalidate(lambda: token_cache.invalidate_user(user_id))
+
+
+@receiver(users_updated, sender=User)
+def invalidate_updated_users_tokens(sender, user_ids, fields, **kwargs) -> None:
+    """
+    Invalidates cached tokens of users changed by `User.objects...update()`.
+    """
+    if not AUTH_FIELDS & fields:
+        return
+    invalidate(
+        lambda: token_cache.invalidate(
+            Token.objects.filter(user_id__in=user_ids).values_list("key", flat=True)
+        )
+    )
+
+
+@receiver(setting_changed)
+def reset_token_cache(setting: str, **kwargs) -> None:
+    if setting == "TOKEN_AUTH_CACHE":
+        token_cache.reset()
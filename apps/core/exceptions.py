@@ -0,0 +1,27 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = _(
+        "The resource was modified since it was retrieved. "
+        "Retrieve it again and retry the request."
+    )
+    default_code = "precondition_failed"
+
+
+class Conflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = _("The request conflicts with the current state of the resource.")
+    default_code = "conflict"
+
+
+class NotRepresentable(APIException):
+    status_code = status.HTTP_406_NOT_ACCEPTABLE
+    default_detail = _(
+        "The resource is not representable in the requested format. "
+        "Request it in JSON."
+    )
+    default_code = "not_representable"
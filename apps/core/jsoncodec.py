@@ -0,0 +1,75 @@
+"""
+JSON codec of API requests and responses (see `JSON_CODEC` setting):
+`orjson` encodes and decodes large diagram documents many times faster than
+stdlib `json` which is used if the optional `orjson` package is not installed.
+Values which JSON has no type for (UUIDs, datetimes, Decimals, etc.) are
+converted by DRF's `JSONEncoder`, so both codecs produce the same JSON.
+"""
+
+import re
+from typing import Any
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+JSON = "json"
+ORJSON = "orjson"
+CODECS = (JSON, ORJSON)
+
+_encoder = JSONEncoder()
+
+# Integers which may not fit 64 bits (numbers with 19 and more digits).
+_LONG_NUMBER = re.compile(rb"\d{19}")
+
+
+def resolve(codec: str) -> str:
+    """
+    Returns the codec which is used if the codec is requested:
+    orjson falls back to json if `orjson` package is not installed.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unknown JSON codec: {codec!r}.")
+    if codec == ORJSON and orjson is None:
+        return JSON
+    return codec
+
+
+def is_fast() -> bool:
+    return resolve(settings.JSON_CODEC) == ORJSON
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Returns compact UTF-8 JSON of the data by orjson. Datetimes, dates and times
+    are passed to DRF's `JSONEncoder` too, because orjson formats them another
+    way (e.g. UTC offsets).
+    Unlike DRF's renderer, orjson renders out of range floats (NaN, Infinity)
+    as null, but they can be neither parsed from JSON nor stored in JSON columns.
+    Raises `TypeError` (`orjson.JSONEncodeError`) if the data is not serializable,
+    e.g. for integers which do not fit 64 bits, so callers render it by `json`.
+    """
+    return orjson.dumps(
+        data,
+        default=_encoder.default,
+        option=orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS,
+    )
+
+
+def loads(data: bytes) -> Any:
+    """
+    Parses UTF-8 JSON by orjson, raises `ValueError` if it is not valid.
+    orjson is stricter than stdlib `json` (e.g. it rejects numbers out of range
+    of floats), so callers parse rejected documents by `json` again.
+    orjson parses integers which do not fit 64 bits as floats, so documents
+    with long numbers are rejected too (the check takes ~1% of parse time).
+    """
+    if _LONG_NUMBER.search(data):
+        raise ValueError("Numbers with 19 and more digits are parsed by json.")
+    return orjson.loads(data)
@@ -0,0 +1,173 @@
+"""
+Minimal implementation of JSON Patch (RFC 6902) and JSON Merge Patch (RFC 7396).
+Patches are applied in place, so the target document is not copied even if it
+is large: callers must discard the document if an error is raised.
+"""
+
+from typing import Any, List, Tuple, Union
+
+Container = Union[dict, list]
+
+
+class JSONPatchError(ValueError):
+    """
+    The patch is malformed or can not be applied to the document.
+    """
+
+
+class JSONPatchTestFailed(JSONPatchError):
+    """
+    A `test` operation of the patch failed.
+    """
+
+
+def parse_pointer(pointer: Any) -> List[str]:
+    """
+    Splits a JSON Pointer (RFC 6901) into unescaped reference tokens.
+    """
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise JSONPatchError(f"Invalid JSON pointer: {pointer!r}.")
+    if not pointer:
+        return []
+    return [
+        token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")
+    ]
+
+
+def apply_json_patch(document: Any, operations: Any) -> Any:
+    """
+    Applies JSON Patch operations to the document and returns the result,
+    which is the same object unless the whole document is replaced.
+    """
+    if not isinstance(operations, list):
+        raise JSONPatchError("JSON Patch must be an array of operations.")
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise JSONPatchError("JSON Patch operation must be an object.")
+        op = operation.get("op")
+        path = parse_pointer(operation.get("path"))
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JSONPatchError(f"Operation '{op}' requires 'value' member.")
+
+        if op == "add":
+            document = _add(document, path, operation["value"])
+        elif op == "remove":
+            document, _value = _remove(document, path)
+        elif op == "replace":
+            _resolve(document, path)
+            document, _value = _remove(document, path)
+            document = _add(document, path, operation["value"])
+        elif op in ("move", "copy"):
+            from_path = parse_pointer(operation.get("from"))
+            if op == "move":
+                if path[: len(from_path)] == from_path and path != from_path:
+                    raise JSONPatchError("Value can not be moved into its child.")
+                document, value = _remove(document, from_path)
+            else:
+                value = _deepcopy(_resolve(document, from_path))
+            document = _add(document, path, value)
+        elif op == "test":
+            if not _equal(_resolve(document, path), operation["value"]):
+                raise JSONPatchTestFailed(
+                    f"Test operation failed for path {operation['path']!r}."
+                )
+        else:
+            raise JSONPatchError(f"Unknown JSON Patch operation: {op!r}.")
+    return document
+
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """
+    Applies JSON Merge Patch to the target and returns the result, which is
+    the same object if both the target and the patch are objects.
+    """
+    if not isinstance(patch, dict):
+        return patch
+    if not isinstance(target, dict):
+        target = {}
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        else:
+            target[key] = apply_merge_patch(target.get(key), value)
+    return target
+
+
+def _resolve(document: Any, path: List[str]) -> Any:
+    for token in path:
+        container, key = _child(document, token)
+        document = container[key]
+    return document
+
+
+def _parent(document: Any, path: List[str]) -> Tuple[Container, str]:
+    container = _resolve(document, path[:-1])
+    if not isinstance(container, (dict, list)):
+        raise JSONPatchError(f"Path {_format(path)} does not exist.")
+    return container, path[-1]
+
+
+def _child(container: Any, token: str) -> Tuple[Container, Union[str, int]]:
+    if isinstance(container, dict) and token in container:
+        return container, token
+    if isinstance(container, list):
+        index = _index(container, token)
+        if index < len(container):
+            return container, index
+    raise JSONPatchError(f"Path member {token!r} does not exist.")
+
+
+def _index(container: list, token: str) -> int:
+    if token != "0" and (not token.isdigit() or token.startswith("0")):
+        raise JSONPatchError(f"Invalid array index: {token!r}.")
+    return int(token)
+
+
+def _add(document: Any, path: List[str], value: Any) -> Any:
+    if not path:
+        return value
+    container, token = _parent(document, path)
+    if isinstance(container, dict):
+        container[token] = value
+    elif token == "-":
+        container.append(value)
+    else:
+        index = _index(container, token)
+        if index > len(container):
+            raise JSONPatchError(f"Array index is out of range: {token!r}.")
+        container.insert(index, value)
+    return document
+
+
+def _remove(document: Any, path: List[str]) -> Tuple[Any, Any]:
+    if not path:
+        return None, document
+    container, key = _child(*_parent(document, path))
+    return document, container.pop(key)
+
+
+def _equal(first: Any, second: Any) -> bool:
+    """
+    Compares JSON values, unlike `==` booleans are not equal to numbers.
+    """
+    if isinstance(first, bool) or isinstance(second, bool):
+        return type(first) is type(second) and first == second
+    if isinstance(first, dict) and isinstance(second, dict):
+        return first.keys() == second.keys() and all(
+            _equal(value, second[key]) for key, value in first.items()
+        )
+    if isinstance(first, list) and isinstance(second, list):
+        return len(first) == len(second) and all(map(_equal, first, second))
+    return first == second
+
+
+def _deepcopy(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _deepcopy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_deepcopy(item) for item in value]
+    return value
+
+
+def _format(path: List[str]) -> str:
+    return repr("".join(f"/{token}" for token in path))
@@ -0,0 +1,118 @@
+"""
+Incremental parsing of JSON items from streams (e.g. request bodies of bulk
+endpoints): newline delimited JSON (NDJSON) is parsed line by line, a JSON
+array is parsed item by item, so the whole body is never held in memory
+(just the item which is being parsed).
+"""
+
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator, Union
+
+from apps.core import jsoncodec
+
+# Bytes read from the stream at once.
+CHUNK_SIZE = 65536
+WHITESPACE = " \t\n\r"
+
+
+class ItemParseError(ValueError):
+    """
+    The item is not valid JSON. Items after it can be parsed just from NDJSON.
+    """
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Parses a JSON item by the fast JSON codec if it is available.
+    """
+    if jsoncodec.is_fast() and isinstance(data, bytes):
+        try:
+            return jsoncodec.loads(data)
+        except ValueError:
+            pass
+    return json.loads(data)
+
+
+def iter_ndjson(stream: BinaryIO) -> Iterator[Union[Any, ItemParseError]]:
+    """
+    Yields items of newline delimited JSON, or `ItemParseError` for lines which
+    are not valid JSON. Blank lines are skipped.
+    """
+    for line in iter(stream.readline, b""):
+        if not line.strip():
+            continue
+        try:
+            yield loads(line)
+        except ValueError as exc:
+            yield ItemParseError(f"JSON parse error - {exc}")
+
+
+def iter_json_array(
+    stream: BinaryIO, chunk_size: int = CHUNK_SIZE
+) -> Iterator[Union[Any, ItemParseError]]:
+    """
+    Yields items of a JSON array. If the body is not a valid JSON array,
+    `ItemParseError` is yielded in place of the next item and parsing stops.
+    The buffer is extended by the size of its content while an item is
+    incomplete, so large items are parsed a few times at most.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer, position, eof = "", 0, False
+
+    def read(size: int) -> None:
+        nonlocal buffer, position, eof
+        chunk = stream.read(size)
+        eof = not chunk
+        buffer = buffer[position:] + text_decoder.decode(chunk, final=eof)
+        position = 0
+
+    def peek() -> str:
+        """
+        Skips whitespace and returns the next character, empty at the end.
+        """
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in WHITESPACE:
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if eof:
+                return ""
+            read(chunk_size)
+
+    try:
+        if peek() != "[":
+            raise ValueError("Expected a JSON array.")
+        position += 1
+        if peek() == "]":
+            position += 1
+        else:
+            while True:
+                peek()
+                while True:
+                    try:
+                        item, end = decoder.raw_decode(buffer, position)
+                    except json.JSONDecodeError:
+                        if eof:
+                            raise
+                        read(max(chunk_size, len(buffer)))
+                        continue
+                    # A number at the end of the buffer can be incomplete.
+                    if end == len(buffer) and not eof:
+                        read(max(chunk_size, len(buffer)))
+                        continue
+                    break
+                position = end
+                yield item
+                separator = peek()
+                position += 1
+                if separator == "]":
+                    break
+                if separator != ",":
+                    raise ValueError("Expected ',' or ']' after an array item.")
+        if peek():
+            raise ValueError("Extra data after the JSON array.")
+    except ValueError as exc:
+        yield ItemParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,260 @@
+"""
+Building blocks of the load benchmark (see `seed_load_data` and
+`run_load_benchmark` management commands): generation of UML diagram documents
+of realistic sizes, concurrent HTTP clients, and latency statistics.
+"""
+
+import http.client
+import json
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+TYPES = ("int", "long", "String", "boolean", "Date", "UUID", "List<String>")
+VISIBILITIES = ("+", "-", "#", "~")
+RELATION_TYPES = (
+    "association",
+    "aggregation",
+    "composition",
+    "inheritance",
+    "realization",
+    "dependency",
+)
+
+
+def uml_document(rng: random.Random, size: int, tag: str = "") -> dict:
+    """
+    Returns a class diagram document which JSON is about `size` bytes long:
+    classes with attributes and methods placed on a canvas, and relations
+    between them. Documents with different tags are different.
+    """
+    classes: List[dict] = []
+    relations: List[dict] = []
+    document = {"name": f"Diagram {tag}", "classes": classes, "relations": relations}
+    length = len(json.dumps(document))
+    while length < size:
+        index = len(classes)
+        attributes = [
+            {
+                "name": f"attribute{number}",
+                "type": rng.choice(TYPES),
+                "visibility": rng.choice(VISIBILITIES),
+            }
+            for number in range(rng.randint(2, 8))
+        ]
+        methods = [
+            {
+                "name": f"method{number}",
+                "returnType": rng.choice(TYPES + ("void",)),
+                "parameters": [
+                    {"name": f"parameter{parameter}", "type": rng.choice(TYPES)}
+                    for parameter in range(rng.randint(0, 3))
+                ],
+                "visibility": rng.choice(VISIBILITIES),
+            }
+            for number in range(rng.randint(1, 6))
+        ]
+        element = {
+            "id": f"{tag}-class-{index}",
+            "name": f"Class{index}",
+            "x": rng.randint(0, 4000),
+            "y": rng.randint(0, 3000),
+            "width": 220,
+            "height": 40 + 18 * (len(attributes) + len(methods)),
+            "attributes": attributes,
+            "methods": methods,
+        }
+        classes.append(element)
+        length += len(json.dumps(element))
+        if index:
+            relation = {
+                "id": f"{tag}-relation-{index}",
+                "source": classes[rng.randrange(index)]["id"],
+                "target": element["id"],
+                "type": rng.choice(RELATION_TYPES),
+            }
+            relations.append(relation)
+            length += len(json.dumps(relation))
+    return document
+
+
+class LoadRequest(NamedTuple):
+    method: str
+    path: str
+    token: Optional[str] = None
+    body: Any = None
+
+
+class Sample(NamedTuple):
+    # Latency in seconds.
+    latency: float
+    status: int
+    # Number of queries and database time in seconds reported by the server.
+    queries: Optional[int] = None
+    db_time: Optional[float] = None
+
+
+class HTTPClient:
+    """
+    Sends requests to the server at `base_url`. The numbers of queries and
+    database time of requests are read from the headers which are set by
+    `QueryBudgetMiddleware` if `QUERY_BUDGETS["RESPONSE_HEADERS"]` is enabled.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 60) -> None:
+        url = urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port
+        self.timeout = timeout
+
+    def send(self, request: LoadRequest) -> Sample:
+        headers = {"Accept": "application/json"}
+        body = None
+        if request.token:
+            headers["Authorization"] = f"Token {request.token}"
+        if request.body is not None:
+            headers["Content-Type"] = "application/json"
+            body = json.dumps(request.body)
+        connection = http.client.HTTPConnection(self.host, self.port, self.timeout)
+        start = time.perf_counter()
+        try:
+            connection.request(request.method, request.path, body, headers)
+            response = connection.getresponse()
+            response.read()
+        finally:
+            connection.close()
+        latency = time.perf_counter() - start
+        queries = response.getheader("X-DB-Queries")
+        db_time = response.getheader("X-DB-Time")
+        return Sample(
+            latency,
+            response.status,
+            int(queries) if queries is not None else None,
+            float(db_time) if db_time is not None else None,
+        )
+
+
+def run_scenario(
+    send: Callable[[LoadRequest], Sample],
+    make_request: Callable[[random.Random], LoadRequest],
+    concurrency: int,
+    duration: Optional[float] = None,
+    requests: Optional[int] = None,
+    seed: int = 0,
+) -> Tuple[List[Sample], float]:
+    """
+    Sends requests made by `make_request` from `concurrency` threads until
+    `duration` seconds elapse or `requests` requests are sent, and returns
+    the samples and the elapsed time in seconds.
+    """
+    samples: List[Sample] = []
+    lock = threading.Lock()
+    remaining = [requests]
+    deadline = None if duration is None else time.monotonic() + duration
+
+    def claim() -> bool:
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        with lock:
+            if remaining[0] is None:
+                return True
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def client(number: int) -> None:
+        rng = random.Random(seed * 1000 + number)
+        while claim():
+            try:
+                sample = send(make_request(rng))
+            except OSError:
+                sample = Sample(0.0, 0)
+            samples.append(sample)
+
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=client, args=(number,)) for number in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def percentile(values: List[float], percent: float) -> Optional[float]:
+    """
+    Returns the nearest-rank percentile of the values.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    """
+    Returns latency percentiles (ms), throughput of successful requests,
+    statuses and numbers of queries per request of the scenario samples.
+    """
+    succeeded = [sample for sample in samples if 200 <= sample.status < 400]
+    latencies = [sample.latency * 1000 for sample in succeeded]
+    queries = [sample.queries for sample in samples if sample.queries is not None]
+    db_times = [sample.db_time * 1000 for sample in samples if sample.db_time]
+
+    def rounded(value: Optional[float]) -> Optional[float]:
+        return None if value is None else round(value, 2)
+
+    return {
+        "requests": len(samples),
+        "errors": len(samples) - len(succeeded),
+        "statuses": {
+            str(status): count
+            for status, count in sorted(Counter(s.status for s in samples).items())
+        },
+        "rps": rounded(len(succeeded) / elapsed if elapsed else 0.0),
+        "latency_ms": {
+            "p50": rounded(percentile(latencies, 50)),
+            "p95": rounded(percentile(latencies, 95)),
+            "p99": rounded(percentile(latencies, 99)),
+            "max": rounded(max(latencies, default=None)),
+        },
+        "queries_per_request": {
+            "mean": rounded(sum(queries) / len(queries) if queries else None),
+            "max": max(queries, default=None),
+        },
+        "db_time_ms": {"p50": rounded(percentile(db_times, 50))},
+    }
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """
+    Returns lines comparing throughput and latency percentiles of
+    the scenarios of two benchmark results.
+    """
+
+    def change(old: Optional[float], new: Optional[float]) -> str:
+        if old is None or new is None:
+            return f"{old} -> {new}"
+        percent = f" ({(new - old) / old * 100:+.1f}%)" if old else ""
+        return f"{old} -> {new}{percent}"
+
+    lines = []
+    for name, result in current["scenarios"].items():
+        old = previous.get("scenarios", {}).get(name)
+        if old is None:
+            continue
+        latencies = ", ".join(
+            f"{key} {change(old['latency_ms'][key], result['latency_ms'][key])}"
+            for key in ("p50", "p95", "p99")
+        )
+        lines.append(
+            f"{name}: rps {change(old['rps'], result['rps'])}, "
+            f"latency ms {latencies}, queries per request "
+            f"{change(old['queries_per_request']['mean'], result['queries_per_request']['mean'])}"  # noqa: E501
+        )
+    return lines
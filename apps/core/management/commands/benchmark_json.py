@@ -0,0 +1,98 @@
+import io
+import json
+import random
+import statistics
+import time
+import uuid
+from typing import Callable, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.core import jsoncodec
+from apps.core.loadtest import uml_document
+from apps.core.parsers import FastJSONParser
+from apps.core.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks rendering and parsing of diagrams with large documents "
+        "by the fast JSON codec (see `apps.core.jsoncodec`) against DRF's JSON "
+        "renderer and parser. Outputs of both are checked to be equal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[100000, 1000000, 5000000],
+            help="Sizes of diagram documents in bytes of JSON.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of runs to take the median time of.",
+        )
+
+    def handle(self, *args, **options):
+        if not jsoncodec.is_fast():
+            raise CommandError(
+                "The fast JSON codec is not used ('orjson' is not installed "
+                "or JSON_CODEC setting is 'json'), there is nothing to compare."
+            )
+        rng = random.Random(0)
+        for size in options["sizes"]:
+            document = uml_document(rng, size, str(size))
+            timestamp = now()
+            # Response data of diagram retrieve.
+            data = {
+                "diagram_id": uuid.uuid4(),
+                "title": "Diagram",
+                "json": document,
+                "description": "Benchmark diagram",
+                "owner_id": uuid.uuid4(),
+                "owner_email": "owner@example.com",
+                "created_at": timestamp,
+                "updated_at": timestamp,
+            }
+            rendered = JSONRenderer().render(data)
+            if json.loads(FastJSONRenderer().render(data)) != json.loads(rendered):
+                raise CommandError("Fast JSON renderer output differs from DRF's one.")
+            # Request body of diagram update.
+            body = json.dumps({"title": "Diagram", "json": document}).encode()
+            parsed = JSONParser().parse(io.BytesIO(body))
+            if FastJSONParser().parse(io.BytesIO(body)) != parsed:
+                raise CommandError("Fast JSON parser output differs from DRF's one.")
+
+            repeat = options["repeat"]
+            render_times = [
+                self.time(lambda: renderer().render(data), repeat)
+                for renderer in (JSONRenderer, FastJSONRenderer)
+            ]
+            parse_times = [
+                self.time(lambda: parser().parse(io.BytesIO(body)), repeat)
+                for parser in (JSONParser, FastJSONParser)
+            ]
+            self.stdout.write(
+                f"Document: {len(body) // 1024} KB, "
+                f"render: DRF {render_times[0]:.2f} ms, "
+                f"fast {render_times[1]:.2f} ms "
+                f"({render_times[0] / render_times[1]:.1f}x), "
+                f"parse: DRF {parse_times[0]:.2f} ms, "
+                f"fast {parse_times[1]:.2f} ms "
+                f"({parse_times[0] / parse_times[1]:.1f}x)."
+            )
+
+    @staticmethod
+    def time(function: Callable[[], object], repeat: int) -> float:
+        times: List[float] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append((time.perf_counter() - start) * 1000)
+        return statistics.median(times)
@@ -0,0 +1,136 @@
+import random
+import statistics
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+
+from apps.core.loadtest import uml_document
+from apps.core.serializers import drf_serializer
+from apps.diagrams.api.v1.projections import DiagramListRow
+from apps.diagrams.api.v1.serializers import (
+    DiagramListSerializerWithPublicFlag,
+    DiagramSerializer,
+    SharedDiagramListSerializer,
+)
+from apps.diagrams.models import Diagram
+from apps.sharings.api.v1.serializers import CollaboratorSerializer
+from apps.sharings.constants import PermissionLevels
+from apps.sharings.models import Collaborator
+from apps.users.models import User
+
+PERMISSION_LEVELS = [level for level, _ in PermissionLevels.CHOICES]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the fast path of serializers (see `apps.core.serializers`) "
+        "against DRF's `to_representation()`: times of serializing lists "
+        "of in-memory rows as the endpoints do. Outputs of both are checked "
+        "to be equal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[10, 100, 1000],
+            help="Numbers of serialized rows.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of runs to take the median time of.",
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        owners = [User(email=f"benchmark-{index}@example.com") for index in range(10)]
+        make_rows: Dict[type, Callable[[int], Any]] = {
+            DiagramSerializer: lambda index: self.diagram(rng, owners, index),
+            DiagramListSerializerWithPublicFlag: lambda index: self.list_row(
+                rng, owners, index, is_public=rng.random() < 0.5
+            ),
+            SharedDiagramListSerializer: lambda index: self.list_row(
+                rng,
+                owners,
+                index,
+                permission_level=rng.choice(PERMISSION_LEVELS),
+            ),
+            CollaboratorSerializer: lambda index: self.collaborator(rng, owners, index),
+        }
+        for serializer_class, make_row in make_rows.items():
+            for count in options["rows"]:
+                rows = [make_row(index) for index in range(count)]
+                reference = drf_serializer(serializer_class)
+                if serializer_class(rows, many=True).data != (
+                    reference(rows, many=True).data
+                ):
+                    raise CommandError(
+                        f"Fast path output of {serializer_class.__name__} "
+                        "differs from DRF's one."
+                    )
+                drf_time = self.time(reference, rows, options["repeat"])
+                fast_time = self.time(serializer_class, rows, options["repeat"])
+                self.stdout.write(
+                    f"{serializer_class.__name__}, rows: {count}, "
+                    f"DRF: {drf_time:.2f} ms, fast path: {fast_time:.2f} ms "
+                    f"({drf_time / fast_time:.1f}x)."
+                )
+
+    @staticmethod
+    def time(serializer_class: type, rows: List[Any], repeat: int) -> float:
+        times: List[float] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            serializer_class(rows, many=True).data
+            times.append((time.perf_counter() - start) * 1000)
+        return statistics.median(times)
+
+    @staticmethod
+    def diagram(rng: random.Random, owners: List[User], index: int) -> Diagram:
+        timestamp = now()
+        diagram = Diagram(
+            id=uuid.uuid4(),
+            title=f"Diagram {index}",
+            description=f"Benchmark diagram {index}",
+            owner=rng.choice(owners),
+            created_at=timestamp,
+            updated_at=timestamp,
+        )
+        diagram.json = uml_document(rng, 2000, str(index))
+        return diagram
+
+    @staticmethod
+    def list_row(
+        rng: random.Random, owners: List[User], index: int, **annotations: Any
+    ) -> DiagramListRow:
+        owner = rng.choice(owners)
+        timestamp = now()
+        return DiagramListRow(
+            id=uuid.uuid4(),
+            title=f"Diagram {index}",
+            owner_id=owner.id,
+            owner_email=owner.email,
+            created_at=timestamp,
+            updated_at=timestamp,
+            **annotations,
+        )
+
+    def collaborator(
+        self, rng: random.Random, owners: List[User], index: int
+    ) -> Collaborator:
+        diagram = self.diagram(rng, owners, index)
+        # Every tenth share is public.
+        shared_to = None if index % 10 == 0 else rng.choice(owners)
+        return Collaborator(
+            id=uuid.uuid4(),
+            diagram=diagram,
+            shared_to=shared_to,
+            permission_level=rng.choice(PERMISSION_LEVELS),
+            shared_at=now(),
+        )
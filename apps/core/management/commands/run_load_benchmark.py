@@ -0,0 +1,344 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.authtoken.models import Token
+
+from apps.core.loadtest import (
+    HTTPClient,
+    LoadRequest,
+    compare,
+    run_scenario,
+    summarize,
+    uml_document,
+)
+from apps.diagrams.models import Diagram
+from apps.sharings.constants import PermissionLevels
+from apps.sharings.models import Collaborator
+from apps.users.models import User
+
+SCENARIOS = ("list", "retrieve", "save", "copy", "invite", "public-read")
+
+
+@dataclass
+class Population:
+    """
+    Seeded data the requests are made with: tokens of a sample of users with
+    ids of their diagrams, ids of public diagrams and the number of users.
+    """
+
+    tokens: List[str]
+    diagram_ids: Dict[str, List[str]]
+    public_ids: List[str]
+    users: int
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the load benchmark: concurrent clients request the API endpoints "
+        "(list, retrieve, save, copy, invite and public read of diagrams) "
+        "as users seeded by 'seed_load_data' command. A local gunicorn server is "
+        "started unless '--url' is given. Latency percentiles, throughput and "
+        "database queries per request are reported and stored as JSON, so runs "
+        "of different commits can be compared by '--compare'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="URL of a running server, it must return query counts in "
+            "headers (QUERY_BUDGETS_RESPONSE_HEADERS and QUERY_BUDGETS_SAMPLE_RATE=1).",
+        )
+        parser.add_argument(
+            "--bind",
+            default="127.0.0.1:8010",
+            help="Address the started gunicorn server listens on (metrics are "
+            "exported on 8001-8002 ports).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of workers of the started gunicorn server.",
+        )
+        parser.add_argument(
+            "--scenarios",
+            nargs="+",
+            choices=SCENARIOS,
+            default=list(SCENARIOS),
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=16,
+            help="Number of concurrent clients.",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=30,
+            help="Duration of each scenario in seconds.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            help="Number of requests of each scenario instead of the duration.",
+        )
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument(
+            "--prefix",
+            default="load",
+            help="Email prefix of the seeded users.",
+        )
+        parser.add_argument(
+            "--sample-users",
+            type=int,
+            default=1000,
+            help="Number of seeded users the requests are made by.",
+        )
+        parser.add_argument(
+            "--document-size",
+            type=int,
+            default=20000,
+            help="Size of saved documents in bytes of JSON.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output",
+            help="JSON file to store the results to, defaults to "
+            "load-benchmark-<commit>-<time>.json.",
+        )
+        parser.add_argument(
+            "--compare",
+            help="JSON file of a previous run to compare the results with.",
+        )
+
+    def handle(self, *args, **options):
+        previous = None
+        if options["compare"]:
+            previous = json.loads(Path(options["compare"]).read_text())
+        population = self.load_population(options)
+        if not population.tokens:
+            raise CommandError(
+                f"There are no diagrams of users with '{options['prefix']}' "
+                "prefix, seed them by 'seed_load_data' command first."
+            )
+
+        server = None
+        url = options["url"]
+        if url is None:
+            url = f"http://{options['bind']}"
+            server = self.start_server(url, options)
+        client = HTTPClient(url)
+        results = {}
+        try:
+            for seed, name in enumerate(options["scenarios"], start=options["seed"]):
+                samples, elapsed = run_scenario(
+                    client.send,
+                    self.make_scenario(name, population, options),
+                    options["concurrency"],
+                    None if options["requests"] else options["duration"],
+                    options["requests"],
+                    seed,
+                )
+                results[name] = summarize(samples, elapsed)
+                self.stdout.write(self.format_result(name, results[name]))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+        commit = self.get_commit()
+        created_at = now()
+        report = {
+            "commit": commit,
+            "created_at": created_at.isoformat(),
+            "options": {
+                key: options[key]
+                for key in ("workers", "concurrency", "duration", "requests")
+            },
+            "data": {
+                "users": population.users,
+                "diagrams": Diagram.objects.filter(
+                    owner__email__startswith=f"{options['prefix']}-"
+                ).count(),
+                "shares": Collaborator.objects.filter(
+                    diagram__owner__email__startswith=f"{options['prefix']}-"
+                ).count(),
+            },
+            "scenarios": results,
+        }
+        output = options["output"] or (
+            f"load-benchmark-{(commit or 'unknown')[:12]}-"
+            f"{created_at.strftime('%Y%m%d%H%M%S')}.json"
+        )
+        Path(output).write_text(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Results are stored to {output}."))
+        if previous is not None:
+            for line in compare(previous, report):
+                self.stdout.write(line)
+
+    @staticmethod
+    def load_population(options: dict) -> Population:
+        users = User.objects.filter(email__startswith=f"{options['prefix']}-")
+        # Tokens are random, so ordering by them samples random users.
+        tokens = dict(
+            Token.objects.filter(user__in=users)
+            .order_by("key")
+            .values_list("user_id", "key")[: options["sample_users"]]
+        )
+        diagram_ids = defaultdict(list)
+        diagrams = Diagram.objects.filter(owner_id__in=tokens)
+        for owner_id, diagram_id in diagrams.values_list("owner_id", "id"):
+            diagram_ids[tokens[owner_id]].append(str(diagram_id))
+        public_ids = diagrams.filter(is_public=True).values_list("id", flat=True)
+        return Population(
+            tokens=list(diagram_ids),
+            diagram_ids=dict(diagram_ids),
+            public_ids=[str(diagram_id) for diagram_id in public_ids],
+            users=users.count(),
+        )
+
+    @staticmethod
+    def make_scenario(
+        name: str, population: Population, options: dict
+    ) -> Callable[[random.Random], LoadRequest]:
+        document = uml_document(
+            random.Random(options["seed"]), options["document_size"], "save"
+        )
+
+        def owned(rng: random.Random):
+            token = rng.choice(population.tokens)
+            return token, rng.choice(population.diagram_ids[token])
+
+        def list_diagrams(rng: random.Random) -> LoadRequest:
+            path = f"{reverse('diagram-list')}?page_size={options['page_size']}"
+            return LoadRequest("GET", path, rng.choice(population.tokens))
+
+        def retrieve(rng: random.Random) -> LoadRequest:
+            token, pk = owned(rng)
+            return LoadRequest("GET", reverse("diagram-detail", args=[pk]), token)
+
+        def save(rng: random.Random) -> LoadRequest:
+            token, pk = owned(rng)
+            # Every save stores a new content as edits in the editor do.
+            body = {"json": {**document, "revision": rng.random()}}
+            return LoadRequest(
+                "PATCH", reverse("diagram-detail", args=[pk]), token, body
+            )
+
+        def copy(rng: random.Random) -> LoadRequest:
+            token, pk = owned(rng)
+            return LoadRequest(
+                "POST", reverse("diagram-copy-diagram", args=[pk]), token
+            )
+
+        def invite(rng: random.Random) -> LoadRequest:
+            token, pk = owned(rng)
+            body = {
+                "user_email": f"{options['prefix']}-"
+                f"{rng.randrange(population.users)}@example.com",
+                "permission_level": rng.choice(
+                    [level for level, _ in PermissionLevels.CHOICES]
+                ),
+            }
+            return LoadRequest(
+                "POST", reverse("diagram-invite-collaborator", args=[pk]), token, body
+            )
+
+        def public_read(rng: random.Random) -> LoadRequest:
+            pk = rng.choice(population.public_ids)
+            return LoadRequest("GET", reverse("public-diagram-detail", args=[pk]))
+
+        scenarios = {
+            "list": list_diagrams,
+            "retrieve": retrieve,
+            "save": save,
+            "copy": copy,
+            "invite": invite,
+            "public-read": public_read,
+        }
+        if name == "public-read" and not population.public_ids:
+            raise CommandError("There are no public diagrams of the sampled users.")
+        return scenarios[name]
+
+    def start_server(self, url: str, options: dict) -> subprocess.Popen:
+        client = HTTPClient(url, timeout=5)
+        try:
+            client.send(LoadRequest("GET", reverse("health-check")))
+        except OSError:
+            pass
+        else:
+            raise CommandError(f"Address {options['bind']} is already in use.")
+        env = {
+            **os.environ,
+            "QUERY_BUDGETS_ENABLED": "True",
+            "QUERY_BUDGETS_SAMPLE_RATE": "1",
+            "QUERY_BUDGETS_RESPONSE_HEADERS": "True",
+        }
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "config.wsgi",
+                "--bind",
+                options["bind"],
+                "--workers",
+                str(options["workers"]),
+                "--timeout",
+                "180",
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"gunicorn exited with code {server.returncode}.")
+            try:
+                if (
+                    client.send(LoadRequest("GET", reverse("health-check"))).status
+                    == 200
+                ):
+                    return server
+            except OSError:
+                pass
+            time.sleep(0.5)
+        server.terminate()
+        raise CommandError("gunicorn did not start in 60 seconds.")
+
+    @staticmethod
+    def get_commit() -> Optional[str]:
+        try:
+            result = subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return result.stdout.strip()
+
+    @staticmethod
+    def format_result(name: str, result: dict) -> str:
+        latency = result["latency_ms"]
+        return (
+            f"{name}: {result['requests']} requests, {result['errors']} errors, "
+            f"{result['rps']} rps, latency p50 {latency['p50']} ms, "
+            f"p95 {latency['p95']} ms, p99 {latency['p99']} ms, "
+            f"queries per request {result['queries_per_request']['mean']}."
+        )
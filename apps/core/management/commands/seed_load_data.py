@@ -0,0 +1,230 @@
+import random
+import uuid
+from typing import List
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from apps.core.loadtest import uml_document
+from apps.diagrams.models import Diagram, DiagramContent
+from apps.sharings.constants import PermissionLevels
+from apps.sharings.models import Collaborator
+from apps.users.models import User
+
+PERMISSION_LEVELS = [level for level, _ in PermissionLevels.CHOICES]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds the database with load benchmark data by bulk inserts: users "
+        "with tokens, diagrams with generated UML documents, shares to other "
+        "users (with a few users which many diagrams are shared to) and public "
+        "shares. Users are identified by the email prefix, their data is deleted "
+        "by '--delete'. Do not run it in production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prefix",
+            default="load",
+            help="Email prefix of the created users.",
+        )
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--diagrams", type=int, default=1000000)
+        parser.add_argument(
+            "--contents",
+            type=int,
+            default=10000,
+            help="Number of distinct documents, diagrams refer to them in turn "
+            "as copies do.",
+        )
+        parser.add_argument(
+            "--document-size",
+            type=int,
+            default=20000,
+            help="Mean size of the documents in bytes of JSON "
+            "(sizes vary from half to one and a half of it).",
+        )
+        parser.add_argument(
+            "--shares-per-diagram",
+            type=int,
+            default=3,
+            help="Number of users each diagram is shared to.",
+        )
+        parser.add_argument(
+            "--hot-users",
+            type=int,
+            default=10,
+            help="Number of users which many diagrams are shared to.",
+        )
+        parser.add_argument(
+            "--hot-share-ratio",
+            type=float,
+            default=0.1,
+            help="Share of diagrams which are also shared to one of hot users.",
+        )
+        parser.add_argument(
+            "--public-ratio",
+            type=float,
+            default=0.05,
+            help="Share of diagrams which are shared publicly.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of objects created by a query.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete the users with the prefix and their diagrams instead.",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(email__startswith=f"{options['prefix']}-")
+        if options["delete"]:
+            self.delete(users, options["batch_size"])
+            return
+        if users.exists():
+            raise CommandError(
+                f"Users with '{options['prefix']}' prefix exist, "
+                "delete them by '--delete' first."
+            )
+        if options["users"] < options["shares_per_diagram"] + 1:
+            raise CommandError("There are not enough users to share diagrams to.")
+
+        rng = random.Random(options["seed"])
+        user_ids = self.create_users(options)
+        self.stdout.write(f"Created {len(user_ids)} users with tokens.")
+        digests = self.create_contents(rng, options)
+        self.stdout.write(f"Created {len(digests)} contents.")
+        shares = self.create_diagrams(rng, user_ids, digests, options)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {options['diagrams']} diagrams and {shares} shares."
+            )
+        )
+
+    @staticmethod
+    def create_users(options: dict) -> List[uuid.UUID]:
+        user_ids = []
+        # Users log in by their tokens, passwords are not usable.
+        password = make_password(None)
+        for start in range(0, options["users"], options["batch_size"]):
+            end = min(start + options["batch_size"], options["users"])
+            with transaction.atomic():
+                users = User.objects.bulk_create(
+                    User(
+                        email=f"{options['prefix']}-{index}@example.com",
+                        password=password,
+                    )
+                    for index in range(start, end)
+                )
+                Token.objects.bulk_create(
+                    Token(key=Token.generate_key(), user=user) for user in users
+                )
+            user_ids.extend(user.pk for user in users)
+        return user_ids
+
+    @staticmethod
+    def create_contents(rng: random.Random, options: dict) -> List[str]:
+        count = max(min(options["contents"], options["diagrams"]), 1)
+        digests = []
+        codec, dictionary_id = DiagramContent.resolve_encoding()
+        for start in range(0, count, options["batch_size"]):
+            contents = []
+            for index in range(start, min(start + options["batch_size"], count)):
+                size = int(options["document_size"] * rng.uniform(0.5, 1.5))
+                document = uml_document(rng, size, f"{options['prefix']}-{index}")
+                # Diagrams refer to the contents in turn.
+                references = options["diagrams"] // count + (
+                    index < options["diagrams"] % count
+                )
+                contents.append(
+                    DiagramContent(
+                        digest=DiagramContent.hash_json(document),
+                        ref_count=references,
+                        **DiagramContent.encode(document, codec, dictionary_id),
+                    )
+                )
+            DiagramContent.objects.bulk_create(contents)
+            digests.extend(content.digest for content in contents)
+        return digests
+
+    @staticmethod
+    def create_diagrams(
+        rng: random.Random,
+        user_ids: List[uuid.UUID],
+        digests: List[str],
+        options: dict,
+    ) -> int:
+        hot_users = max(min(options["hot_users"], len(user_ids)), 1)
+        shares = 0
+        for start in range(0, options["diagrams"], options["batch_size"]):
+            diagrams, collaborators = [], []
+            for index in range(
+                start, min(start + options["batch_size"], options["diagrams"])
+            ):
+                owner = rng.randrange(len(user_ids))
+                diagram = Diagram(
+                    id=uuid.uuid4(),
+                    title=f"Diagram {index}",
+                    description=f"Load benchmark diagram {index}",
+                    content_id=digests[index % len(digests)],
+                    owner_id=user_ids[owner],
+                    is_public=rng.random() < options["public_ratio"],
+                )
+                diagrams.append(diagram)
+                offsets = rng.sample(
+                    range(1, len(user_ids)), options["shares_per_diagram"]
+                )
+                shared_to = {(owner + offset) % len(user_ids) for offset in offsets}
+                if rng.random() < options["hot_share_ratio"]:
+                    shared_to.add(rng.randrange(hot_users))
+                shared_to.discard(owner)
+                collaborators.extend(
+                    Collaborator(
+                        diagram_id=diagram.id,
+                        shared_to_id=user_ids[user],
+                        permission_level=rng.choice(PERMISSION_LEVELS),
+                    )
+                    for user in shared_to
+                )
+                if diagram.is_public:
+                    # The public flag is maintained by the public share.
+                    collaborators.append(
+                        Collaborator(
+                            diagram_id=diagram.id,
+                            shared_to=None,
+                            permission_level=PermissionLevels.VIEWONLY,
+                        )
+                    )
+            with transaction.atomic():
+                Diagram.objects.bulk_create(diagrams)
+                Collaborator.objects.bulk_create(collaborators)
+            shares += len(collaborators)
+        return shares
+
+    def delete(self, users, batch_size: int) -> None:
+        diagrams = Diagram.objects.filter(owner__in=users).order_by("pk")
+        deleted = 0
+        while True:
+            ids = list(diagrams.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += (
+                Diagram.objects.filter(pk__in=ids)
+                .delete()[1]
+                .get(Diagram._meta.label, 0)
+            )
+        _, deleted_objects = users.delete()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} diagrams and "
+                f"{deleted_objects.get(User._meta.label, 0)} users."
+            )
+        )
@@ -1,11 +1,25 @@
 import logging
+import random
+from contextlib import ExitStack
 
 from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
 from django.http import HttpResponse
 from django.utils.deprecation import MiddlewareMixin
 from django.utils.log import log_response
+from prometheus_client import Counter
+
+from apps.core.query_budgets import QueryRecorder, get_query_budget, get_view_action
 
 logger = logging.getLogger("django.request")
+budget_logger = logging.getLogger("query_budgets")
+
+query_budget_exceeded = Counter(
+    "query_budget_exceeded_total",
+    "Sampled requests which exceeded the query count or database time budget.",
+    ["view", "action", "reason"],
+)
 
 
 class LogAllRequestsMiddleware(MiddlewareMixin):
@@ -48,3 +62,67 @@ class LogAllRequestsMiddleware(MiddlewareMixin):
             request=request,
         )
         return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Runtime checks of query budgets of the endpoints (see
+    `apps.core.query_budgets`) enabled by `QUERY_BUDGETS` setting.
+    Queries of a sample of requests are recorded, and requests which exceed
+    the query budget of their endpoint or the database time budget are logged
+    as warnings with their SQL and counted by `query_budget_exceeded_total`
+    metric. Numbers of queries and database time of sampled requests are also
+    returned in `X-DB-Queries` and `X-DB-Time` (seconds) response headers
+    if `RESPONSE_HEADERS` option is enabled (see `run_load_benchmark` command).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        options = settings.QUERY_BUDGETS
+        if not options["ENABLED"] or random.random() >= options["SAMPLE_RATE"]:
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        self.check_budget(request, response, recorder, options)
+        if options.get("RESPONSE_HEADERS"):
+            response["X-DB-Queries"] = str(len(recorder))
+            response["X-DB-Time"] = f"{recorder.duration:.6f}"
+        return response
+
+    @staticmethod
+    def check_budget(request, response, recorder: QueryRecorder, options: dict):
+        resolver_match = getattr(request, "resolver_match", None)
+        if resolver_match is None:
+            return
+        view_class, action = get_view_action(resolver_match, request.method)
+        budget = get_query_budget(view_class, action)
+        reasons = []
+        if budget is not None and len(recorder) > budget:
+            reasons.append("queries")
+        if options["DB_TIME"] and recorder.duration > options["DB_TIME"]:
+            reasons.append("db_time")
+        if not reasons:
+            return
+        view_name = getattr(view_class, "__name__", resolver_match.view_name)
+        for reason in reasons:
+            query_budget_exceeded.labels(
+                view=view_name, action=action, reason=reason
+            ).inc()
+        budget_logger.warning(
+            "Query budget exceeded by %s %s (%s.%s): %d queries (budget: %s), "
+            "%.1f ms of database time.\n%s",
+            request.method,
+            request.path,
+            view_name,
+            action,
+            len(recorder),
+            budget,
+            recorder.duration * 1000,
+            recorder.format(),
+            extra={"request": request, "status_code": response.status_code},
+        )
@@ -0,0 +1,59 @@
+"""
+MessagePack codec of API requests and responses (`application/msgpack`):
+a compact binary alternative to JSON for clients which exchange large diagram
+documents. It requires optional `msgpack` package, the format is not offered
+by content negotiation if it is not installed.
+JSON values are encoded by MessagePack types without loss (floats are encoded
+as doubles), values which JSON has no type for (UUIDs, datetimes, Decimals,
+etc.) are converted by DRF's `JSONEncoder`, so documents have the same values
+as their JSON representation.
+"""
+
+from typing import Any
+
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+MEDIA_TYPE = "application/msgpack"
+
+_encoder = JSONEncoder()
+
+
+def is_available() -> bool:
+    return msgpack is not None
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Returns MessagePack of the data. Raises `OverflowError` for integers which
+    do not fit 64 bits, because MessagePack has no type for them.
+    """
+    return msgpack.packb(data, default=_default)
+
+
+def _default(value: Any) -> Any:
+    # Integers which do not fit 64 bits are passed here by the packer.
+    if isinstance(value, int):
+        raise OverflowError("Integer does not fit 64 bits.")
+    return _encoder.default(value)
+
+
+def loads(data: bytes) -> Any:
+    """
+    Parses MessagePack, raises `ValueError` if it is not valid, has extension
+    types or non-string map keys. Binary and timestamp values are parsed
+    as `bytes` and `msgpack.Timestamp`, which are not JSON values, so they are
+    rejected by validation of JSON fields.
+    """
+    try:
+        return msgpack.unpackb(data, ext_hook=_reject_extension, timestamp=0)
+    except msgpack.UnpackException as exc:
+        raise ValueError(str(exc) or type(exc).__name__) from exc
+
+
+def _reject_extension(code: int, data: bytes) -> Any:
+    raise ValueError(f"Extension type {code} is not supported.")
@@ -0,0 +1,75 @@
+"""
+Migration operations which build indexes without locking the table for writes
+(`CREATE INDEX CONCURRENTLY`) on PostgreSQL and fall back to the regular
+operations on other databases. Migrations which use them must be non-atomic
+(`atomic = False`) because PostgreSQL does not build indexes concurrently
+inside a transaction.
+"""
+
+from django.db import migrations
+
+
+def is_postgresql(schema_editor) -> bool:
+    return schema_editor.connection.vendor == "postgresql"
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not is_postgresql(schema_editor):
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if not is_postgresql(schema_editor):
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+    def describe(self):
+        return super().describe() + " concurrently"
+
+
+class AddUniqueIndexConcurrently(migrations.AddConstraint):
+    """
+    Adds a `UniqueConstraint` which is implemented by a unique index
+    (i.e. one with `condition`, `include` or expressions).
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not is_postgresql(schema_editor):
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            sql = str(self.constraint.create_sql(model, schema_editor))
+            schema_editor.execute(
+                sql.replace(
+                    "CREATE UNIQUE INDEX", "CREATE UNIQUE INDEX CONCURRENTLY", 1
+                )
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if not is_postgresql(schema_editor):
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.execute(
+                schema_editor._delete_index_sql(
+                    model,
+                    self.constraint.name,
+                    sql=schema_editor.sql_delete_index_concurrently,
+                )
+            )
+
+    def describe(self):
+        return super().describe() + " concurrently"
@@ -0,0 +1,289 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from django.db.models import Q, QuerySet
+from django.utils.encoding import force_str
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPageNumberPagination(PageNumberPagination):
+    """
+    Page number pagination with an opt-in keyset (cursor) mode.
+
+    Query parameters:
+    - `page`: page number (default mode, uses `OFFSET`);
+    - `cursor`: switches to the keyset mode, an empty value requests the first
+      page. Pages are selected with a `WHERE` condition on the values of the
+      ordering fields of the last returned row instead of `OFFSET`, so a deep
+      page costs the same as the first one. Ties are broken by the primary key;
+    - `count`: set to `false` to omit the total count (and its `COUNT(*)`
+      query) from the response in both modes.
+
+    Only the fields listed in `cursor_ordering_fields` (plus the primary key)
+    can be used for ordering in the keyset mode, they must be non-nullable.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_query_description = _(
+        "The pagination cursor value. Pass an empty value to get the first page "
+        "of the keyset (cursor) pagination mode."
+    )
+    count_query_param = "count"
+    count_query_description = _(
+        "Set to `false` to omit the total count of results from the response."
+    )
+    cursor_ordering_fields: Sequence[str] = ()
+    invalid_cursor_message = _("Invalid cursor.")
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view=None
+    ) -> Optional[List]:
+        self.request = request
+        self.page = self.count = None
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.keyset_mode = self.cursor_query_param in request.query_params
+        if self.keyset_mode:
+            return self.paginate_queryset_by_keyset(queryset, request, page_size)
+        if self.is_count_requested(request):
+            page = super().paginate_queryset(queryset, request, view)
+            self.count = self.page.paginator.count
+            return page
+        return self.paginate_queryset_without_count(queryset, request, page_size)
+
+    def paginate_queryset_without_count(
+        self, queryset: QuerySet, request: Request, page_size: int
+    ) -> List:
+        """
+        Page number mode which fetches one extra row to find out whether there is
+        a next page instead of counting all rows.
+        """
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+            if self.page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+
+        offset = (self.page_number - 1) * page_size
+        limit = offset + page_size + 1
+        results = list(queryset[offset:limit])
+        if not results and self.page_number != 1:
+            raise NotFound(self.invalid_page_message)
+        self.has_next = len(results) > page_size
+        self.has_previous = self.page_number > 1
+        return results[:page_size]
+
+    def paginate_queryset_by_keyset(
+        self, queryset: QuerySet, request: Request, page_size: int
+    ) -> List:
+        if self.is_count_requested(request):
+            self.count = queryset.count()
+
+        self.ordering = self.get_keyset_ordering(queryset)
+        position, reverse = self.decode_cursor(request)
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(ordering, position))
+
+        results = list(queryset[: page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.next_position = self.previous_position = None
+        if results:
+            self.next_position = self.get_position(results[-1])
+            self.previous_position = self.get_position(results[0])
+        return results
+
+    def get_keyset_ordering(self, queryset: QuerySet) -> Tuple[str, ...]:
+        """
+        Returns the queryset ordering completed with the primary key as a
+        tie-breaker, so every row has a unique position.
+        """
+        pk_name = queryset.model._meta.pk.name
+        ordering = tuple(queryset.query.order_by) or (pk_name,)
+        for field in ordering:
+            if not isinstance(field, str) or field.lstrip("-") not in (
+                *self.cursor_ordering_fields,
+                pk_name,
+                "pk",
+            ):
+                raise ValidationError(
+                    detail={
+                        self.cursor_query_param: f"Cursor pagination is not "
+                        f"supported for ordering by '{field}'."
+                    },
+                    code="unsupported_cursor_ordering",
+                )
+        if ordering[-1].lstrip("-") not in (pk_name, "pk"):
+            descending = ordering[-1].startswith("-")
+            ordering += (f"-{pk_name}" if descending else pk_name,)
+        return ordering
+
+    @staticmethod
+    def get_keyset_filter(ordering: Sequence[str], position: Sequence[Any]) -> Q:
+        """
+        Builds the condition which selects rows placed after the given position:
+        `(a > x) OR (a = x AND b > y) OR ...` with the comparison operator
+        flipped for the descending fields.
+        """
+        condition = Q()
+        for index, field in enumerate(ordering):
+            lookup = "lt" if field.startswith("-") else "gt"
+            equalities = {
+                previous_field.lstrip("-"): value
+                for previous_field, value in zip(ordering[:index], position[:index])
+            }
+            condition |= Q(
+                **equalities, **{f"{field.lstrip('-')}__{lookup}": position[index]}
+            )
+        return condition
+
+    def get_position(self, instance) -> List[Any]:
+        """
+        Returns JSON-serializable values of the ordering fields of a row, which
+        can be a model instance or a dict produced by `QuerySet.values()`.
+        """
+        position = []
+        for field in self.ordering:
+            name = field.lstrip("-")
+            if isinstance(instance, dict):
+                value = instance["id" if name == "pk" else name]
+            else:
+                value = getattr(instance, name)
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            elif isinstance(value, UUID):
+                value = str(value)
+            position.append(value)
+        return position
+
+    def decode_cursor(self, request: Request) -> Tuple[Optional[List[Any]], bool]:
+        """
+        Returns the position and the direction encoded in the cursor.
+        The cursor is rejected if it was issued for another ordering.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padding = "=" * (-len(encoded) % 4)
+            cursor = json.loads(urlsafe_b64decode(encoded + padding))
+            position, reverse = cursor["p"], bool(cursor.get("r"))
+            valid = cursor["o"] == list(self.ordering) and len(position) == len(
+                self.ordering
+            )
+        except (BinasciiError, KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position: List[Any], reverse: bool = False) -> str:
+        cursor = {"o": list(self.ordering), "p": position}
+        if reverse:
+            cursor["r"] = 1
+        encoded = json.dumps(cursor, separators=(",", ":")).encode()
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            urlsafe_b64encode(encoded).decode().rstrip("="),
+        )
+
+    def is_count_requested(self, request: Request) -> bool:
+        value = request.query_params.get(self.count_query_param, "true")
+        return value.lower() not in ("false", "0", "no")
+
+    def get_next_link(self) -> Optional[str]:
+        if self.keyset_mode:
+            if not self.has_next or self.next_position is None:
+                return None
+            return self.encode_cursor(self.next_position)
+        if self.page is not None:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self) -> Optional[str]:
+        if self.keyset_mode:
+            if not self.has_previous or self.previous_position is None:
+                return None
+            return self.encode_cursor(self.previous_position, reverse=True)
+        if self.page is not None:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data: List) -> Response:
+        response_data = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            response_data = {"count": self.count, **response_data}
+        return Response(response_data)
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["required"] = ["results"]
+        return response_schema
+
+    def get_schema_operation_parameters(self, view) -> List[dict]:
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": force_str(self.cursor_query_description),
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": force_str(self.count_query_description),
+                "schema": {"type": "boolean", "default": True},
+            },
+        ]
+
+    def get_html_context(self) -> dict:
+        if self.page is not None:
+            return super().get_html_context()
+        return {
+            "previous_url": self.get_previous_link(),
+            "next_url": self.get_next_link(),
+        }
+
+
+def _reverse_ordering(ordering: Sequence[str]) -> Tuple[str, ...]:
+    return tuple(
+        field[1:] if field.startswith("-") else f"-{field}" for field in ordering
+    )
@@ -0,0 +1,61 @@
+import io
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from apps.core import jsoncodec, msgpackcodec
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSON parser which decodes UTF-8 request bodies by the fast JSON codec
+    (see `apps.core.jsoncodec`) if it is available. Bodies which are rejected
+    by the codec are parsed by the parent, so they are parsed and rejected
+    the same way as before.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if not jsoncodec.is_fast() or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            data = stream.read()
+        except OSError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+        try:
+            return jsoncodec.loads(data)
+        except ValueError:
+            return super().parse(io.BytesIO(data), media_type, parser_context)
+
+
+class JSONPatchParser(FastJSONParser):
+    """
+    Parses JSON Patch (RFC 6902) request bodies.
+    """
+
+    media_type = "application/json-patch+json"
+
+
+class JSONMergePatchParser(FastJSONParser):
+    """
+    Parses JSON Merge Patch (RFC 7396) request bodies.
+    """
+
+    media_type = "application/merge-patch+json"
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses MessagePack request bodies (see `apps.core.msgpackcodec`),
+    it requires optional `msgpack` package.
+    """
+
+    media_type = msgpackcodec.MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpackcodec.loads(stream.read())
+        except (OSError, ValueError) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
@@ -0,0 +1,75 @@
+"""
+Query budgets of API endpoints.
+Views declare the maximal number of database queries of a request by
+`query_budgets` attribute which maps viewset actions (or lowercase HTTP methods
+of other views) to numbers of queries, e.g. `{"list": 4, "retrieve": 3}`.
+Budgets do not depend on the page size. They are checked for every endpoint
+by `tests/integration/test_query_budgets.py` and, optionally, for a sample
+of requests in production by `apps.core.middleware.QueryBudgetMiddleware`.
+"""
+
+import time
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple, Type
+
+from django.urls import ResolverMatch
+
+
+class RecordedQuery(NamedTuple):
+    sql: str
+    duration: float
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper (see `connection.execute_wrapper()`) which records
+    SQL of executed queries (without parameters) and their durations.
+    """
+
+    def __init__(self) -> None:
+        self.queries: List[RecordedQuery] = []
+
+    def __call__(
+        self, execute: Callable, sql: str, params: Any, many: bool, context: dict
+    ) -> Any:
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(RecordedQuery(sql, time.perf_counter() - start))
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+    @property
+    def duration(self) -> float:
+        """
+        Database time of the recorded queries in seconds.
+        """
+        return sum(query.duration for query in self.queries)
+
+    def format(self) -> str:
+        return "\n".join(
+            f"{index}. ({query.duration * 1000:.1f} ms) {query.sql}"
+            for index, query in enumerate(self.queries, start=1)
+        )
+
+
+def get_view_action(
+    resolver_match: ResolverMatch, method: str
+) -> Tuple[Optional[Type], Optional[str]]:
+    """
+    Returns the view class and the action (or the lowercase method for views
+    which are not viewsets) which handle requests of the method.
+    """
+    func = resolver_match.func
+    view_class = getattr(func, "cls", None) or getattr(func, "view_class", None)
+    actions = getattr(func, "actions", None)
+    if actions:
+        return view_class, actions.get(method.lower())
+    return view_class, method.lower()
+
+
+def get_query_budget(
+    view_class: Optional[Type], action: Optional[str]
+) -> Optional[int]:
+    return getattr(view_class, "query_budgets", {}).get(action)
@@ -0,0 +1,227 @@
+"""
+Planning of `select_related()`, `prefetch_related()` and `only()` from the
+`source` paths of serializer fields, so querysets load exactly the related
+objects and columns which the serializer reads, and serializing a page costs
+the same number of queries regardless of its size.
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Optional, Set, Tuple, Type
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Model, Prefetch, QuerySet
+from rest_framework import relations, serializers
+from rest_framework.permissions import SAFE_METHODS
+
+LOOKUP_SEP = "__"
+
+
+@dataclass
+class QuerySetPlan:
+    """
+    Related objects and columns to load for a serializer:
+    - `select_related`: forward foreign keys and one-to-one relations;
+    - `prefetch_related`: many-to-many and reverse foreign key relations
+      by their lookups;
+    - `only`: columns of the loaded models.
+    """
+
+    select_related: Set[str] = field(default_factory=set)
+    prefetch_related: Dict[str, Prefetch] = field(default_factory=dict)
+    only: Set[str] = field(default_factory=set)
+
+    def apply(self, queryset: QuerySet, restrict_columns: bool = True) -> QuerySet:
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(
+                *(self.prefetch_related[key] for key in sorted(self.prefetch_related))
+            )
+        if restrict_columns and self.only:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+def get_model_field(model: Type[Model], attr: str):
+    """
+    Returns the model field or the reverse relation which is accessed by
+    the attribute.
+    """
+    try:
+        return model._meta.get_field(attr)
+    except FieldDoesNotExist:
+        for relation in model._meta.related_objects:
+            if relation.get_accessor_name() == attr:
+                return relation
+        raise
+
+
+class QuerySetPlanner:
+    """
+    Builds `QuerySetPlan` of a model for the fields of a serializer.
+    Sources which are not model fields (properties, methods, `source="*"`)
+    can read any column, so the model they belong to is loaded with all
+    columns. Sources which are annotations of the queryset are skipped.
+    Prefetched objects are loaded with all columns, related objects read
+    by their nested serializers are planned as well.
+    """
+
+    def __init__(self, model: Type[Model], annotations: Iterable[str] = ()):
+        self.model = model
+        self.annotations = set(annotations)
+        self.plan = QuerySetPlan()
+        # Lookup prefixes ("" for the root model) of models loaded with all columns.
+        self.all_columns: Set[str] = set()
+        self.models = {"": model}
+
+    def add_serializer(
+        self, serializer: serializers.BaseSerializer, prefix: Tuple[str, ...] = ()
+    ) -> None:
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        for serializer_field in serializer.fields.values():
+            if serializer_field.write_only:
+                continue
+            source_attrs = prefix + tuple(serializer_field.source_attrs)
+            if isinstance(serializer_field, relations.ManyRelatedField):
+                serializer_field = serializer_field.child_relation
+            if isinstance(serializer_field, serializers.BaseSerializer):
+                self.add_source(source_attrs, serializer_field)
+            elif isinstance(serializer_field, relations.SlugRelatedField):
+                self.add_source(source_attrs + (serializer_field.slug_field,))
+            elif isinstance(serializer_field, relations.RelatedField) and not (
+                isinstance(serializer_field, relations.PrimaryKeyRelatedField)
+            ):
+                # The related object is read as a whole, e.g. by `__str__()`.
+                self.add_source(source_attrs + ("*",))
+            elif source_attrs == prefix:
+                # `source="*"`, e.g. `SerializerMethodField`.
+                self.add_source(prefix + ("*",))
+            else:
+                self.add_source(source_attrs)
+
+    def add_source(
+        self,
+        source_attrs: Tuple[str, ...],
+        serializer: Optional[serializers.BaseSerializer] = None,
+    ) -> None:
+        """
+        Adds the dotted source path (split to attributes) read by a field,
+        or by the nested serializer if it is given.
+        """
+        if source_attrs and source_attrs[0] in self.annotations:
+            return
+        model, lookup = self.model, ""
+        for index, attr in enumerate(source_attrs):
+            is_last = index == len(source_attrs) - 1
+            try:
+                model_field = get_model_field(model, attr)
+            except FieldDoesNotExist:
+                self.all_columns.add(lookup)
+                return
+            if model_field.is_relation and model_field.related_model is None:
+                # Generic foreign keys can not be joined.
+                self.all_columns.add(lookup)
+                return
+            path = lookup + model_field.name
+            if not model_field.is_relation:
+                self.plan.only.add(path)
+                return
+            if model_field.many_to_many or model_field.one_to_many:
+                # Prefetched by the attribute name, e.g. `collaborator_set`.
+                self.add_prefetch(
+                    lookup + attr,
+                    model_field.related_model,
+                    serializer if is_last else None,
+                )
+                return
+            if model_field.concrete:
+                self.plan.only.add(path)
+            if is_last and serializer is None:
+                # The related object itself is read, e.g. by related fields.
+                if not model_field.concrete:
+                    self.plan.select_related.add(path)
+                    self.models[path + LOOKUP_SEP] = model_field.related_model
+                    self.all_columns.add(path + LOOKUP_SEP)
+                return
+            self.plan.select_related.add(path)
+            model, lookup = model_field.related_model, path + LOOKUP_SEP
+            self.models[lookup] = model
+        if serializer is not None:
+            self.add_serializer(serializer, source_attrs)
+
+    def add_prefetch(
+        self,
+        lookup: str,
+        model: Type[Model],
+        serializer: Optional[serializers.BaseSerializer],
+    ) -> None:
+        planner = QuerySetPlanner(model)
+        if serializer is not None:
+            planner.add_serializer(serializer)
+        queryset = planner.build().apply(
+            model._default_manager.all(), restrict_columns=False
+        )
+        self.plan.prefetch_related[lookup] = Prefetch(lookup, queryset=queryset)
+
+    def build(self) -> QuerySetPlan:
+        for lookup in self.all_columns:
+            self.plan.only.update(
+                lookup + model_field.name
+                for model_field in self.models[lookup]._meta.concrete_fields
+            )
+        return self.plan
+
+
+@lru_cache(maxsize=None)
+def plan_serializer_queryset(
+    serializer_class: Type[serializers.BaseSerializer],
+    model: Type[Model],
+    annotations: FrozenSet[str] = frozenset(),
+    extra_sources: Tuple[str, ...] = (),
+) -> QuerySetPlan:
+    """
+    Returns the plan of loading `model` objects for the serializer, the plan
+    includes additional dotted source paths read by e.g. permission classes.
+    """
+    planner = QuerySetPlanner(model, annotations)
+    planner.add_serializer(serializer_class())
+    for source in extra_sources:
+        planner.add_source(tuple(source.split(".")))
+    return planner.build()
+
+
+class SerializerQuerySetMixin:
+    """
+    Loads the related objects read by the serializer of the action by joins
+    (`select_related()`) and prefetch queries (`prefetch_related()`) instead of
+    a query per object, and selects just the read columns (`only()`) on safe
+    requests. Writes load all columns because the instances are validated and
+    saved.
+    `queryset_plan_sources` lists dotted source paths read in addition to the
+    serializer fields, e.g. by object permissions.
+    """
+
+    queryset_plan_sources: Tuple[str, ...] = ()
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        """
+        Extends `filter_queryset()` because it is applied by `get_object()`
+        and `list()` to the result of `get_queryset()` which is overridden
+        by the viewsets.
+        """
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, "action", None) is None or queryset.query.values_select:
+            return queryset
+        serializer_class = self.get_serializer_class()
+        if serializer_class is None:
+            return queryset
+        plan = plan_serializer_queryset(
+            serializer_class,
+            queryset.model,
+            frozenset(queryset.query.annotations),
+            tuple(self.queryset_plan_sources),
+        )
+        method = getattr(self.request, "method", None)
+        return plan.apply(queryset, restrict_columns=method in SAFE_METHODS)
@@ -0,0 +1,111 @@
+from uuid import uuid4
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from apps.core import jsoncodec, msgpackcodec
+
+# UTF-8 encoding prefix of U+2028 LINE SEPARATOR and U+2029 PARAGRAPH SEPARATOR.
+LINE_SEPARATORS_PREFIX = "\u2028".encode()[:2]
+
+
+class RawJSON(str):
+    """
+    JSON document which is already encoded as text (e.g. fetched from the
+    database as text) and must be put into the response body as it is.
+    """
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer which encodes data by the fast JSON codec (see
+    `apps.core.jsoncodec`) if it is available. Indented or ASCII-only output
+    (e.g. of the browsable API) and data which is rejected by the codec
+    (e.g. integers which do not fit 64 bits) are rendered by the parent.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if (
+            data is None
+            or not jsoncodec.is_fast()
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = jsoncodec.dumps(data)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Keep the output a strict javascript subset like the parent does.
+        # Both separators start with the same bytes, so the output is scanned
+        # once if there are none of them.
+        if LINE_SEPARATORS_PREFIX in content:
+            content = content.replace("\u2028".encode(), b"\\u2028").replace(
+                "\u2029".encode(), b"\\u2029"
+            )
+        return content
+
+
+class PassthroughJSONRenderer(FastJSONRenderer):
+    """
+    JSON renderer which splices `RawJSON` values of a top-level dict into
+    the rendered body without decoding and encoding them again.
+    Each raw value is replaced by a random placeholder string before rendering
+    the rest of the data, then the placeholder is replaced by the raw text.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if not isinstance(data, dict) or not any(
+            isinstance(value, RawJSON) for value in data.values()
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        data, raw_values = dict(data), {}
+        for key, value in data.items():
+            if isinstance(value, RawJSON):
+                placeholder = f"raw-json-{uuid4().hex}"
+                raw_values[f'"{placeholder}"'.encode()] = value
+                data[key] = placeholder
+
+        content = super().render(data, accepted_media_type, renderer_context)
+        for placeholder, value in raw_values.items():
+            # Keep the output a strict javascript subset like the parent does.
+            value = value.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+            content = content.replace(placeholder, value.encode(), 1)
+        return content
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders data as MessagePack (see `apps.core.msgpackcodec`), it requires
+    optional `msgpack` package.
+    """
+
+    media_type = msgpackcodec.MEDIA_TYPE
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b""
+        return msgpackcodec.dumps(data)
+
+
+class NDJSONRenderer(PassthroughJSONRenderer):
+    """
+    Renders data as a line of newline delimited JSON (`application/x-ndjson`),
+    e.g. errors of streaming endpoints which stream lines rendered by it.
+    Lines are never indented.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def get_indent(self, accepted_media_type, renderer_context):
+        return None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b""
+        return super().render(data, accepted_media_type, renderer_context) + b"\n"
@@ -0,0 +1,164 @@
+"""
+Fast path of `Serializer.to_representation()` for read-heavy serializers.
+DRF builds the fields of every serializer instance (model introspection of
+`ModelSerializer`) and gets every attribute through `Field.get_attribute()`
+which handles mappings, callables and missing attributes. The fast path
+compiles the readable fields of a serializer class once into plain attribute
+getters and converters, so rows are serialized without building the fields
+and with one `attrgetter()` call per field. The output is the same as DRF's:
+unusual values (mappings, callables, missing attributes) and fields with
+custom `get_attribute()` are serialized by the fields themselves.
+"""
+
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, Type
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.functional import cached_property
+from rest_framework import ISO_8601, fields, relations, serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from rest_framework.settings import api_settings
+
+# Fields which `to_representation()` returns the value as it is.
+IDENTITY_FIELDS = (fields.ReadOnlyField,)
+
+
+class FieldAccessor(NamedTuple):
+    name: str
+    # None if the field is always serialized by itself.
+    get: Optional[Callable[[Any], Any]]
+    field: fields.Field
+
+
+def compile_field(field: fields.Field, model) -> FieldAccessor:
+    getter = None
+    if isinstance(field, relations.PrimaryKeyRelatedField):
+        if field.pk_field is None and len(field.source_attrs) == 1:
+            # `serializable_value()` of the relation is the foreign key column.
+            model_field = model._meta.get_field(field.source_attrs[0])
+            getter = attrgetter(model_field.attname)
+    elif type(field).get_attribute is fields.Field.get_attribute and field.source_attrs:
+        getter = attrgetter(".".join(field.source_attrs))
+    return FieldAccessor(field.field_name, getter, field)
+
+
+def make_converter(field: fields.Field) -> Optional[Callable[[Any], Any]]:
+    """
+    Returns the function which converts attributes to the representation
+    of the field, None if attributes are represented as they are.
+    """
+    if isinstance(field, (IDENTITY_FIELDS, relations.PrimaryKeyRelatedField)):
+        return None
+    if isinstance(field, fields.DateTimeField):
+        return make_datetime_converter(field)
+    return field.to_representation
+
+
+def make_datetime_converter(field: fields.DateTimeField) -> Callable[[Any], Any]:
+    """
+    `DateTimeField.to_representation()` resolves the current timezone for every
+    value, which costs more than the rest of the serialization of a row.
+    The returned converter formats aware datetimes in the timezone resolved
+    once, other values are converted by the field.
+    """
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    field_timezone = (
+        field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    )
+    if (
+        output_format is None
+        or output_format.lower() != ISO_8601
+        or field_timezone is None
+    ):
+        return field.to_representation
+
+    def convert(value: Any) -> Any:
+        if not isinstance(value, datetime) or value.utcoffset() is None:
+            return field.to_representation(value)
+        try:
+            value = value.astimezone(field_timezone).isoformat()
+        except OverflowError:
+            return field.to_representation(value)
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    return convert
+
+
+class FastRepresentationMixin:
+    """
+    Serializes instances by the accessors which are compiled once per
+    serializer class from the readable fields of a serializer instance without
+    context, so it is used just for serializers which fields do not depend
+    on the instance or the context. Converters of the accessors are made once
+    per serializer instance (the child of a list serializer is shared by
+    all rows).
+    """
+
+    _accessors: Dict[Type, Tuple[FieldAccessor, ...]] = {}
+
+    @classmethod
+    def get_accessors(cls) -> Tuple[FieldAccessor, ...]:
+        accessors = FastRepresentationMixin._accessors.get(cls)
+        if accessors is None:
+            prototype = cls()
+            accessors = tuple(
+                compile_field(field, prototype.Meta.model)
+                for field in prototype._readable_fields
+            )
+            FastRepresentationMixin._accessors[cls] = accessors
+        return accessors
+
+    @cached_property
+    def representers(self) -> Tuple[Tuple[str, Optional[Callable], Any], ...]:
+        return tuple(
+            (name, get, make_converter(field))
+            for name, get, field in self.get_accessors()
+        )
+
+    def to_representation(self, instance) -> Dict[str, Any]:
+        ret = {}
+        for name, get, convert in self.representers:
+            if get is not None:
+                try:
+                    attribute = get(instance)
+                except (AttributeError, KeyError, ObjectDoesNotExist):
+                    pass
+                else:
+                    if attribute is None:
+                        ret[name] = None
+                        continue
+                    if not callable(attribute):
+                        ret[name] = attribute if convert is None else convert(attribute)
+                        continue
+            try:
+                ret[name] = self.represent_field(self.fields[name], instance)
+            except SkipField:
+                pass
+        return ret
+
+    @staticmethod
+    def represent_field(field: fields.Field, instance) -> Any:
+        """
+        Same as `Serializer.to_representation()` does for the field.
+        """
+        attribute = field.get_attribute(instance)
+        check_for_none = (
+            attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+        )
+        if check_for_none is None:
+            return None
+        return field.to_representation(attribute)
+
+
+def drf_serializer(serializer_class: Type[serializers.Serializer]) -> Type:
+    """
+    Returns the subclass of the serializer which serializes instances
+    by DRF's `Serializer.to_representation()` (for benchmarks and tests).
+    """
+    return type(
+        f"DRF{serializer_class.__name__}",
+        (serializer_class,),
+        {"to_representation": serializers.Serializer.to_representation},
+    )
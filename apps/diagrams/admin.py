@@ -1,17 +1,79 @@
+from django import forms
 from django.contrib import admin
 
-from apps.diagrams.models import Diagram
+from apps.diagrams.models import (
+    Diagram,
+    DiagramContent,
+    DiagramContentDictionary,
+)
+
+
+class DiagramAdminForm(forms.ModelForm):
+    """
+    Allows to edit the diagram JSON which is stored in the diagram content.
+    """
+
+    json = forms.JSONField(label="Diagram JSON")
+
+    class Meta:
+        model = Diagram
+        fields = ("title", "json", "description", "owner")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.content_id is not None:
+            self.initial["json"] = self.instance.json
+
+    def save(self, commit=True):
+        if "json" in self.changed_data or self.instance.content_id is None:
+            self.instance.json = self.cleaned_data["json"]
+        return super().save(commit)
 
 
 class DiagramAdmin(admin.ModelAdmin):
+    form = DiagramAdminForm
     list_display = (
         "id",
         "title",
         "owner",
+        "is_public",
         "created_at",
         "updated_at",
     )
     search_fields = ("title", "owner__email")
 
 
+class DiagramContentAdmin(admin.ModelAdmin):
+    list_display = ("digest", "codec", "ref_count")
+    fields = (
+        "digest",
+        "value",
+        "codec",
+        "dictionary",
+        "compression_tried",
+        "ref_count",
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class DiagramContentDictionaryAdmin(admin.ModelAdmin):
+    list_display = ("id", "created_at")
+    fields = ("id", "created_at")
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(Diagram, DiagramAdmin)
+admin.site.register(DiagramContent, DiagramContentAdmin)
+admin.site.register(DiagramContentDictionary, DiagramContentDictionaryAdmin)
@@ -1,39 +1,171 @@
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from rest_framework import status
+from rest_framework.exceptions import NotFound, PermissionDenied, UnsupportedMediaType
 from rest_framework.mixins import CreateModelMixin
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from apps.core import jsonstream
+from apps.diagrams import export, imports
+from apps.diagrams.api.v1.serializers import DiagramExportSerializer
+from apps.diagrams.constants import ExportScopes
+from apps.diagrams.models import Diagram
 from apps.sharings.models import Collaborator
 
 
 def copy_diagram(self: GenericViewSet, request: Request, **_kwargs) -> Response:
     """
     API endpoint that allows to create a copy of an existing diagram.
+    The diagram is copied by a single `INSERT ... SELECT` statement filtered by
+    `get_copy_queryset()` of the viewset, so the permission check is done by
+    the same statement and the document does not leave the database.
     """
-    original_diagram = self.get_object()
     serializer = self.get_serializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    serializer.instance = original_diagram
-    serializer.save(
-        id=None,
-        title=f"Copy of {original_diagram.title}",
-        owner=self.request.user,
+    lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+    try:
+        diagram_id = Diagram._meta.pk.to_python(self.kwargs[lookup_url_kwarg])
+    except DjangoValidationError:
+        raise NotFound()
+
+    copy_id = uuid.uuid4()
+    copied = self.get_copy_queryset().insert_copies(
+        {diagram_id: copy_id},
+        owner_id=request.user.id,
+        description=serializer.validated_data.get("description"),
     )
+    if not copied:
+        # Raises 404 NOT FOUND or 403 FORBIDDEN if the diagram is not copied
+        # because of permissions.
+        self.get_object()
+        raise NotFound()
+
+    serializer.instance = Diagram.objects.only(
+        "title", "description", "created_at"
+    ).get(pk=copy_id)
     headers = CreateModelMixin().get_success_headers(serializer.data)
     return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
 
+def copy_diagrams(self: GenericViewSet, request: Request, **_kwargs) -> Response:
+    """
+    API endpoint that allows to create copies of several existing diagrams
+    by a single `INSERT ... SELECT` statement (see `copy_diagram()`).
+    Either all diagrams are copied or none of them: 404 NOT FOUND is returned
+    with ids of the diagrams which do not exist or can not be copied.
+    """
+    serializer = self.get_serializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    diagram_ids = list(dict.fromkeys(serializer.validated_data["diagram_ids"]))
+    copy_ids = {diagram_id: uuid.uuid4() for diagram_id in diagram_ids}
+    queryset = self.get_copy_queryset()
+
+    with transaction.atomic():
+        copied = queryset.insert_copies(copy_ids, owner_id=request.user.id)
+        if copied != len(copy_ids):
+            transaction.set_rollback(True)
+    if copied != len(copy_ids):
+        found_ids = set(
+            queryset.filter(pk__in=diagram_ids).values_list("pk", flat=True)
+        )
+        raise NotFound(
+            detail={
+                "diagram_ids": [
+                    str(diagram_id)
+                    for diagram_id in diagram_ids
+                    if diagram_id not in found_ids
+                ]
+            },
+            code="diagrams_not_found",
+        )
+
+    copies = Diagram.objects.only("title", "description", "created_at").in_bulk(
+        copy_ids.values()
+    )
+    for diagram_id, copy_id in copy_ids.items():
+        copies[copy_id].original_diagram_id = diagram_id
+    serializer = self.get_serializer(
+        [copies[copy_id] for copy_id in copy_ids.values()], many=True
+    )
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+def export_diagrams(
+    self: GenericViewSet, request: Request, **_kwargs
+) -> StreamingHttpResponse:
+    """
+    API endpoint that allows to export diagrams of a scope as NDJSON stream
+    (see `apps.diagrams.export`): owned by the user, shared to the user
+    or all diagrams (just for admin users). The stream is compressed by gzip
+    or zstd if the encoding is accepted by `Accept-Encoding` header.
+    """
+    serializer = DiagramExportSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    scope = serializer.validated_data["scope"]
+    if scope == ExportScopes.ALL and not request.user.is_admin:
+        raise PermissionDenied()
+
+    queryset = export.get_export_queryset(scope, request.user)
+    encoding = export.negotiate_encoding(request.headers.get("Accept-Encoding", ""))
+    response = StreamingHttpResponse(
+        export.compress(export.export_lines(queryset), encoding),
+        content_type=export.MEDIA_TYPE,
+    )
+    if encoding is not None:
+        response["Content-Encoding"] = encoding
+    response["Content-Disposition"] = f'attachment; filename="diagrams-{scope}.ndjson"'
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+def import_diagrams(self: GenericViewSet, request: Request, **_kwargs) -> Response:
+    """
+    API endpoint that allows to import diagrams from NDJSON (`application/x-ndjson`)
+    or JSON array (`application/json`) body which is parsed incrementally
+    (see `apps.diagrams.imports`). Invalid items do not abort the import,
+    results of all items are returned in their order.
+    """
+    media_type = (request.content_type or "").split(";")[0].strip().lower()
+    if media_type == export.MEDIA_TYPE:
+        parse = jsonstream.iter_ndjson
+    elif media_type == "application/json":
+        parse = jsonstream.iter_json_array
+    else:
+        raise UnsupportedMediaType(media_type)
+
+    stream = request.stream
+    items = [] if stream is None else parse(stream)
+    results = sorted(
+        imports.import_diagrams(
+            items, request.user, settings.DIAGRAM_IMPORT_BATCH_SIZE
+        ),
+        key=lambda result: result["index"],
+    )
+    created = sum("diagram_id" in result for result in results)
+    return Response(
+        {"created": created, "failed": len(results) - created, "results": results},
+        status=status.HTTP_200_OK,
+    )
+
+
 def save_diagram(self: GenericViewSet, request: Request, **_kwargs) -> Response:
     """
     API endpoint that allows to save changes to an existing shared diagram.
     If the diagram was shared to a user with appropriate "view-edit" permission,
     it can be edited, and the changes will be saved.
+    The `If-Match` precondition is honoured, see `DiagramPreconditionMixin`.
     """
     diagram = self.get_object()
     serializer = self.get_serializer(diagram, data=request.data, partial=True)
     serializer.is_valid(raise_exception=True)
-    serializer.save()
+    self.perform_conditional_save(serializer)
 
     if getattr(diagram, "_prefetched_objects_cache", None):
         # If 'prefetch_related' has been applied to a queryset, we need to
@@ -47,7 +179,8 @@ def unshare_me(self: GenericViewSet, request: Request, **_kwargs) -> Response:
     """
     API endpoint that allows user to unsubscribe himself from a diagram
     if the diagram was shared to him.
-    Unsubscribed user will be removed from diagram collaborators.
+    Unsubscribed user will be removed from diagram collaborators, shares
+    to his teams are left as they are.
     """
     diagram = self.get_object()
     Collaborator.objects.filter(diagram=diagram, shared_to=request.user).delete()
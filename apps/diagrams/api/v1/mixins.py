@@ -0,0 +1,433 @@
+import hashlib
+import json
+from typing import Any, List, Optional, Tuple
+
+from django.db.models import F, QuerySet, TextField
+from django.db.models.functions import Cast
+from django.http import HttpResponseBase
+from django.shortcuts import get_object_or_404
+from django.utils.cache import (
+    get_conditional_response,
+    parse_etags,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import BaseParser
+from rest_framework.relations import RelatedField
+from rest_framework.renderers import BaseRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.serializers import ModelSerializer
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.core import msgpackcodec
+from apps.core.exceptions import Conflict, NotRepresentable, PreconditionFailed
+from apps.core.jsonpatch import (
+    JSONPatchError,
+    JSONPatchTestFailed,
+    apply_json_patch,
+    apply_merge_patch,
+    parse_pointer,
+)
+from apps.core.parsers import (
+    JSONMergePatchParser,
+    JSONPatchParser,
+    MessagePackParser,
+)
+from apps.core.renderers import MessagePackRenderer, PassthroughJSONRenderer
+from apps.diagrams.api.v1.projections import DiagramListRow
+from apps.diagrams.models import Diagram
+from apps.sharings.access import annotate_access
+
+
+class DiagramListProjectionMixin:
+    """
+    List a queryset of diagrams selecting just the columns which are shown
+    by the list serializers: diagram contents are never loaded and rows are
+    serialized from lightweight `DiagramListRow` objects instead of model
+    instances, so list latency and memory do not depend on diagram size.
+    Annotations made by `get_queryset()` and fields listed by `get_list_fields()`
+    are included into the rows.
+    """
+
+    def get_list_fields(self) -> Tuple[str, ...]:
+        """
+        Returns names of the model fields which are selected in addition
+        to `DiagramListRow.fields`.
+        """
+        return ()
+
+    def get_list_queryset(self) -> QuerySet:
+        queryset = self.get_queryset().annotate(owner_email=F("owner__email"))
+        queryset = self.filter_queryset(queryset)
+        annotations = [
+            name
+            for name in queryset.query.annotations
+            if name not in DiagramListRow.fields
+        ]
+        return queryset.values(
+            *DiagramListRow.fields, *self.get_list_fields(), *annotations
+        )
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        queryset = self.get_list_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            rows = [DiagramListRow(**values) for values in page]
+            serializer = self.get_serializer(rows, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        rows = [DiagramListRow(**values) for values in queryset]
+        serializer = self.get_serializer(rows, many=True)
+        return Response(serializer.data)
+
+
+def get_representation_etag(request: Request, diagram: Diagram) -> str:
+    """
+    Returns the strong entity tag of the diagram in the format of the response
+    (see `Diagram.get_etag()`), since JSON and MessagePack bodies of the same
+    diagram version differ. Tags of any format match `If-Match` preconditions.
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    representation = getattr(renderer, "format", "json")
+    return diagram.get_etag("" if representation == "json" else representation)
+
+
+class DiagramMessagePackMixin:
+    """
+    MessagePack (`application/msgpack`) request bodies and responses
+    in addition to JSON if optional `msgpack` package is installed
+    (see `apps.core.msgpackcodec`). Clients opt in by `Content-Type` and
+    `Accept` headers, JSON stays the default format.
+    Responses vary by `Accept` header, and their ETags are specific to
+    the format (see `get_representation_etag()`).
+    MessagePack responses are rendered by the view, so documents which
+    MessagePack has no type for (integers which do not fit 64 bits) are
+    answered with 406 NOT ACCEPTABLE instead of failing while the response
+    is being sent.
+    """
+
+    def get_renderers(self) -> List[BaseRenderer]:
+        renderers = super().get_renderers()
+        if msgpackcodec.is_available():
+            renderers.append(MessagePackRenderer())
+        return renderers
+
+    def get_parsers(self) -> List[BaseParser]:
+        parsers = super().get_parsers()
+        if msgpackcodec.is_available():
+            parsers.append(MessagePackParser())
+        return parsers
+
+    def finalize_response(self, request: Request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if isinstance(response, Response) and isinstance(
+            getattr(response, "accepted_renderer", None), MessagePackRenderer
+        ):
+            try:
+                response.render()
+            except OverflowError:
+                response = super().finalize_response(
+                    request, self.handle_exception(NotRepresentable()), *args, **kwargs
+                )
+        patch_vary_headers(response, ("Accept",))
+        return response
+
+
+class DiagramAccessMixin:
+    """
+    Annotates the diagram loaded by `get_object()` (or `get_metadata_object()`
+    of conditional requests) with the sharing details of the request user
+    (see `annotate_access()`), so the permission classes resolve access
+    without additional queries.
+    """
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, "detail", False):
+            queryset = annotate_access(queryset, self.request.user)
+        return queryset
+
+    def get_metadata_queryset(self) -> QuerySet:
+        return annotate_access(super().get_metadata_queryset(), self.request.user)
+
+
+class DiagramRawJSONRetrieveMixin:
+    """
+    Retrieve a diagram fetching its content JSON as text which is spliced into
+    the response body by `PassthroughJSONRenderer` as it is, skipping decoding
+    by `JSONField.from_db_value()`, `DiagramSerializer` field processing and
+    encoding by the renderer. Compressed contents are fetched in the same query
+    and just decompressed to text.
+    Used just if the negotiated renderer supports raw JSON values.
+    """
+
+    def is_raw_json_retrieve(self) -> bool:
+        return getattr(self, "action", None) == "retrieve" and isinstance(
+            getattr(self.request, "accepted_renderer", None), PassthroughJSONRenderer
+        )
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        """
+        Extends `filter_queryset()` because it is applied by `get_object()`
+        to the result of `get_queryset()` which is overridden by the viewsets.
+        """
+        queryset = super().filter_queryset(queryset)
+        if self.is_raw_json_retrieve():
+            queryset = queryset.annotate(
+                json_text=Cast("content__json", output_field=TextField()),
+                json_codec=F("content__codec"),
+                json_data=F("content__data"),
+                json_dictionary_id=F("content__dictionary_id"),
+            )
+        return queryset
+
+
+class DiagramConditionalRetrieveMixin:
+    """
+    Conditional GET support for diagram retrieve endpoints.
+    Responses have a strong `ETag` of the response format (see
+    `get_representation_etag()`) and `Last-Modified` headers. If a request has
+    `If-None-Match` or `If-Modified-Since` header, the diagram metadata is loaded
+    first without the diagram content, and 304 NOT MODIFIED is returned if
+    the client copy is up-to-date, so the document is neither loaded nor
+    transferred.
+    """
+
+    metadata_fields = ("id", "owner_id", "is_public", "updated_at", "content")
+
+    def retrieve(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        if {"If-None-Match", "If-Modified-Since"} & set(request.headers):
+            instance = self.get_metadata_object()
+            response = get_conditional_response(
+                request,
+                etag=get_representation_etag(request, instance),
+                last_modified=int(instance.updated_at.timestamp()),
+            )
+            if response is not None:
+                return self.set_validator_headers(response, instance)
+
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return self.set_validator_headers(Response(serializer.data), instance)
+
+    def get_metadata_object(self) -> Diagram:
+        """
+        Same as `get_object()` but loads just the diagram fields required to
+        check object permissions and to build validators.
+        """
+        queryset = self.get_metadata_queryset()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        instance = get_object_or_404(
+            queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    def get_metadata_queryset(self) -> QuerySet:
+        return self.get_queryset().only(*self.metadata_fields)
+
+    def set_validator_headers(
+        self, response: HttpResponseBase, instance: Diagram
+    ) -> HttpResponseBase:
+        response["ETag"] = get_representation_etag(self.request, instance)
+        response["Last-Modified"] = http_date(instance.updated_at.timestamp())
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class DiagramConditionalListMixin:
+    """
+    Conditional GET support for diagram list endpoints.
+    Responses have a collection-level `ETag` computed from the serialized page
+    (which never contains diagram documents), so unchanged pages are answered
+    with 304 NOT MODIFIED and are not transferred again.
+    """
+
+    def list(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        response = super().list(request, *args, **kwargs)
+        content = json.dumps(response.data, cls=JSONEncoder).encode()
+        content += request.accepted_media_type.encode()
+        response["ETag"] = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+        patch_cache_control(response, private=True, no_cache=True)
+        return get_conditional_response(
+            request, etag=response["ETag"], response=response
+        )
+
+
+class DiagramPreconditionMixin:
+    """
+    Optimistic concurrency control for diagram writes.
+    If a write request has `If-Match` header with entity tags returned by
+    the diagram endpoints in any format (see `Diagram.get_etag()`), the changes
+    are saved by a single conditional `UPDATE` (see `Diagram.save_if_match`),
+    and 412 PRECONDITION FAILED is returned if the diagram was modified
+    by someone else meanwhile.
+    Without the header the last write wins.
+    Responses have the new `ETag` to be sent with the next write.
+    """
+
+    def get_if_match_etags(self) -> Optional[List[str]]:
+        """
+        Returns entity tags of `If-Match` header or None if there is
+        no precondition (`*` matches any existing diagram).
+        """
+        headers = getattr(self.request, "headers", {})
+        etags = parse_etags(headers.get("If-Match", ""))
+        if not etags or "*" in etags:
+            return None
+        return etags
+
+    def perform_conditional_save(self, serializer: ModelSerializer, **kwargs) -> None:
+        """
+        Same as `serializer.save(**kwargs)` for an existing diagram,
+        but honours the `If-Match` precondition.
+        """
+        etags = self.get_if_match_etags()
+        if etags is None:
+            serializer.save(**kwargs)
+        elif not self.save_if_match(serializer, etags, **kwargs):
+            raise PreconditionFailed()
+        self.set_etag_header(serializer.instance)
+
+    @staticmethod
+    def save_if_match(serializer: ModelSerializer, etags: List[str], **kwargs) -> bool:
+        """
+        Applies validated data to the diagram and saves it if it matches
+        one of the entity tags.
+        """
+        diagram = serializer.instance
+        for attr, value in {**serializer.validated_data, **kwargs}.items():
+            setattr(diagram, attr, value)
+        return diagram.save_if_match(etags)
+
+    def set_etag_header(self, diagram: Diagram) -> None:
+        if hasattr(self, "headers"):
+            # Default response headers, set for the response by `finalize_response`.
+            self.headers["ETag"] = get_representation_etag(self.request, diagram)
+
+
+class DiagramDeltaSaveMixin:
+    """
+    Delta saves of diagrams.
+    `PATCH` requests of `delta_save_actions` accept JSON Patch
+    (`application/json-patch+json`) and JSON Merge Patch
+    (`application/merge-patch+json`) bodies, which are applied to the writable
+    fields of the stored diagram (e.g. `/json/classes/0/x` pointer), so clients
+    send just the changes instead of the whole document. The patched fields are
+    validated by the serializer as a usual partial update.
+
+    The patch is applied to the diagram version loaded by the request which is
+    saved by a conditional `UPDATE` (see `DiagramPreconditionMixin`), so
+    the changes are applied atomically: 409 CONFLICT is returned if the diagram
+    was modified meanwhile, and the request can be retried.
+    """
+
+    delta_save_actions = ("partial_update", "save_shared_diagram")
+    delta_parser_classes = (JSONPatchParser, JSONMergePatchParser)
+    delta_base_etag: Optional[str] = None
+    delta_data: Optional[dict] = None
+
+    def get_parsers(self) -> List[BaseParser]:
+        parsers = super().get_parsers()
+        # The action is not set yet while the request is being initialized.
+        action = getattr(self, "action", None) or self.action_map.get(
+            self.request.method.lower()
+        )
+        if action in self.delta_save_actions:
+            parsers += [parser() for parser in self.delta_parser_classes]
+        return parsers
+
+    def get_delta_media_type(self) -> Optional[str]:
+        content_type = getattr(self.request, "content_type", "") or ""
+        media_type = content_type.split(";")[0].strip().lower()
+        for parser in self.delta_parser_classes:
+            if parser.media_type == media_type:
+                return media_type
+        return None
+
+    def get_serializer(self, *args, **kwargs):
+        if args and "data" in kwargs and self.get_delta_media_type() is not None:
+            kwargs["data"] = self.apply_delta(args[0], kwargs["data"])
+        return super().get_serializer(*args, **kwargs)
+
+    def get_request_data(self) -> Any:
+        """
+        Returns the request data, which are the patched fields for delta saves.
+        """
+        return self.request.data if self.delta_data is None else self.delta_data
+
+    def apply_delta(self, diagram: Diagram, patch: Any) -> dict:
+        """
+        Applies the request patch to the writable fields of the diagram and
+        returns values of the patched fields.
+        """
+        serializer = super().get_serializer(diagram)
+        document = {
+            name: getattr(diagram, field.source)
+            for name, field in serializer.fields.items()
+            if not field.read_only and not isinstance(field, RelatedField)
+        }
+        try:
+            if self.get_delta_media_type() == JSONPatchParser.media_type:
+                patched_fields = self.get_json_patch_fields(patch)
+                document = apply_json_patch(document, patch)
+            else:
+                if not isinstance(patch, dict):
+                    raise JSONPatchError("JSON Merge Patch must be an object.")
+                patched_fields = set(patch)
+                document = apply_merge_patch(document, patch)
+        except JSONPatchTestFailed as error:
+            raise Conflict(detail=str(error), code="patch_test_failed")
+        except JSONPatchError as error:
+            raise ValidationError(detail=str(error), code="invalid_patch")
+
+        removed_fields = ", ".join(sorted(patched_fields - set(document)))
+        if removed_fields:
+            raise ValidationError(
+                detail=f"Fields can not be removed: {removed_fields}.",
+                code="invalid_patch",
+            )
+        self.delta_base_etag = diagram.etag
+        self.delta_data = {name: document[name] for name in patched_fields}
+        return self.delta_data
+
+    @staticmethod
+    def get_json_patch_fields(operations: Any) -> set:
+        """
+        Returns names of the fields changed by JSON Patch operations.
+        """
+        if not isinstance(operations, list):
+            raise JSONPatchError("JSON Patch must be an array of operations.")
+        fields = set()
+        for operation in operations:
+            if not isinstance(operation, dict):
+                raise JSONPatchError("JSON Patch operation must be an object.")
+            if operation.get("op") == "test":
+                continue
+            pointers = [operation.get("path")]
+            if operation.get("op") == "move":
+                pointers.append(operation.get("from"))
+            for pointer in pointers:
+                path = parse_pointer(pointer)
+                if not path:
+                    raise JSONPatchError("The whole diagram can not be replaced.")
+                fields.add(path[0])
+        return fields
+
+    def perform_conditional_save(self, serializer: ModelSerializer, **kwargs) -> None:
+        """
+        Delta saves without `If-Match` precondition are saved only if the diagram
+        was not modified since the patch was applied to it.
+        """
+        if self.delta_base_etag is None or self.get_if_match_etags() is not None:
+            super().perform_conditional_save(serializer, **kwargs)
+        elif self.save_if_match(serializer, [self.delta_base_etag], **kwargs):
+            self.set_etag_header(serializer.instance)
+        else:
+            raise Conflict(
+                detail="The diagram was modified while the patch was being applied.",
+                code="concurrent_modification",
+            )
@@ -1,7 +1,8 @@
-from rest_framework.pagination import PageNumberPagination
+from apps.core.pagination import KeysetPageNumberPagination
 
 
-class DiagramViewSetPagination(PageNumberPagination):
+class DiagramViewSetPagination(KeysetPageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+    cursor_ordering_fields = ("title", "created_at", "updated_at")
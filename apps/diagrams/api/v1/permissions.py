@@ -2,6 +2,8 @@ from rest_framework import permissions
 from rest_framework.request import Request
 from rest_framework.views import APIView
 
+from apps.sharings.access import get_diagram_access
+
 
 class IsAdminOrIsDiagramOwner(permissions.BasePermission):
     """
@@ -11,6 +13,5 @@ class IsAdminOrIsDiagramOwner(permissions.BasePermission):
     """
 
     def has_object_permission(self, request: Request, view: APIView, obj) -> bool:
-        if request.user.is_admin:
-            return True
-        return obj.owner == request.user
+        access = get_diagram_access(request, obj)
+        return access.is_admin or access.is_owner
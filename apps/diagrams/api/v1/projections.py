@@ -0,0 +1,64 @@
+from collections import namedtuple
+from typing import Any, Optional
+from uuid import UUID
+
+DiagramOwnerRow = namedtuple("DiagramOwnerRow", ["id", "email"])
+
+
+class DiagramListRow:
+    """
+    Lightweight read-only stand-in for a Diagram instance which is built from
+    a `QuerySet.values()` row. Used to serialize diagram lists without loading
+    the `json` column and without model instantiation.
+    Annotations of the list querysets (`is_public`, `permission_level`) are set
+    as attributes; missing ones raise AttributeError like on a model instance,
+    so serializers skip them.
+    """
+
+    __slots__ = (
+        "pk",
+        "title",
+        "owner_id",
+        "owner",
+        "created_at",
+        "updated_at",
+        "is_public",
+        "permission_level",
+    )
+
+    # Columns selected for every row in addition to the queryset annotations.
+    fields = ("id", "title", "owner_id", "owner_email", "created_at", "updated_at")
+
+    def __init__(
+        self,
+        id: UUID,
+        title: str,
+        owner_id: Optional[UUID],
+        owner_email: Optional[str],
+        created_at,
+        updated_at,
+        **annotations: Any,
+    ):
+        self.pk = id
+        self.title = title
+        self.owner_id = owner_id
+        self.owner = (
+            None if owner_id is None else DiagramOwnerRow(owner_id, owner_email)
+        )
+        self.created_at = created_at
+        self.updated_at = updated_at
+        for name, value in annotations.items():
+            setattr(self, name, value)
+
+    @property
+    def id(self) -> UUID:
+        return self.pk
+
+    def serializable_value(self, field_name: str) -> Any:
+        """
+        Mimics `Model.serializable_value()` which is used by
+        `PrimaryKeyRelatedField` to get a related object's pk without loading it.
+        """
+        if field_name == "owner":
+            return self.owner_id
+        return getattr(self, field_name)
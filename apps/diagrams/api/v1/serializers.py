@@ -3,10 +3,40 @@ import uuid
 from drf_spectacular.utils import OpenApiExample, extend_schema_serializer
 from rest_framework import serializers
 
-from apps.diagrams.models import Diagram
+from apps.core.renderers import RawJSON
+from apps.core.serializers import FastRepresentationMixin
+from apps.diagrams.constants import ExportScopes
+from apps.diagrams.models import Diagram, DiagramContent
 from apps.users.models import User
 
 
+class DiagramJSONField(serializers.JSONField):
+    """
+    JSON field which outputs the diagram document as `RawJSON` text if the
+    diagram object is annotated with `json_text` (the `json` column fetched
+    as text) or with the compressed content (`json_codec`, `json_data` and
+    `json_dictionary_id`), so it is not decoded and encoded again.
+    """
+
+    def get_attribute(self, instance):
+        json_text = getattr(instance, "json_text", None)
+        if json_text is not None:
+            return RawJSON(json_text)
+        json_codec = getattr(instance, "json_codec", None)
+        if json_codec:
+            return RawJSON(
+                DiagramContent.decode_text(
+                    json_codec, instance.json_data, instance.json_dictionary_id
+                )
+            )
+        return super().get_attribute(instance)
+
+    def to_representation(self, value):
+        if isinstance(value, RawJSON):
+            return value
+        return super().to_representation(value)
+
+
 # region @extend_schema_serializer
 @extend_schema_serializer(
     examples=[
@@ -36,9 +66,9 @@ from apps.users.models import User
     ]
 )
 # endregion
-class DiagramSerializer(serializers.ModelSerializer):
+class DiagramSerializer(FastRepresentationMixin, serializers.ModelSerializer):
     diagram_id = serializers.ReadOnlyField(source="id")
-    json = serializers.JSONField()
+    json = DiagramJSONField()
     owner_id = serializers.PrimaryKeyRelatedField(
         required=False, queryset=User.objects.all()
     )
@@ -94,7 +124,51 @@ class DiagramCopySerializer(serializers.ModelSerializer):
         ]
 
 
-class DiagramListSerializer(serializers.ModelSerializer):
+# region @extend_schema_serializer
+@extend_schema_serializer(
+    examples=[
+        OpenApiExample(
+            name="JSON body example",
+            description="Ids of the diagrams to copy (up to 100).\n\n"
+            "The copies will have the same content and description as the original "
+            "ones, but titles `Copy of {original_diagram_title}`.",
+            value={"diagram_ids": [f"{uuid.uuid4()}", f"{uuid.uuid4()}"]},
+            request_only=True,
+        ),
+    ]
+)
+# endregion
+class DiagramBulkCopySerializer(serializers.ModelSerializer):
+    """
+    Used to copy several diagrams at once via:
+    - `POST api/v1/diagrams/copy/`;
+    - `POST api/v1/diagrams/shared-with-me/copy/`.
+    """
+
+    diagram_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        write_only=True,
+        allow_empty=False,
+        max_length=100,
+    )
+    original_diagram_id = serializers.UUIDField(read_only=True)
+    diagram_id = serializers.ReadOnlyField(source="id")
+    title = serializers.ReadOnlyField()
+    description = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Diagram
+        fields = [
+            "diagram_ids",
+            "original_diagram_id",
+            "diagram_id",
+            "title",
+            "description",
+            "created_at",
+        ]
+
+
+class DiagramListSerializer(FastRepresentationMixin, serializers.ModelSerializer):
     """
     Used to list diagrams via:
     - `GET api/v1/diagrams/`.
@@ -181,3 +255,35 @@ class SharedDiagramSaveSerializer(serializers.ModelSerializer):
             "description",
             "updated_at",
         ]
+
+
+class DiagramExportSerializer(serializers.Serializer):
+    """
+    Used to validate query parameters of diagrams export via:
+    - `GET api/v1/diagrams/export/`.
+    """
+
+    scope = serializers.ChoiceField(
+        choices=ExportScopes.CHOICES, default=ExportScopes.OWNED
+    )
+
+
+class DiagramImportSerializer(serializers.ModelSerializer):
+    """
+    Used to validate items of diagrams import via:
+    - `POST api/v1/diagrams/import/`.
+    The owner is validated just as an id, owners of a batch of items are
+    looked up by a single query (see `apps.diagrams.imports`).
+    """
+
+    json = serializers.JSONField()
+    owner_id = serializers.UUIDField(required=False)
+
+    class Meta:
+        model = Diagram
+        fields = [
+            "title",
+            "json",
+            "description",
+            "owner_id",
+        ]
@@ -1,16 +1,40 @@
+from typing import Tuple
+
 from django.contrib.auth import get_user_model
-from django.db.models import Exists, OuterRef, QuerySet, Subquery
+from django.db.models import QuerySet
 from drf_spectacular.utils import OpenApiResponse, extend_schema, extend_schema_view
 from rest_framework import filters, mixins, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
 
-from apps.diagrams.api.v1.actions import copy_diagram, save_diagram, unshare_me
+from apps.core.querysets import SerializerQuerySetMixin
+from apps.core.renderers import NDJSONRenderer, PassthroughJSONRenderer
+from apps.diagrams.api.v1.actions import (
+    copy_diagram,
+    copy_diagrams,
+    export_diagrams,
+    import_diagrams,
+    save_diagram,
+    unshare_me,
+)
+from apps.diagrams.api.v1.mixins import (
+    DiagramAccessMixin,
+    DiagramConditionalListMixin,
+    DiagramConditionalRetrieveMixin,
+    DiagramDeltaSaveMixin,
+    DiagramListProjectionMixin,
+    DiagramMessagePackMixin,
+    DiagramPreconditionMixin,
+    DiagramRawJSONRetrieveMixin,
+)
 from apps.diagrams.api.v1.pagination import DiagramViewSetPagination
 from apps.diagrams.api.v1.permissions import IsAdminOrIsDiagramOwner
 from apps.diagrams.api.v1.serializers import (
+    DiagramBulkCopySerializer,
     DiagramCopySerializer,
+    DiagramExportSerializer,
+    DiagramImportSerializer,
     DiagramListSerializerWithPublicFlag,
     DiagramSerializer,
     SharedDiagramListSerializer,
@@ -20,6 +44,7 @@ from apps.diagrams.apps import DiagramsConfig
 from apps.diagrams.models import Diagram
 from apps.sharings.api.v1.actions import (
     invite_collaborator,
+    invite_collaborators,
     remove_all_collaborators,
     set_diagram_private,
     set_diagram_public,
@@ -31,10 +56,12 @@ from apps.sharings.api.v1.permissions import (
     IsPublicDiagram,
 )
 from apps.sharings.api.v1.serializers import (
+    BulkInviteCollaboratorsSerializer,
     InviteCollaboratorSerializer,
+    InviteTeamSerializer,
     PublicDiagramSharingSerializer,
 )
-from apps.sharings.models import Collaborator
+from apps.sharings.constants import PermissionLevels
 from docs.api.templates.parameters import required_header_auth_parameter
 
 
@@ -82,18 +109,32 @@ from docs.api.templates.parameters import required_header_auth_parameter
             400: OpenApiResponse(description="JSON parse error"),
             401: OpenApiResponse(description="Invalid token or token not provided"),
             404: OpenApiResponse(description="Diagram not found"),
+            412: OpenApiResponse(
+                description="Diagram was modified since the `If-Match` ETag was issued"
+            ),
         },
     ),
     partial_update=extend_schema(
         tags=[DiagramsConfig.tag],
         summary="Partially update a diagram",
-        description="Partially updates the details of a specific diagram.",
+        description="Partially updates the details of a specific diagram.\n\n"
+        "Besides JSON body with fields to update, accepts JSON Patch "
+        "(`application/json-patch+json`) and JSON Merge Patch "
+        "(`application/merge-patch+json`) bodies applied to the stored diagram, "
+        "e.g. `/json/classes/0/x` path.",
         parameters=[required_header_auth_parameter],
         responses={
             200: DiagramSerializer,
             400: OpenApiResponse(description="JSON parse error"),
             401: OpenApiResponse(description="Invalid token or token not provided"),
             404: OpenApiResponse(description="Diagram not found"),
+            412: OpenApiResponse(
+                description="Diagram was modified since the `If-Match` ETag was issued"
+            ),
+            409: OpenApiResponse(
+                description="Patch test failed or the diagram was modified "
+                "while the patch was being applied"
+            ),
         },
     ),
     destroy=extend_schema(
@@ -125,6 +166,64 @@ from docs.api.templates.parameters import required_header_auth_parameter
             404: OpenApiResponse(description="Diagram not found"),
         },
     ),
+    copy_diagrams=extend_schema(
+        tags=[DiagramsConfig.tag],
+        summary="Create copies of several existing diagrams",
+        description="Allows user to create copies of up to 100 own diagrams "
+        "at once. Either all diagrams are copied or none of them.\n\n"
+        "**Admin user can copy any diagrams.**",
+        parameters=[required_header_auth_parameter],
+        responses={
+            201: DiagramBulkCopySerializer(many=True),
+            400: OpenApiResponse(description="JSON parse error"),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+            404: OpenApiResponse(
+                description="Some diagrams not found, their ids are returned"
+            ),
+        },
+    ),
+    export_diagrams=extend_schema(
+        tags=[DiagramsConfig.tag],
+        summary="Export diagrams as NDJSON",
+        description="Streams diagrams with their documents as newline delimited "
+        "JSON (`application/x-ndjson`), a diagram per line with the same fields "
+        "as the diagram details. Scopes of exported diagrams:\n"
+        "- *owned*: diagrams of the user (default);\n"
+        "- *shared*: diagrams shared to the user, lines have `permission_level`;\n"
+        "- *all*: all diagrams, **just for admin user**.\n\n"
+        "The stream is compressed if `Accept-Encoding` header accepts "
+        "`gzip` or `zstd`.",
+        parameters=[required_header_auth_parameter, DiagramExportSerializer],
+        request=None,
+        responses={
+            (200, "application/x-ndjson"): DiagramSerializer,
+            400: OpenApiResponse(description="Invalid scope"),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+            403: OpenApiResponse(description="All diagrams requested by non-admin"),
+        },
+    ),
+    import_diagrams=extend_schema(
+        tags=[DiagramsConfig.tag],
+        summary="Import diagrams in bulk",
+        description="Creates diagrams from items of newline delimited JSON "
+        "(`application/x-ndjson`) or JSON array (`application/json`) body, "
+        "every item has the same fields as the diagram creation body. "
+        "The body is parsed incrementally and diagrams are inserted in batches.\n\n"
+        "Invalid items are skipped, the rest are imported. Results of all items "
+        "are returned in their order: `diagram_id` of created diagrams or "
+        "`errors` of invalid items.\n\n"
+        "**Admin user can set owners of diagrams by `owner_id`.**",
+        parameters=[required_header_auth_parameter],
+        request={
+            "application/x-ndjson": DiagramImportSerializer,
+            "application/json": DiagramImportSerializer(many=True),
+        },
+        responses={
+            200: OpenApiResponse(description="Results of the items"),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+            415: OpenApiResponse(description="Unsupported media type"),
+        },
+    ),
     invite_collaborator=extend_schema(
         tags=[DiagramsConfig.tag],
         summary="Invite a collaborator to a diagram",
@@ -150,10 +249,56 @@ from docs.api.templates.parameters import required_header_auth_parameter
             404: OpenApiResponse(description="Diagram not found"),
         },
     ),
+    invite_collaborators=extend_schema(
+        tags=[DiagramsConfig.tag],
+        summary="Invite several collaborators to a diagram",
+        description="A diagram owner can share his diagram to up to 500 users "
+        "at once: each invitation has `user_email` and `permission_level` "
+        "like the single invitation.\n\n"
+        "Invalid invitations are skipped, the rest are created. Results of all "
+        "invitations are returned in their order: the created share, "
+        "or `errors` and their `codes` which are the same as the errors "
+        "of the single invitation (e.g. `does_not_exist`, `inactive_user`, "
+        "`self_sharing`, `non_unique_sharing`).\n\n"
+        "**Admin can share any diagram**.",
+        parameters=[required_header_auth_parameter],
+        responses={
+            200: OpenApiResponse(description="Results of the invitations"),
+            400: OpenApiResponse(
+                description="JSON parse error or invitations are not a list"
+            ),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+            404: OpenApiResponse(description="Diagram not found"),
+        },
+    ),
+    invite_team=extend_schema(
+        tags=[DiagramsConfig.tag],
+        summary="Share a diagram to a team",
+        description="A diagram owner can share his diagram to a team which "
+        "he owns or is a member of with one of the permission levels. "
+        "Members of the team have the same access to the diagram as if "
+        "it was shared to each of them, members who join the team later "
+        "get the access too. If a diagram is shared to a user several times "
+        "(directly and through teams), the highest permission level applies.\n\n"
+        "**Admin can share any diagram to any team**.",
+        parameters=[required_header_auth_parameter],
+        responses={
+            201: InviteTeamSerializer,
+            400: OpenApiResponse(
+                description="Possible errors:\n"
+                "- JSON parse error;\n"
+                "- team not found;\n"
+                "- invalid permission level provided;\n"
+                "- sharing the same diagram to the same team is not allowed."
+            ),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+            404: OpenApiResponse(description="Diagram not found"),
+        },
+    ),
     remove_all_collaborators=extend_schema(
         tags=[DiagramsConfig.tag],
         summary="Remove all collaborators from a diagram",
-        description="Removes all users which diagram was shared to "
+        description="Removes all users and teams which diagram was shared to "
         "from the collaborators list of a provided diagram.",
         parameters=[required_header_auth_parameter],
         responses={
@@ -192,10 +337,20 @@ from docs.api.templates.parameters import required_header_auth_parameter
     ),
 )
 # endregion
-class DiagramViewSet(viewsets.ModelViewSet):
+class DiagramViewSet(
+    DiagramConditionalListMixin,
+    DiagramConditionalRetrieveMixin,
+    DiagramDeltaSaveMixin,
+    DiagramListProjectionMixin,
+    DiagramMessagePackMixin,
+    DiagramPreconditionMixin,
+    DiagramRawJSONRetrieveMixin,
+    SerializerQuerySetMixin,
+    viewsets.ModelViewSet,
+):
     """
     API endpoint that allows:
-    - view all diagrams;
+    - view all diagrams (the `json` field is not loaded for the list);
     - store a new diagram;
     - view, edit or delete an existing diagram.
     """
@@ -207,24 +362,44 @@ class DiagramViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ["title", "owner_email", "created_at", "updated_at"]
     ordering = ["-updated_at"]
+    query_budgets = {
+        "list": 3,
+        "create": 9,
+        "retrieve": 2,
+        "update": 11,
+        "partial_update": 11,
+        "destroy": 9,
+        "copy_diagram": 6,
+        "copy_diagrams": 8,
+        "export_diagrams": 2,
+        "import_diagrams": 9,
+        "invite_collaborator": 6,
+        "invite_collaborators": 8,
+        "invite_team": 7,
+        "remove_all_collaborators": 7,
+        "set_diagram_public": 6,
+        "set_diagram_private": 7,
+    }
 
     def get_queryset(self) -> QuerySet[Diagram]:
         """
         Filter the queryset based on the user's permissions:
         - if the user is an admin, return all diagrams;
         - otherwise, return only the diagrams that belong to the user.
-        Each diagram object is annotated with value of whether it is public or not.
-        It will help to share diagram as public
-        without having to make unnecessary intermediate requests.
         """
         if self.request.user.is_admin:
             return Diagram.objects.all()
-        diagrams = self.queryset.filter(owner=self.request.user)
-        return diagrams.annotate(
-            is_public=Exists(
-                Collaborator.objects.filter(diagram_id=OuterRef("id"), shared_to=None)
-            )
-        )
+        return self.queryset.filter(owner=self.request.user)
+
+    def get_list_fields(self) -> Tuple[str, ...]:
+        """
+        Diagrams are listed with the value of whether they are public or not
+        to non-admin users. It will help to share diagram as public
+        without having to make unnecessary intermediate requests.
+        """
+        if self.request.user.is_admin:
+            return ()
+        return ("is_public",)
 
     def perform_update(self, serializer: DiagramSerializer) -> None:
         """
@@ -233,9 +408,10 @@ class DiagramViewSet(viewsets.ModelViewSet):
         otherwise owner_id field is remained unchanged.
         """
         owner = serializer.instance.owner
-        if self.request.data.get("owner_id") and self.request.user.is_admin:
-            owner = get_user_model().objects.get(id=self.request.data.get("owner_id"))
-        serializer.save(owner_id=owner.id)
+        data = self.get_request_data()
+        if data.get("owner_id") and self.request.user.is_admin:
+            owner = get_user_model().objects.get(id=data.get("owner_id"))
+        self.perform_conditional_save(serializer, owner_id=owner.id)
 
     def perform_create(self, serializer: DiagramSerializer) -> None:
         """
@@ -248,11 +424,20 @@ class DiagramViewSet(viewsets.ModelViewSet):
             owner = get_user_model().objects.get(id=self.request.data.get("owner_id"))
         serializer.save(owner_id=owner.id)
 
+    def get_copy_queryset(self) -> QuerySet[Diagram]:
+        """
+        Returns the diagrams which the user can copy.
+        """
+        return self.get_queryset()
+
     def get_serializer_class(self):
         serializer_mapping = {
             "list": DiagramListSerializerWithPublicFlag,
             "copy_diagram": DiagramCopySerializer,
+            "copy_diagrams": DiagramBulkCopySerializer,
             "invite_collaborator": InviteCollaboratorSerializer,
+            "invite_collaborators": BulkInviteCollaboratorsSerializer,
+            "invite_team": InviteTeamSerializer,
             "remove_all_collaborators": None,
             "set_diagram_public": PublicDiagramSharingSerializer,
         }
@@ -265,6 +450,33 @@ class DiagramViewSet(viewsets.ModelViewSet):
         """
         return copy_diagram(self, *args, **kwargs)
 
+    @action(detail=False, methods=["post"], url_path="copy")
+    def copy_diagrams(self, *args, **kwargs):
+        """
+        Allows diagram owner or admin to create copies of several diagrams.
+        """
+        return copy_diagrams(self, *args, **kwargs)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        renderer_classes=[PassthroughJSONRenderer, NDJSONRenderer],
+    )
+    def export_diagrams(self, *args, **kwargs):
+        """
+        Allows user to export all own diagrams or diagrams shared to him
+        as a stream. Admin can export all diagrams.
+        """
+        return export_diagrams(self, *args, **kwargs)
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_diagrams(self, *args, **kwargs):
+        """
+        Allows user to create many diagrams at once. Admin can set their owners.
+        """
+        return import_diagrams(self, *args, **kwargs)
+
     @action(detail=True, methods=["post"], url_path="share-invite-user")
     def invite_collaborator(self, *args, **kwargs):
         """
@@ -273,6 +485,22 @@ class DiagramViewSet(viewsets.ModelViewSet):
         """
         return invite_collaborator(self, *args, **kwargs)
 
+    @action(detail=True, methods=["post"], url_path="share-invite-users")
+    def invite_collaborators(self, *args, **kwargs):
+        """
+        Allows diagram owner to share his diagram to several users at once.
+        Admin can share any diagram.
+        """
+        return invite_collaborators(self, *args, **kwargs)
+
+    @action(detail=True, methods=["post"], url_path="share-invite-team")
+    def invite_team(self, *args, **kwargs):
+        """
+        Allows diagram owner to share his diagram to a team.
+        Admin can share any diagram.
+        """
+        return invite_collaborator(self, *args, **kwargs)
+
     @action(detail=True, methods=["delete"], url_path="share-unshare-all")
     def remove_all_collaborators(self, *args, **kwargs):
         """
@@ -338,13 +566,34 @@ class DiagramViewSet(viewsets.ModelViewSet):
             404: OpenApiResponse(description="Shared diagram not found"),
         },
     ),
+    copy_shared_diagrams=extend_schema(
+        tags=[DiagramsConfig.tag],
+        summary="Copy several diagrams shared to the current user",
+        description="Allows to copy up to 100 diagrams shared to the current "
+        "user with **view-copy** (View & Copy) or **view-edit** (View & Edit) "
+        "permission to the user's account at once. "
+        "Either all diagrams are copied or none of them.",
+        parameters=[required_header_auth_parameter],
+        responses={
+            201: DiagramBulkCopySerializer(many=True),
+            400: OpenApiResponse(description="Possible errors:\n- JSON parse error."),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+            404: OpenApiResponse(
+                description="Some shared diagrams not found or can not be copied, "
+                "their ids are returned"
+            ),
+        },
+    ),
     save_shared_diagram=extend_schema(
         tags=[DiagramsConfig.tag],
         summary="Save changes made to the shared diagram",
         description="Allows to save changes made to a specific "
         "diagram shared to the current user, "
         "if its owner shared it to him with **view-edit** "
-        "(View & Edit) permission.",
+        "(View & Edit) permission.\n\n"
+        "Besides JSON body with fields to update, accepts JSON Patch "
+        "(`application/json-patch+json`) and JSON Merge Patch "
+        "(`application/merge-patch+json`) bodies applied to the stored diagram.",
         parameters=[required_header_auth_parameter],
         responses={
             200: SharedDiagramSaveSerializer,
@@ -354,6 +603,13 @@ class DiagramViewSet(viewsets.ModelViewSet):
                 description="Insufficient permission to save made changes"
             ),
             404: OpenApiResponse(description="Shared diagram not found"),
+            412: OpenApiResponse(
+                description="Diagram was modified since the `If-Match` ETag was issued"
+            ),
+            409: OpenApiResponse(
+                description="Patch test failed or the diagram was modified "
+                "while the patch was being applied"
+            ),
         },
     ),
     unshare_me_from_diagram=extend_schema(
@@ -361,7 +617,9 @@ class DiagramViewSet(viewsets.ModelViewSet):
         summary="Unsubscribe user from a shared diagram",
         description="Allows logged-in user to unsubscribe himself from "
         "the diagram if it was shared to him. "
-        "Unsubscribed user will be removed from diagram collaborators list.",
+        "Unsubscribed user will be removed from diagram collaborators list. "
+        "Shares to his teams are not changed, so the diagram remains shared "
+        "to him while he is a member of such a team.",
         parameters=[required_header_auth_parameter],
         responses={
             204: OpenApiResponse(description="Removed successfully"),
@@ -372,11 +630,23 @@ class DiagramViewSet(viewsets.ModelViewSet):
 )
 # endregion
 class SharedWithMeDiagramViewSet(
-    mixins.RetrieveModelMixin, mixins.ListModelMixin, GenericViewSet
+    DiagramAccessMixin,
+    DiagramConditionalListMixin,
+    DiagramConditionalRetrieveMixin,
+    DiagramDeltaSaveMixin,
+    DiagramListProjectionMixin,
+    DiagramMessagePackMixin,
+    DiagramPreconditionMixin,
+    DiagramRawJSONRetrieveMixin,
+    SerializerQuerySetMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
 ):
     """
     API endpoint that allows:
-    - view list of all diagrams which were shared to the current user;
+    - view list of all diagrams which were shared to the current user
+      (the `json` field is not loaded for the list);
     - view a diagram that was shared to the current user.
     """
 
@@ -388,6 +658,14 @@ class SharedWithMeDiagramViewSet(
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ["title", "owner_email", "created_at", "updated_at"]
     ordering = ["-updated_at"]
+    query_budgets = {
+        "list": 3,
+        "retrieve": 2,
+        "copy_shared_diagram": 6,
+        "copy_shared_diagrams": 8,
+        "save_shared_diagram": 3,
+        "unshare_me_from_diagram": 6,
+    }
 
     def get_queryset(self) -> QuerySet[Diagram]:
         """
@@ -395,15 +673,15 @@ class SharedWithMeDiagramViewSet(
         to the current user. Each shared diagram object is annotated with value
         of the permission level it was shared with.
         """
-        shared_diagrams_id = Collaborator.objects.filter(
-            shared_to=self.request.user
-        ).values("diagram_id")
-        return Diagram.objects.filter(id__in=shared_diagrams_id).annotate(
-            permission_level=Subquery(
-                Collaborator.objects.filter(
-                    shared_to_id=self.request.user.id, diagram_id=OuterRef("id")
-                ).values("permission_level")
-            )
+        return Diagram.objects.shared_to(self.request.user)
+
+    def get_copy_queryset(self) -> QuerySet[Diagram]:
+        """
+        Returns the diagrams which were shared to the current user
+        with a permission level that allows to copy them.
+        """
+        return self.get_queryset().filter(
+            permission_level__in=[PermissionLevels.VIEWCOPY, PermissionLevels.VIEWEDIT]
         )
 
     def get_serializer_class(self):
@@ -411,6 +689,7 @@ class SharedWithMeDiagramViewSet(
             "list": SharedDiagramListSerializer,
             "retrieve": DiagramSerializer,
             "copy_shared_diagram": DiagramCopySerializer,
+            "copy_shared_diagrams": DiagramBulkCopySerializer,
             "save_shared_diagram": SharedDiagramSaveSerializer,
             "unshare_me_from_diagram": None,
         }
@@ -423,6 +702,7 @@ class SharedWithMeDiagramViewSet(
                 IsCollaboratorAndHasViewCopyPermission
                 | IsCollaboratorAndHasViewEditPermission,
             ],
+            "copy_shared_diagrams": [IsAuthenticated],
             "save_shared_diagram": [
                 IsAuthenticated,
                 IsCollaboratorAndHasViewEditPermission,
@@ -445,6 +725,14 @@ class SharedWithMeDiagramViewSet(
         """
         return copy_diagram(self, *args, **kwargs)
 
+    @action(detail=False, methods=["post"], url_path="copy")
+    def copy_shared_diagrams(self, *args, **kwargs):
+        """
+        Allows invited collaborator to copy several diagrams he was shared to
+        if he has appropriate permission.
+        """
+        return copy_diagrams(self, *args, **kwargs)
+
     @action(detail=True, methods=["patch"], url_path="save")
     def save_shared_diagram(self, *args, **kwargs):
         """
@@ -481,7 +769,15 @@ class SharedWithMeDiagramViewSet(
     ),
 )
 # endregion
-class PublicDiagramViewSet(mixins.RetrieveModelMixin, GenericViewSet):
+class PublicDiagramViewSet(
+    DiagramAccessMixin,
+    DiagramConditionalRetrieveMixin,
+    DiagramMessagePackMixin,
+    DiagramRawJSONRetrieveMixin,
+    SerializerQuerySetMixin,
+    mixins.RetrieveModelMixin,
+    GenericViewSet,
+):
     """
     API endpoint that allows to view a diagram that was shared publicly.
     If a diagram was shared and 'shared_to' field is set to 'shared_to=null',
@@ -491,6 +787,7 @@ class PublicDiagramViewSet(mixins.RetrieveModelMixin, GenericViewSet):
     queryset: QuerySet[Diagram] = Diagram.objects.all()
     serializer_class = DiagramSerializer
     permission_classes = [AllowAny, IsPublicDiagram]
+    query_budgets = {"retrieve": 2}
 
     def get_queryset(self):
         """
@@ -498,8 +795,4 @@ class PublicDiagramViewSet(mixins.RetrieveModelMixin, GenericViewSet):
         Otherwise, if diagram is not public but its id (pk) was provided to the endpoint
         it will be processed by permission classes as if it was public.
         """
-        return (
-            super()
-            .get_queryset()
-            .filter(collaborator__isnull=False, collaborator__shared_to=None)
-        )
+        return super().get_queryset().filter(is_public=True)
@@ -0,0 +1,83 @@
+"""
+Storage codecs of diagram contents. zstd codec requires optional `zstandard`
+package, zlib is used instead if it is not installed.
+"""
+
+import zlib
+from typing import List, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+NONE = ""
+ZLIB = "zlib"
+ZSTD = "zstd"
+CODECS = (NONE, ZLIB, ZSTD)
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+
+
+class CodecError(ValueError):
+    """
+    The codec is unknown or not available.
+    """
+
+
+def is_available(codec: str) -> bool:
+    return codec in (NONE, ZLIB) or (codec == ZSTD and zstandard is not None)
+
+
+def resolve(codec: str) -> str:
+    """
+    Returns the codec which is used to store contents if the codec is requested:
+    zstd falls back to zlib if `zstandard` package is not installed.
+    """
+    if codec not in CODECS:
+        raise CodecError(f"Unknown codec: {codec!r}.")
+    if codec == ZSTD and zstandard is None:
+        return ZLIB
+    return codec
+
+
+def compress(data: bytes, codec: str, dictionary: Optional[bytes] = None) -> bytes:
+    if codec == ZLIB:
+        return zlib.compress(data, ZLIB_LEVEL)
+    if codec == ZSTD:
+        compressor = zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL, dict_data=_zstd_dictionary(dictionary)
+        )
+        return compressor.compress(data)
+    raise CodecError(f"Unknown codec: {codec!r}.")
+
+
+def decompress(data: bytes, codec: str, dictionary: Optional[bytes] = None) -> bytes:
+    if codec == ZLIB:
+        return zlib.decompress(data)
+    if codec == ZSTD:
+        if zstandard is None:
+            raise CodecError("zstd codec requires 'zstandard' package.")
+        decompressor = zstandard.ZstdDecompressor(
+            dict_data=_zstd_dictionary(dictionary)
+        )
+        return decompressor.decompress(data)
+    raise CodecError(f"Unknown codec: {codec!r}.")
+
+
+def train_dictionary(samples: List[bytes], size: int) -> bytes:
+    """
+    Trains a zstd dictionary on the samples of contents. Diagram documents
+    share most of their keys and structure, so a dictionary makes compression
+    of small documents much more efficient.
+    """
+    if zstandard is None:
+        raise CodecError("zstd codec requires 'zstandard' package.")
+    return zstandard.train_dictionary(size, samples, level=ZSTD_LEVEL).as_bytes()
+
+
+def _zstd_dictionary(dictionary: Optional[bytes]):
+    if dictionary is None:
+        return None
+    return zstandard.ZstdCompressionDict(dictionary)
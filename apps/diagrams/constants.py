@@ -0,0 +1,17 @@
+class ExportScopes:
+    """
+    Diagrams which are exported (see `apps.diagrams.export`):
+    - owned: diagrams owned by the user;
+    - shared: diagrams shared to the user;
+    - all: all diagrams, just admin users can export them.
+    """
+
+    OWNED = "owned"
+    SHARED = "shared"
+    ALL = "all"
+
+    CHOICES = (
+        (OWNED, "Owned"),
+        (SHARED, "Shared with me"),
+        (ALL, "All"),
+    )
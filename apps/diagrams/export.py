@@ -0,0 +1,134 @@
+"""
+Streaming export of diagrams as newline delimited JSON (NDJSON): a line per
+diagram with the same fields as diagram retrieve responses (and the permission
+level of diagrams shared to the user). Diagrams are read by a server-side
+cursor in chunks (`QuerySet.iterator()`), their documents are fetched as JSON
+text or compressed data and spliced into the lines as they are (see
+`DiagramJSONField`), and lines are streamed as soon as they are rendered, so
+memory depends on the chunk size but not on the number of diagrams.
+The stream can be compressed by gzip or zstd (which requires optional
+`zstandard` package).
+"""
+
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from django.db.models import F, QuerySet, TextField
+from django.db.models.functions import Cast
+
+from apps.core.renderers import NDJSONRenderer
+from apps.diagrams import codecs
+from apps.diagrams.api.v1.serializers import DiagramSerializer
+from apps.diagrams.constants import ExportScopes
+from apps.diagrams.models import Diagram
+
+GZIP = "gzip"
+ZSTD = "zstd"
+ENCODINGS = (GZIP, ZSTD)
+
+MEDIA_TYPE = NDJSONRenderer.media_type
+# Diagrams fetched from the cursor at once, the memory of an export is about
+# the size of this number of the largest documents.
+CHUNK_SIZE = 100
+# Fast levels, the stream is compressed while it is transferred.
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def get_export_queryset(scope: str, user=None) -> QuerySet[Diagram]:
+    """
+    Returns the diagrams of the scope: owned by the user, shared to the user
+    (annotated with `permission_level`) or all diagrams.
+    Documents are fetched by the same query without decoding.
+    """
+    if scope == ExportScopes.OWNED:
+        queryset = Diagram.objects.filter(owner=user)
+    elif scope == ExportScopes.SHARED:
+        queryset = Diagram.objects.shared_to(user)
+    elif scope == ExportScopes.ALL:
+        queryset = Diagram.objects.all()
+    else:
+        raise ValueError(f"Unknown export scope: {scope!r}.")
+    return (
+        queryset.select_related("owner")
+        .only(
+            "id",
+            "title",
+            "description",
+            "owner_id",
+            "owner__email",
+            "created_at",
+            "updated_at",
+        )
+        .annotate(
+            json_text=Cast("content__json", output_field=TextField()),
+            json_codec=F("content__codec"),
+            json_data=F("content__data"),
+            json_dictionary_id=F("content__dictionary_id"),
+        )
+        .order_by()
+    )
+
+
+def export_lines(
+    queryset: QuerySet[Diagram], chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Yields NDJSON lines of the diagrams. Documents are compact JSON, so they
+    never contain line breaks.
+    """
+    serializer = DiagramSerializer()
+    renderer = NDJSONRenderer()
+    with_permission_level = "permission_level" in queryset.query.annotations
+    for diagram in queryset.iterator(chunk_size=chunk_size):
+        data = serializer.to_representation(diagram)
+        if with_permission_level:
+            data["permission_level"] = diagram.permission_level
+        yield renderer.render(data)
+
+
+def compress(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """
+    Yields the chunks compressed by gzip or zstd as a single stream,
+    the chunks as they are if the encoding is None.
+    """
+    if encoding is None:
+        yield from chunks
+        return
+    if encoding == GZIP:
+        compressor = zlib.compressobj(GZIP_LEVEL, wbits=16 + zlib.MAX_WBITS)
+    elif encoding == ZSTD:
+        if not codecs.is_available(codecs.ZSTD):
+            raise codecs.CodecError("zstd codec requires 'zstandard' package.")
+        compressor = codecs.zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    else:
+        raise codecs.CodecError(f"Unknown encoding: {encoding!r}.")
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Returns the encoding of the stream accepted by `Accept-Encoding` header
+    (zstd is preferred if it is available), None if the stream is not compressed.
+    """
+    accepted = set()
+    for coding in accept_encoding.lower().split(","):
+        name, _, params = coding.partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip())
+    for encoding in (ZSTD, GZIP):
+        if encoding in accepted and (
+            encoding != ZSTD or codecs.is_available(codecs.ZSTD)
+        ):
+            return encoding
+    return None
@@ -0,0 +1,110 @@
+"""
+Bulk import of diagrams from NDJSON or JSON array streams (see
+`apps.core.jsonstream`). Items have the fields of diagram creation requests,
+they are parsed and validated one by one, and valid items are inserted
+in batches: contents of a batch are stored by
+`DiagramContent.objects.acquire_many()` and diagrams by a single
+`bulk_create()`. Invalid items are reported and skipped, so the rest of
+the items are imported anyway.
+"""
+
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+from apps.core.jsonstream import ItemParseError
+from apps.diagrams.api.v1.serializers import DiagramImportSerializer
+from apps.diagrams.models import Diagram, DiagramContent
+from apps.users.models import User
+
+# Result of an imported item: `{"index": 0, "diagram_id": "..."}`,
+# or of an invalid one: `{"index": 1, "errors": {"title": ["..."]}}`.
+ImportResult = Dict[str, Any]
+
+
+def import_diagrams(
+    items: Iterable[Any], user: User, batch_size: int = 0
+) -> Iterator[ImportResult]:
+    """
+    Imports the items (or `ItemParseError` in place of items which are not
+    valid JSON) as diagrams of the user and yields results of the items:
+    results of invalid items are yielded at once, results of valid items when
+    their batch is inserted. Admin users can set owners by `owner_id`,
+    it is ignored for other users like by diagram creation.
+    The batch size defaults to `DIAGRAM_IMPORT_BATCH_SIZE` setting.
+    """
+    batch_size = batch_size or settings.DIAGRAM_IMPORT_BATCH_SIZE
+    # Fields of the serializer are built once for all items.
+    serializer = DiagramImportSerializer()
+    batch: List[Tuple[int, dict]] = []
+    for index, item in enumerate(items):
+        if isinstance(item, ItemParseError):
+            yield error_result(index, str(item))
+            continue
+        try:
+            data = serializer.run_validation(item)
+        except ValidationError as exc:
+            yield {"index": index, "errors": exc.detail}
+            continue
+        if not user.is_admin:
+            data.pop("owner_id", None)
+        batch.append((index, data))
+        if len(batch) >= batch_size:
+            yield from insert_batch(batch, user)
+            batch = []
+    if batch:
+        yield from insert_batch(batch, user)
+
+
+def insert_batch(batch: List[Tuple[int, dict]], user: User) -> Iterator[ImportResult]:
+    """
+    Inserts diagrams of validated items by a constant number of queries.
+    Items with owners which do not exist are reported as invalid.
+    """
+    owner_ids = {data["owner_id"] for _, data in batch if "owner_id" in data}
+    existing_ids = set()
+    if owner_ids:
+        existing_ids = set(
+            User.objects.filter(id__in=owner_ids).values_list("id", flat=True)
+        )
+    valid: List[Tuple[int, dict]] = []
+    for index, data in batch:
+        owner_id = data.get("owner_id", user.id)
+        if owner_id != user.id and owner_id not in existing_ids:
+            message = PrimaryKeyRelatedField.default_error_messages["does_not_exist"]
+            yield {
+                "index": index,
+                "errors": {"owner_id": [message.format(pk_value=owner_id)]},
+            }
+            continue
+        valid.append((index, data))
+    if not valid:
+        return
+
+    diagrams = [
+        Diagram(
+            id=uuid.uuid4(),
+            owner_id=data.get("owner_id", user.id),
+            title=data["title"],
+            description=data.get("description", ""),
+        )
+        for _, data in valid
+    ]
+    with transaction.atomic():
+        digests = DiagramContent.objects.acquire_many(
+            [data["json"] for _, data in valid]
+        )
+        for diagram, digest in zip(diagrams, digests):
+            diagram.content_id = digest
+        Diagram.objects.bulk_create(diagrams)
+    for (index, _), diagram in zip(valid, diagrams):
+        yield {"index": index, "diagram_id": str(diagram.id)}
+
+
+def error_result(index: int, message: str) -> ImportResult:
+    return {"index": index, "errors": {api_settings.NON_FIELD_ERRORS_KEY: [message]}}
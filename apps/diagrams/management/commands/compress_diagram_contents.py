@@ -0,0 +1,123 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.diagrams import codecs
+from apps.diagrams.models import DiagramContent, DiagramContentDictionary
+
+
+class Command(BaseCommand):
+    help = (
+        "Compresses stored diagram contents by the codec in batches "
+        "(or decompresses them with '--codec none') and reports compression ratios."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--codec",
+            choices=("none", codecs.ZLIB, codecs.ZSTD),
+            help="Codec to store contents with, "
+            "defaults to DIAGRAM_CONTENT_CODEC setting.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of contents processed in a transaction.",
+        )
+        parser.add_argument(
+            "--train-dictionary",
+            action="store_true",
+            help="Train a new zstd dictionary on samples of contents first.",
+        )
+        parser.add_argument(
+            "--dictionary-size",
+            type=int,
+            default=112640,
+            help="Maximal size of the trained dictionary in bytes.",
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=1000,
+            help="Number of contents to train the dictionary on.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report compression ratios without storing the contents.",
+        )
+
+    def handle(self, *args, **options):
+        codec = options["codec"] or settings.DIAGRAM_CONTENT_CODEC
+        codec = codecs.resolve("" if codec == "none" else codec)
+        if options["codec"] == codecs.ZSTD and codec != codecs.ZSTD:
+            self.stderr.write("'zstandard' is not installed, zlib is used instead.")
+        if options["train_dictionary"]:
+            if codec != codecs.ZSTD:
+                raise CommandError("Dictionary can be trained just for zstd codec.")
+            if not options["dry_run"]:
+                self.train_dictionary(options["dictionary_size"], options["samples"])
+
+        # The dictionary is resolved once for all batches.
+        codec, dictionary_id = DiagramContent.resolve_encoding(codec)
+        # Contents which are already stored by the codec are skipped, and so
+        # are contents which it did not make smaller with the same dictionary.
+        queryset = DiagramContent.objects.exclude(
+            codec=codec, dictionary_id=dictionary_id
+        ).order_by("pk")
+        if codec != codecs.NONE:
+            queryset = queryset.exclude(
+                compression_tried=DiagramContent.compression_key(codec, dictionary_id)
+            )
+
+        processed, original_size, stored_size, last_pk = 0, 0, 0, ""
+        while True:
+            with transaction.atomic():
+                batch = list(queryset.filter(pk__gt=last_pk)[: options["batch_size"]])
+                if not batch:
+                    break
+                for content in batch:
+                    value = content.value
+                    fields = DiagramContent.encode(value, codec, dictionary_id)
+                    for name, field_value in fields.items():
+                        setattr(content, name, field_value)
+                    text = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+                    original_size += len(text.encode())
+                    stored_size += (
+                        len(content.data) if content.codec else len(text.encode())
+                    )
+                if not options["dry_run"]:
+                    DiagramContent.objects.bulk_update(
+                        batch,
+                        ["json", "codec", "data", "dictionary", "compression_tried"],
+                    )
+            processed += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"Processed {processed} contents.")
+
+        ratio = original_size / stored_size if stored_size else 1.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Codec: {codec or 'none'}, contents: {processed}, "
+                f"original size: {original_size} B, stored size: {stored_size} B, "
+                f"compression ratio: {ratio:.2f}."
+            )
+        )
+
+    def train_dictionary(self, size: int, samples: int) -> None:
+        contents = DiagramContent.objects.order_by("?")[:samples]
+        data = [
+            json.dumps(
+                content.value, separators=(",", ":"), ensure_ascii=False
+            ).encode()
+            for content in contents
+        ]
+        try:
+            dictionary = codecs.train_dictionary(data, size)
+        except Exception as e:
+            raise CommandError(f"Dictionary can not be trained: {e}") from e
+        DiagramContentDictionary.objects.create(data=dictionary)
+        self.stdout.write(f"Trained dictionary of {len(dictionary)} B.")
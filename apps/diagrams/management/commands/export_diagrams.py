@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.diagrams import codecs, export
+from apps.diagrams.constants import ExportScopes
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports diagrams as newline delimited JSON (a diagram per line, "
+        "see `apps.diagrams.export`): diagrams owned by or shared to the user, "
+        "or all diagrams. Diagrams are read in chunks, so memory does not depend "
+        "on the number of exported diagrams."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scope",
+            choices=[scope for scope, _ in ExportScopes.CHOICES],
+            default=ExportScopes.OWNED,
+        )
+        parser.add_argument(
+            "--user",
+            help="Email of the user whose owned or shared diagrams are exported.",
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="File to write the diagrams to, defaults to the standard output.",
+        )
+        parser.add_argument(
+            "--compression",
+            choices=export.ENCODINGS,
+            help="Compress the output by gzip or zstd.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=export.CHUNK_SIZE,
+            help="Number of diagrams fetched from the database at once.",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options["scope"] != ExportScopes.ALL:
+            if not options["user"]:
+                raise CommandError(f"--user is required for '{options['scope']}'.")
+            try:
+                user = User.objects.get(email=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist.")
+        if options["compression"] == export.ZSTD and not codecs.is_available(
+            codecs.ZSTD
+        ):
+            raise CommandError("zstd compression requires 'zstandard' package.")
+
+        queryset = export.get_export_queryset(options["scope"], user)
+        exported = 0
+
+        def lines():
+            nonlocal exported
+            for line in export.export_lines(queryset, options["chunk_size"]):
+                exported += 1
+                yield line
+
+        chunks = export.compress(lines(), options["compression"])
+        if options["output"] == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+        with Path(options["output"]).open("wb") as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stdout.write(
+            self.style.SUCCESS(f"Exported {exported} diagrams to {options['output']}.")
+        )
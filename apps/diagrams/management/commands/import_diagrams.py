@@ -0,0 +1,91 @@
+import json
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import jsonstream
+from apps.diagrams import imports
+from apps.users.models import User
+
+NDJSON = "ndjson"
+JSON = "json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports diagrams of the user from newline delimited JSON or a JSON array "
+        "(see `apps.diagrams.imports`). The input is parsed incrementally and "
+        "diagrams are inserted in batches, invalid items are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            required=True,
+            help="Email of the user who imports the diagrams. "
+            "Admin can set owners of diagrams by `owner_id`.",
+        )
+        parser.add_argument(
+            "--input",
+            default="-",
+            help="File to read the diagrams from, defaults to the standard input.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=[NDJSON, JSON],
+            help="Format of the input, defaults to JSON array for .json files "
+            "and to newline delimited JSON otherwise.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.DIAGRAM_IMPORT_BATCH_SIZE,
+            help="Number of diagrams inserted by a query.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+        input_format = options["format"]
+        if not input_format:
+            is_json = Path(options["input"]).suffix == ".json"
+            input_format = JSON if is_json else NDJSON
+        parse = (
+            jsonstream.iter_json_array
+            if input_format == JSON
+            else jsonstream.iter_ndjson
+        )
+
+        if options["input"] == "-":
+            created, failed = self.run_import(
+                parse(sys.stdin.buffer), user, options["batch_size"]
+            )
+        else:
+            try:
+                stream = Path(options["input"]).open("rb")
+            except OSError as exc:
+                raise CommandError(f"Cannot read {options['input']}: {exc}")
+            with stream:
+                created, failed = self.run_import(
+                    parse(stream), user, options["batch_size"]
+                )
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {created} diagrams, {failed} failed.")
+        )
+
+    def run_import(self, items, user: User, batch_size: int):
+        created = failed = 0
+        for result in imports.import_diagrams(items, user, batch_size):
+            if "diagram_id" in result:
+                created += 1
+                continue
+            failed += 1
+            errors = json.dumps(result["errors"], ensure_ascii=False)
+            self.stderr.write(f"Item {result['index']}: {errors}")
+        return created, failed
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-17 12:46
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def fill_json_hash(apps, schema_editor):
+    Diagram = apps.get_model('diagrams', 'Diagram')
+    diagrams = Diagram.objects.only('id', 'json').iterator(chunk_size=500)
+    batch = []
+    for diagram in diagrams:
+        encoded = json.dumps(
+            diagram.json, sort_keys=True, separators=(',', ':'), ensure_ascii=False
+        )
+        diagram.json_hash = hashlib.sha256(encoded.encode()).hexdigest()
+        batch.append(diagram)
+        if len(batch) == 500:
+            Diagram.objects.bulk_update(batch, ['json_hash'])
+            batch = []
+    Diagram.objects.bulk_update(batch, ['json_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagrams', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diagram',
+            name='json_hash',
+            field=models.CharField(default='', editable=False, help_text='SHA-256 hash of the diagram JSON, it is updated on every save.', max_length=64, verbose_name='Diagram JSON hash'),
+        ),
+        migrations.RunPython(fill_json_hash, migrations.RunPython.noop),
+    ]
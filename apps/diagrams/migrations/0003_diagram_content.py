@@ -0,0 +1,96 @@
+# Generated by Django 5.0.6 on 2026-10-17 15:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_json_to_contents(apps, schema_editor):
+    Diagram = apps.get_model('diagrams', 'Diagram')
+    DiagramContent = apps.get_model('diagrams', 'DiagramContent')
+    diagrams = Diagram.objects.only('id', 'json', 'json_hash').iterator(chunk_size=500)
+    batch = []
+    for diagram in diagrams:
+        # json_hash is the digest of the canonical encoding of json (0002).
+        diagram.content_id = diagram.json_hash
+        batch.append(diagram)
+        if len(batch) == 500:
+            _store_contents(Diagram, DiagramContent, batch)
+            batch = []
+    _store_contents(Diagram, DiagramContent, batch)
+    references = (
+        Diagram.objects.filter(content=models.OuterRef('pk'))
+        .order_by()
+        .values('content')
+        .annotate(count=models.Count('pk'))
+        .values('count')
+    )
+    DiagramContent.objects.update(ref_count=models.Subquery(references))
+
+
+def _store_contents(Diagram, DiagramContent, diagrams):
+    contents = {
+        diagram.content_id: DiagramContent(digest=diagram.content_id, json=diagram.json)
+        for diagram in diagrams
+    }
+    DiagramContent.objects.bulk_create(contents.values(), ignore_conflicts=True)
+    Diagram.objects.bulk_update(diagrams, ['content'])
+
+
+def move_contents_to_json(apps, schema_editor):
+    Diagram = apps.get_model('diagrams', 'Diagram')
+    diagrams = Diagram.objects.select_related('content').iterator(chunk_size=500)
+    batch = []
+    for diagram in diagrams:
+        diagram.json = diagram.content.json
+        diagram.json_hash = diagram.content_id
+        batch.append(diagram)
+        if len(batch) == 500:
+            Diagram.objects.bulk_update(batch, ['json', 'json_hash'])
+            batch = []
+    Diagram.objects.bulk_update(batch, ['json', 'json_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagrams', '0002_diagram_json_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiagramContent',
+            fields=[
+                ('digest', models.CharField(editable=False, help_text='SHA-256 hash of the canonical JSON encoding of the document.', max_length=64, primary_key=True, serialize=False, verbose_name='Digest')),
+                ('json', models.JSONField(help_text='Diagram structure and properties in JSON format.', verbose_name='Diagram JSON')),
+                ('ref_count', models.PositiveIntegerField(default=0, help_text='Number of diagrams which refer to the content.', verbose_name='Reference count')),
+            ],
+            options={
+                'verbose_name': 'Diagram content',
+                'verbose_name_plural': 'Diagram contents',
+            },
+        ),
+        migrations.AddField(
+            model_name='diagram',
+            name='content',
+            field=models.ForeignKey(editable=False, help_text='Diagram JSON, which is stored once for all diagrams with the same content.', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='diagrams', to='diagrams.diagramcontent', verbose_name='Diagram content'),
+        ),
+        migrations.AlterField(
+            model_name='diagram',
+            name='json',
+            field=models.JSONField(help_text='Diagram structure and properties in JSON format.', null=True, verbose_name='Diagram JSON'),
+        ),
+        migrations.RunPython(move_json_to_contents, move_contents_to_json),
+        migrations.RemoveField(
+            model_name='diagram',
+            name='json',
+        ),
+        migrations.RemoveField(
+            model_name='diagram',
+            name='json_hash',
+        ),
+        migrations.AlterField(
+            model_name='diagram',
+            name='content',
+            field=models.ForeignKey(editable=False, help_text='Diagram JSON, which is stored once for all diagrams with the same content.', on_delete=django.db.models.deletion.PROTECT, related_name='diagrams', to='diagrams.diagramcontent', verbose_name='Diagram content'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-17 13:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagrams', '0003_diagram_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiagramContentDictionary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField(verbose_name='Dictionary data')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+            ],
+            options={
+                'verbose_name': 'Diagram content dictionary',
+                'verbose_name_plural': 'Diagram content dictionaries',
+            },
+        ),
+        migrations.AddField(
+            model_name='diagramcontent',
+            name='codec',
+            field=models.CharField(blank=True, default='', help_text='Codec which compressed the document, empty if not compressed.', max_length=8, verbose_name='Codec'),
+        ),
+        migrations.AddField(
+            model_name='diagramcontent',
+            name='data',
+            field=models.BinaryField(help_text='UTF-8 JSON encoding of the document compressed by the codec.', null=True, verbose_name='Compressed JSON'),
+        ),
+        migrations.AlterField(
+            model_name='diagramcontent',
+            name='json',
+            field=models.JSONField(blank=True, help_text='Diagram structure and properties in JSON format if the content is not compressed.', null=True, verbose_name='Diagram JSON'),
+        ),
+        migrations.AddField(
+            model_name='diagramcontent',
+            name='dictionary',
+            field=models.ForeignKey(blank=True, help_text='Dictionary which the document was compressed with.', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='contents', to='diagrams.diagramcontentdictionary', verbose_name='Dictionary'),
+        ),
+    ]
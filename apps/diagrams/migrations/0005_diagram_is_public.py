@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-17 13:13
+
+from django.db import migrations, models
+
+
+def set_public_flags(apps, schema_editor):
+    Diagram = apps.get_model('diagrams', 'Diagram')
+    Collaborator = apps.get_model('sharings', 'Collaborator')
+    Diagram.objects.filter(
+        pk__in=Collaborator.objects.filter(shared_to=None).values('diagram_id')
+    ).update(is_public=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagrams', '0004_diagram_content_codec'),
+        ('sharings', '0002_alter_collaborator_shared_to_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diagram',
+            name='is_public',
+            field=models.BooleanField(db_index=True, default=False, editable=False, help_text='Whether the diagram is shared publicly. It is maintained by public shares (collaborators) and never saved with the diagram.', verbose_name='Is public'),
+        ),
+        migrations.RunPython(set_public_flags, migrations.RunPython.noop),
+    ]
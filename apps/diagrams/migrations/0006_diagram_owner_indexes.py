@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-17 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.core.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently on PostgreSQL (see apps.core.operations).
+    atomic = False
+
+    dependencies = [
+        ('diagrams', '0005_diagram_is_public'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='diagram',
+            index=models.Index(fields=['owner', 'updated_at'], name='diagram_owner_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='diagram',
+            index=models.Index(fields=['owner', 'title'], name='diagram_owner_title_idx'),
+        ),
+    ]
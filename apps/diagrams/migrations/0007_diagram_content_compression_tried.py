@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagrams', '0006_diagram_owner_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diagramcontent',
+            name='compression_tried',
+            field=models.CharField(blank=True, default='', help_text="Codec and dictionary (e.g. 'zstd:3') which did not make the document smaller, so it is stored uncompressed.", max_length=32, verbose_name='Compression tried'),
+        ),
+    ]
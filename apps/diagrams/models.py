@@ -1,7 +1,394 @@
+import hashlib
+import json
+import re
 import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models.functions import Concat
+from django.utils.timezone import now
+
+from apps.diagrams import codecs
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NOT_LOADED = object()
+# The latest dictionary is looked up by `DiagramContent.encode()`.
+LATEST_DICTIONARY = object()
+
+
+class DiagramContentDictionaryManager(models.Manager):
+    # Dictionaries are never changed, so their data is cached by id.
+    _cache: Dict[int, bytes] = {}
+
+    def get_data(self, pk: int) -> bytes:
+        if pk not in self._cache:
+            self._cache[pk] = bytes(self.values_list("data", flat=True).get(pk=pk))
+        return self._cache[pk]
+
+    def latest_id(self) -> Optional[int]:
+        return self.order_by("-id").values_list("id", flat=True).first()
+
+
+class DiagramContentDictionary(models.Model):
+    """
+    zstd dictionary trained on samples of diagram contents
+    (see `compress_diagram_contents` command).
+    """
+
+    data = models.BinaryField(verbose_name="Dictionary data")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created at")
+
+    objects = DiagramContentDictionaryManager()
+
+    class Meta:
+        verbose_name = "Diagram content dictionary"
+        verbose_name_plural = "Diagram content dictionaries"
+
+    def __str__(self):
+        return f"id: {self.id} | created at: {self.created_at}"
+
+
+class DiagramContentManager(models.Manager):
+    def acquire(self, value: Any) -> str:
+        """
+        Returns the digest of the content with the JSON value and adds a reference
+        to it, the content is stored if it does not exist yet.
+        """
+        digest = DiagramContent.hash_json(value)
+        if self.filter(pk=digest).update(ref_count=models.F("ref_count") + 1):
+            return digest
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(digest=digest, ref_count=1, **DiagramContent.encode(value))
+        except IntegrityError:
+            # The same content was stored by a concurrent transaction.
+            self.filter(pk=digest).update(ref_count=models.F("ref_count") + 1)
+        return digest
+
+    def acquire_many(self, values: Sequence[Any]) -> List[str]:
+        """
+        Same as `acquire()` for several JSON values by a constant number of
+        queries: contents which do not exist yet are inserted by a single
+        `bulk_create()` (just they are encoded), then references to all of them
+        are added by a single `UPDATE`. Returns digests in the order of values.
+        """
+        digests = [DiagramContent.hash_json(value) for value in values]
+        references = Counter(digests)
+        if not references:
+            return digests
+        documents = dict(zip(digests, values))
+        with transaction.atomic(using=self.db):
+            existing = set(self.filter(pk__in=references).values_list("pk", flat=True))
+            codec, dictionary_id = DiagramContent.resolve_encoding()
+            self.bulk_create(
+                [
+                    DiagramContent(
+                        digest=digest,
+                        ref_count=0,
+                        **DiagramContent.encode(document, codec, dictionary_id),
+                    )
+                    for digest, document in documents.items()
+                    if digest not in existing
+                ],
+                # The same contents can be stored by concurrent transactions.
+                ignore_conflicts=True,
+            )
+            self.filter(pk__in=references).update(
+                ref_count=models.F("ref_count") + self.counts(references)
+            )
+        return digests
+
+    @staticmethod
+    def counts(references: Mapping[str, int]) -> models.Case:
+        """
+        Returns the expression of the number of references by digest of
+        the content, contents with the same number share a `WHEN` clause.
+        """
+        digests_by_count = defaultdict(list)
+        for digest, count in references.items():
+            digests_by_count[count].append(digest)
+        return models.Case(
+            *(
+                models.When(pk__in=counted, then=models.Value(count))
+                for count, counted in digests_by_count.items()
+            ),
+            output_field=models.PositiveIntegerField(),
+        )
+
+    def release(self, references: Mapping[str, int]) -> None:
+        """
+        Removes references (number of them by digest) to the contents and
+        deletes the contents which are not referred anymore. References are
+        removed by a single `UPDATE` whatever the number of contents is.
+        """
+        if not references:
+            return
+        self.filter(pk__in=references).update(
+            ref_count=models.F("ref_count") - self.counts(references)
+        )
+        self.filter(pk__in=references, ref_count__lte=0).delete()
+
+
+class DiagramContent(models.Model):
+    """
+    Diagram document stored once by the digest of its content and shared
+    by all diagrams with the same content, e.g. copies of a diagram.
+    Contents are never changed: a diagram which document is edited refers
+    to another content (copy-on-write), and the content is deleted when
+    no diagram refers to it.
+    The document is stored either in `json` column or compressed in `data`
+    column by the codec (see `DIAGRAM_CONTENT_CODEC` setting), `value` returns
+    the decoded document in both cases.
+    """
+
+    digest = models.CharField(
+        max_length=64,
+        primary_key=True,
+        editable=False,
+        verbose_name="Digest",
+        help_text="SHA-256 hash of the canonical JSON encoding of the document.",
+    )
+    json = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name="Diagram JSON",
+        help_text="Diagram structure and properties in JSON format "
+        "if the content is not compressed.",
+    )
+    codec = models.CharField(
+        max_length=8,
+        blank=True,
+        default=codecs.NONE,
+        verbose_name="Codec",
+        help_text="Codec which compressed the document, empty if not compressed.",
+    )
+    data = models.BinaryField(
+        null=True,
+        verbose_name="Compressed JSON",
+        help_text="UTF-8 JSON encoding of the document compressed by the codec.",
+    )
+    dictionary = models.ForeignKey(
+        DiagramContentDictionary,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="contents",
+        verbose_name="Dictionary",
+        help_text="Dictionary which the document was compressed with.",
+    )
+    compression_tried = models.CharField(
+        max_length=32,
+        blank=True,
+        default="",
+        verbose_name="Compression tried",
+        help_text="Codec and dictionary (e.g. 'zstd:3') which did not make "
+        "the document smaller, so it is stored uncompressed.",
+    )
+    ref_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Reference count",
+        help_text="Number of diagrams which refer to the content.",
+    )
+
+    objects = DiagramContentManager()
+
+    class Meta:
+        verbose_name = "Diagram content"
+        verbose_name_plural = "Diagram contents"
+
+    def __str__(self):
+        return f"digest: {self.digest} | references: {self.ref_count}"
+
+    @property
+    def value(self) -> Any:
+        """
+        Decoded diagram document.
+        """
+        if not self.codec:
+            return self.json
+        return json.loads(self.decode_text(self.codec, self.data, self.dictionary_id))
+
+    @staticmethod
+    def decode_text(
+        codec: str, data: bytes, dictionary_id: Optional[int] = None
+    ) -> str:
+        """
+        Returns JSON text of a compressed document.
+        """
+        dictionary = None
+        if dictionary_id is not None:
+            dictionary = DiagramContentDictionary.objects.get_data(dictionary_id)
+        return codecs.decompress(bytes(data), codec, dictionary).decode()
+
+    @staticmethod
+    def resolve_encoding(codec: Optional[str] = None) -> Tuple[str, Optional[int]]:
+        """
+        Returns the codec which documents are compressed by, the default one
+        is `DIAGRAM_CONTENT_CODEC` setting, and the id of the dictionary it uses:
+        zstd codec uses the latest dictionary if any was trained. Batches of
+        documents resolve it once and pass it to `encode()`.
+        """
+        codec = codecs.resolve(
+            settings.DIAGRAM_CONTENT_CODEC if codec is None else codec
+        )
+        dictionary_id = None
+        if codec == codecs.ZSTD:
+            dictionary_id = DiagramContentDictionary.objects.latest_id()
+        return codec, dictionary_id
+
+    @staticmethod
+    def compression_key(codec: str, dictionary_id: Optional[int]) -> str:
+        """
+        Returns the value of `compression_tried` for the codec and dictionary.
+        """
+        return f"{codec}:{'' if dictionary_id is None else dictionary_id}"
+
+    @staticmethod
+    def encode(
+        value: Any, codec: Optional[str] = None, dictionary_id=LATEST_DICTIONARY
+    ) -> Dict[str, Any]:
+        """
+        Returns values of the storage fields (`json`, `codec`, `data`,
+        `dictionary_id` and `compression_tried`) of the document compressed
+        by the codec and the dictionary, they are resolved by `resolve_encoding()`
+        unless the dictionary is given. The document is stored uncompressed if
+        compression does not make it smaller.
+        """
+        if dictionary_id is LATEST_DICTIONARY:
+            codec, dictionary_id = DiagramContent.resolve_encoding(codec)
+        fields = {
+            "json": value,
+            "codec": codecs.NONE,
+            "data": None,
+            "dictionary_id": None,
+            "compression_tried": "",
+        }
+        if codec == codecs.NONE:
+            return fields
+        dictionary = None
+        if dictionary_id is not None:
+            dictionary = DiagramContentDictionary.objects.get_data(dictionary_id)
+        text = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+        data = codecs.compress(text, codec, dictionary)
+        if len(data) < len(text):
+            fields.update(
+                json=None, codec=codec, data=data, dictionary_id=dictionary_id
+            )
+        else:
+            fields["compression_tried"] = DiagramContent.compression_key(
+                codec, dictionary_id
+            )
+        return fields
+
+    @staticmethod
+    def hash_json(value: Any) -> str:
+        """
+        Returns SHA-256 hex digest of the canonical (sorted keys, compact)
+        encoding of a JSON value.
+        """
+        encoded = json.dumps(
+            value, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        )
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class DiagramQuerySet(models.QuerySet):
+    def insert_copies(
+        self,
+        copy_ids: Dict[uuid.UUID, uuid.UUID],
+        owner_id: uuid.UUID,
+        description: Optional[str] = None,
+    ) -> int:
+        """
+        Copies the diagrams of the queryset which ids are the keys of `copy_ids`
+        to the owner with a single `INSERT ... SELECT` statement. The copies
+        refer to the same contents, so the documents are neither transferred
+        nor duplicated, just reference counts of the contents are increased.
+        The copies get ids from `copy_ids` values and `Copy of {title}` titles.
+        Filters of the queryset (e.g. permission checks) are applied by the same
+        statement. Returns the number of copied diagrams.
+        """
+        if not copy_ids:
+            return 0
+        timestamp = now()
+        copy_id = models.Case(
+            *(
+                models.When(pk=diagram_id, then=models.Value(new_id))
+                for diagram_id, new_id in copy_ids.items()
+            ),
+            output_field=models.UUIDField(),
+        )
+        values = {
+            "id": copy_id,
+            "title": Concat(models.Value("Copy of "), "title"),
+            "owner": models.Value(owner_id, output_field=models.UUIDField()),
+            "created_at": models.Value(timestamp, output_field=models.DateTimeField()),
+            "updated_at": models.Value(timestamp, output_field=models.DateTimeField()),
+            "is_public": models.Value(False),
+        }
+        if description is not None:
+            values["description"] = models.Value(description)
+        fields = self.model._meta.concrete_fields
+        # Values of other fields are copied as they are, the aliases
+        # are prefixed to avoid clashes with the field names.
+        select = (
+            self.filter(pk__in=copy_ids)
+            .order_by()
+            .values(
+                **{
+                    f"copy_{field.name}": values.get(field.name, models.F(field.name))
+                    for field in fields
+                }
+            )
+        )
+        sql, params = select.query.get_compiler(self.db).as_sql()
+        connection = connections[self.db]
+        columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with transaction.atomic(using=self.db):
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {table} ({columns}) {sql}", params)
+                copied = cursor.rowcount
+            copies = self.model.objects.filter(pk__in=copy_ids.values())
+            copies_count = (
+                copies.filter(content=models.OuterRef("pk"))
+                .order_by()
+                .values("content")
+                .annotate(count=models.Count("pk"))
+                .values("count")
+            )
+            DiagramContent.objects.filter(pk__in=copies.values("content")).update(
+                ref_count=models.F("ref_count") + models.Subquery(copies_count)
+            )
+        return copied
+
+    def shared_to(self, user) -> "DiagramQuerySet":
+        """
+        Returns the diagrams which were shared to the user, directly or through
+        his teams, annotated with the highest `permission_level` they were
+        shared with. The grants are joined grouped by diagram (see
+        `apps.sharings.access.join_grants()`), so a diagram shared several
+        times is returned once, and the memberships of the user are resolved
+        by the same query.
+        """
+        # The sharings app depends on the diagrams models.
+        from apps.sharings.access import join_grants
+
+        return join_grants(self, user)
+
+    def delete(self) -> Tuple[int, Dict[str, int]]:
+        """
+        Deletes the diagrams and releases their contents.
+        """
+        with transaction.atomic(using=self.db):
+            references = Counter(self.values_list("content", flat=True))
+            deleted = super().delete()
+            DiagramContent.objects.release(references)
+        return deleted
 
 
 class Diagram(models.Model):
@@ -9,11 +396,14 @@ class Diagram(models.Model):
     title = models.CharField(
         max_length=255, null=False, blank=False, verbose_name="Diagram title"
     )
-    json = models.JSONField(
-        null=False,
-        blank=False,
-        verbose_name="Diagram JSON",
-        help_text="Diagram structure and properties in JSON format.",
+    content = models.ForeignKey(
+        DiagramContent,
+        on_delete=models.PROTECT,
+        related_name="diagrams",
+        editable=False,
+        verbose_name="Diagram content",
+        help_text="Diagram JSON, which is stored once for all diagrams "
+        "with the same content.",
     )
     description = models.TextField(
         blank=True, default="", verbose_name="Diagram description"
@@ -25,12 +415,167 @@ class Diagram(models.Model):
         verbose_name="Contributor",
         help_text="User who added this diagram to the database.",
     )
+    is_public = models.BooleanField(
+        default=False,
+        db_index=True,
+        editable=False,
+        verbose_name="Is public",
+        help_text="Whether the diagram is shared publicly. It is maintained "
+        "by public shares (collaborators) and never saved with the diagram.",
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created at")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated at")
 
+    objects = DiagramQuerySet.as_manager()
+
+    # The document value if it was loaded or set, and whether it was changed.
+    _json = NOT_LOADED
+    _json_changed = False
+
     class Meta:
         verbose_name = "Diagram"
         verbose_name_plural = "Diagrams"
+        indexes = [
+            # Lists of the owner's diagrams sorted by update time or title.
+            models.Index(
+                fields=["owner", "updated_at"], name="diagram_owner_updated_idx"
+            ),
+            models.Index(fields=["owner", "title"], name="diagram_owner_title_idx"),
+        ]
 
     def __str__(self):
         return f"id: {self.id} | {self.owner} | {self.title}"
+
+    @property
+    def json(self) -> Any:
+        """
+        Diagram structure and properties in JSON format.
+        It is loaded from the diagram content on first access.
+        """
+        if self._json is NOT_LOADED:
+            self._json = self.content.value
+        return self._json
+
+    @json.setter
+    def json(self, value: Any) -> None:
+        self._json = value
+        self._json_changed = True
+
+    def save(self, *args, **kwargs):
+        """
+        Switches the diagram to the content of its `json` if the latter was changed.
+        `json` can be listed in `update_fields`.
+        """
+        update_fields = kwargs.get("update_fields")
+        saves_json = self._json_changed and (
+            update_fields is None or "json" in update_fields
+        )
+        if update_fields is None and not self._state.adding:
+            # The public flag can be changed since the diagram was loaded.
+            kwargs["update_fields"] = [field.name for field in self.saved_fields()]
+        elif update_fields is not None and "json" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "content"} - {"json"}
+        if not saves_json:
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic(using=kwargs.get("using")):
+            released_content_id = self.content_id
+            self.content_id = DiagramContent.objects.acquire(self._json)
+            super().save(*args, **kwargs)
+            if released_content_id is not None:
+                DiagramContent.objects.release({released_content_id: 1})
+        self._json_changed = False
+
+    def saved_fields(self) -> List[models.Field]:
+        """
+        Returns the fields which are saved by updates: all concrete fields
+        except the primary key and `is_public`.
+        """
+        return [
+            field
+            for field in self._meta.concrete_fields
+            if not field.primary_key and field.name != "is_public"
+        ]
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            deleted = super().delete(*args, **kwargs)
+            DiagramContent.objects.release({self.content_id: 1})
+        return deleted
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        if fields is None or {"json", "content"} & set(fields):
+            self._json, self._json_changed = NOT_LOADED, False
+
+    @property
+    def etag(self) -> str:
+        """
+        Strong entity tag of the JSON representation of the diagram made of
+        the `updated_at` timestamp in microseconds and the beginning of
+        the content digest.
+        """
+        return self.get_etag()
+
+    def get_etag(self, representation: str = "") -> str:
+        """
+        Strong entity tag of the diagram representation (e.g. "msgpack"),
+        which is the `etag` suffixed by the representation unless it is JSON,
+        because strong tags of different bodies must differ.
+        """
+        timestamp = (self.updated_at - EPOCH) // timedelta(microseconds=1)
+        suffix = f"-{representation}" if representation else ""
+        return f'"{timestamp}-{self.content_id[:16]}{suffix}"'
+
+    @staticmethod
+    def parse_etag(etag: str) -> Optional[Tuple[datetime, str]]:
+        """
+        Returns `updated_at` and the content digest prefix encoded in an entity tag
+        of any representation made by `get_etag()` or None if the tag
+        is malformed.
+        """
+        match = re.fullmatch(r'"(\d+)-([0-9a-f]{16})(?:-[a-z]+)?"', etag.strip())
+        if match is None:
+            return None
+        updated_at = EPOCH + timedelta(microseconds=int(match.group(1)))
+        return updated_at, match.group(2)
+
+    def save_if_match(self, etags: Iterable[str]) -> bool:
+        """
+        Saves the diagram with a single conditional `UPDATE` which matches the row
+        only if it is still in a state identified by one of the entity tags
+        (see `etag`), i.e. `updated_at` and the content digest prefix are the same.
+        No row is locked before the update, so concurrent writers do not wait
+        for each other: the first one wins and the rest get False,
+        while the row is left unchanged.
+        """
+        condition = models.Q()
+        for etag in etags:
+            parsed = self.parse_etag(etag)
+            if parsed is not None:
+                updated_at, digest_prefix = parsed
+                condition |= models.Q(
+                    updated_at=updated_at, content__digest__startswith=digest_prefix
+                )
+        if not condition:
+            return False
+
+        with transaction.atomic():
+            released_content_id = self.content_id
+            if self._json_changed:
+                self.content_id = DiagramContent.objects.acquire(self._json)
+            self.updated_at = now()
+            values = {
+                field.attname: getattr(self, field.attname)
+                for field in self.saved_fields()
+                if field.name != "created_at"
+            }
+            queryset = type(self)._base_manager.filter(condition, pk=self.pk)
+            if not queryset.update(**values):
+                transaction.set_rollback(True)
+                self.content_id = released_content_id
+                return False
+            if self._json_changed:
+                DiagramContent.objects.release({released_content_id: 1})
+        self._json_changed = False
+        return True
@@ -0,0 +1,305 @@
+"""
+Resolution of the effective access of a user to a diagram: ownership, admin role,
+the permission level the diagram was shared to the user with, and whether
+the diagram is public (`Diagram.is_public`). Access is resolved once per request
+and diagram, preferably from annotations made by the query which loaded
+the diagram (see `annotate_access()`), so permission classes do not query
+the database.
+
+A diagram is shared to a user either directly (`Collaborator`) or through
+a team the user is a member of (`TeamCollaborator`). Memberships are resolved
+by the queries themselves, and the user has the highest permission level
+of all his grants. Lists of shared diagrams join the grants of the user
+grouped by diagram (see `join_grants()`), single diagrams look their grants
+up by correlated subqueries (see `granted_permission_level()`).
+"""
+
+from typing import Optional
+
+import django
+from django.db.models import (
+    Case,
+    CharField,
+    Expression,
+    F,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Concat, Greatest, NullIf, Substr
+from django.db.models.sql.constants import INNER
+from django.utils.functional import cached_property
+from rest_framework.request import Request
+
+from apps.diagrams.models import Diagram
+from apps.sharings.constants import PermissionLevels
+from apps.sharings.models import Collaborator, TeamCollaborator, TeamMember
+
+
+def team_ids(user) -> QuerySet[TeamMember]:
+    """
+    Returns the subquery of ids of the teams of the user, which is driven
+    by the `team_member_user_team_unique` index.
+    """
+    return TeamMember.objects.filter(user_id=user.id).values("team_id")
+
+
+def ranked_permission_level() -> Concat:
+    """
+    Returns the permission level prefixed by its rank (e.g. "3view-edit"),
+    so the highest level of several grants is the greatest of the values.
+    """
+    return Concat(
+        Case(
+            *[
+                When(permission_level=level, then=Value(str(rank)))
+                for rank, (level, _) in enumerate(PermissionLevels.CHOICES, 1)
+            ],
+        ),
+        "permission_level",
+        output_field=CharField(),
+    )
+
+
+def grants(user) -> QuerySet[Collaborator]:
+    """
+    Returns the query of the grants of the user, directly or through his teams,
+    as pairs of `shared_diagram_id` and `ranked` permission level. A diagram is
+    included once per grant. Both kinds of grants are driven by the unique
+    indexes which include permission levels, so they are scanned index-only.
+    """
+    return (
+        Collaborator.objects.filter(shared_to_id=user.id)
+        .values(shared_diagram_id=F("diagram_id"), ranked=ranked_permission_level())
+        .union(
+            TeamCollaborator.objects.filter(team_id__in=team_ids(user)).values(
+                shared_diagram_id=F("diagram_id"), ranked=ranked_permission_level()
+            ),
+            all=True,
+        )
+    )
+
+
+def granted_diagram_ids(user) -> QuerySet[Collaborator]:
+    """
+    Returns the subquery of ids of the diagrams shared to the user, directly
+    or through his teams. A diagram is included once per grant.
+    """
+    return (
+        Collaborator.objects.filter(shared_to_id=user.id)
+        .values("diagram_id")
+        .union(
+            TeamCollaborator.objects.filter(team_id__in=team_ids(user)).values(
+                "diagram_id"
+            ),
+            all=True,
+        )
+    )
+
+
+class GrantsJoin:
+    """
+    Inner join of the diagrams with the grants of the user (see `grants()`)
+    grouped by diagram to the highest `ranked` permission level, so diagrams
+    shared several times are joined once. Django joins only relations, so
+    it is added to the query by `Query.join()` as joins of relations are,
+    and its aliases are relabeled when the query is nested.
+
+    It implements the interface of `django.db.models.sql.datastructures.Join`
+    which is private, so it is used just with the Django versions it was
+    checked with (`django_versions`), the others fall back to subqueries.
+    """
+
+    django_versions = ((5, 0),)
+    # Attributes and methods of `Join` which are used by `Query` and compilers.
+    interface = (
+        "table_name",
+        "parent_alias",
+        "table_alias",
+        "join_type",
+        "nullable",
+        "filtered_relation",
+        "identity",
+        "as_sql",
+        "relabeled_clone",
+        "demote",
+        "promote",
+    )
+
+    table_name = "sharings_grants"
+    join_type = INNER
+    nullable = False
+    filtered_relation = None
+
+    def __init__(self, user, parent_alias: str, table_alias: Optional[str] = None):
+        self.user = user
+        self.parent_alias = parent_alias
+        self.table_alias = table_alias
+
+    def as_sql(self, compiler, connection):
+        grants_sql, params = (
+            grants(self.user).query.get_compiler(connection=connection).as_sql()
+        )
+        qn = compiler.quote_name_unless_alias
+        qn2 = connection.ops.quote_name
+        diagram_id, ranked = qn2("shared_diagram_id"), qn2("ranked")
+        sql = (
+            f"{self.join_type} (SELECT {diagram_id}, MAX({ranked}) AS {ranked} "
+            f"FROM ({grants_sql}) {qn2('grants')} GROUP BY {diagram_id}) "
+            f"{qn(self.table_alias)} ON ({qn(self.table_alias)}.{diagram_id} = "
+            f"{qn(self.parent_alias)}.{qn2(Diagram._meta.pk.column)})"
+        )
+        return sql, params
+
+    def relabeled_clone(self, change_map):
+        return self.__class__(
+            self.user,
+            change_map.get(self.parent_alias, self.parent_alias),
+            change_map.get(self.table_alias, self.table_alias),
+        )
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        return django.VERSION[:2] in cls.django_versions
+
+    @property
+    def identity(self):
+        return self.__class__, self.user.id, self.parent_alias
+
+    def __eq__(self, other):
+        if not isinstance(other, GrantsJoin):
+            return NotImplemented
+        return self.identity == other.identity
+
+    def __hash__(self):
+        return hash(self.identity)
+
+    def demote(self):
+        return self.relabeled_clone({})
+
+    def promote(self):
+        # Grants are never optional, diagrams without them are not listed.
+        return self.relabeled_clone({})
+
+
+class GrantsColumn(Expression):
+    """
+    Column of the grants joined by `GrantsJoin`.
+    """
+
+    contains_column_references = True
+
+    def __init__(self, alias: str, column: str, output_field=None):
+        super().__init__(output_field=output_field)
+        self.alias, self.column = alias, column
+
+    def as_sql(self, compiler, connection):
+        qn = compiler.quote_name_unless_alias
+        return f"{qn(self.alias)}.{connection.ops.quote_name(self.column)}", []
+
+    def relabeled_clone(self, change_map):
+        return self.__class__(
+            change_map.get(self.alias, self.alias), self.column, self.output_field
+        )
+
+    def get_group_by_cols(self):
+        return [self]
+
+
+def join_grants(queryset: QuerySet[Diagram], user) -> QuerySet[Diagram]:
+    """
+    Returns the diagrams of the queryset which were shared to the user,
+    annotated with the highest `permission_level` they were shared with.
+    Grants are read by a single pass over both kinds of them, which is joined
+    with the diagrams, instead of subqueries per diagram. Django versions
+    `GrantsJoin` does not support filter the diagrams by the ids of the grants
+    and look their permission levels up by correlated subqueries instead.
+    """
+    if not GrantsJoin.is_supported():
+        return queryset.filter(pk__in=granted_diagram_ids(user)).annotate(
+            permission_level=granted_permission_level(user)
+        )
+    queryset = queryset.all()
+    query = queryset.query
+    alias = query.join(GrantsJoin(user, query.get_initial_alias()))
+    ranked = GrantsColumn(alias, "ranked", output_field=CharField())
+    return queryset.annotate(permission_level=Substr(ranked, 2))
+
+
+def granted_permission_level(user) -> NullIf:
+    """
+    Returns the expression of the highest permission level the diagram was
+    shared to the user with, directly or through his teams (None if it was not).
+    Each kind of grants is looked up by a single correlated subquery.
+    """
+    direct = Subquery(
+        Collaborator.objects.filter(diagram_id=OuterRef("id"), shared_to_id=user.id)
+        .annotate(ranked=ranked_permission_level())
+        .values("ranked")
+    )
+    team = Subquery(
+        TeamCollaborator.objects.filter(
+            diagram_id=OuterRef("id"), team_id__in=team_ids(user)
+        )
+        .annotate(ranked=ranked_permission_level())
+        .order_by("-ranked")
+        .values("ranked")[:1]
+    )
+    highest = Greatest(Coalesce(direct, Value("")), Coalesce(team, Value("")))
+    return NullIf(Substr(highest, 2), Value(""), output_field=CharField())
+
+
+def annotate_access(queryset: QuerySet[Diagram], user) -> QuerySet[Diagram]:
+    """
+    Annotates the diagrams with the highest `permission_level` they were shared
+    to the user with (None if they were not) unless the queryset already has
+    the annotation.
+    """
+    if "permission_level" in queryset.query.annotations:
+        return queryset
+    if not user.is_authenticated:
+        return queryset.annotate(permission_level=Value(None, output_field=CharField()))
+    return queryset.annotate(permission_level=granted_permission_level(user))
+
+
+class DiagramAccess:
+    """
+    Effective access of a user to a diagram. The permission level is read
+    from the diagram annotation if it has one, otherwise it is fetched
+    on first access.
+    """
+
+    def __init__(self, user, diagram: Diagram):
+        self.user = user
+        self.diagram = diagram
+        self.is_admin = bool(getattr(user, "is_admin", False))
+        self.is_owner = user.is_authenticated and diagram.owner_id == user.id
+        self.is_public = diagram.is_public
+
+    @cached_property
+    def permission_level(self) -> Optional[str]:
+        if hasattr(self.diagram, "permission_level"):
+            return self.diagram.permission_level
+        if not self.user.is_authenticated:
+            return None
+        return (
+            Diagram.objects.filter(pk=self.diagram.pk)
+            .annotate(permission_level=granted_permission_level(self.user))
+            .values_list("permission_level", flat=True)
+            .first()
+        )
+
+
+def get_diagram_access(request: Request, diagram: Diagram) -> DiagramAccess:
+    """
+    Returns access of the request user to the diagram which is resolved
+    once per request, e.g. for all permission classes combined by `|`.
+    """
+    cache = getattr(request, "_diagram_access", None)
+    if cache is None:
+        cache = request._diagram_access = {}
+    if diagram.pk not in cache:
+        cache[diagram.pk] = DiagramAccess(request.user, diagram)
+    return cache[diagram.pk]
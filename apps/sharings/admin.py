@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from apps.sharings.models import Collaborator
+from apps.sharings.models import Collaborator, Team, TeamCollaborator, TeamMember
 
 
 class CollaboratorAdmin(admin.ModelAdmin):
@@ -11,8 +11,41 @@ class CollaboratorAdmin(admin.ModelAdmin):
         "permission_level",
         "shared_at",
     )
+    # The diagram is shown with its owner.
+    list_select_related = ("diagram__owner", "shared_to")
     fields = ("diagram", "shared_to", "permission_level")
     search_fields = ("diagram__title", "shared_to__email")
 
 
+class TeamMemberInline(admin.TabularInline):
+    model = TeamMember
+    fields = ("user", "joined_at")
+    readonly_fields = ("joined_at",)
+    raw_id_fields = ("user",)
+    extra = 0
+
+
+class TeamAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "owner", "created_at")
+    list_select_related = ("owner",)
+    fields = ("name", "owner")
+    search_fields = ("name", "owner__email")
+    inlines = (TeamMemberInline,)
+
+
+class TeamCollaboratorAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "diagram",
+        "team",
+        "permission_level",
+        "shared_at",
+    )
+    list_select_related = ("diagram__owner", "team__owner")
+    fields = ("diagram", "team", "permission_level")
+    search_fields = ("diagram__title", "team__name")
+
+
 admin.site.register(Collaborator, CollaboratorAdmin)
+admin.site.register(Team, TeamAdmin)
+admin.site.register(TeamCollaborator, TeamCollaboratorAdmin)
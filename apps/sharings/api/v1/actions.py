@@ -3,8 +3,9 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from apps.sharings import invitations
 from apps.sharings.constants import PermissionLevels
-from apps.sharings.models import Collaborator
+from apps.sharings.models import Collaborator, TeamCollaborator
 
 
 def invite_collaborator(self: ModelViewSet, request: Request, **_kwargs) -> Response:
@@ -22,13 +23,64 @@ def invite_collaborator(self: ModelViewSet, request: Request, **_kwargs) -> Resp
     return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
 
+def invite_collaborators(self: ModelViewSet, request: Request, **_kwargs) -> Response:
+    """
+    API endpoint that allows to share an existing diagram with several users
+    at once (see `apps.sharings.invitations`). Invalid invitations do not
+    prevent the valid ones, results of all invitations are returned
+    in their order.
+    """
+    diagram = self.get_object()
+    serializer = self.get_serializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    results = invitations.invite_collaborators(
+        diagram, serializer.validated_data["invitations"]
+    )
+    created = sum("errors" not in result for result in results)
+    return Response(
+        {"created": created, "failed": len(results) - created, "results": results},
+        status=status.HTTP_200_OK,
+    )
+
+
+def update_collaborators(self: ModelViewSet, request: Request, **_kwargs) -> Response:
+    """
+    API endpoint that allows to change the permission level of the selected
+    collaborators by a single `UPDATE` statement. The statement is restricted
+    to the collaborators of the queryset of the view, i.e. of diagrams which
+    the user owns unless he is an admin, instead of checking object permissions.
+    Public shares are always view-only, so they are not changed.
+    """
+    serializer = self.get_serializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    updated = (
+        serializer.filter_queryset(self.get_queryset())
+        .exclude(shared_to=None)
+        .update(permission_level=serializer.validated_data["permission_level"])
+    )
+    return Response({"updated": updated}, status=status.HTTP_200_OK)
+
+
+def delete_collaborators(self: ModelViewSet, request: Request, **_kwargs) -> Response:
+    """
+    API endpoint that allows to delete the selected collaborators by a single
+    `DELETE` statement restricted to the collaborators of the queryset of
+    the view (see `update_collaborators()`).
+    """
+    serializer = self.get_serializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    deleted, _ = serializer.filter_queryset(self.get_queryset()).delete()
+    return Response({"deleted": deleted}, status=status.HTTP_200_OK)
+
+
 def remove_all_collaborators(self: ModelViewSet, *_args, **_kwargs) -> Response:
     """
     API endpoint that allows to remove all existing collaborators from a
-    certain diagram.
+    certain diagram, including the teams it was shared to.
     """
     diagram = self.get_object()
     Collaborator.objects.filter(diagram=diagram).delete()
+    TeamCollaborator.objects.filter(diagram=diagram).delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -1,7 +1,16 @@
-from rest_framework.pagination import PageNumberPagination
+from apps.core.pagination import KeysetPageNumberPagination
 
 
-class CollaboratorViewSetPagination(PageNumberPagination):
+class CollaboratorViewSetPagination(KeysetPageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+    cursor_ordering_fields = ("diagram_id", "permission_level", "shared_at")
+
+
+class TeamViewSetPagination(CollaboratorViewSetPagination):
+    cursor_ordering_fields = ("name", "created_at")
+
+
+class TeamCollaboratorViewSetPagination(CollaboratorViewSetPagination):
+    cursor_ordering_fields = ("diagram_id", "team_id", "permission_level", "shared_at")
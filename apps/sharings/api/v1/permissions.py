@@ -3,8 +3,9 @@ from rest_framework.request import Request
 from rest_framework.views import APIView
 
 from apps.diagrams.models import Diagram
+from apps.sharings.access import get_diagram_access
 from apps.sharings.constants import PermissionLevels
-from apps.sharings.models import Collaborator
+from apps.sharings.models import Collaborator, Team
 
 
 class IsAdminOrIsSharingOwner(permissions.BasePermission):
@@ -19,20 +20,35 @@ class IsAdminOrIsSharingOwner(permissions.BasePermission):
     ) -> bool:
         if request.user.is_admin:
             return True
-        return obj.diagram.owner == request.user
+        return obj.diagram.owner_id == request.user.id
+
+
+class IsAdminOrIsTeamOwner(permissions.BasePermission):
+    """
+    Custom permission which allows:
+    - admins to do anything with any team;
+    - team members to view the team;
+    - team owners to edit or delete their own team.
+    """
+
+    def has_object_permission(self, request: Request, view: APIView, obj: Team) -> bool:
+        if request.user.is_admin or request.method in permissions.SAFE_METHODS:
+            return True
+        return obj.owner_id == request.user.id
 
 
 class IsCollaborator(permissions.BasePermission):
     """
     Custom permission which allows user to access the diagram
-    if he is the one who the diagram was shared to (i.e. collaborator).
+    if he is the one who the diagram was shared to (i.e. collaborator),
+    directly or through his team.
     Permission "view-only" is required in database.
     """
 
     def has_object_permission(
         self, request: Request, view: APIView, obj: Diagram
     ) -> bool:
-        return Collaborator.objects.filter(diagram=obj, shared_to=request.user).exists()
+        return get_diagram_access(request, obj).permission_level is not None
 
 
 class IsCollaboratorAndHasViewCopyPermission(permissions.BasePermission):
@@ -45,11 +61,8 @@ class IsCollaboratorAndHasViewCopyPermission(permissions.BasePermission):
     def has_object_permission(
         self, request: Request, view: APIView, obj: Diagram
     ) -> bool:
-        return Collaborator.objects.filter(
-            diagram=obj,
-            shared_to=request.user,
-            permission_level=PermissionLevels.VIEWCOPY,
-        ).exists()
+        access = get_diagram_access(request, obj)
+        return access.permission_level == PermissionLevels.VIEWCOPY
 
 
 class IsCollaboratorAndHasViewEditPermission(permissions.BasePermission):
@@ -62,11 +75,8 @@ class IsCollaboratorAndHasViewEditPermission(permissions.BasePermission):
     def has_object_permission(
         self, request: Request, view: APIView, obj: Diagram
     ) -> bool:
-        return Collaborator.objects.filter(
-            diagram=obj,
-            shared_to=request.user,
-            permission_level=PermissionLevels.VIEWEDIT,
-        ).exists()
+        access = get_diagram_access(request, obj)
+        return access.permission_level == PermissionLevels.VIEWEDIT
 
 
 class IsPublicDiagram(permissions.BasePermission):
@@ -78,7 +88,4 @@ class IsPublicDiagram(permissions.BasePermission):
     def has_object_permission(
         self, request: Request, view: APIView, obj: Diagram
     ) -> bool:
-        return Collaborator.objects.filter(
-            diagram=obj,
-            shared_to=None,
-        ).exists()
+        return get_diagram_access(request, obj).is_public
@@ -1,11 +1,16 @@
 import uuid
 from datetime import datetime, timezone
 
+from django.db import IntegrityError, transaction
+from django.db.models import Q, QuerySet
+from django.utils.encoding import smart_str
 from drf_spectacular.utils import OpenApiExample, extend_schema_serializer
 from rest_framework import serializers
 
+from apps.core.serializers import FastRepresentationMixin
+from apps.sharings.access import team_ids
 from apps.sharings.constants import PermissionLevels
-from apps.sharings.models import Collaborator
+from apps.sharings.models import Collaborator, Team, TeamCollaborator, TeamMember
 from apps.sharings.validators import CollaboratorValidator
 from apps.users.models import User
 
@@ -53,6 +58,144 @@ class InviteCollaboratorSerializer(serializers.ModelSerializer):
         return value
 
 
+class PrefetchedSlugRelatedField(serializers.SlugRelatedField):
+    """
+    Same as `SlugRelatedField`, but objects are looked up in the mapping
+    (slug: object) of the `objects_context_key` context entry, which is
+    fetched for many values by a single query instead of a query per value.
+    """
+
+    def __init__(self, objects_context_key: str, **kwargs):
+        self.objects_context_key = objects_context_key
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        obj = self.context[self.objects_context_key].get(str(data))
+        if obj is None:
+            self.fail(
+                "does_not_exist", slug_name=self.slug_field, value=smart_str(data)
+            )
+        return obj
+
+
+class CollaboratorInvitationSerializer(InviteCollaboratorSerializer):
+    """
+    Used to validate invitations of bulk sharing via
+    `POST api/v1/diagrams/{id}/share-invite-users/` with the same errors as
+    `InviteCollaboratorSerializer`. Users and existing shares of the diagram
+    are fetched once for all invitations and provided by the context:
+    `users` by email and `shared_to_ids`.
+    """
+
+    user_email = PrefetchedSlugRelatedField(
+        objects_context_key="users",
+        write_only=True,
+        queryset=User.objects.all(),
+        slug_field="email",
+        source="shared_to",
+        allow_null=False,
+    )
+
+    def validate(self, attrs):
+        attrs["diagram"] = self.context["diagram"]
+        if attrs["shared_to"].id in self.context["shared_to_ids"]:
+            raise CollaboratorValidator.non_unique_sharing_error(
+                attrs["diagram"], attrs["shared_to"]
+            )
+        _ = CollaboratorValidator.validate_self_sharing(attrs)
+        del attrs["diagram"]
+        return attrs
+
+
+class BulkInviteCollaboratorsSerializer(serializers.Serializer):
+    """
+    Used to share a diagram to several users at once via
+    `POST api/v1/diagrams/{id}/share-invite-users/`. Invitations are validated
+    one by one by `CollaboratorInvitationSerializer`.
+    """
+
+    invitations = serializers.ListField(
+        write_only=True, allow_empty=False, max_length=500
+    )
+
+
+class CollaboratorFilterSerializer(serializers.Serializer):
+    """
+    Filter of collaborators changed in bulk: by the diagram, the permission
+    level and the email of the user who the diagram is shared to.
+    """
+
+    diagram_id = serializers.UUIDField(required=False)
+    permission_level = serializers.ChoiceField(
+        choices=PermissionLevels.CHOICES, required=False
+    )
+    shared_to = serializers.EmailField(required=False)
+
+    # Lookups of the filter fields.
+    lookups = {
+        "diagram_id": "diagram_id",
+        "permission_level": "permission_level",
+        "shared_to": "shared_to__email",
+    }
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError(
+                detail="At least one filter field is required.", code="empty_filter"
+            )
+        return attrs
+
+
+class CollaboratorBulkDeleteSerializer(serializers.Serializer):
+    """
+    Used to delete several collaborators at once via
+    `DELETE api/v1/sharings/bulk/`. Collaborators are selected either by ids
+    or by a filter.
+    """
+
+    collaborator_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        write_only=True,
+        required=False,
+        allow_empty=False,
+        max_length=1000,
+    )
+    filter = CollaboratorFilterSerializer(write_only=True, required=False)
+
+    def validate(self, attrs):
+        if ("collaborator_ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError(
+                detail="Either collaborator_ids or filter is required.",
+                code="invalid_selection",
+            )
+        return attrs
+
+    def filter_queryset(self, queryset: QuerySet[Collaborator]) -> QuerySet:
+        """
+        Returns the selected collaborators of the queryset.
+        """
+        if "collaborator_ids" in self.validated_data:
+            return queryset.filter(pk__in=self.validated_data["collaborator_ids"])
+        lookups = CollaboratorFilterSerializer.lookups
+        return queryset.filter(
+            **{
+                lookups[name]: value
+                for name, value in self.validated_data["filter"].items()
+            }
+        )
+
+
+class CollaboratorBulkUpdateSerializer(CollaboratorBulkDeleteSerializer):
+    """
+    Used to change the permission level of several collaborators at once via
+    `PATCH api/v1/sharings/bulk/`.
+    """
+
+    permission_level = serializers.ChoiceField(
+        choices=PermissionLevels.CHOICES, write_only=True
+    )
+
+
 # region @extend_schema_serializer
 @extend_schema_serializer(
     examples=[
@@ -90,7 +233,7 @@ class InviteCollaboratorSerializer(serializers.ModelSerializer):
     ]
 )
 # endregion
-class CollaboratorSerializer(serializers.ModelSerializer):
+class CollaboratorSerializer(FastRepresentationMixin, serializers.ModelSerializer):
     collaborator_id = serializers.ReadOnlyField(source="id")
     diagram_id = serializers.ReadOnlyField(source="diagram.id")
     diagram_title = serializers.ReadOnlyField(source="diagram.title")
@@ -125,3 +268,167 @@ class PublicDiagramSharingSerializer(serializers.ModelSerializer):
         _ = CollaboratorValidator.validate_multiple_public_shares(attrs)
         del attrs["diagram"]
         return attrs
+
+    def create(self, validated_data):
+        """
+        The diagram can be shared publicly by a concurrent request after
+        the validation, then the unique index prevents the second public share.
+        """
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            diagram = validated_data["diagram"]
+            raise CollaboratorValidator.multiple_public_shares_error(diagram)
+
+
+class TeamSerializer(serializers.ModelSerializer):
+    """
+    Used to view, create and edit teams via `api/v1/sharings/teams/`.
+    Members are set by the list of their emails, which replaces the members
+    of the team.
+    """
+
+    team_id = serializers.ReadOnlyField(source="id")
+    owner_id = serializers.ReadOnlyField(source="owner.id")
+    members = serializers.SlugRelatedField(
+        many=True, read_only=True, slug_field="email"
+    )
+    member_emails = serializers.ListField(
+        child=serializers.EmailField(),
+        write_only=True,
+        required=False,
+        max_length=1000,
+    )
+
+    class Meta:
+        model = Team
+        fields = [
+            "team_id",
+            "name",
+            "owner_id",
+            "members",
+            "member_emails",
+            "created_at",
+        ]
+
+    @staticmethod
+    def validate_member_emails(value):
+        """
+        Members are fetched by a single query, just active users can be members.
+        """
+        emails = set(value)
+        users = list(
+            User.objects.filter(email__in=emails, is_active=True).only("id", "email")
+        )
+        missing = emails - {user.email for user in users}
+        if missing:
+            raise serializers.ValidationError(
+                detail="Active users with the emails do not exist: "
+                f"{', '.join(sorted(missing))}.",
+                code="does_not_exist",
+            )
+        return users
+
+    def create(self, validated_data):
+        members = validated_data.pop("member_emails", [])
+        with transaction.atomic():
+            team = super().create(validated_data)
+            TeamMember.objects.bulk_create(
+                [TeamMember(team=team, user=user) for user in members]
+            )
+        return team
+
+    def update(self, instance, validated_data):
+        members = validated_data.pop("member_emails", None)
+        with transaction.atomic():
+            team = super().update(instance, validated_data)
+            if members is not None:
+                self.set_members(team, members)
+        return team
+
+    @staticmethod
+    def set_members(team: Team, users) -> None:
+        """
+        Replaces members of the team by a delete and a bulk insert, existing
+        members keep their rows.
+        """
+        TeamMember.objects.filter(team=team).exclude(
+            user_id__in=[user.id for user in users]
+        ).delete()
+        TeamMember.objects.bulk_create(
+            [TeamMember(team=team, user=user) for user in users],
+            ignore_conflicts=True,
+        )
+
+
+class TeamRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Team which the request user owns or is a member of, admin can use any team.
+    """
+
+    def get_queryset(self):
+        user = self.context["request"].user
+        if user.is_admin:
+            return Team.objects.all()
+        return Team.objects.filter(Q(owner_id=user.id) | Q(pk__in=team_ids(user)))
+
+
+class InviteTeamSerializer(serializers.ModelSerializer):
+    """
+    Used to share a diagram to a team via
+    `POST api/v1/diagrams/{id}/share-invite-team/`.
+    """
+
+    team_id = TeamRelatedField(source="team")
+    permission_level = serializers.ChoiceField(choices=PermissionLevels.CHOICES)
+    diagram_id = serializers.ReadOnlyField(source="diagram.id")
+    team_collaborator_id = serializers.ReadOnlyField(source="id")
+
+    class Meta:
+        model = TeamCollaborator
+        fields = [
+            "team_collaborator_id",
+            "team_id",
+            "diagram_id",
+            "permission_level",
+        ]
+
+    def validate(self, attrs):
+        diagram, team = self.context["diagram"], attrs["team"]
+        if TeamCollaborator.objects.filter(diagram=diagram, team=team).exists():
+            raise CollaboratorValidator.non_unique_team_sharing_error(diagram, team)
+        return attrs
+
+    def create(self, validated_data):
+        """
+        The diagram can be shared to the team by a concurrent request after
+        the validation, then the unique constraint prevents the second share.
+        """
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise CollaboratorValidator.non_unique_team_sharing_error(
+                validated_data["diagram"], validated_data["team"]
+            )
+
+
+class TeamCollaboratorSerializer(FastRepresentationMixin, serializers.ModelSerializer):
+    team_collaborator_id = serializers.ReadOnlyField(source="id")
+    diagram_id = serializers.ReadOnlyField(source="diagram.id")
+    diagram_title = serializers.ReadOnlyField(source="diagram.title")
+    team_id = serializers.ReadOnlyField(source="team.id")
+    team_name = serializers.ReadOnlyField(source="team.name")
+    permission_level = serializers.ChoiceField(choices=PermissionLevels.CHOICES)
+
+    class Meta:
+        model = TeamCollaborator
+        fields = [
+            "team_collaborator_id",
+            "diagram_id",
+            "diagram_title",
+            "team_id",
+            "team_name",
+            "permission_level",
+            "shared_at",
+        ]
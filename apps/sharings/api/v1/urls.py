@@ -4,6 +4,8 @@ from rest_framework import routers
 from apps.sharings.api.v1 import views
 
 router = routers.SimpleRouter()
+router.register(r"teams", views.TeamViewSet)
+router.register(r"team-shares", views.TeamCollaboratorViewSet)
 router.register(r"", views.CollaboratorViewSet)
 
 urlpatterns = [path("", include(router.urls))]
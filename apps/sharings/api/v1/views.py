@@ -1,14 +1,31 @@
-from django.db.models import QuerySet
+from django.db.models import Q, QuerySet
 from drf_spectacular.utils import OpenApiResponse, extend_schema, extend_schema_view
-from rest_framework import filters, mixins
+from rest_framework import filters, mixins, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
 
-from apps.sharings.api.v1.pagination import CollaboratorViewSetPagination
-from apps.sharings.api.v1.permissions import IsAdminOrIsSharingOwner
-from apps.sharings.api.v1.serializers import CollaboratorSerializer
+from apps.core.querysets import SerializerQuerySetMixin
+from apps.sharings.access import team_ids
+from apps.sharings.api.v1.actions import delete_collaborators, update_collaborators
+from apps.sharings.api.v1.pagination import (
+    CollaboratorViewSetPagination,
+    TeamCollaboratorViewSetPagination,
+    TeamViewSetPagination,
+)
+from apps.sharings.api.v1.permissions import (
+    IsAdminOrIsSharingOwner,
+    IsAdminOrIsTeamOwner,
+)
+from apps.sharings.api.v1.serializers import (
+    CollaboratorBulkDeleteSerializer,
+    CollaboratorBulkUpdateSerializer,
+    CollaboratorSerializer,
+    TeamCollaboratorSerializer,
+    TeamSerializer,
+)
 from apps.sharings.apps import SharingsConfig
-from apps.sharings.models import Collaborator
+from apps.sharings.models import Collaborator, Team, TeamCollaborator
 from docs.api.templates.parameters import required_header_auth_parameter
 
 
@@ -64,9 +81,33 @@ from docs.api.templates.parameters import required_header_auth_parameter
             404: OpenApiResponse(description="Sharing invitation not found"),
         },
     ),
+    update_collaborators=extend_schema(
+        tags=[SharingsConfig.tag],
+        summary="Update permission level of several sharing invitations",
+        description="Changes the permission level of sharing invitations selected "
+        "either by `collaborator_ids` (up to 1000) or by `filter` by "
+        "`diagram_id`, `permission_level` and `shared_to` (user email) "
+        "by a single query. Returns the number of the updated invitations.\n\n"
+        "Invitations of diagrams of other users are not updated, public "
+        "shares are always *view-only*.\n\n"
+        "**Admin can change permission level of any sharing invitations.**",
+        parameters=[required_header_auth_parameter],
+        responses={
+            200: OpenApiResponse(description="Number of the updated invitations"),
+            400: OpenApiResponse(
+                description="Possible errors:\n"
+                "- JSON parse error;\n"
+                "- neither or both of ids and filter provided;\n"
+                "- empty filter provided;\n"
+                "- invalid permission level provided."
+            ),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+        },
+    ),
 )
 # endregion
 class CollaboratorViewSet(
+    SerializerQuerySetMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     mixins.DestroyModelMixin,
@@ -76,6 +117,7 @@ class CollaboratorViewSet(
     """
     API endpoint that allows:
     - view, edit (change permission level) or delete an existing sharing invitation;
+    - edit or delete several sharing invitations at once;
     - view all sharing invitations.
     """
 
@@ -87,6 +129,16 @@ class CollaboratorViewSet(
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ["diagram_id", "shared_to", "permission_level", "shared_at"]
     ordering = ["-shared_at"]
+    query_budgets = {
+        "list": 3,
+        "retrieve": 2,
+        "partial_update": 3,
+        "destroy": 3,
+        "update_collaborators": 2,
+        "delete_collaborators": 6,
+    }
+    # Read by `IsAdminOrIsSharingOwner`.
+    queryset_plan_sources = ("diagram.owner",)
 
     def get_queryset(self) -> QuerySet[Collaborator]:
         """
@@ -97,3 +149,263 @@ class CollaboratorViewSet(
         if self.request.user.is_admin:
             return Collaborator.objects.all()
         return self.queryset.filter(diagram__owner=self.request.user)
+
+    def get_serializer_class(self):
+        serializer_mapping = {
+            "update_collaborators": CollaboratorBulkUpdateSerializer,
+            "delete_collaborators": CollaboratorBulkDeleteSerializer,
+        }
+        return serializer_mapping.get(self.action, super().get_serializer_class())
+
+    @action(detail=False, methods=["patch"], url_path="bulk", url_name="bulk")
+    def update_collaborators(self, *args, **kwargs):
+        """
+        Allows diagram owner to change permission level of several sharing
+        invitations of his diagrams. Admin can change any sharing invitations.
+        """
+        return update_collaborators(self, *args, **kwargs)
+
+    # `extend_schema_view()` does not see methods mapped to actions.
+    @update_collaborators.mapping.delete
+    @extend_schema(
+        tags=[SharingsConfig.tag],
+        summary="Delete several sharing invitations",
+        description="Deletes sharing invitations selected either by "
+        "`collaborator_ids` (up to 1000) or by `filter` by `diagram_id`, "
+        "`permission_level` and `shared_to` (user email) by a single query. "
+        "Returns the number of the deleted invitations.\n\n"
+        "Invitations of diagrams of other users are not deleted.\n\n"
+        "**Admin can delete any sharing invitations.**",
+        parameters=[required_header_auth_parameter],
+        request=CollaboratorBulkDeleteSerializer,
+        responses={
+            200: OpenApiResponse(description="Number of the deleted invitations"),
+            400: OpenApiResponse(
+                description="Possible errors:\n"
+                "- JSON parse error;\n"
+                "- neither or both of ids and filter provided;\n"
+                "- empty filter provided."
+            ),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+        },
+    )
+    def delete_collaborators(self, *args, **kwargs):
+        """
+        Allows diagram owner to delete several sharing invitations
+        of his diagrams. Admin can delete any sharing invitations.
+        """
+        return delete_collaborators(self, *args, **kwargs)
+
+
+# region @extend_schema
+@extend_schema_view(
+    list=extend_schema(
+        tags=[SharingsConfig.tag],
+        summary="List teams",
+        description="Returns a list of the teams which the current user owns "
+        "or is a member of.\n\n"
+        "**Admin can see all teams.**",
+        parameters=[required_header_auth_parameter],
+        responses={
+            200: TeamSerializer(many=True),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+        },
+    ),
+    create=extend_schema(
+        tags=[SharingsConfig.tag],
+        summary="Create a team",
+        description="Creates a team owned by the current user with the members "
+        "provided by `member_emails`. Diagrams can be shared to the team "
+        "by `api/v1/diagrams/{id}/share-invite-team/` endpoint, its members "
+        "have the same access to them as if they were shared to each of them.",
+        parameters=[required_header_auth_parameter],
+        responses={
+            201: TeamSerializer,
+            400: OpenApiResponse(
+                description="Possible errors:\n"
+                "- JSON parse error;\n"
+                "- name not provided;\n"
+                "- active users with some of the emails do not exist."
+            ),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+        },
+    ),
+    retrieve=extend_schema(
+        tags=[SharingsConfig.tag],
+        summary="Retrieve a team",
+        description="Returns the details of a team which the current user owns "
+        "or is a member of.\n\n"
+        "**Admin can retrieve any team.**",
+        parameters=[required_header_auth_parameter],
+        responses={
+            200: TeamSerializer,
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+            404: OpenApiResponse(description="Team not found"),
+        },
+    ),
+    partial_update=extend_schema(
+        tags=[SharingsConfig.tag],
+        summary="Partially update a team",
+        description="Changes the name of the team or replaces its members "
+        "by `member_emails`. Removed members lose access to the diagrams "
+        "shared to the team at once.\n\n"
+        "**Admin can update any team.**",
+        parameters=[required_header_auth_parameter],
+        responses={
+            200: TeamSerializer,
+            400: OpenApiResponse(description="JSON parse error or invalid emails"),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+            403: OpenApiResponse(description="The user is not the team owner"),
+            404: OpenApiResponse(description="Team not found"),
+        },
+    ),
+    destroy=extend_schema(
+        tags=[SharingsConfig.tag],
+        summary="Delete a team",
+        description="Deletes a team and the shares of diagrams to it.\n\n"
+        "**Admin can delete any team.**",
+        parameters=[required_header_auth_parameter],
+        responses={
+            204: OpenApiResponse(description="Deleted successfully"),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+            403: OpenApiResponse(description="The user is not the team owner"),
+            404: OpenApiResponse(description="Team not found"),
+        },
+    ),
+)
+# endregion
+class TeamViewSet(SerializerQuerySetMixin, viewsets.ModelViewSet):
+    """
+    API endpoint that allows:
+    - view teams which the user owns or is a member of;
+    - create a new team;
+    - edit (rename, replace members) or delete an own team.
+    """
+
+    queryset: QuerySet[Team] = Team.objects.all()
+    serializer_class = TeamSerializer
+    permission_classes = [IsAuthenticated, IsAdminOrIsTeamOwner]
+    http_method_names = ["get", "post", "patch", "delete"]
+    pagination_class = TeamViewSetPagination
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ["name", "created_at"]
+    ordering = ["-created_at"]
+    query_budgets = {
+        "list": 4,
+        "create": 7,
+        "retrieve": 3,
+        "partial_update": 10,
+        "destroy": 6,
+    }
+
+    def get_queryset(self) -> QuerySet[Team]:
+        """
+        Filter the queryset based on the user's permissions:
+        - if the user is an admin, return all teams;
+        - otherwise, return the teams which the user owns or is a member of.
+        """
+        if self.request.user.is_admin:
+            return Team.objects.all()
+        user = self.request.user
+        return self.queryset.filter(Q(owner=user) | Q(pk__in=team_ids(user)))
+
+    def perform_create(self, serializer: TeamSerializer) -> None:
+        serializer.save(owner=self.request.user)
+
+
+# region @extend_schema
+@extend_schema_view(
+    list=extend_schema(
+        tags=[SharingsConfig.tag],
+        summary="List team sharing invitations",
+        description="Returns a list of the shares of diagrams of the current "
+        "user to teams.\n\n"
+        "**Admin can see all team sharing invitations.**",
+        parameters=[required_header_auth_parameter],
+        responses={
+            200: TeamCollaboratorSerializer(many=True),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+        },
+    ),
+    retrieve=extend_schema(
+        tags=[SharingsConfig.tag],
+        summary="Retrieve a team sharing invitation",
+        description="Returns the details of a specific share of a diagram "
+        "to a team.\n\n"
+        "**Admin can retrieve any team sharing invitations.**",
+        parameters=[required_header_auth_parameter],
+        responses={
+            200: TeamCollaboratorSerializer,
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+            404: OpenApiResponse(description="Sharing not found"),
+        },
+    ),
+    partial_update=extend_schema(
+        tags=[SharingsConfig.tag],
+        summary="Partially update permission level of a team sharing invitation",
+        description="Changes the permission level which a diagram is shared "
+        "to a team with, for all members of the team at once.\n\n"
+        "**Admin can change permission level of any team sharing invitation.**",
+        parameters=[required_header_auth_parameter],
+        responses={
+            200: TeamCollaboratorSerializer,
+            400: OpenApiResponse(description="JSON parse error"),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+            404: OpenApiResponse(description="Sharing not found"),
+        },
+    ),
+    destroy=extend_schema(
+        tags=[SharingsConfig.tag],
+        summary="Delete a team sharing invitation",
+        description="Deletes a specific share of a diagram to a team.\n\n"
+        "**Admin can delete any team sharing invitation.**",
+        parameters=[required_header_auth_parameter],
+        responses={
+            204: OpenApiResponse(description="Deleted successfully"),
+            401: OpenApiResponse(description="Invalid token or token not provided"),
+            404: OpenApiResponse(description="Sharing invitation not found"),
+        },
+    ),
+)
+# endregion
+class TeamCollaboratorViewSet(
+    SerializerQuerySetMixin,
+    mixins.RetrieveModelMixin,
+    mixins.UpdateModelMixin,
+    mixins.DestroyModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
+    """
+    API endpoint that allows:
+    - view, edit (change permission level) or delete an existing share
+      of a diagram to a team;
+    - view all shares of diagrams to teams.
+    """
+
+    queryset: QuerySet[TeamCollaborator] = TeamCollaborator.objects.all()
+    serializer_class = TeamCollaboratorSerializer
+    permission_classes = [IsAuthenticated, IsAdminOrIsSharingOwner]
+    http_method_names = ["get", "patch", "delete"]
+    pagination_class = TeamCollaboratorViewSetPagination
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ["diagram_id", "team_id", "permission_level", "shared_at"]
+    ordering = ["-shared_at"]
+    query_budgets = {
+        "list": 3,
+        "retrieve": 2,
+        "partial_update": 3,
+        "destroy": 3,
+    }
+    # Read by `IsAdminOrIsSharingOwner`.
+    queryset_plan_sources = ("diagram.owner",)
+
+    def get_queryset(self) -> QuerySet[TeamCollaborator]:
+        """
+        Filter the queryset based on the user's permissions:
+        - if the user is an admin, return all team sharings;
+        - otherwise, return only the ones of the user's diagrams.
+        """
+        if self.request.user.is_admin:
+            return TeamCollaborator.objects.all()
+        return self.queryset.filter(diagram__owner=self.request.user)
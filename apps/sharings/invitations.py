@@ -0,0 +1,112 @@
+"""
+Bulk sharing of a diagram to several users. Users and existing shares are
+fetched by a query for all invitations, which are validated one by one like
+by the single invitation, and valid invitations are inserted by a single
+`bulk_create()`. Invalid invitations are reported and skipped.
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from apps.diagrams.models import Diagram
+from apps.sharings.api.v1.serializers import (
+    CollaboratorInvitationSerializer,
+    InviteCollaboratorSerializer,
+)
+from apps.sharings.models import Collaborator
+from apps.sharings.validators import CollaboratorValidator
+from apps.users.models import User
+
+# Result of a created share: `{"index": 0, "collaborator_id": "...", ...}`
+# (fields of `InviteCollaboratorSerializer`), or of an invalid invitation:
+# `{"index": 1, "errors": {"user_email": ["..."]},
+# "codes": {"user_email": ["does_not_exist"]}}`.
+InvitationResult = Dict[str, Any]
+
+
+def invite_collaborators(
+    diagram: Diagram, invitations: Sequence[Any]
+) -> List[InvitationResult]:
+    """
+    Shares the diagram to the users of the invitations (`user_email` and
+    `permission_level` like by the single invitation) and returns results
+    of the invitations in their order. An invitation of a user who the diagram
+    is already shared to, also by a previous invitation, is invalid.
+    """
+    emails = {
+        str(invitation.get("user_email"))
+        for invitation in invitations
+        if isinstance(invitation, dict)
+    }
+    users = {
+        user.email: user
+        for user in User.objects.filter(email__in=emails).only("email", "is_active")
+    }
+    shared_to_ids = set()
+    if users:
+        shared_to_ids = set(
+            Collaborator.objects.filter(
+                diagram=diagram, shared_to__in=users.values()
+            ).values_list("shared_to_id", flat=True)
+        )
+    context = {"diagram": diagram, "users": users, "shared_to_ids": shared_to_ids}
+    # Fields of the serializer are built once for all invitations.
+    serializer = CollaboratorInvitationSerializer(context=context)
+
+    results: List[InvitationResult] = []
+    collaborators: List[Tuple[int, Collaborator]] = []
+    for index, invitation in enumerate(invitations):
+        try:
+            data = serializer.run_validation(invitation)
+        except ValidationError as exc:
+            results.append(error_result(index, exc))
+            continue
+        shared_to_ids.add(data["shared_to"].id)
+        collaborators.append((index, Collaborator(diagram=diagram, **data)))
+
+    if collaborators:
+        results.extend(insert_collaborators(diagram, collaborators))
+    return sorted(results, key=lambda result: result["index"])
+
+
+def insert_collaborators(
+    diagram: Diagram, collaborators: List[Tuple[int, Collaborator]]
+) -> List[InvitationResult]:
+    """
+    Inserts the collaborators by a single query. The diagram can be shared
+    to the same users by concurrent requests after the validation, then their
+    collaborators are not inserted and are reported as non-unique sharings.
+    """
+    with transaction.atomic():
+        Collaborator.objects.bulk_create(
+            [collaborator for _, collaborator in collaborators],
+            ignore_conflicts=True,
+        )
+        inserted_ids = set(
+            Collaborator.objects.filter(
+                pk__in=[collaborator.pk for _, collaborator in collaborators]
+            ).values_list("pk", flat=True)
+        )
+    results = []
+    for index, collaborator in collaborators:
+        if collaborator.pk not in inserted_ids:
+            error = CollaboratorValidator.non_unique_sharing_error(
+                diagram, collaborator.shared_to
+            )
+            results.append(error_result(index, error))
+            continue
+        data = InviteCollaboratorSerializer(collaborator).data
+        results.append({"index": index, **data})
+    return results
+
+
+def error_result(index: int, exc: ValidationError) -> InvitationResult:
+    """
+    Errors of the invitation are keyed by fields like errors of the single
+    invitation, `codes` has their codes (e.g. `non_unique_sharing`).
+    """
+    errors = ValidationError(as_serializer_error(exc))
+    return {"index": index, "errors": errors.detail, "codes": errors.get_codes()}
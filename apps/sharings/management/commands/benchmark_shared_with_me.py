@@ -0,0 +1,248 @@
+import json
+import statistics
+import time
+import uuid
+from typing import Iterator, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models
+from django.db.models import QuerySet
+
+from apps.diagrams.models import Diagram, DiagramContent
+from apps.sharings.constants import PermissionLevels
+from apps.sharings.models import Collaborator, Team, TeamCollaborator, TeamMember
+from apps.users.models import User
+
+# Tables of the grants which are scanned by the shared-with-me list query.
+SHARE_TABLES = [
+    Collaborator._meta.db_table,
+    TeamCollaborator._meta.db_table,
+    TeamMember._meta.db_table,
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the shared-with-me diagram list query for a user with "
+        "growing numbers of shares, directly and through his teams, and reports "
+        "how the shares are scanned (index-only on PostgreSQL) and query times. "
+        "Benchmark data is created "
+        "in the database and deleted afterwards, do not run it in production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--shares",
+            type=int,
+            nargs="+",
+            default=[100, 1000, 10000, 50000],
+            help="Numbers of diagrams shared to the user to benchmark with.",
+        )
+        parser.add_argument(
+            "--other-shares",
+            type=int,
+            default=100000,
+            help="Number of diagrams shared to other users, so the shares "
+            "of the user are a part of the table as in production.",
+        )
+        parser.add_argument(
+            "--other-users",
+            type=int,
+            default=100,
+            help="Number of other users the diagrams are shared to.",
+        )
+        parser.add_argument(
+            "--teams",
+            type=int,
+            default=5,
+            help="Number of teams of the user, and of each other user.",
+        )
+        parser.add_argument(
+            "--team-shares",
+            type=int,
+            default=50,
+            help="Percentage of the shares which are shared to teams.",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=10,
+            help="Number of diagrams on the listed page.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of query runs to take the median time of.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of diagrams and shares created by a query.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Fail unless the shares and the memberships are scanned "
+            "index-only (PostgreSQL).",
+        )
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:8]
+        owner = User.objects.create_user(f"benchmark-owner-{suffix}@example.com", "")
+        user = User.objects.create_user(f"benchmark-user-{suffix}@example.com", "")
+        other_users = User.objects.bulk_create(
+            User(email=f"benchmark-user-{suffix}-{index}@example.com")
+            for index in range(max(options["other_users"], 1))
+        )
+        failed = []
+        try:
+            other_teams = self.create_teams(owner, other_users, options)
+            teams = self.create_teams(owner, [user], options)
+            self.create_shares(
+                owner, other_users, other_teams, options["other_shares"], options
+            )
+            created = 0
+            for shares in sorted(options["shares"]):
+                self.create_shares(owner, [user], teams, shares - created, options)
+                created = shares
+                self.analyze()
+                scans = self.describe_scans(self.list_queryset(user, options))
+                elapsed = self.time_query(self.list_queryset(user, options), options)
+                self.stdout.write(
+                    f"Shares: {shares}, collaborator scans: {', '.join(scans)}, "
+                    f"median time: {elapsed:.2f} ms."
+                )
+                if connection.vendor == "postgresql" and any(
+                    "Index Only Scan" not in scan for scan in scans
+                ):
+                    failed.append(shares)
+        finally:
+            Diagram.objects.filter(owner=owner).delete()
+            User.objects.filter(
+                pk__in=[owner.pk, user.pk, *(other.pk for other in other_users)]
+            ).delete()
+
+        if options["check"] and failed:
+            raise CommandError(
+                "Shares or memberships are not scanned index-only with "
+                f"{', '.join(str(shares) for shares in failed)} shares."
+            )
+
+    @staticmethod
+    def list_queryset(user: User, options: dict) -> QuerySet[Diagram]:
+        # The same query as the first page of `SharedWithMeDiagramViewSet` list.
+        return (
+            Diagram.objects.shared_to(user)
+            .annotate(owner_email=models.F("owner__email"))
+            .order_by("-updated_at")
+            .values("id", "title", "owner_id", "owner_email", "permission_level")[
+                : options["page_size"]
+            ]
+        )
+
+    @staticmethod
+    def create_teams(owner: User, users: List[User], options: dict) -> List[Team]:
+        """
+        Creates the teams of each of the users.
+        """
+        teams = Team.objects.bulk_create(
+            Team(name="Benchmark", owner=owner)
+            for _ in range(len(users) * options["teams"])
+        )
+        TeamMember.objects.bulk_create(
+            (
+                TeamMember(team=team, user=users[index // options["teams"]])
+                for index, team in enumerate(teams)
+            ),
+            batch_size=options["batch_size"],
+        )
+        return teams
+
+    @staticmethod
+    def create_shares(
+        owner: User, users: List[User], teams: List[Team], count: int, options: dict
+    ) -> None:
+        """
+        Creates diagrams shared to the users, `--team-shares` percent of them
+        are shared to the teams instead.
+        """
+        if count <= 0:
+            return
+        digest = DiagramContent.objects.acquire({"benchmark": True})
+        DiagramContent.objects.filter(pk=digest).update(
+            ref_count=models.F("ref_count") + count - 1
+        )
+        for size in batches(count, options["batch_size"]):
+            diagrams = Diagram.objects.bulk_create(
+                Diagram(title="Benchmark", content_id=digest, owner=owner)
+                for _ in range(size)
+            )
+            team_shares = size * options["team_shares"] // 100 if teams else 0
+            Collaborator.objects.bulk_create(
+                Collaborator(
+                    diagram=diagram,
+                    shared_to=users[index % len(users)],
+                    permission_level=PermissionLevels.VIEWONLY,
+                )
+                for index, diagram in enumerate(diagrams[team_shares:])
+            )
+            TeamCollaborator.objects.bulk_create(
+                TeamCollaborator(
+                    diagram=diagram,
+                    team=teams[index % len(teams)],
+                    permission_level=PermissionLevels.VIEWCOPY,
+                )
+                for index, diagram in enumerate(diagrams[:team_shares])
+            )
+
+    @staticmethod
+    def analyze() -> None:
+        tables = [Diagram._meta.db_table, *SHARE_TABLES]
+        with connection.cursor() as cursor:
+            for table in tables:
+                if connection.vendor == "postgresql":
+                    # Index-only scans rely on the visibility map set by vacuum.
+                    cursor.execute(f"VACUUM ANALYZE {table}")
+                else:
+                    cursor.execute(f"ANALYZE {table}")
+
+    @staticmethod
+    def describe_scans(queryset: QuerySet[Diagram]) -> List[str]:
+        """
+        Returns how the tables of shares and memberships are scanned.
+        """
+        if connection.vendor != "postgresql":
+            return [
+                line.strip()
+                for line in queryset.explain().splitlines()
+                if any(table in line for table in SHARE_TABLES)
+            ]
+        plan = json.loads(queryset.explain(format="json"))
+        return [
+            f"{node['Node Type']} using {node.get('Index Name', '-')}"
+            for node in plan_nodes(plan[0]["Plan"])
+            if node.get("Relation Name") in SHARE_TABLES
+        ]
+
+    @staticmethod
+    def time_query(queryset: QuerySet[Diagram], options: dict) -> float:
+        times: List[float] = []
+        for _ in range(options["repeat"]):
+            start = time.perf_counter()
+            list(queryset.all())
+            times.append((time.perf_counter() - start) * 1000)
+        return statistics.median(times)
+
+
+def batches(count: int, size: int) -> Iterator[int]:
+    while count > 0:
+        yield min(count, size)
+        count -= size
+
+
+def plan_nodes(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
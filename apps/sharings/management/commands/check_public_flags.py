@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.sharings.models import Collaborator
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks that 'is_public' flags of diagrams match their public shares "
+        "and optionally fixes them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Set the flags of inconsistent diagrams to the actual values.",
+        )
+
+    def handle(self, *args, **options):
+        inconsistent_ids = list(
+            Collaborator.objects.inconsistent_public_flags()
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        if not inconsistent_ids:
+            self.stdout.write(self.style.SUCCESS("Public flags are consistent."))
+            return
+
+        listed_ids = ", ".join(str(pk) for pk in inconsistent_ids[:20])
+        if len(inconsistent_ids) > 20:
+            listed_ids += ", ..."
+        message = f"Inconsistent public flags of {len(inconsistent_ids)} diagrams: "
+        if not options["fix"]:
+            raise CommandError(message + listed_ids)
+        self.stdout.write(message + listed_ids)
+        fixed = Collaborator.objects.sync_public_flags(inconsistent_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f"Fixed public flags of {fixed} diagrams.")
+        )
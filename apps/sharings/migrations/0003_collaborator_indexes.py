@@ -0,0 +1,39 @@
+# Generated by Django 5.0.6 on 2026-10-17 13:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.core.operations import AddIndexConcurrently, AddUniqueIndexConcurrently
+
+
+def delete_duplicate_public_shares(apps, schema_editor):
+    # Keeps the earliest public share of each diagram.
+    Collaborator = apps.get_model('sharings', 'Collaborator')
+    public_shares = Collaborator.objects.filter(shared_to=None)
+    earliest = public_shares.filter(diagram_id=models.OuterRef('diagram_id')).order_by(
+        'shared_at', 'id'
+    )
+    public_shares.exclude(pk=models.Subquery(earliest.values('pk')[:1])).delete()
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently on PostgreSQL (see apps.core.operations).
+    atomic = False
+
+    dependencies = [
+        ('diagrams', '0006_diagram_owner_indexes'),
+        ('sharings', '0002_alter_collaborator_shared_to_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='collaborator',
+            index=models.Index(fields=['shared_to', 'diagram'], include=('permission_level',), name='collaborator_shared_to_idx'),
+        ),
+        migrations.RunPython(delete_duplicate_public_shares, migrations.RunPython.noop),
+        AddUniqueIndexConcurrently(
+            model_name='collaborator',
+            constraint=models.UniqueConstraint(condition=models.Q(('shared_to__isnull', True)), fields=('diagram',), name='collaborator_single_public_share', violation_error_code='multiple_public_shares', violation_error_message='Cannot create multiple public shares for the same diagram.'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.0.6 on 2026-10-17 14:06
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagrams', '0006_diagram_owner_indexes'),
+        ('sharings', '0003_collaborator_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Team',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, verbose_name='Name')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TeamCollaborator',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('permission_level', models.CharField(choices=[('view-only', 'View'), ('view-copy', 'View & Copy'), ('view-edit', 'View & Edit')], default='view-only', help_text='Permission level which diagram is shared with.', max_length=16, verbose_name='Permission level')),
+                ('shared_at', models.DateTimeField(auto_now_add=True, help_text='Date and time when diagram was shared.', verbose_name='Shared at')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TeamMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('joined_at', models.DateTimeField(auto_now_add=True, verbose_name='Joined at')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='owner',
+            field=models.ForeignKey(help_text='User who manages the team.', on_delete=django.db.models.deletion.CASCADE, related_name='owned_teams', to=settings.AUTH_USER_MODEL, verbose_name='Owner'),
+        ),
+        migrations.AddField(
+            model_name='teamcollaborator',
+            name='diagram',
+            field=models.ForeignKey(help_text='Diagram which is shared.', on_delete=django.db.models.deletion.CASCADE, to='diagrams.diagram'),
+        ),
+        migrations.AddField(
+            model_name='teamcollaborator',
+            name='team',
+            field=models.ForeignKey(help_text='Team whom diagram is shared to.', on_delete=django.db.models.deletion.CASCADE, related_name='shares', to='sharings.team'),
+        ),
+        migrations.AddField(
+            model_name='teammember',
+            name='team',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sharings.team'),
+        ),
+        migrations.AddField(
+            model_name='teammember',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='members',
+            field=models.ManyToManyField(blank=True, help_text='Users who diagrams shared to the team are shared to.', related_name='teams', through='sharings.TeamMember', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='teamcollaborator',
+            index=models.Index(fields=['team', 'diagram'], include=('permission_level',), name='team_collaborator_team_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='teamcollaborator',
+            unique_together={('team', 'diagram')},
+        ),
+        migrations.AddConstraint(
+            model_name='teammember',
+            constraint=models.UniqueConstraint(fields=('user', 'team'), name='team_member_user_team_unique'),
+        ),
+    ]
@@ -1,17 +1,63 @@
 import uuid
+from typing import Dict, Iterable, Optional, Tuple
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Q
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef, Q
 
 from apps.diagrams.models import Diagram
 from apps.sharings.constants import PermissionLevels
 
 
+class CollaboratorQuerySet(models.QuerySet):
+    def delete(self) -> Tuple[int, Dict[str, int]]:
+        """
+        Deletes the collaborators and clears public flags of the diagrams
+        which public shares are deleted.
+        """
+        with transaction.atomic(using=self.db):
+            diagram_ids = list(
+                self.filter(shared_to=None).values_list("diagram_id", flat=True)
+            )
+            deleted = super().delete()
+            self.model.objects.sync_public_flags(diagram_ids)
+        return deleted
+
+    def inconsistent_public_flags(
+        self, diagram_ids: Optional[Iterable] = None
+    ) -> models.QuerySet:
+        """
+        Returns the diagrams (all ones if `diagram_ids` is None) which `is_public`
+        flags do not match whether they have public shares.
+        """
+        diagrams = Diagram.objects.alias(has_public_share=self.public_share_exists())
+        if diagram_ids is not None:
+            diagrams = diagrams.filter(pk__in=diagram_ids)
+        return diagrams.exclude(is_public=models.F("has_public_share"))
+
+    def sync_public_flags(self, diagram_ids: Optional[Iterable] = None) -> int:
+        """
+        Sets `is_public` flags of the diagrams (all ones if `diagram_ids` is None)
+        to whether they have public shares. Returns the number of diagrams
+        which flags were changed.
+        """
+        return self.inconsistent_public_flags(diagram_ids).update(
+            is_public=self.public_share_exists()
+        )
+
+    @staticmethod
+    def public_share_exists() -> Exists:
+        return Exists(
+            Collaborator.objects.filter(diagram_id=OuterRef("pk"), shared_to=None)
+        )
+
+
 class Collaborator(models.Model):
     """
     Model contains shared diagram and the user whom it was shared to.
+    Public shares (`shared_to` is None) are reflected by `Diagram.is_public`
+    flag which is updated in the same transaction.
     """
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -41,9 +87,34 @@ class Collaborator(models.Model):
         help_text="Date and time when diagram was shared.",
     )
 
+    objects = CollaboratorQuerySet.as_manager()
+
+    # The diagram and the public state the collaborator was loaded with.
+    _loaded_public_diagram_id = None
+
     class Meta:
         unique_together = ("shared_to", "diagram")
+        indexes = [
+            # Shared-with-me lookups read permission levels by index-only scans.
+            # It is separate from the unique constraint, because SQLite does not
+            # create unique constraints with non-key columns.
+            models.Index(
+                fields=["shared_to", "diagram"],
+                include=["permission_level"],
+                name="collaborator_shared_to_idx",
+            ),
+        ]
         constraints = [
+            # Prevents multiple public shares for the same diagram.
+            # It is validated during diagram sharing via admin panel as well.
+            models.UniqueConstraint(
+                fields=["diagram"],
+                condition=Q(shared_to__isnull=True),
+                name="collaborator_single_public_share",
+                violation_error_message="Cannot create multiple public shares "
+                "for the same diagram.",
+                violation_error_code="multiple_public_shares",
+            ),
             # Prevents sharing diagram as public with other than "view-only" permission.
             # This is reinsurance during diagram sharing via admin panel because
             # public sharing via endpoint automatically uses "view-only" permission.
@@ -54,7 +125,7 @@ class Collaborator(models.Model):
                 violation_error_message="The 'shared_to' field may only \
                 be empty if the 'permission_level' field is set to 'view-only' (View).",
                 violation_error_code="wrong_permission_level_for_null_shared_to_field",
-            )
+            ),
         ]
 
     def clean(self):
@@ -73,19 +144,140 @@ class Collaborator(models.Model):
                 f'diagram "{self.diagram.id}" to itself.',
                 code="self_sharing",
             )
-        # Prevents multiple public shares for the same diagram.
-        elif (
-            self.shared_to is None
-            and Collaborator.objects.filter(
-                diagram=self.diagram, shared_to=None
-            ).exists()
-        ):
-            raise ValidationError(
-                message=f"Cannot create multiple public shares for the same object:\n"
-                f"diagram {self.diagram.id} has already been shared publicly.",
-                code="multiple_public_shares",
-            )
         super().clean()
 
     def __str__(self):
         return f"{self.diagram} 🡒 {self.shared_to} | {self.permission_level}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if instance.shared_to_id is None:
+            instance._loaded_public_diagram_id = instance.diagram_id
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Updates public flags of the diagram if the collaborator is a public share
+        or it was loaded as a public share (e.g. it is changed by admin).
+        """
+        diagram_ids = {self._loaded_public_diagram_id}
+        if self.shared_to_id is None:
+            diagram_ids.add(self.diagram_id)
+        diagram_ids.discard(None)
+        if not diagram_ids:
+            return super().save(*args, **kwargs)
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            Collaborator.objects.sync_public_flags(diagram_ids)
+        self._loaded_public_diagram_id = (
+            self.diagram_id if self.shared_to_id is None else None
+        )
+        if self.shared_to_id is None and Collaborator.diagram.is_cached(self):
+            self.diagram.is_public = True
+
+    def delete(self, *args, **kwargs):
+        if self.shared_to_id is not None:
+            return super().delete(*args, **kwargs)
+        with transaction.atomic(using=kwargs.get("using")):
+            deleted = super().delete(*args, **kwargs)
+            Collaborator.objects.sync_public_flags([self.diagram_id])
+        if Collaborator.diagram.is_cached(self):
+            self.diagram.is_public = False
+        return deleted
+
+
+class Team(models.Model):
+    """
+    Group of users which diagrams can be shared to (see `TeamCollaborator`),
+    so sharing a diagram to an organisation is a single share instead of
+    a share per user. Membership is resolved when shared diagrams are queried
+    (see `apps.sharings.access`).
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255, verbose_name="Name")
+    owner = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="owned_teams",
+        verbose_name="Owner",
+        help_text="User who manages the team.",
+    )
+    members = models.ManyToManyField(
+        get_user_model(),
+        through="TeamMember",
+        related_name="teams",
+        blank=True,
+        help_text="Users who diagrams shared to the team are shared to.",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created at")
+
+    def __str__(self):
+        return f"{self.name} | {self.owner}"
+
+
+class TeamMember(models.Model):
+    team = models.ForeignKey(Team, on_delete=models.CASCADE)
+    user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
+    joined_at = models.DateTimeField(auto_now_add=True, verbose_name="Joined at")
+
+    class Meta:
+        constraints = [
+            # Teams of a user are looked up by the index of the constraint.
+            models.UniqueConstraint(
+                fields=["user", "team"], name="team_member_user_team_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.team.name} 🡒 {self.user}"
+
+
+class TeamCollaborator(models.Model):
+    """
+    Model contains shared diagram and the team whom it was shared to.
+    Members of the team have the same access to the diagram as if it was
+    shared to them with the permission level (see `Collaborator`).
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    team = models.ForeignKey(
+        Team,
+        on_delete=models.CASCADE,
+        related_name="shares",
+        help_text="Team whom diagram is shared to.",
+    )
+    diagram = models.ForeignKey(
+        Diagram,
+        on_delete=models.CASCADE,
+        help_text="Diagram which is shared.",
+    )
+    permission_level = models.CharField(
+        max_length=16,
+        choices=PermissionLevels.CHOICES,
+        default=PermissionLevels.VIEWONLY,
+        verbose_name="Permission level",
+        help_text="Permission level which diagram is shared with.",
+    )
+    shared_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Shared at",
+        help_text="Date and time when diagram was shared.",
+    )
+
+    class Meta:
+        unique_together = ("team", "diagram")
+        indexes = [
+            # Diagrams shared to teams of a user are joined with their
+            # permission levels by index-only scans. It is separate from
+            # the unique constraint like the one of `Collaborator`.
+            models.Index(
+                fields=["team", "diagram"],
+                include=["permission_level"],
+                name="team_collaborator_team_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.diagram} 🡒 {self.team.name} | {self.permission_level}"
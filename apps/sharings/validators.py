@@ -15,42 +15,64 @@ class CollaboratorValidator:
         if Collaborator.objects.filter(
             shared_to=attrs["shared_to"], diagram=attrs["diagram"]
         ).exists():
-            raise serializers.ValidationError(
-                detail=f'Diagram with id "{attrs["diagram"].id}" has already shared '
-                f'to user with email "{attrs["shared_to"].email}".',
-                code="non_unique_sharing",
+            raise CollaboratorValidator.non_unique_sharing_error(
+                attrs["diagram"], attrs["shared_to"]
             )
         return attrs
 
     @staticmethod
     def validate_self_sharing(attrs: Dict) -> Dict:
         """
-        Prevents sharing a diagram to its owner.
+        Prevents sharing a diagram to its owner. The owner is compared by id,
+        so it is not loaded.
         """
         diagram = attrs["diagram"]
         shared_to = attrs["shared_to"]
-        if diagram.owner == shared_to:
-            raise serializers.ValidationError(
-                detail=f'User with email "{shared_to.email}" cannot share the '
-                f'diagram "{diagram.id}" to itself.',
-                code="self_sharing",
-            )
+        if diagram.owner_id == shared_to.id:
+            raise CollaboratorValidator.self_sharing_error(diagram, shared_to)
         return attrs
 
     @staticmethod
     def validate_multiple_public_shares(attrs: Dict) -> Dict:
         """
         Prevents multiple public shares for the same diagram.
-        Partly intersects with the `clean()` method of Collaborator model
-        by functionality, because model validation by `clean()` is
-        not invoked by default, so it should be done manually
-        inside serializer validate().
+        The diagram `is_public` flag is checked, so no query is made. Concurrent
+        public shares are prevented by `collaborator_single_public_share`
+        unique index, see `PublicDiagramSharingSerializer.create()`.
         """
         diagram = attrs["diagram"]
-        if Collaborator.objects.filter(diagram=diagram, shared_to=None).exists():
-            raise serializers.ValidationError(
-                detail=f"Cannot create multiple public shares for the same object: "
-                f"diagram {diagram.id} has already been shared publicly.",
-                code="multiple_public_shares",
-            )
+        if diagram.is_public:
+            raise CollaboratorValidator.multiple_public_shares_error(diagram)
         return attrs
+
+    @staticmethod
+    def non_unique_sharing_error(diagram, shared_to) -> serializers.ValidationError:
+        return serializers.ValidationError(
+            detail=f'Diagram with id "{diagram.id}" has already shared '
+            f'to user with email "{shared_to.email}".',
+            code="non_unique_sharing",
+        )
+
+    @staticmethod
+    def non_unique_team_sharing_error(diagram, team) -> serializers.ValidationError:
+        return serializers.ValidationError(
+            detail=f'Diagram with id "{diagram.id}" has already shared '
+            f'to team with id "{team.id}".',
+            code="non_unique_sharing",
+        )
+
+    @staticmethod
+    def self_sharing_error(diagram, shared_to) -> serializers.ValidationError:
+        return serializers.ValidationError(
+            detail=f'User with email "{shared_to.email}" cannot share the '
+            f'diagram "{diagram.id}" to itself.',
+            code="self_sharing",
+        )
+
+    @staticmethod
+    def multiple_public_shares_error(diagram) -> serializers.ValidationError:
+        return serializers.ValidationError(
+            detail=f"Cannot create multiple public shares for the same object: "
+            f"diagram {diagram.id} has already been shared publicly.",
+            code="multiple_public_shares",
+        )
@@ -33,6 +33,7 @@ class SignupUserAPIView(generics.CreateAPIView):
 
     serializer_class = SignupUserSerializer
     permission_classes = [AllowAny]
+    query_budgets = {"post": 3}
 
 
 # region @extend_schema
@@ -82,6 +83,12 @@ class UserViewSet(GenericViewSet, RetrieveModelMixin, UpdateModelMixin):
     http_method_names = ["get", "head", "put", "patch"]
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    # Saves of users invalidate cached resolutions of their tokens by a query.
+    query_budgets = {"retrieve": 1, "update": 4, "partial_update": 3}
 
     def get_object(self):
-        return self.request.user
+        user = self.request.user
+        # Users authenticated by cached tokens have just a few fields loaded.
+        if user.get_deferred_fields():
+            user.refresh_from_db()
+        return user
@@ -1,9 +1,25 @@
 from django.contrib.auth.models import BaseUserManager
+from django.db import models
 
 from apps.users.constants import UserRoles
+from apps.users.signals import users_updated
 
 
-class UserManager(BaseUserManager):
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs) -> int:
+        """
+        Sends `users_updated` with ids of the updated users, which are fetched
+        just if the signal has receivers.
+        """
+        if not users_updated.has_listeners(self.model):
+            return super().update(**kwargs)
+        user_ids = list(self.values_list("pk", flat=True))
+        updated = super().update(**kwargs)
+        users_updated.send(self.model, user_ids=user_ids, fields=set(kwargs))
+        return updated
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def create_user(self, email: str, password: str, **extra_fields):
         if not email:
             raise ValueError("The Email field must be set.")
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent by `UserQuerySet.update()` with `user_ids` and the updated `fields`,
+# as updates of querysets send no `post_save` signals.
+users_updated = Signal()
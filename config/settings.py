@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     "django_prometheus",
     # Created apps
     "apps.core",
+    "apps.authentication",
     "apps.users",
     "apps.diagrams",
     "apps.sharings",
@@ -68,6 +69,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # Custom middleware
     "apps.core.middleware.LogAllRequestsMiddleware",
+    "apps.core.middleware.QueryBudgetMiddleware",
     # Installed middleware (post-processing)
     "django_prometheus.middleware.PrometheusAfterMiddleware",
 ]
@@ -124,6 +126,11 @@ LOGGING = {
             "level": env.str("DJANGO_LOG_LEVEL", default="INFO"),
             "propagate": False,
         },
+        "query_budgets": {
+            "handlers": ["file", "console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
     },
 }
 
@@ -211,14 +218,47 @@ AUTH_USER_MODEL = "users.User"
 # DRF
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "apps.core.renderers.PassthroughJSONRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "apps.core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "apps.authentication.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Caches, e.g. CACHE_URL=redis://uml-diagrams-redis:6379/0 for a cache
+# which is shared by all processes (process-local memory cache by default).
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
+# Token authentication cache (see apps.authentication.authentication.TokenCache)
+TOKEN_AUTH_CACHE = {
+    # Alias of a cache from CACHES which is shared by all processes (tokens are
+    # not cached without it) and its entries lifetime in seconds.
+    "SHARED_CACHE": env.str("TOKEN_AUTH_SHARED_CACHE", default=""),
+    "SHARED_TTL": env.int("TOKEN_AUTH_SHARED_CACHE_TTL", default=300),
+    # In-process LRU cache size and entries lifetime in seconds (0 disables it),
+    # it requires the shared cache which validates its entries.
+    "MAX_SIZE": env.int("TOKEN_AUTH_CACHE_MAX_SIZE", default=10000),
+    "TTL": env.int("TOKEN_AUTH_CACHE_TTL", default=0),
+}
+
+# Runtime checks of query budgets (see apps.core.middleware.QueryBudgetMiddleware)
+QUERY_BUDGETS = {
+    "ENABLED": env.bool("QUERY_BUDGETS_ENABLED", default=False),
+    # Share of requests which queries are recorded and checked.
+    "SAMPLE_RATE": env.float("QUERY_BUDGETS_SAMPLE_RATE", default=0.01),
+    # Database time budget of a request in seconds (0 disables the check).
+    "DB_TIME": env.float("QUERY_BUDGETS_DB_TIME", default=0.5),
+    # Return numbers of queries and database time of sampled requests
+    # in response headers (for load benchmarks, do not enable in production).
+    "RESPONSE_HEADERS": env.bool("QUERY_BUDGETS_RESPONSE_HEADERS", default=False),
+}
+
 # drf-spectacular
 SPECTACULAR_SETTINGS = {
     "TITLE": "UML diagrams API",
@@ -263,3 +303,16 @@ CORS_ALLOWED_ORIGINS = [
 # Metrics
 # See: https://github.com/korfuri/django-prometheus/blob/master/documentation/exports.md
 PROMETHEUS_METRICS_EXPORT_PORT_RANGE = range(8001, 8003)
+
+# Diagrams
+# Codec of new diagram contents: "" (not compressed), "zlib" or "zstd".
+# zstd requires `zstandard` package, zlib is used if it is not installed.
+# Existing contents are (re)compressed by `compress_diagram_contents` command.
+DIAGRAM_CONTENT_CODEC = env.str("DIAGRAM_CONTENT_CODEC", default="")
+
+# JSON codec of API requests and responses: "json" (stdlib) or "orjson".
+# orjson requires `orjson` package, json is used if it is not installed.
+JSON_CODEC = env.str("JSON_CODEC", default="orjson")
+
+# Number of diagrams inserted by a query by bulk imports (see apps.diagrams.imports).
+DIAGRAM_IMPORT_BATCH_SIZE = env.int("DIAGRAM_IMPORT_BATCH_SIZE", default=500)
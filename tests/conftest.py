@@ -1,4 +1,7 @@
 import pytest
+from django.core.cache import caches
+
+from apps.authentication.authentication import token_cache
 
 
 @pytest.fixture(autouse=True)
@@ -10,3 +13,14 @@ def enable_db_access_for_all_tests(db):
     - db: The database fixture provided by pytest.
     """
     pass
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    """
+    A fixture that isolates tests from each other's cached token resolutions.
+    """
+    token_cache.reset()
+    caches["default"].clear()
+    yield
+    token_cache.reset()
@@ -4,7 +4,7 @@ from faker import Faker
 
 from apps.diagrams.models import Diagram
 from apps.sharings.constants import PermissionLevels
-from apps.sharings.models import Collaborator
+from apps.sharings.models import Collaborator, Team, TeamCollaborator, TeamMember
 from apps.users.constants import PASSWORD_MIN_LENGTH, UserRoles
 from apps.users.models import User
 
@@ -62,3 +62,28 @@ class CollaboratorFactory(DjangoModelFactory):
     diagram = factory.SubFactory(DiagramFactory)
     shared_to = factory.SubFactory(UserFactory)
     permission_level = factory.Iterator(PermissionLevels.CHOICES, getter=lambda x: x[0])
+
+
+class TeamFactory(DjangoModelFactory):
+    class Meta:
+        model = Team
+
+    name = factory.Faker("company")
+    owner = factory.SubFactory(UserFactory)
+
+
+class TeamMemberFactory(DjangoModelFactory):
+    class Meta:
+        model = TeamMember
+
+    team = factory.SubFactory(TeamFactory)
+    user = factory.SubFactory(UserFactory)
+
+
+class TeamCollaboratorFactory(DjangoModelFactory):
+    class Meta:
+        model = TeamCollaborator
+
+    team = factory.SubFactory(TeamFactory)
+    diagram = factory.SubFactory(DiagramFactory)
+    permission_level = factory.Iterator(PermissionLevels.CHOICES, getter=lambda x: x[0])
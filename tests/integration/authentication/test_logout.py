@@ -56,3 +56,17 @@ def test_login_allowed_http_methods(
     """
     response = getattr(client, method)(path=LOGOUT_URL)
     assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+
+def test_logout_token_is_not_accepted_anymore(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN logged-in user who was authenticated by the token (so it is cached)
+    WHEN POST api/v1/logout is requested and the token is used again
+    THEN check that 401 UNAUTHORIZED is returned
+    """
+    assert client.post(path=LOGOUT_URL).status_code == status.HTTP_204_NO_CONTENT
+    response = client.post(path=LOGOUT_URL)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.data["detail"].code == "authentication_failed"
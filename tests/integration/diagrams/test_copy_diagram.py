@@ -1,12 +1,19 @@
+from django.db import connection
+from django.db.models import JSONField
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from faker import Faker
+from pytest_mock import MockerFixture
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from apps.diagrams.models import Diagram
 from apps.users.models import User
 from tests.factories import DiagramFactory
-from tests.integration.diagrams.constants import DIAGRAM_COPY_URL_NAME
+from tests.integration.diagrams.constants import (
+    DIAGRAM_COPY_URL_NAME,
+    DIAGRAMS_COPY_URL,
+)
 
 
 class TestCopyDiagram:
@@ -93,3 +100,121 @@ class TestCopyDiagram:
         copied_diagram = Diagram.objects.get(id=response.data["diagram_id"])
         assert copied_diagram.owner == logged_in_admin
         assert copied_diagram.json == diagram_owned_by_another_user.json
+
+    def test_copy_diagram_inside_database(
+        self, client: APIClient, logged_in_user: User, mocker: MockerFixture
+    ) -> None:
+        """
+        GIVEN a logged-in user who owns a diagram
+        WHEN he requests POST /api/v1/diagrams/{pk}/copy/
+        THEN check that the diagram is copied by a single INSERT ... SELECT
+        statement without loading the diagram JSON
+        """
+        diagram_owned_by_user = DiagramFactory(
+            owner=logged_in_user, json={"classes": [{"name": "User"}]}
+        )
+        url = reverse(DIAGRAM_COPY_URL_NAME, kwargs={"pk": diagram_owned_by_user.pk})
+        from_db_value = mocker.spy(JSONField, "from_db_value")
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(path=url)
+        assert response.status_code == status.HTTP_201_CREATED
+        from_db_value.assert_not_called()
+        inserts = [q["sql"] for q in queries if q["sql"].startswith("INSERT")]
+        assert len(inserts) == 1
+        assert "SELECT" in inserts[0]
+        copied_diagram = Diagram.objects.get(id=response.data["diagram_id"])
+        assert copied_diagram.json == {"classes": [{"name": "User"}]}
+        assert copied_diagram.content_id == diagram_owned_by_user.content_id
+        assert copied_diagram.description == diagram_owned_by_user.description
+        assert copied_diagram.created_at == copied_diagram.updated_at
+
+
+class TestCopyDiagrams:
+    """Testing route to @action copy_diagrams() inside DiagramViewSet."""
+
+    def test_copy_diagrams_by_authenticated_owner(
+        self, client: APIClient, logged_in_user: User
+    ) -> None:
+        """
+        GIVEN a logged-in user who owns 2 diagrams
+        WHEN he requests POST /api/v1/diagrams/copy/ with their ids
+        THEN check that both diagrams are copied and 201 CREATED is returned
+        """
+        diagrams = [DiagramFactory(owner=logged_in_user) for _ in range(2)]
+        diagram_ids = [str(diagram.id) for diagram in diagrams]
+        response = client.post(
+            path=DIAGRAMS_COPY_URL, data={"diagram_ids": diagram_ids}, format="json"
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [item["original_diagram_id"] for item in response.json()] == (
+            diagram_ids
+        )
+        for item, diagram in zip(response.json(), diagrams):
+            copied_diagram = Diagram.objects.get(id=item["diagram_id"])
+            assert item["title"] == copied_diagram.title == f"Copy of {diagram.title}"
+            assert item["description"] == diagram.description
+            assert copied_diagram.json == diagram.json
+            assert copied_diagram.owner == logged_in_user
+        assert Diagram.objects.count() == 4
+
+    def test_copy_diagrams_with_another_user_diagram(
+        self, client: APIClient, logged_in_user: User
+    ) -> None:
+        """
+        GIVEN a logged-in user who owns a diagram
+        WHEN he requests POST /api/v1/diagrams/copy/ with ids of his diagram,
+        another user's diagram and a nonexistent diagram
+        THEN check that nothing is copied, 404 NOT FOUND is returned with ids
+        of the diagrams which can not be copied
+        """
+        diagram_owned_by_user = DiagramFactory(owner=logged_in_user)
+        diagram_owned_by_another_user = DiagramFactory()
+        nonexistent_id = Faker().uuid4()
+        response = client.post(
+            path=DIAGRAMS_COPY_URL,
+            data={
+                "diagram_ids": [
+                    str(diagram_owned_by_user.id),
+                    str(diagram_owned_by_another_user.id),
+                    nonexistent_id,
+                ]
+            },
+            format="json",
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()["diagram_ids"] == [
+            str(diagram_owned_by_another_user.id),
+            nonexistent_id,
+        ]
+        assert Diagram.objects.count() == 2
+
+    def test_copy_diagrams_any_diagrams_by_admin(
+        self, client: APIClient, logged_in_admin: User
+    ) -> None:
+        """
+        GIVEN a logged-in admin
+        WHEN he requests POST /api/v1/diagrams/copy/ with ids of other users'
+        diagrams
+        THEN check that the diagrams are copied to the admin account
+        """
+        diagrams = [DiagramFactory() for _ in range(2)]
+        response = client.post(
+            path=DIAGRAMS_COPY_URL,
+            data={"diagram_ids": [str(diagram.id) for diagram in diagrams]},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Diagram.objects.filter(owner=logged_in_admin).count() == 2
+
+    def test_copy_diagrams_with_invalid_data(
+        self, client: APIClient, logged_in_user: User
+    ) -> None:
+        """
+        GIVEN a logged-in user
+        WHEN he requests POST /api/v1/diagrams/copy/ with an empty list of ids
+        THEN check that 400 BAD REQUEST is returned
+        """
+        response = client.post(
+            path=DIAGRAMS_COPY_URL, data={"diagram_ids": []}, format="json"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -7,7 +7,10 @@ from apps.diagrams.models import Diagram
 from apps.sharings.constants import PermissionLevels
 from apps.users.models import User
 from tests.factories import CollaboratorFactory, DiagramFactory
-from tests.integration.diagrams.constants import SHARED_DIAGRAM_COPY_URL_NAME
+from tests.integration.diagrams.constants import (
+    SHARED_DIAGRAM_COPY_URL_NAME,
+    SHARED_DIAGRAMS_COPY_URL,
+)
 
 
 class TestCopySharedDiagram:
@@ -135,3 +138,58 @@ class TestCopySharedDiagram:
         # Database data check
         assert Diagram.objects.count() == 1
         assert not Diagram.objects.filter(owner=logged_in_user).exists()
+
+
+class TestCopySharedDiagrams:
+    """
+    Testing route to @action copy_shared_diagrams() inside SharedWithMeDiagramViewSet.
+    """
+
+    def test_copy_shared_diagrams_by_collaborator(
+        self, client: APIClient, logged_in_user: User
+    ) -> None:
+        """
+        GIVEN a logged-in user who was shared diagrams to with "view-copy"
+        and "view-edit" permissions
+        WHEN he requests POST /api/v1/diagrams/shared-with-me/copy/
+        THEN check that the diagrams are copied to his account and
+        201 CREATED is returned
+        """
+        collaborators = [
+            CollaboratorFactory(shared_to=logged_in_user, permission_level=level)
+            for level in (PermissionLevels.VIEWCOPY, PermissionLevels.VIEWEDIT)
+        ]
+        response = client.post(
+            path=SHARED_DIAGRAMS_COPY_URL,
+            data={"diagram_ids": [str(c.diagram.id) for c in collaborators]},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        copied_diagrams = Diagram.objects.filter(owner=logged_in_user)
+        assert {diagram.json for diagram in copied_diagrams} == {
+            c.diagram.json for c in collaborators
+        }
+        assert len(response.data) == 2
+
+    def test_copy_shared_diagrams_with_invalid_permission(
+        self, client: APIClient, logged_in_user: User
+    ) -> None:
+        """
+        GIVEN a logged-in user who was shared diagrams to with "view-copy"
+        and "view-only" permissions
+        WHEN he requests POST /api/v1/diagrams/shared-with-me/copy/
+        THEN check that nothing is copied and 404 NOT FOUND is returned
+        with the id of "view-only" diagram
+        """
+        collaborators = [
+            CollaboratorFactory(shared_to=logged_in_user, permission_level=level)
+            for level in (PermissionLevels.VIEWCOPY, PermissionLevels.VIEWONLY)
+        ]
+        response = client.post(
+            path=SHARED_DIAGRAMS_COPY_URL,
+            data={"diagram_ids": [str(c.diagram.id) for c in collaborators]},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()["diagram_ids"] == [str(collaborators[1].diagram.id)]
+        assert not Diagram.objects.filter(owner=logged_in_user).exists()
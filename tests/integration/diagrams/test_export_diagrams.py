@@ -0,0 +1,170 @@
+import gzip
+import json
+from typing import Dict, List
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.diagrams.constants import ExportScopes
+from apps.sharings.constants import PermissionLevels
+from apps.users.models import User
+from tests.factories import CollaboratorFactory, DiagramFactory
+from tests.integration.diagrams.constants import DIAGRAMS_URL
+
+EXPORT_URL = reverse("diagram-export-diagrams")
+
+
+def read_lines(response) -> List[dict]:
+    content = b"".join(response.streaming_content)
+    if response.get("Content-Encoding") == "gzip":
+        content = gzip.decompress(content)
+    assert content.endswith(b"\n") or not content
+    return [json.loads(line) for line in content.splitlines()]
+
+
+def by_id(lines: List[dict]) -> Dict[str, dict]:
+    return {line["diagram_id"]: line for line in lines}
+
+
+def test_export_owned_diagrams(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user who owns diagrams and a diagram of another user
+    WHEN he requests GET /api/v1/diagrams/export/
+    THEN check that his diagrams are streamed as NDJSON lines with the same
+    data as diagram details.
+    """
+    diagrams = [DiagramFactory(owner=logged_in_user) for _ in range(3)]
+    DiagramFactory()
+    response = client.get(EXPORT_URL)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    assert response["Content-Type"] == "application/x-ndjson"
+    assert "Content-Encoding" not in response
+    lines = by_id(read_lines(response))
+    assert set(lines) == {str(diagram.id) for diagram in diagrams}
+    for diagram in diagrams:
+        details = client.get(f"{DIAGRAMS_URL}{diagram.id}/").json()
+        assert lines[str(diagram.id)] == details
+
+
+def test_export_diagrams_with_compressed_contents(
+    client: APIClient, logged_in_user: User, settings
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram which content is compressed
+    WHEN he requests GET /api/v1/diagrams/export/
+    THEN check that the document is exported decompressed.
+    """
+    settings.DIAGRAM_CONTENT_CODEC = "zlib"
+    document = {"classes": [{"name": "Użytkownik", "fields": ["id"]}] * 50}
+    diagram = DiagramFactory(owner=logged_in_user, json=document)
+    assert diagram.content.codec == "zlib"
+    [line] = read_lines(client.get(EXPORT_URL))
+    assert line["json"] == document
+
+
+def test_export_shared_diagrams(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user who has diagrams shared to him
+    WHEN he requests GET /api/v1/diagrams/export/?scope=shared
+    THEN check that just the shared diagrams are streamed with permission levels.
+    """
+    DiagramFactory(owner=logged_in_user)
+    collaborators = [
+        CollaboratorFactory(shared_to=logged_in_user, permission_level=level)
+        for level, _ in PermissionLevels.CHOICES
+    ]
+    response = client.get(f"{EXPORT_URL}?scope={ExportScopes.SHARED}")
+    assert response.status_code == status.HTTP_200_OK
+    lines = by_id(read_lines(response))
+    assert {
+        diagram_id: line["permission_level"] for diagram_id, line in lines.items()
+    } == {
+        str(collaborator.diagram_id): collaborator.permission_level
+        for collaborator in collaborators
+    }
+
+
+def test_export_all_diagrams_by_admin(client: APIClient, logged_in_admin: User) -> None:
+    """
+    GIVEN a logged-in admin and diagrams of other users
+    WHEN he requests GET /api/v1/diagrams/export/?scope=all
+    THEN check that all diagrams are streamed.
+    """
+    diagrams = [DiagramFactory() for _ in range(3)]
+    response = client.get(f"{EXPORT_URL}?scope={ExportScopes.ALL}")
+    assert response.status_code == status.HTTP_200_OK
+    assert set(by_id(read_lines(response))) == {str(diagram.id) for diagram in diagrams}
+
+
+def test_export_all_diagrams_by_user_is_forbidden(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user
+    WHEN he requests GET /api/v1/diagrams/export/?scope=all
+    THEN check that 403 FORBIDDEN is returned.
+    """
+    response = client.get(f"{EXPORT_URL}?scope={ExportScopes.ALL}")
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_export_diagrams_invalid_scope(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user
+    WHEN he requests GET /api/v1/diagrams/export/ with an unknown scope
+    THEN check that 400 BAD REQUEST is returned.
+    """
+    response = client.get(f"{EXPORT_URL}?scope=public")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "scope" in response.json()
+
+
+def test_export_diagrams_by_anonymous_user(client: APIClient) -> None:
+    """
+    GIVEN an anonymous user
+    WHEN he requests GET /api/v1/diagrams/export/
+    THEN check that 401 UNAUTHORIZED is returned.
+    """
+    response = client.get(EXPORT_URL)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.parametrize(
+    "accept_encoding", ["gzip", "br, gzip;q=0.5", "zstd;q=0, gzip"]
+)
+def test_export_diagrams_compressed_by_gzip(
+    client: APIClient, logged_in_user: User, accept_encoding: str
+) -> None:
+    """
+    GIVEN a logged-in user who owns diagrams
+    WHEN he requests GET /api/v1/diagrams/export/ accepting gzip encoding
+    THEN check that the stream is compressed by gzip.
+    """
+    diagrams = [DiagramFactory(owner=logged_in_user) for _ in range(2)]
+    response = client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING=accept_encoding)
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    assert set(by_id(read_lines(response))) == {str(diagram.id) for diagram in diagrams}
+
+
+def test_export_diagrams_compressed_by_zstd(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram
+    WHEN he requests GET /api/v1/diagrams/export/ accepting zstd encoding
+    THEN check that the stream is compressed by zstd.
+    """
+    zstandard = pytest.importorskip("zstandard")
+    diagram = DiagramFactory(owner=logged_in_user)
+    response = client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING="gzip, zstd")
+    assert response["Content-Encoding"] == "zstd"
+    content = (
+        zstandard.ZstdDecompressor()
+        .decompressobj()
+        .decompress(b"".join(response.streaming_content))
+    )
+    assert json.loads(content)["diagram_id"] == str(diagram.id)
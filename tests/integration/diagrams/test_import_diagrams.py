@@ -0,0 +1,174 @@
+import json
+import uuid
+from typing import List
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.diagrams.models import Diagram, DiagramContent
+from apps.users.models import User
+from tests.factories import DiagramFactory, UserFactory
+
+IMPORT_URL = reverse("diagram-import-diagrams")
+
+ITEMS = [
+    {"title": "Orders", "json": {"classes": [{"name": "Order"}]}},
+    {"title": "Users", "json": {"classes": [{"name": "User"}]}, "description": "v2"},
+]
+
+
+def ndjson(items: List) -> bytes:
+    return b"".join(json.dumps(item).encode() + b"\n" for item in items)
+
+
+def post_import(client: APIClient, body: bytes, content_type: str):
+    return client.generic("POST", IMPORT_URL, body, content_type=content_type)
+
+
+@pytest.mark.parametrize(
+    "body, content_type",
+    [
+        (ndjson(ITEMS), "application/x-ndjson"),
+        (json.dumps(ITEMS).encode(), "application/json"),
+        (json.dumps(ITEMS).encode(), "application/json; charset=utf-8"),
+    ],
+)
+def test_import_diagrams(
+    client: APIClient, logged_in_user: User, body: bytes, content_type: str
+) -> None:
+    """
+    GIVEN a logged-in user and diagrams as NDJSON or JSON array
+    WHEN he requests POST /api/v1/diagrams/import/
+    THEN check that the diagrams are created for him in order of the items.
+    """
+    response = post_import(client, body, content_type)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 0
+    assert [result["index"] for result in data["results"]] == [0, 1]
+    for item, result in zip(ITEMS, data["results"]):
+        diagram = Diagram.objects.get(id=result["diagram_id"])
+        assert diagram.owner == logged_in_user
+        assert diagram.title == item["title"]
+        assert diagram.description == item.get("description", "")
+        assert diagram.json == item["json"]
+
+
+def test_import_diagrams_skips_invalid_items(
+    client: APIClient, logged_in_user: User, settings
+) -> None:
+    """
+    GIVEN a logged-in user and NDJSON with valid items, items without required
+    fields and a line which is not JSON
+    WHEN he requests POST /api/v1/diagrams/import/ with a small batch size
+    THEN check that the valid items are imported and errors of the invalid
+    ones are returned in their places.
+    """
+    settings.DIAGRAM_IMPORT_BATCH_SIZE = 1
+    body = ndjson([ITEMS[0], {"json": {}}]) + b"{invalid\n" + ndjson([ITEMS[1], 5])
+    response = post_import(client, body, "application/x-ndjson")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert (data["created"], data["failed"]) == (2, 3)
+    results = data["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert "diagram_id" in results[0] and "diagram_id" in results[3]
+    assert "title" in results[1]["errors"]
+    assert "non_field_errors" in results[2]["errors"]
+    assert "non_field_errors" in results[4]["errors"]
+    assert Diagram.objects.filter(owner=logged_in_user).count() == 2
+
+
+def test_import_diagrams_stores_equal_contents_once(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram and items with the same json
+    WHEN he requests POST /api/v1/diagrams/import/
+    THEN check that the json is stored once with references of all diagrams.
+    """
+    diagram = DiagramFactory(owner=logged_in_user, json=ITEMS[0]["json"])
+    response = post_import(client, ndjson([ITEMS[0]] * 3), "application/x-ndjson")
+    assert response.json()["created"] == 3
+    assert DiagramContent.objects.get().ref_count == 4
+    assert DiagramContent.objects.get().digest == diagram.content_id
+
+
+def test_import_diagrams_owners_by_admin(
+    client: APIClient, logged_in_admin: User
+) -> None:
+    """
+    GIVEN a logged-in admin, a user and items with owners which exist or not
+    WHEN he requests POST /api/v1/diagrams/import/
+    THEN check that diagrams are created for the existing owners and for the
+    admin without owner, and items with unknown owners are reported.
+    """
+    user = UserFactory()
+    items = [
+        {**ITEMS[0], "owner_id": str(user.id)},
+        {**ITEMS[1], "owner_id": str(uuid.uuid4())},
+        ITEMS[1],
+    ]
+    response = post_import(client, ndjson(items), "application/x-ndjson")
+    results = response.json()["results"]
+    assert Diagram.objects.get(id=results[0]["diagram_id"]).owner == user
+    assert "owner_id" in results[1]["errors"]
+    assert Diagram.objects.get(id=results[2]["diagram_id"]).owner == logged_in_admin
+
+
+def test_import_diagrams_owner_is_ignored_for_user(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user and an item with an owner of another user
+    WHEN he requests POST /api/v1/diagrams/import/
+    THEN check that the diagram is created for him.
+    """
+    other = UserFactory()
+    items = [{**ITEMS[0], "owner_id": str(other.id)}]
+    response = post_import(client, ndjson(items), "application/x-ndjson")
+    [result] = response.json()["results"]
+    assert Diagram.objects.get(id=result["diagram_id"]).owner == logged_in_user
+
+
+def test_import_diagrams_invalid_json_array(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user and a JSON array which is cut
+    WHEN he requests POST /api/v1/diagrams/import/
+    THEN check that the items before the error are imported and the error is
+    reported in place of the next item.
+    """
+    body = json.dumps(ITEMS).encode()[:-10]
+    response = post_import(client, body, "application/json")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert (data["created"], data["failed"]) == (1, 1)
+    assert "non_field_errors" in data["results"][1]["errors"]
+
+
+def test_import_diagrams_unsupported_media_type(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user
+    WHEN he requests POST /api/v1/diagrams/import/ with a CSV body
+    THEN check that 415 UNSUPPORTED MEDIA TYPE is returned.
+    """
+    response = post_import(client, b"title,json\n", "text/csv")
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    assert not Diagram.objects.exists()
+
+
+def test_import_diagrams_by_anonymous_user(client: APIClient) -> None:
+    """
+    GIVEN an anonymous user
+    WHEN he requests POST /api/v1/diagrams/import/
+    THEN check that 401 UNAUTHORIZED is returned.
+    """
+    response = post_import(client, ndjson(ITEMS), "application/x-ndjson")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
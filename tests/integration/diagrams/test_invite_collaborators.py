@@ -0,0 +1,193 @@
+from typing import Any, Callable, Dict
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.diagrams.models import Diagram
+from apps.sharings.constants import PermissionLevels
+from apps.sharings.models import Collaborator
+from apps.users.models import User
+from tests.factories import CollaboratorFactory, DiagramFactory, UserFactory
+from tests.integration.sharings.constants import (
+    DIAGRAM_SHARE_INVITE_USER_URL_NAME,
+    DIAGRAM_SHARE_INVITE_USERS_URL_NAME,
+)
+
+
+def invite_users_url(diagram: Diagram) -> str:
+    return reverse(DIAGRAM_SHARE_INVITE_USERS_URL_NAME, kwargs={"pk": diagram.pk})
+
+
+def test_invite_collaborators(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram and other users
+    WHEN he requests POST /api/v1/diagrams/{diagram_id}/share-invite-users/
+    THEN check that the diagram is shared to the users with their permission
+    levels and the shares are returned in order of the invitations.
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    users = [UserFactory() for _ in range(3)]
+    levels = [level for level, _ in PermissionLevels.CHOICES]
+    invitations = [
+        {"user_email": user.email, "permission_level": level}
+        for user, level in zip(users, levels)
+    ]
+    response = client.post(
+        invite_users_url(diagram), {"invitations": invitations}, format="json"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert (data["created"], data["failed"]) == (3, 0)
+    for index, (user, level, result) in enumerate(zip(users, levels, data["results"])):
+        collaborator = Collaborator.objects.get(id=result["collaborator_id"])
+        assert (collaborator.diagram, collaborator.shared_to) == (diagram, user)
+        assert result == {
+            "index": index,
+            "collaborator_id": str(collaborator.id),
+            "diagram_id": str(diagram.id),
+            "shared_to": user.email,
+            "permission_level": level,
+        }
+        assert collaborator.permission_level == level
+
+
+# Invitations which are invalid for the single and for the bulk invite.
+INVALID_INVITATIONS: Dict[str, Callable[[Diagram], Any]] = {
+    "does_not_exist": lambda diagram: {
+        "user_email": "nobody@example.com",
+        "permission_level": PermissionLevels.VIEWONLY,
+    },
+    "null": lambda diagram: {
+        "user_email": "",
+        "permission_level": PermissionLevels.VIEWONLY,
+    },
+    "required": lambda diagram: {"permission_level": PermissionLevels.VIEWONLY},
+    "invalid_choice": lambda diagram: {
+        "user_email": UserFactory().email,
+        "permission_level": "invalid_permission_level",
+    },
+    "inactive_user": lambda diagram: {
+        "user_email": UserFactory(is_active=False).email,
+        "permission_level": PermissionLevels.VIEWONLY,
+    },
+    "self_sharing": lambda diagram: {
+        "user_email": diagram.owner.email,
+        "permission_level": PermissionLevels.VIEWONLY,
+    },
+    "non_unique_sharing": lambda diagram: {
+        "user_email": CollaboratorFactory(diagram=diagram).shared_to.email,
+        "permission_level": PermissionLevels.VIEWONLY,
+    },
+    "invalid": lambda diagram: "user@example.com",
+}
+
+
+@pytest.mark.parametrize("code", INVALID_INVITATIONS)
+def test_invite_collaborators_errors_are_same_as_single_invite(
+    client: APIClient, logged_in_user: User, code: str
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram and an invalid invitation
+    WHEN he requests POST /api/v1/diagrams/{diagram_id}/share-invite-users/
+    with the invalid and a valid invitation
+    THEN check that the valid one is created and errors of the invalid one are
+    the same as by POST /api/v1/diagrams/{diagram_id}/share-invite-user/.
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    invitation = INVALID_INVITATIONS[code](diagram)
+    single = client.post(
+        reverse(DIAGRAM_SHARE_INVITE_USER_URL_NAME, kwargs={"pk": diagram.pk}),
+        invitation,
+        format="json",
+    )
+    assert single.status_code == status.HTTP_400_BAD_REQUEST
+    valid = {"user_email": UserFactory().email, "permission_level": "view-edit"}
+    response = client.post(
+        invite_users_url(diagram),
+        {"invitations": [invitation, valid]},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert (data["created"], data["failed"]) == (1, 1)
+    error, created = data["results"]
+    assert error["errors"] == single.json()
+    assert error["codes"] == {
+        field: [detail.code for detail in details]
+        for field, details in single.data.items()
+    }
+    assert code in sum(error["codes"].values(), [])
+    assert created["shared_to"] == valid["user_email"]
+
+
+def test_invite_collaborators_same_user_twice(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram
+    WHEN he requests POST /api/v1/diagrams/{diagram_id}/share-invite-users/
+    with two invitations of the same user
+    THEN check that the first one is created and the second one is reported
+    as non-unique sharing.
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    invitation = {"user_email": UserFactory().email, "permission_level": "view-only"}
+    response = client.post(
+        invite_users_url(diagram), {"invitations": [invitation] * 2}, format="json"
+    )
+    first, second = response.json()["results"]
+    assert "collaborator_id" in first
+    assert second["codes"] == {"non_field_errors": ["non_unique_sharing"]}
+    assert Collaborator.objects.filter(diagram=diagram).count() == 1
+
+
+@pytest.mark.parametrize("body", [{}, {"invitations": []}, {"invitations": "x"}])
+def test_invite_collaborators_invalid_body(
+    client: APIClient, logged_in_user: User, body: dict
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram
+    WHEN he requests POST /api/v1/diagrams/{diagram_id}/share-invite-users/
+    without a list of invitations
+    THEN check that 400 BAD REQUEST is returned.
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    response = client.post(invite_users_url(diagram), body, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "invitations" in response.json()
+
+
+def test_invite_collaborators_to_alien_diagram(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user and a diagram of another user
+    WHEN he requests POST /api/v1/diagrams/{diagram_id}/share-invite-users/
+    THEN check that 404 NOT FOUND is returned.
+    """
+    diagram = DiagramFactory()
+    invitation = {"user_email": UserFactory().email, "permission_level": "view-only"}
+    response = client.post(
+        invite_users_url(diagram), {"invitations": [invitation]}, format="json"
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert not Collaborator.objects.exists()
+
+
+def test_invite_collaborators_to_alien_diagram_by_admin(
+    client: APIClient, logged_in_admin: User
+) -> None:
+    """
+    GIVEN a logged-in admin and a diagram of another user
+    WHEN he requests POST /api/v1/diagrams/{diagram_id}/share-invite-users/
+    THEN check that the diagram is shared.
+    """
+    diagram = DiagramFactory()
+    invitation = {"user_email": UserFactory().email, "permission_level": "view-only"}
+    response = client.post(
+        invite_users_url(diagram), {"invitations": [invitation]}, format="json"
+    )
+    assert response.json()["created"] == 1
+    assert Collaborator.objects.get().diagram == diagram
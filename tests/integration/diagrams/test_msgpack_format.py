@@ -0,0 +1,258 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.core import msgpackcodec
+from apps.diagrams.models import Diagram
+from apps.sharings.constants import PermissionLevels
+from apps.users.models import User
+from tests.factories import CollaboratorFactory, DiagramFactory
+from tests.integration.diagrams.constants import (
+    DIAGRAMS_URL,
+    PUBLIC_DIAGRAMS_URL_NAME,
+    SHARED_DIAGRAMS_URL,
+)
+
+msgpack = pytest.importorskip("msgpack")
+
+MSGPACK = "application/msgpack"
+
+# JSON values which must round-trip without loss.
+DOCUMENT = {
+    "classes": [
+        {
+            "name": "Użytkownik \u2028 😀",
+            "x": 0.1,
+            "y": -1e-300,
+            "width": 1.7976931348623157e308,
+            "id": 2**63 - 1,
+            "minimum": -(2**63),
+            "abstract": False,
+            "parent": None,
+            "attributes": [],
+        }
+    ],
+    "links": [{"from": 0, "to": 0, "label": ""}],
+    "meta": {},
+}
+
+
+def test_retrieve_diagram_as_msgpack(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram
+    WHEN he requests GET /api/v1/diagrams/{diagram_id}/ accepting MessagePack
+    THEN check that the response is MessagePack with the same data as JSON one
+    and that responses vary by Accept header.
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    url = f"{DIAGRAMS_URL}{diagram.id}/"
+    response = client.get(url, HTTP_ACCEPT=MSGPACK)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == MSGPACK
+    assert "Accept" in response["Vary"]
+    assert msgpack.unpackb(response.content) == client.get(url).json()
+
+
+def test_msgpack_and_json_responses_have_different_etags(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram
+    WHEN he requests GET /api/v1/diagrams/{diagram_id}/ as MessagePack and JSON
+    THEN check that the responses have different strong ETags, a cached copy
+    is validated just by the ETag of its format, and ETags of both formats
+    are accepted by If-Match precondition
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    url = f"{DIAGRAMS_URL}{diagram.id}/"
+    msgpack_etag = client.get(url, HTTP_ACCEPT=MSGPACK)["ETag"]
+    json_etag = client.get(url)["ETag"]
+    assert msgpack_etag != json_etag
+    assert not msgpack_etag.startswith("W/")
+    response = client.get(url, HTTP_ACCEPT=MSGPACK, HTTP_IF_NONE_MATCH=json_etag)
+    assert response.status_code == status.HTTP_200_OK
+    response = client.get(url, HTTP_ACCEPT=MSGPACK, HTTP_IF_NONE_MATCH=msgpack_etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == msgpack_etag
+    response = client.patch(
+        url, data={"title": "Changed"}, format="json", HTTP_IF_MATCH=msgpack_etag
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] not in (json_etag, msgpack_etag)
+    response = client.patch(
+        url,
+        data=msgpack.packb({"title": "Stale"}),
+        content_type=MSGPACK,
+        HTTP_ACCEPT=MSGPACK,
+        HTTP_IF_MATCH=json_etag,
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+
+def test_retrieve_diagram_not_representable_as_msgpack(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram with an integer which does not fit
+    64 bits
+    WHEN he requests GET /api/v1/diagrams/{diagram_id}/ accepting MessagePack
+    THEN check that 406 NOT ACCEPTABLE is returned and the diagram can be
+    retrieved as JSON.
+    """
+    document = {"size": 123456789012345678901234567890}
+    diagram = DiagramFactory(owner=logged_in_user, json=document)
+    url = f"{DIAGRAMS_URL}{diagram.id}/"
+    response = client.get(url, HTTP_ACCEPT=MSGPACK)
+    assert response.status_code == status.HTTP_406_NOT_ACCEPTABLE
+    assert msgpack.unpackb(response.content)["detail"]
+    assert "ETag" not in response
+    assert "Accept" in response["Vary"]
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["json"] == document
+
+
+def test_save_diagram_as_msgpack_round_trips_document(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram
+    WHEN he requests PATCH /api/v1/diagrams/{diagram_id}/ with MessagePack body
+    THEN check that the stored document and documents of MessagePack and JSON
+    responses are the same as the sent one.
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    url = f"{DIAGRAMS_URL}{diagram.id}/"
+    response = client.patch(
+        url,
+        data=msgpack.packb({"title": "Binary", "json": DOCUMENT}),
+        content_type=MSGPACK,
+        HTTP_ACCEPT=MSGPACK,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert msgpack.unpackb(response.content)["json"] == DOCUMENT
+    diagram = Diagram.objects.get(id=diagram.id)
+    assert diagram.title == "Binary"
+    assert diagram.json == DOCUMENT
+    response = client.get(url, HTTP_ACCEPT=MSGPACK)
+    assert msgpack.unpackb(response.content)["json"] == DOCUMENT
+    assert client.get(url).json()["json"] == DOCUMENT
+
+
+def test_create_diagram_as_msgpack(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user
+    WHEN he requests POST /api/v1/diagrams/ with MessagePack body
+    THEN check that the diagram is created and 201 CREATED is returned.
+    """
+    response = client.post(
+        DIAGRAMS_URL,
+        data=msgpack.packb({"title": "Binary", "json": DOCUMENT}),
+        content_type=MSGPACK,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    diagram = Diagram.objects.get(id=response.json()["diagram_id"])
+    assert diagram.owner == logged_in_user
+    assert diagram.json == DOCUMENT
+
+
+def test_list_shared_diagrams_as_msgpack(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who has a diagram shared to him
+    WHEN he requests GET /api/v1/diagrams/shared-with-me/ accepting MessagePack
+    THEN check that the response has the same data as JSON one.
+    """
+    CollaboratorFactory(shared_to=logged_in_user)
+    response = client.get(SHARED_DIAGRAMS_URL, HTTP_ACCEPT=MSGPACK)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == MSGPACK
+    assert msgpack.unpackb(response.content) == client.get(SHARED_DIAGRAMS_URL).json()
+
+
+def test_retrieve_public_diagram_as_msgpack(client: APIClient) -> None:
+    """
+    GIVEN a publicly shared diagram and an anonymous user
+    WHEN he requests GET /api/v1/diagrams/public/{diagram_id}/ accepting MessagePack
+    THEN check that the response has the same data as JSON one.
+    """
+    public_sharing = CollaboratorFactory(
+        shared_to=None, permission_level=PermissionLevels.VIEWONLY
+    )
+    url = reverse(PUBLIC_DIAGRAMS_URL_NAME, kwargs={"pk": public_sharing.diagram.pk})
+    response = client.get(url, HTTP_ACCEPT=MSGPACK)
+    assert response.status_code == status.HTTP_200_OK
+    assert msgpack.unpackb(response.content) == client.get(url).json()
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"\xc1",
+        msgpack.packb({"title": "Binary"}) + b"\x00",
+        msgpack.packb({1: "Binary"}),
+        msgpack.packb({"title": msgpack.ExtType(1, b"data")}),
+    ],
+)
+def test_save_diagram_with_invalid_msgpack_body(
+    client: APIClient, logged_in_user: User, body: bytes
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram
+    WHEN he requests PATCH /api/v1/diagrams/{diagram_id}/ with a body which is
+    not valid MessagePack or has values which JSON has no type for
+    THEN check that 400 BAD REQUEST is returned in the accepted format.
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    response = client.patch(
+        f"{DIAGRAMS_URL}{diagram.id}/",
+        data=body,
+        content_type=MSGPACK,
+        HTTP_ACCEPT=MSGPACK,
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert msgpack.unpackb(response.content)["detail"].startswith(
+        "MessagePack parse error"
+    )
+
+
+def test_save_diagram_with_binary_document_in_msgpack_body(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram
+    WHEN he requests PATCH /api/v1/diagrams/{diagram_id}/ with MessagePack body
+    which document is a binary value
+    THEN check that 400 BAD REQUEST is returned and the diagram is not changed.
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    response = client.patch(
+        f"{DIAGRAMS_URL}{diagram.id}/",
+        data=msgpack.packb({"json": b"\x00"}),
+        content_type=MSGPACK,
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "json" in response.json()
+    assert Diagram.objects.get(id=diagram.id).json == diagram.json
+
+
+def test_msgpack_is_not_negotiated_without_package(
+    client: APIClient, logged_in_user: User, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    GIVEN that `msgpack` package is not installed
+    WHEN a user requests a diagram accepting just MessagePack or sends
+    MessagePack body
+    THEN check that 406 NOT ACCEPTABLE and 415 UNSUPPORTED MEDIA TYPE are returned.
+    """
+    monkeypatch.setattr(msgpackcodec, "msgpack", None)
+    diagram = DiagramFactory(owner=logged_in_user)
+    url = f"{DIAGRAMS_URL}{diagram.id}/"
+    assert (
+        client.get(url, HTTP_ACCEPT=MSGPACK).status_code
+        == status.HTTP_406_NOT_ACCEPTABLE
+    )
+    response = client.patch(url, data=b"\x80", content_type=MSGPACK)
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
@@ -1,3 +1,8 @@
+from django.db import connection
+from django.db.models import JSONField
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from pytest_mock import MockerFixture
 from rest_framework import status
 from rest_framework.test import APIClient
 
@@ -73,3 +78,133 @@ def test_retrieve_diagram_admin_can_retrieve_any_diagram(
         ),
     }
     assert response.json() == diagram_data_as_dict
+
+
+def test_retrieve_diagram_returns_json_without_decoding_it(
+    client: APIClient, logged_in_user: User, mocker: MockerFixture
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram with a JSON object document
+    WHEN he requests GET /api/v1/diagrams/{diagram_id}/
+    THEN check that he gets the document, which was not decoded from the database
+    value, and 200 OK is returned
+    """
+    document = {"classes": [{"name": "Диаграмма", "fields": []}], "links": [1.5]}
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user, json=document)
+    from_db_value = mocker.spy(JSONField, "from_db_value")
+    response = client.get(f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["json"] == document
+    assert response.json()["diagram_id"] == str(diagram_owned_by_user.id)
+    from_db_value.assert_not_called()
+
+
+def test_retrieve_diagram_with_compressed_content(
+    client: APIClient, logged_in_user: User, settings
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram which content is stored compressed
+    WHEN he requests GET /api/v1/diagrams/{diagram_id}/
+    THEN check that he gets the document as plain JSON and 200 OK is returned
+    """
+    settings.DIAGRAM_CONTENT_CODEC = "zlib"
+    document = {"classes": [{"name": "Диаграмма", "fields": []}] * 20}
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user, json=document)
+    assert diagram_owned_by_user.content.codec == "zlib"
+    response = client.get(f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["json"] == document
+
+
+def test_retrieve_diagram_returns_validators(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram
+    WHEN he requests GET /api/v1/diagrams/{diagram_id}/
+    THEN check that the response has ETag and Last-Modified headers
+    """
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user)
+    response = client.get(f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/")
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] == diagram_owned_by_user.etag
+    assert response["Last-Modified"] == http_date(
+        diagram_owned_by_user.updated_at.timestamp()
+    )
+    assert "no-cache" in response["Cache-Control"]
+
+
+def test_retrieve_diagram_if_none_match_not_modified(
+    client: APIClient, logged_in_user: User, mocker: MockerFixture
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram and has its current ETag
+    WHEN he requests GET /api/v1/diagrams/{diagram_id}/ with If-None-Match header
+    THEN check that 304 NOT MODIFIED is returned without loading the document
+    """
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user)
+    etag = client.get(f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/")["ETag"]
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(
+            f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/", HTTP_IF_NONE_MATCH=etag
+        )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == etag
+    assert not response.content
+    diagram_queries = [q["sql"] for q in queries if '"diagrams_diagram"' in q["sql"]]
+    assert diagram_queries
+    assert all('"json"' not in sql for sql in diagram_queries)
+
+
+def test_retrieve_diagram_if_none_match_modified(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who has an ETag of a diagram which was changed later
+    WHEN he requests GET /api/v1/diagrams/{diagram_id}/ with If-None-Match header
+    THEN check that he gets the diagram with a new ETag and 200 OK is returned
+    """
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user)
+    etag = diagram_owned_by_user.etag
+    diagram_owned_by_user.json = {"changed": True}
+    diagram_owned_by_user.save()
+    response = client.get(
+        f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/", HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["json"] == {"changed": True}
+    assert response["ETag"] != etag
+
+
+def test_retrieve_diagram_if_modified_since_not_modified(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram
+    WHEN he requests GET /api/v1/diagrams/{diagram_id}/ with If-Modified-Since
+    header set to the Last-Modified value
+    THEN check that 304 NOT MODIFIED is returned
+    """
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user)
+    last_modified = http_date(diagram_owned_by_user.updated_at.timestamp())
+    response = client.get(
+        f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/",
+        HTTP_IF_MODIFIED_SINCE=last_modified,
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_retrieve_diagram_if_none_match_another_user_diagram(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who knows an ETag of another user's diagram
+    WHEN he requests GET /api/v1/diagrams/{diagram_id}/ with If-None-Match header
+    THEN check that 404 NOT FOUND is returned
+    """
+    diagram_owned_by_another_user = DiagramFactory()
+    response = client.get(
+        f"{DIAGRAMS_URL}{diagram_owned_by_another_user.id}/",
+        HTTP_IF_NONE_MATCH=diagram_owned_by_another_user.etag,
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -1,6 +1,9 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from apps.diagrams.models import Diagram
 from apps.users.models import User
 from tests.factories import DiagramFactory
 from tests.integration.diagrams.constants import DIAGRAMS_URL
@@ -66,3 +69,138 @@ def test_retrieve_all_diagrams_by_admin(
             "updated_at": diagram.updated_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
         }
         assert results[idx] == diagram_data_as_dict
+
+
+def test_retrieve_diagrams_by_cursor_returns_all_diagrams_once(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns 5 diagrams with the same title
+    WHEN he follows the `next` links of GET /api/v1/diagrams/?cursor=
+    THEN he gets every diagram exactly once, ties are broken by diagram id
+    """
+    for _ in range(5):
+        DiagramFactory(owner=logged_in_user, title="Same title")
+    expected_ids = [
+        str(diagram_id)
+        for diagram_id in Diagram.objects.order_by("title", "id").values_list(
+            "id", flat=True
+        )
+    ]
+    url = f"{DIAGRAMS_URL}?ordering=title&page_size=2&cursor="
+    received_ids, next_urls = [], []
+    while url:
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        received_ids += [diagram["diagram_id"] for diagram in data["results"]]
+        next_urls.append(url)
+        url = data["next"]
+    assert received_ids == expected_ids
+    assert len(next_urls) == 3
+
+    # previous link of the last page leads back to the second page
+    last_page = client.get(next_urls[-1]).json()
+    previous_page = client.get(last_page["previous"]).json()
+    assert [diagram["diagram_id"] for diagram in previous_page["results"]] == (
+        expected_ids[2:4]
+    )
+
+
+def test_retrieve_diagrams_by_cursor_without_count(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns 3 diagrams
+    WHEN he requests GET /api/v1/diagrams/?cursor=&count=false
+    THEN he gets the first page without total count and 200 OK is returned
+    """
+    _ = [DiagramFactory(owner=logged_in_user) for _ in range(3)]
+    response = client.get(f"{DIAGRAMS_URL}?cursor=&count=false&page_size=2")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert "count" not in data
+    assert len(data["results"]) == 2
+    assert data["previous"] is None
+    assert "cursor=" in data["next"]
+
+
+def test_retrieve_diagrams_by_page_number_without_count(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns 3 diagrams
+    WHEN he requests the second page of GET /api/v1/diagrams/?count=false
+    THEN he gets the last diagram, no total count and no next page link
+    """
+    _ = [DiagramFactory(owner=logged_in_user) for _ in range(3)]
+    response = client.get(f"{DIAGRAMS_URL}?count=false&page_size=2&page=2")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert "count" not in data
+    assert len(data["results"]) == 1
+    assert data["next"] is None
+    assert data["previous"] is not None
+
+
+def test_retrieve_diagrams_by_invalid_cursor(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user
+    WHEN he requests GET /api/v1/diagrams/ with a malformed cursor
+    THEN 404 NOT FOUND is returned
+    """
+    response = client.get(f"{DIAGRAMS_URL}?cursor=not-a-cursor")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_retrieve_diagrams_does_not_load_diagram_json(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns 2 diagrams
+    WHEN he requests GET /api/v1/diagrams/
+    THEN the `json` column is not selected from the database
+    """
+    _ = [DiagramFactory(owner=logged_in_user) for _ in range(2)]
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(DIAGRAMS_URL)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["results"]) == 2
+    assert not any('"json"' in query["sql"] for query in context.captured_queries)
+
+
+def test_retrieve_diagrams_ordered_by_owner_email(
+    client: APIClient, logged_in_admin: User
+) -> None:
+    """
+    GIVEN a logged in admin and 3 diagrams owned by different users
+    WHEN he requests GET /api/v1/diagrams/?ordering=owner_email
+    THEN he gets diagrams ordered by their owners emails
+    """
+    _ = [DiagramFactory() for _ in range(3)]
+    response = client.get(f"{DIAGRAMS_URL}?ordering=owner_email")
+    assert response.status_code == status.HTTP_200_OK
+    emails = [diagram["owner_email"] for diagram in response.json()["results"]]
+    assert emails == sorted(emails)
+
+
+def test_retrieve_diagrams_if_none_match(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns a diagram and has the ETag of the list page
+    WHEN he requests GET /api/v1/diagrams/ with If-None-Match header
+    THEN check that 304 NOT MODIFIED is returned while the page is unchanged
+    and 200 OK with a new ETag is returned after a new diagram is created
+    """
+    DiagramFactory(owner=logged_in_user)
+    etag = client.get(DIAGRAMS_URL)["ETag"]
+    response = client.get(DIAGRAMS_URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    DiagramFactory(owner=logged_in_user)
+    response = client.get(DIAGRAMS_URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
+    assert response.json()["count"] == 2
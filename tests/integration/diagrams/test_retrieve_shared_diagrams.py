@@ -1,3 +1,5 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
 
@@ -60,3 +62,19 @@ def test_retrieve_shared_diagrams_returns_empty_list_for_non_collaborator(
     assert response.status_code == status.HTTP_200_OK
     assert response.data["count"] == 0
     assert response.json()["results"] == []
+
+
+def test_retrieve_shared_diagrams_does_not_load_diagram_json(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who was invited as collaborator to 2 diagrams
+    WHEN he requests GET /api/v1/diagrams/shared-with-me/
+    THEN the `json` column is not selected from the database
+    """
+    _ = [CollaboratorFactory(shared_to=logged_in_user) for _ in range(2)]
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(SHARED_DIAGRAMS_URL)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["results"]) == 2
+    assert not any('"json"' in query["sql"] for query in context.captured_queries)
@@ -134,3 +134,81 @@ class TestSaveSharedDiagram:
         # Database data check
         edited_diagram = Diagram.objects.get(id=original_diagram.id)
         assert edited_diagram == original_diagram
+
+    def test_save_shared_diagram_if_match_stale_etag(
+        self, client: APIClient, logged_in_user: User
+    ) -> None:
+        """
+        GIVEN a logged-in collaborator with "view-edit" permission who has
+        an ETag of the diagram which was changed by its owner later
+        WHEN he requests PATCH /api/v1/diagrams/shared-with-me/{diagram_id}/save/
+        with If-Match header
+        THEN check that the changes are not saved and 412 PRECONDITION FAILED
+        is returned, while the current ETag is accepted.
+        """
+        collaborator = CollaboratorFactory(
+            shared_to=logged_in_user, permission_level=PermissionLevels.VIEWEDIT
+        )
+        diagram = collaborator.diagram
+        stale_etag = diagram.etag
+        diagram.json = {"changed": "by owner"}
+        diagram.save()
+        url = reverse(SHARED_DIAGRAM_SAVE_URL_NAME, kwargs={"pk": diagram.pk})
+
+        response = client.patch(
+            path=url,
+            data={"json": '{"changed": "by collaborator"}'},
+            HTTP_IF_MATCH=stale_etag,
+        )
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        assert Diagram.objects.get(id=diagram.id).json == {"changed": "by owner"}
+
+        response = client.patch(
+            path=url,
+            data={"json": '{"changed": "by collaborator"}'},
+            HTTP_IF_MATCH=diagram.etag,
+        )
+        assert response.status_code == status.HTTP_200_OK
+        diagram.refresh_from_db()
+        assert diagram.json == {"changed": "by collaborator"}
+        assert response["ETag"] == diagram.etag
+
+    def test_save_shared_diagram_by_json_patch(
+        self, client: APIClient, logged_in_user: User
+    ) -> None:
+        """
+        GIVEN a logged-in collaborator with "view-edit" permission
+        WHEN he requests PATCH /api/v1/diagrams/shared-with-me/{diagram_id}/save/
+        with JSON Patch body
+        THEN check that the patch is applied to the stored diagram, while
+        the read-only title can not be patched.
+        """
+        collaborator = CollaboratorFactory(
+            diagram=DiagramFactory(json={"classes": [{"name": "User"}]}),
+            shared_to=logged_in_user,
+            permission_level=PermissionLevels.VIEWEDIT,
+        )
+        diagram = collaborator.diagram
+        url = reverse(SHARED_DIAGRAM_SAVE_URL_NAME, kwargs={"pk": diagram.pk})
+        operations = [
+            {"op": "add", "path": "/json/classes/-", "value": {"name": "Role"}},
+            {"op": "replace", "path": "/description", "value": "Roles added"},
+        ]
+        response = client.patch(
+            path=url,
+            data=json.dumps(operations),
+            content_type="application/json-patch+json",
+        )
+        assert response.status_code == status.HTTP_200_OK
+        saved_diagram = Diagram.objects.get(id=diagram.id)
+        assert saved_diagram.json == {"classes": [{"name": "User"}, {"name": "Role"}]}
+        assert saved_diagram.description == "Roles added"
+        assert response["ETag"] == saved_diagram.etag
+
+        response = client.patch(
+            path=url,
+            data=json.dumps([{"op": "replace", "path": "/title", "value": "New"}]),
+            content_type="application/json-patch+json",
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Diagram.objects.get(id=diagram.id).title == diagram.title
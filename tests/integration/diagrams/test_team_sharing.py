@@ -0,0 +1,220 @@
+import pytest
+from django.urls import reverse
+from pytest_mock import MockerFixture
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.diagrams.models import Diagram
+from apps.sharings.api.v1.serializers import InviteTeamSerializer
+from apps.sharings.constants import PermissionLevels
+from apps.sharings.models import Collaborator, TeamCollaborator
+from apps.users.models import User
+from tests.factories import (
+    CollaboratorFactory,
+    DiagramFactory,
+    TeamCollaboratorFactory,
+    TeamFactory,
+    TeamMemberFactory,
+)
+from tests.integration.diagrams.constants import (
+    SHARED_DIAGRAM_COPY_URL_NAME,
+    SHARED_DIAGRAM_SAVE_URL_NAME,
+    SHARED_DIAGRAM_UNSHARE_ME_URL_NAME,
+    SHARED_DIAGRAMS_COPY_URL,
+    SHARED_DIAGRAMS_URL,
+)
+from tests.integration.sharings.constants import (
+    DIAGRAM_SHARE_INVITE_TEAM_URL_NAME,
+    DIAGRAM_SHARE_UNSHARE_ALL_URL_NAME,
+)
+
+
+def test_invite_team(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user who is a member of a team and owns a diagram
+    WHEN he requests POST /api/v1/diagrams/{id}/share-invite-team/ twice
+    THEN check that the diagram is shared to the team once and the second
+    request fails with the same code as sharing to a user twice.
+    """
+    team = TeamMemberFactory(user=logged_in_user).team
+    diagram = DiagramFactory(owner=logged_in_user)
+    url = reverse(DIAGRAM_SHARE_INVITE_TEAM_URL_NAME, kwargs={"pk": diagram.pk})
+    data = {"team_id": str(team.pk), "permission_level": PermissionLevels.VIEWCOPY}
+    response = client.post(url, data, format="json")
+    assert response.status_code == status.HTTP_201_CREATED
+    share = TeamCollaborator.objects.get(diagram=diagram, team=team)
+    assert response.json() == {
+        "team_collaborator_id": str(share.pk),
+        "team_id": str(team.pk),
+        "diagram_id": str(diagram.pk),
+        "permission_level": PermissionLevels.VIEWCOPY,
+    }
+    response = client.post(url, data, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert TeamCollaborator.objects.filter(diagram=diagram).count() == 1
+    assert "has already shared" in response.json()["non_field_errors"][0]
+
+
+def test_invite_team_shared_concurrently(
+    client: APIClient, logged_in_user: User, mocker: MockerFixture
+) -> None:
+    """
+    GIVEN a diagram which is shared to a team of a logged-in user by
+    a concurrent request after the validation of his request
+    WHEN he requests POST /api/v1/diagrams/{id}/share-invite-team/
+    THEN check that the unique constraint prevents the second share and
+    the request fails as a non-unique sharing.
+    """
+    team = TeamMemberFactory(user=logged_in_user).team
+    diagram = DiagramFactory(owner=logged_in_user)
+    TeamCollaboratorFactory(diagram=diagram, team=team)
+    mocker.patch.object(InviteTeamSerializer, "validate", lambda self, attrs: attrs)
+    url = reverse(DIAGRAM_SHARE_INVITE_TEAM_URL_NAME, kwargs={"pk": diagram.pk})
+    data = {"team_id": str(team.pk), "permission_level": PermissionLevels.VIEWCOPY}
+    response = client.post(url, data, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "has already shared" in response.json()[0]
+    assert TeamCollaborator.objects.filter(diagram=diagram).count() == 1
+
+
+def test_invite_team_of_other_users(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user and a team he is not a member of
+    WHEN he requests POST /api/v1/diagrams/{id}/share-invite-team/ with the team
+    THEN check that the diagram is not shared and 400 Bad Request is returned.
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    url = reverse(DIAGRAM_SHARE_INVITE_TEAM_URL_NAME, kwargs={"pk": diagram.pk})
+    data = {
+        "team_id": str(TeamFactory().pk),
+        "permission_level": PermissionLevels.VIEWONLY,
+    }
+    response = client.post(url, data, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "team_id" in response.json()
+    assert not TeamCollaborator.objects.exists()
+
+
+def test_retrieve_diagrams_shared_to_teams(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user with diagrams shared to his team, one of them
+    also directly, and a diagram shared to another team
+    WHEN he requests GET /api/v1/diagrams/shared-with-me/
+    THEN check that the diagrams are listed once with the highest permission
+    levels they were shared to him with.
+    """
+    team = TeamMemberFactory(user=logged_in_user).team
+    direct = CollaboratorFactory(
+        shared_to=logged_in_user, permission_level=PermissionLevels.VIEWEDIT
+    )
+    TeamCollaboratorFactory(
+        team=team, diagram=direct.diagram, permission_level=PermissionLevels.VIEWONLY
+    )
+    shared = TeamCollaboratorFactory(
+        team=team, permission_level=PermissionLevels.VIEWCOPY
+    )
+    TeamCollaboratorFactory()
+    response = client.get(SHARED_DIAGRAMS_URL)
+    assert response.status_code == status.HTTP_200_OK
+    levels = {
+        result["diagram_id"]: result["permission_level"]
+        for result in response.json()["results"]
+    }
+    assert response.json()["count"] == len(levels) == 2
+    assert levels == {
+        str(direct.diagram_id): PermissionLevels.VIEWEDIT,
+        str(shared.diagram_id): PermissionLevels.VIEWCOPY,
+    }
+
+
+@pytest.mark.parametrize(
+    ("permission_level", "status_code"),
+    [
+        (PermissionLevels.VIEWONLY, status.HTTP_403_FORBIDDEN),
+        (PermissionLevels.VIEWCOPY, status.HTTP_201_CREATED),
+        (PermissionLevels.VIEWEDIT, status.HTTP_201_CREATED),
+    ],
+)
+def test_copy_diagram_shared_to_team(
+    client: APIClient, logged_in_user: User, permission_level: str, status_code: int
+) -> None:
+    """
+    GIVEN a logged-in user with a diagram shared to his team
+    WHEN he requests POST /api/v1/diagrams/shared-with-me/{id}/copy/
+    and POST /api/v1/diagrams/shared-with-me/copy/
+    THEN check that the diagram is copied just if the team has the permission.
+    """
+    share = TeamCollaboratorFactory(
+        team=TeamMemberFactory(user=logged_in_user).team,
+        permission_level=permission_level,
+    )
+    url = reverse(SHARED_DIAGRAM_COPY_URL_NAME, kwargs={"pk": share.diagram_id})
+    response = client.post(url, format="json")
+    assert response.status_code == status_code
+    response = client.post(
+        SHARED_DIAGRAMS_COPY_URL,
+        {"diagram_ids": [str(share.diagram_id)]},
+        format="json",
+    )
+    is_copied = status_code == status.HTTP_201_CREATED
+    assert (response.status_code < 400) == is_copied
+    assert Diagram.objects.filter(owner=logged_in_user).count() == 2 * is_copied
+
+
+@pytest.mark.parametrize(
+    ("permission_level", "status_code"),
+    [
+        (PermissionLevels.VIEWCOPY, status.HTTP_403_FORBIDDEN),
+        (PermissionLevels.VIEWEDIT, status.HTTP_200_OK),
+    ],
+)
+def test_save_diagram_shared_to_team(
+    client: APIClient, logged_in_user: User, permission_level: str, status_code: int
+) -> None:
+    """
+    GIVEN a logged-in user with a diagram shared to his team
+    WHEN he requests PATCH /api/v1/diagrams/shared-with-me/{id}/save/
+    THEN check that the diagram is saved just with "view-edit" permission.
+    """
+    share = TeamCollaboratorFactory(
+        team=TeamMemberFactory(user=logged_in_user).team,
+        permission_level=permission_level,
+    )
+    url = reverse(SHARED_DIAGRAM_SAVE_URL_NAME, kwargs={"pk": share.diagram_id})
+    response = client.patch(url, {"description": "Changed"}, format="json")
+    assert response.status_code == status_code
+
+
+def test_unshare_me_keeps_team_shares(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user with a diagram shared to him and to his team
+    WHEN he requests DELETE /api/v1/diagrams/shared-with-me/{id}/unshare-me/
+    THEN check that just the direct share is deleted, so the diagram remains
+    shared to him through the team.
+    """
+    share = TeamCollaboratorFactory(team=TeamMemberFactory(user=logged_in_user).team)
+    CollaboratorFactory(diagram=share.diagram, shared_to=logged_in_user)
+    url = reverse(SHARED_DIAGRAM_UNSHARE_ME_URL_NAME, kwargs={"pk": share.diagram_id})
+    response = client.delete(url)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not Collaborator.objects.filter(shared_to=logged_in_user).exists()
+    assert TeamCollaborator.objects.filter(pk=share.pk).exists()
+
+
+def test_remove_all_collaborators_removes_teams(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who shared his diagram to a user and to a team
+    WHEN he requests DELETE /api/v1/diagrams/{id}/share-unshare-all/
+    THEN check that both shares are deleted.
+    """
+    share = TeamCollaboratorFactory(diagram=DiagramFactory(owner=logged_in_user))
+    CollaboratorFactory(diagram=share.diagram)
+    url = reverse(DIAGRAM_SHARE_UNSHARE_ALL_URL_NAME, kwargs={"pk": share.diagram_id})
+    response = client.delete(url)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not Collaborator.objects.filter(diagram=share.diagram).exists()
+    assert not TeamCollaborator.objects.filter(diagram=share.diagram).exists()
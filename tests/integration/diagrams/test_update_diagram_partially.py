@@ -1,10 +1,13 @@
+import json
 from json import loads
 
 import pytest
 from faker import Faker
+from pytest_mock import MockerFixture
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from apps.core.jsonpatch import apply_json_patch
 from apps.diagrams.models import Diagram
 from apps.users.models import User
 from tests.factories import DiagramFactory, UserFactory
@@ -128,3 +131,245 @@ def test_partial_update_any_diagram_by_admin(
         assert (diagram.json == loads(data_to_update[field_name])) == expected
     else:
         assert (getattr(diagram, field_name) == data_to_update[field_name]) == expected
+
+
+def test_partial_update_diagram_if_match_current_etag(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a user who owns a diagram and has its current ETag
+    WHEN he requests PATCH /api/v1/diagrams/<diagram_id> with If-Match header
+    THEN check that the diagram is updated and the new ETag is returned
+    """
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user)
+    etag = diagram_owned_by_user.etag
+    response = client.patch(
+        path=f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/",
+        data={"title": "New title"},
+        HTTP_IF_MATCH=etag,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    diagram = Diagram.objects.get(id=diagram_owned_by_user.id)
+    assert diagram.title == "New title"
+    assert diagram.owner == logged_in_user
+    assert diagram.json == diagram_owned_by_user.json
+    assert diagram.updated_at > diagram_owned_by_user.updated_at
+    assert response["ETag"] == diagram.etag != etag
+
+
+def test_partial_update_diagram_if_match_stale_etag(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a user who owns a diagram and has an ETag of its previous version
+    WHEN he requests PATCH /api/v1/diagrams/<diagram_id> with If-Match header
+    THEN check that the diagram is not updated and 412 PRECONDITION FAILED
+    is returned
+    """
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user)
+    stale_etag = diagram_owned_by_user.etag
+    response = client.patch(
+        path=f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/",
+        data={"json": '{"first": "write"}'},
+        HTTP_IF_MATCH=stale_etag,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    response = client.patch(
+        path=f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/",
+        data={"json": '{"second": "write"}'},
+        HTTP_IF_MATCH=stale_etag,
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert response.data["detail"].code == "precondition_failed"
+    assert Diagram.objects.get(id=diagram_owned_by_user.id).json == {"first": "write"}
+
+
+@pytest.mark.parametrize("if_match", ['W/"1-0123456789abcdef"', '"unknown"'])
+def test_partial_update_diagram_if_match_invalid_etag(
+    client: APIClient, logged_in_user: User, if_match: str
+) -> None:
+    """
+    GIVEN a user who owns a diagram
+    WHEN he requests PATCH /api/v1/diagrams/<diagram_id> with If-Match header
+    containing a weak or unknown entity tag
+    THEN check that 412 PRECONDITION FAILED is returned
+    """
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user)
+    response = client.patch(
+        path=f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/",
+        data={"title": "New title"},
+        HTTP_IF_MATCH=if_match,
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert Diagram.objects.get(id=diagram_owned_by_user.id).title != "New title"
+
+
+def test_partial_update_diagram_by_json_patch(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a user who owns a diagram
+    WHEN he requests PATCH /api/v1/diagrams/<diagram_id> with JSON Patch body
+    THEN check that the patch is applied to the stored diagram, other fields are
+    not changed and the new version is returned
+    """
+    document = {"classes": [{"name": "User", "x": 0}, {"name": "Role", "x": 5}]}
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user, json=document)
+    operations = [
+        {"op": "test", "path": "/json/classes/0/name", "value": "User"},
+        {"op": "replace", "path": "/json/classes/0/x", "value": 10},
+        {"op": "add", "path": "/json/links", "value": [[0, 1]]},
+        {"op": "replace", "path": "/title", "value": "New title"},
+    ]
+    response = client.patch(
+        path=f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/",
+        data=json.dumps(operations),
+        content_type="application/json-patch+json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+    expected_document = {
+        "classes": [{"name": "User", "x": 10}, {"name": "Role", "x": 5}],
+        "links": [[0, 1]],
+    }
+    diagram = Diagram.objects.get(id=diagram_owned_by_user.id)
+    assert diagram.json == response.json()["json"] == expected_document
+    assert diagram.title == "New title"
+    assert diagram.description == diagram_owned_by_user.description
+    assert diagram.owner == logged_in_user
+    assert response["ETag"] == diagram.etag
+
+
+def test_partial_update_diagram_by_merge_patch(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a user who owns a diagram
+    WHEN he requests PATCH /api/v1/diagrams/<diagram_id> with JSON Merge Patch body
+    THEN check that the patch is merged into the stored diagram
+    """
+    document = {"classes": {"user": {"x": 0, "y": 0}, "role": {"x": 5, "y": 5}}}
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user, json=document)
+    patch = {"json": {"classes": {"user": {"x": 10}, "role": None}}}
+    response = client.patch(
+        path=f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/",
+        data=json.dumps(patch),
+        content_type="application/merge-patch+json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+    diagram = Diagram.objects.get(id=diagram_owned_by_user.id)
+    assert diagram.json == {"classes": {"user": {"x": 10, "y": 0}}}
+    assert diagram.title == diagram_owned_by_user.title
+
+
+@pytest.mark.parametrize(
+    ("content_type", "patch", "expected_status", "expected_code"),
+    [
+        (
+            "application/json-patch+json",
+            [{"op": "test", "path": "/json/version", "value": 2}],
+            status.HTTP_409_CONFLICT,
+            "patch_test_failed",
+        ),
+        (
+            "application/json-patch+json",
+            [{"op": "remove", "path": "/json/missing"}],
+            status.HTTP_400_BAD_REQUEST,
+            "invalid_patch",
+        ),
+        (
+            "application/json-patch+json",
+            [{"op": "remove", "path": "/title"}],
+            status.HTTP_400_BAD_REQUEST,
+            "invalid_patch",
+        ),
+        (
+            "application/json-patch+json",
+            [{"op": "replace", "path": "", "value": {}}],
+            status.HTTP_400_BAD_REQUEST,
+            "invalid_patch",
+        ),
+        (
+            "application/merge-patch+json",
+            [1],
+            status.HTTP_400_BAD_REQUEST,
+            "invalid_patch",
+        ),
+    ],
+)
+def test_partial_update_diagram_by_invalid_patch(
+    client: APIClient,
+    logged_in_user: User,
+    content_type: str,
+    patch: list,
+    expected_status: int,
+    expected_code: str,
+) -> None:
+    """
+    GIVEN a user who owns a diagram
+    WHEN he requests PATCH /api/v1/diagrams/<diagram_id> with a patch which
+    can not be applied
+    THEN check that the diagram is not changed and an error is returned
+    """
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user, json={"version": 1})
+    response = client.patch(
+        path=f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/",
+        data=json.dumps(patch),
+        content_type=content_type,
+    )
+    assert response.status_code == expected_status
+    error = response.data["detail"] if expected_status == 409 else response.data[0]
+    assert error.code == expected_code
+    assert Diagram.objects.get(id=diagram_owned_by_user.id).etag == (
+        diagram_owned_by_user.etag
+    )
+
+
+def test_partial_update_diagram_by_patch_with_concurrent_write(
+    client: APIClient, logged_in_user: User, mocker: MockerFixture
+) -> None:
+    """
+    GIVEN a user who owns a diagram
+    WHEN he requests PATCH /api/v1/diagrams/<diagram_id> with JSON Patch body
+    and the diagram is modified by another request while the patch is applied
+    THEN check that the concurrent changes are not overwritten and
+    409 CONFLICT is returned
+    """
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user, json={"v": 1})
+
+    def apply_patch_with_concurrent_write(document: dict, operations: list) -> dict:
+        concurrent_diagram = Diagram.objects.get(id=diagram_owned_by_user.id)
+        concurrent_diagram.json = {"v": "concurrent"}
+        concurrent_diagram.save()
+        return apply_json_patch(document, operations)
+
+    patched_apply_json_patch = mocker.patch(
+        "apps.diagrams.api.v1.mixins.apply_json_patch",
+        side_effect=apply_patch_with_concurrent_write,
+    )
+    response = client.patch(
+        path=f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/",
+        data=json.dumps([{"op": "replace", "path": "/json/v", "value": 2}]),
+        content_type="application/json-patch+json",
+    )
+    patched_apply_json_patch.assert_called_once()
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.data["detail"].code == "concurrent_modification"
+    diagram = Diagram.objects.get(id=diagram_owned_by_user.id)
+    assert diagram.json == {"v": "concurrent"}
+
+
+def test_update_diagram_by_json_patch_not_supported(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a user who owns a diagram
+    WHEN he requests PUT /api/v1/diagrams/<diagram_id> with JSON Patch body
+    THEN check that 415 UNSUPPORTED MEDIA TYPE is returned
+    """
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user)
+    response = client.put(
+        path=f"{DIAGRAMS_URL}{diagram_owned_by_user.id}/",
+        data=json.dumps([{"op": "replace", "path": "/title", "value": "New"}]),
+        content_type="application/json-patch+json",
+    )
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
@@ -1,5 +1,10 @@
 from django.urls import reverse
 
 DIAGRAM_SHARE_INVITE_USER_URL_NAME = "diagram-invite-collaborator"
+DIAGRAM_SHARE_INVITE_USERS_URL_NAME = "diagram-invite-collaborators"
 DIAGRAM_SHARE_UNSHARE_ALL_URL_NAME = "diagram-remove-all-collaborators"
 COLLABORATOR_URL = reverse("collaborator-list")
+COLLABORATORS_BULK_URL = reverse("collaborator-bulk")
+DIAGRAM_SHARE_INVITE_TEAM_URL_NAME = "diagram-invite-team"
+TEAMS_URL = reverse("team-list")
+TEAM_SHARES_URL = reverse("teamcollaborator-list")
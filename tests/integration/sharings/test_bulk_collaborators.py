@@ -0,0 +1,257 @@
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.sharings.constants import PermissionLevels
+from apps.sharings.models import Collaborator
+from apps.users.models import User
+from tests.factories import CollaboratorFactory, DiagramFactory
+from tests.integration.sharings.constants import COLLABORATORS_BULK_URL
+
+
+def permission_levels(*collaborators: Collaborator) -> list:
+    return [
+        Collaborator.objects.get(pk=collaborator.pk).permission_level
+        for collaborator in collaborators
+    ]
+
+
+def test_update_collaborators_by_ids(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user who shared his diagram and a collaborator
+    of a diagram of another user
+    WHEN he requests PATCH /api/v1/sharings/bulk/ with ids of all of them
+    THEN check that just permission levels of his collaborators are changed.
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    owned = [
+        CollaboratorFactory(diagram=diagram, permission_level=PermissionLevels.VIEWEDIT)
+        for _ in range(2)
+    ]
+    alien = CollaboratorFactory(permission_level=PermissionLevels.VIEWEDIT)
+    response = client.patch(
+        COLLABORATORS_BULK_URL,
+        {
+            "collaborator_ids": [str(c.pk) for c in (*owned, alien)],
+            "permission_level": PermissionLevels.VIEWONLY,
+        },
+        format="json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"updated": 2}
+    assert permission_levels(*owned) == [PermissionLevels.VIEWONLY] * 2
+    assert permission_levels(alien) == [PermissionLevels.VIEWEDIT]
+
+
+def test_update_collaborators_by_filter(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who shared his diagrams with various permission levels
+    WHEN he requests PATCH /api/v1/sharings/bulk/ with a filter by a diagram
+    and view-edit permission level
+    THEN check that just view-edit collaborators of the diagram are downgraded.
+    """
+    diagram, other_diagram = [DiagramFactory(owner=logged_in_user) for _ in range(2)]
+    edit = CollaboratorFactory(diagram=diagram, permission_level="view-edit")
+    copy = CollaboratorFactory(diagram=diagram, permission_level="view-copy")
+    other = CollaboratorFactory(diagram=other_diagram, permission_level="view-edit")
+    response = client.patch(
+        COLLABORATORS_BULK_URL,
+        {
+            "filter": {"diagram_id": str(diagram.pk), "permission_level": "view-edit"},
+            "permission_level": PermissionLevels.VIEWONLY,
+        },
+        format="json",
+    )
+    assert response.json() == {"updated": 1}
+    assert permission_levels(edit, copy, other) == [
+        "view-only",
+        "view-copy",
+        "view-edit",
+    ]
+
+
+def test_update_collaborators_by_user_skips_public_shares(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who shared his diagram to a user and publicly
+    WHEN he requests PATCH /api/v1/sharings/bulk/ with both ids and
+    view-edit permission level, then with a filter by the user email
+    THEN check that the public share stays view-only.
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    shared = CollaboratorFactory(diagram=diagram, permission_level="view-only")
+    public = CollaboratorFactory(
+        diagram=diagram, shared_to=None, permission_level="view-only"
+    )
+    response = client.patch(
+        COLLABORATORS_BULK_URL,
+        {
+            "collaborator_ids": [str(shared.pk), str(public.pk)],
+            "permission_level": PermissionLevels.VIEWEDIT,
+        },
+        format="json",
+    )
+    assert response.json() == {"updated": 1}
+    assert permission_levels(shared, public) == ["view-edit", "view-only"]
+    response = client.patch(
+        COLLABORATORS_BULK_URL,
+        {
+            "filter": {"shared_to": shared.shared_to.email},
+            "permission_level": "view-copy",
+        },
+        format="json",
+    )
+    assert response.json() == {"updated": 1}
+    assert permission_levels(shared) == ["view-copy"]
+
+
+def test_update_collaborators_by_admin(
+    client: APIClient, logged_in_admin: User
+) -> None:
+    """
+    GIVEN a logged-in admin and collaborators of diagrams of other users
+    WHEN he requests PATCH /api/v1/sharings/bulk/ with their ids
+    THEN check that their permission levels are changed.
+    """
+    collaborators = [
+        CollaboratorFactory(permission_level="view-only") for _ in range(2)
+    ]
+    response = client.patch(
+        COLLABORATORS_BULK_URL,
+        {
+            "collaborator_ids": [str(c.pk) for c in collaborators],
+            "permission_level": PermissionLevels.VIEWCOPY,
+        },
+        format="json",
+    )
+    assert response.json() == {"updated": 2}
+    assert permission_levels(*collaborators) == ["view-copy"] * 2
+
+
+@pytest.mark.parametrize(
+    "data, field",
+    [
+        ({"permission_level": "view-only"}, "non_field_errors"),
+        (
+            {"collaborator_ids": [], "permission_level": "view-only"},
+            "collaborator_ids",
+        ),
+        ({"filter": {}, "permission_level": "view-only"}, "filter"),
+        (
+            {
+                "collaborator_ids": ["00000000-0000-0000-0000-000000000000"],
+                "filter": {"permission_level": "view-edit"},
+                "permission_level": "view-only",
+            },
+            "non_field_errors",
+        ),
+        ({"filter": {"permission_level": "view-edit"}}, "permission_level"),
+        (
+            {"filter": {"permission_level": "view-edit"}, "permission_level": "edit"},
+            "permission_level",
+        ),
+    ],
+)
+def test_update_collaborators_invalid_data(
+    client: APIClient, logged_in_user: User, data: dict, field: str
+) -> None:
+    """
+    GIVEN a logged-in user who shared his diagram
+    WHEN he requests PATCH /api/v1/sharings/bulk/ without a selection of
+    collaborators, with both selections or without a valid permission level
+    THEN check that 400 BAD REQUEST is returned and nothing is changed.
+    """
+    collaborator = CollaboratorFactory(
+        diagram=DiagramFactory(owner=logged_in_user), permission_level="view-edit"
+    )
+    response = client.patch(COLLABORATORS_BULK_URL, data, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert field in response.json()
+    assert permission_levels(collaborator) == ["view-edit"]
+
+
+def test_delete_collaborators_by_ids(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user who shared his diagram to a user and publicly,
+    and a collaborator of a diagram of another user
+    WHEN he requests DELETE /api/v1/sharings/bulk/ with ids of all of them
+    THEN check that just his collaborators are deleted and the diagram
+    is not public anymore.
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    owned = [
+        CollaboratorFactory(diagram=diagram),
+        CollaboratorFactory(
+            diagram=diagram, shared_to=None, permission_level="view-only"
+        ),
+    ]
+    alien = CollaboratorFactory()
+    diagram.refresh_from_db()
+    assert diagram.is_public
+    response = client.delete(
+        COLLABORATORS_BULK_URL,
+        {"collaborator_ids": [str(c.pk) for c in (*owned, alien)]},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"deleted": 2}
+    assert list(Collaborator.objects.all()) == [alien]
+    diagram.refresh_from_db()
+    assert not diagram.is_public
+
+
+def test_delete_collaborators_by_filter(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who shared his diagrams with various permission levels
+    WHEN he requests DELETE /api/v1/sharings/bulk/ with a filter by
+    view-edit permission level
+    THEN check that just his view-edit collaborators are deleted.
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    edit = CollaboratorFactory(diagram=diagram, permission_level="view-edit")
+    copy = CollaboratorFactory(diagram=diagram, permission_level="view-copy")
+    alien = CollaboratorFactory(permission_level="view-edit")
+    response = client.delete(
+        COLLABORATORS_BULK_URL,
+        {"filter": {"permission_level": "view-edit"}},
+        format="json",
+    )
+    assert response.json() == {"deleted": 1}
+    assert not Collaborator.objects.filter(pk=edit.pk).exists()
+    assert set(Collaborator.objects.all()) == {copy, alien}
+
+
+def test_delete_collaborators_without_selection(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who shared his diagram
+    WHEN he requests DELETE /api/v1/sharings/bulk/ without a selection
+    THEN check that 400 BAD REQUEST is returned and nothing is deleted.
+    """
+    CollaboratorFactory(diagram=DiagramFactory(owner=logged_in_user))
+    response = client.delete(COLLABORATORS_BULK_URL, {}, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert Collaborator.objects.count() == 1
+
+
+@pytest.mark.parametrize("method", ["patch", "delete"])
+def test_bulk_collaborators_by_anonymous_user(client: APIClient, method: str) -> None:
+    """
+    GIVEN an anonymous user
+    WHEN he requests PATCH or DELETE /api/v1/sharings/bulk/
+    THEN check that 401 UNAUTHORIZED is returned.
+    """
+    collaborator = CollaboratorFactory()
+    response = getattr(client, method)(
+        COLLABORATORS_BULK_URL,
+        {"collaborator_ids": [str(collaborator.pk)], "permission_level": "view-edit"},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert Collaborator.objects.get() == collaborator
@@ -1,3 +1,5 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
 
@@ -68,3 +70,62 @@ def test_retrieve_all_collaborators_by_admin(
             "shared_at": collaborator.shared_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
         }
         assert results[idx] == collaborator_data_as_dict
+
+
+def test_retrieve_collaborators_by_cursor(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who invited 3 collaborators to his diagram
+    WHEN he follows the `next` links of GET /api/v1/sharings/?cursor=
+    THEN he gets every collaborator exactly once ordered by `shared_at`
+    """
+    diagram_owned_by_user = DiagramFactory(owner=logged_in_user)
+    collaborators_invited_by_user = [
+        CollaboratorFactory(diagram=diagram_owned_by_user) for _ in range(3)
+    ]
+    url = f"{COLLABORATOR_URL}?ordering=shared_at&page_size=2&cursor="
+    received_ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["count"] == len(collaborators_invited_by_user)
+        received_ids += [item["collaborator_id"] for item in data["results"]]
+        url = data["next"]
+    assert received_ids == [
+        str(collaborator.id) for collaborator in collaborators_invited_by_user
+    ]
+
+
+def test_retrieve_collaborators_by_cursor_with_unsupported_ordering(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user
+    WHEN he requests GET /api/v1/sharings/?cursor= ordered by nullable `shared_to`
+    THEN 400 BAD REQUEST is returned
+    """
+    response = client.get(f"{COLLABORATOR_URL}?ordering=shared_to&cursor=")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_retrieve_collaborators_query_count_does_not_depend_on_page_size(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who invited 1 and then 10 collaborators to his diagrams
+    WHEN he requests GET /api/v1/sharings/ after each of the invitations
+    THEN check that both pages are fetched by the same number of queries
+    """
+    CollaboratorFactory(diagram=DiagramFactory(owner=logged_in_user))
+    client.get(COLLABORATOR_URL)  # authentication is cached
+    with CaptureQueriesContext(connection) as single_page_queries:
+        response = client.get(COLLABORATOR_URL)
+    assert len(response.json()["results"]) == 1
+    for _ in range(9):
+        CollaboratorFactory(diagram=DiagramFactory(owner=logged_in_user))
+    with CaptureQueriesContext(connection) as full_page_queries:
+        response = client.get(COLLABORATOR_URL)
+    assert len(response.json()["results"]) == 10
+    assert len(full_page_queries) == len(single_page_queries)
@@ -0,0 +1,196 @@
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.sharings.constants import PermissionLevels
+from apps.sharings.models import Team, TeamCollaborator
+from apps.users.models import User
+from tests.factories import (
+    DiagramFactory,
+    TeamCollaboratorFactory,
+    TeamFactory,
+    TeamMemberFactory,
+    UserFactory,
+)
+from tests.integration.sharings.constants import TEAM_SHARES_URL, TEAMS_URL
+
+
+def test_create_team(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user and other users
+    WHEN he requests POST /api/v1/sharings/teams/ with emails of the users
+    THEN check that the team is created with him as the owner and the users
+    as its members.
+    """
+    users = [UserFactory() for _ in range(2)]
+    response = client.post(
+        TEAMS_URL,
+        {"name": "Team", "member_emails": [user.email for user in users]},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    team = Team.objects.get()
+    data = response.json()
+    assert data["team_id"] == str(team.pk)
+    assert data["owner_id"] == str(logged_in_user.pk)
+    assert sorted(data["members"]) == sorted(user.email for user in users)
+    assert set(team.members.all()) == set(users)
+
+
+def test_create_team_with_unknown_members(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user and an inactive user
+    WHEN he requests POST /api/v1/sharings/teams/ with emails of the inactive
+    user and of nobody
+    THEN check that the team is not created and 400 Bad Request is returned.
+    """
+    inactive = UserFactory(is_active=False)
+    response = client.post(
+        TEAMS_URL,
+        {"name": "Team", "member_emails": [inactive.email, "nobody@example.com"]},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert inactive.email in response.json()["member_emails"][0]
+    assert not Team.objects.exists()
+
+
+def test_retrieve_teams(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user who owns a team and is a member of another team
+    WHEN he requests GET /api/v1/sharings/teams/
+    THEN check that just his teams are returned.
+    """
+    owned = TeamFactory(owner=logged_in_user)
+    member = TeamMemberFactory(user=logged_in_user)
+    TeamFactory()
+    response = client.get(TEAMS_URL)
+    assert response.status_code == status.HTTP_200_OK
+    assert {result["team_id"] for result in response.json()["results"]} == {
+        str(owned.pk),
+        str(member.team_id),
+    }
+
+
+@pytest.mark.parametrize("ordering", ["", "name", "-created_at"])
+def test_retrieve_teams_by_cursor(
+    client: APIClient, logged_in_user: User, ordering: str
+) -> None:
+    """
+    GIVEN a logged-in user who owns 3 teams
+    WHEN he follows the `next` links of GET /api/v1/sharings/teams/?cursor=
+    with the default and the other supported orderings
+    THEN he gets every team exactly once
+    """
+    teams = [TeamFactory(owner=logged_in_user) for _ in range(3)]
+    url = f"{TEAMS_URL}?ordering={ordering}&page_size=2&cursor="
+    received_ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        received_ids += [item["team_id"] for item in response.json()["results"]]
+        url = response.json()["next"]
+    assert sorted(received_ids) == sorted(str(team.pk) for team in teams)
+
+
+def test_replace_team_members(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user who owns a team with members
+    WHEN he requests PATCH /api/v1/sharings/teams/{id}/ with new members
+    THEN check that the members are replaced and removed members lose access
+    to the diagrams shared to the team.
+    """
+    team = TeamFactory(owner=logged_in_user)
+    kept, removed = TeamMemberFactory(team=team), TeamMemberFactory(team=team)
+    added = UserFactory()
+    TeamCollaboratorFactory(team=team)
+    response = client.patch(
+        f"{TEAMS_URL}{team.pk}/",
+        {"member_emails": [kept.user.email, added.email]},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert sorted(response.json()["members"]) == sorted([kept.user.email, added.email])
+    assert set(team.members.all()) == {kept.user, added}
+    assert not removed.user.teams.exists()
+
+
+def test_edit_team_by_member(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user who is a member of a team of another user
+    WHEN he requests PATCH and DELETE /api/v1/sharings/teams/{id}/
+    THEN check that the team is not changed and 403 Forbidden is returned.
+    """
+    team = TeamMemberFactory(user=logged_in_user).team
+    url = f"{TEAMS_URL}{team.pk}/"
+    response = client.patch(url, {"name": "Renamed"}, format="json")
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = client.delete(url)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert Team.objects.get(pk=team.pk).name == team.name
+
+
+def test_delete_team_deletes_its_shares(
+    client: APIClient, logged_in_user: User
+) -> None:
+    """
+    GIVEN a logged-in user who owns a team which diagrams are shared to
+    WHEN he requests DELETE /api/v1/sharings/teams/{id}/
+    THEN check that the team and its shares are deleted.
+    """
+    share = TeamCollaboratorFactory(team=TeamFactory(owner=logged_in_user))
+    response = client.delete(f"{TEAMS_URL}{share.team_id}/")
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not TeamCollaborator.objects.exists()
+
+
+def test_team_shares(client: APIClient, logged_in_user: User) -> None:
+    """
+    GIVEN a logged-in user who shared his diagram to a team and a share of
+    a diagram of another user
+    WHEN he requests GET /api/v1/sharings/team-shares/ and PATCH the shares
+    THEN check that just his share is listed and can be changed.
+    """
+    share = TeamCollaboratorFactory(
+        diagram=DiagramFactory(owner=logged_in_user),
+        permission_level=PermissionLevels.VIEWONLY,
+    )
+    alien = TeamCollaboratorFactory()
+    response = client.get(TEAM_SHARES_URL)
+    assert response.status_code == status.HTTP_200_OK
+    [result] = response.json()["results"]
+    assert result["team_collaborator_id"] == str(share.pk)
+    assert result["team_name"] == share.team.name
+    data = {"permission_level": PermissionLevels.VIEWEDIT}
+    response = client.patch(f"{TEAM_SHARES_URL}{share.pk}/", data, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    share.refresh_from_db()
+    assert share.permission_level == PermissionLevels.VIEWEDIT
+    response = client.patch(f"{TEAM_SHARES_URL}{alien.pk}/", data, format="json")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.parametrize("ordering", ["", "team_id", "diagram_id", "permission_level"])
+def test_retrieve_team_shares_by_cursor(
+    client: APIClient, logged_in_user: User, ordering: str
+) -> None:
+    """
+    GIVEN a logged-in user who shared his diagrams to 3 teams
+    WHEN he follows the `next` links of GET /api/v1/sharings/team-shares/?cursor=
+    with the default and the other supported orderings
+    THEN he gets every share exactly once
+    """
+    diagram = DiagramFactory(owner=logged_in_user)
+    shares = [TeamCollaboratorFactory(diagram=diagram) for _ in range(3)]
+    url = f"{TEAM_SHARES_URL}?ordering={ordering}&page_size=2&cursor="
+    received_ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        received_ids += [
+            item["team_collaborator_id"] for item in response.json()["results"]
+        ]
+        url = response.json()["next"]
+    assert sorted(received_ids) == sorted(str(share.pk) for share in shares)
@@ -0,0 +1,350 @@
+"""
+Query budgets of all API endpoints (see `apps.core.query_budgets`).
+Every route of `apps/*/api/v1/urls.py` is requested with 1, 10 and 100 objects
+of each kind (diagrams owned by and shared to the user, collaborators)
+and list endpoints with the same page sizes. The number of queries must not
+exceed the budget declared by the view and must not depend on the page size.
+Queries made while streamed responses are sent are counted too.
+"""
+
+import importlib
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import F
+from django.urls import URLPattern, URLResolver, resolve, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from apps.authentication.authentication import token_cache
+from apps.core.query_budgets import QueryRecorder, get_query_budget, get_view_action
+from apps.diagrams.models import Diagram, DiagramContent
+from apps.sharings.constants import PermissionLevels
+from apps.sharings.models import Collaborator, Team, TeamCollaborator, TeamMember
+from apps.users.constants import UserRoles
+from apps.users.models import User
+from tests.factories import (
+    DEFAULT_TEST_PASSWORD,
+    CollaboratorFactory,
+    DiagramFactory,
+    TeamFactory,
+    UserFactory,
+)
+
+PAGE_SIZES = (1, 10, 100)
+HANDLED_METHODS = ("get", "post", "put", "patch", "delete")
+
+
+@dataclass
+class Scenario:
+    size: int
+    user: User
+    other_user: User
+    invited_user: User
+    invitees: List[User]
+    owned: List[Diagram]
+    shared: List[Diagram]
+    public_owned: Diagram
+    private_owned: Diagram
+    public_other: Diagram
+    collaborators: List[Collaborator]
+    collaborator: Collaborator
+    team: Team
+    team_collaborators: List[TeamCollaborator]
+
+
+def create_diagrams(owner: User, count: int) -> List[Diagram]:
+    digest = DiagramContent.objects.acquire({"classes": [], "relations": []})
+    DiagramContent.objects.filter(pk=digest).update(
+        ref_count=F("ref_count") + count - 1
+    )
+    return Diagram.objects.bulk_create(
+        Diagram(title=f"Diagram {index}", content_id=digest, owner=owner)
+        for index in range(count)
+    )
+
+
+def share_diagrams(diagrams: List[Diagram], user: User, permission_level: str):
+    return Collaborator.objects.bulk_create(
+        Collaborator(diagram=diagram, shared_to=user, permission_level=permission_level)
+        for diagram in diagrams
+    )
+
+
+def share_diagrams_to_team(
+    diagrams: List[Diagram], team: Team, permission_level: str
+) -> List[TeamCollaborator]:
+    return TeamCollaborator.objects.bulk_create(
+        TeamCollaborator(diagram=diagram, team=team, permission_level=permission_level)
+        for diagram in diagrams
+    )
+
+
+def build_scenario(size: int) -> Scenario:
+    user = UserFactory(role=UserRoles.USER)
+    other_user = UserFactory(role=UserRoles.USER)
+    owned = create_diagrams(user, size)
+    collaborators = share_diagrams(owned, other_user, PermissionLevels.VIEWONLY)
+    shared = create_diagrams(other_user, size)
+    share_diagrams(shared, user, PermissionLevels.VIEWEDIT)
+    public_owned, public_other = DiagramFactory(owner=user), DiagramFactory(
+        owner=other_user
+    )
+    for diagram in (public_owned, public_other):
+        CollaboratorFactory(
+            diagram=diagram, shared_to=None, permission_level=PermissionLevels.VIEWONLY
+        )
+    # Diagrams are shared to teams of the users too.
+    team, other_team = TeamFactory(owner=user), TeamFactory(owner=other_user)
+    TeamMember.objects.bulk_create(
+        [TeamMember(team=team, user=other_user), TeamMember(team=other_team, user=user)]
+    )
+    team_collaborators = share_diagrams_to_team(owned, team, PermissionLevels.VIEWONLY)
+    share_diagrams_to_team(shared, other_team, PermissionLevels.VIEWCOPY)
+    return Scenario(
+        size=size,
+        user=user,
+        other_user=other_user,
+        invited_user=UserFactory(role=UserRoles.USER),
+        invitees=User.objects.bulk_create(
+            User(email=f"invitee-{size}-{index}@example.com", role=UserRoles.USER)
+            for index in range(size)
+        ),
+        owned=owned,
+        shared=shared,
+        public_owned=public_owned,
+        private_owned=DiagramFactory(owner=user),
+        public_other=public_other,
+        collaborators=collaborators,
+        collaborator=collaborators[0],
+        team=team,
+        team_collaborators=team_collaborators,
+    )
+
+
+def diagram_data(scenario: Scenario) -> dict:
+    # New content is stored by every request.
+    document = {"classes": [], "size": scenario.size}
+    return {"title": "Diagram", "json": document, "description": "Diagram"}
+
+
+def user_data(scenario: Scenario) -> dict:
+    return {
+        "email": scenario.user.email,
+        "password": DEFAULT_TEST_PASSWORD,
+        "first_name": "First",
+        "last_name": "Last",
+    }
+
+
+# URL kwargs and request data of every endpoint (URL name and method).
+Request = Tuple[Callable[[Scenario], dict], Callable[[Scenario], dict]]
+NO_KWARGS, NO_DATA = (lambda s: {}), (lambda s: {})
+PAGE = lambda s: {"page_size": s.size}  # noqa: E731
+OWNED = lambda s: {"pk": s.owned[0].pk}  # noqa: E731
+SHARED = lambda s: {"pk": s.shared[0].pk}  # noqa: E731
+COLLABORATOR = lambda s: {"pk": s.collaborator.pk}  # noqa: E731
+TEAM = lambda s: {"pk": s.team.pk}  # noqa: E731
+TEAM_COLLABORATOR = lambda s: {"pk": s.team_collaborators[0].pk}  # noqa: E731
+MEMBERS = lambda s: {"member_emails": [u.email for u in s.invitees]}  # noqa: E731
+ENDPOINTS: Dict[Tuple[str, str], Request] = {
+    ("login", "post"): (
+        NO_KWARGS,
+        lambda s: {"email": s.user.email, "password": DEFAULT_TEST_PASSWORD},
+    ),
+    ("logout", "post"): (NO_KWARGS, NO_DATA),
+    ("signup", "post"): (
+        NO_KWARGS,
+        lambda s: {"email": f"new-{s.size}@example.com", "password": "Password-123!"},
+    ),
+    ("user-detail", "get"): (NO_KWARGS, NO_DATA),
+    ("user-detail", "put"): (NO_KWARGS, user_data),
+    ("user-detail", "patch"): (NO_KWARGS, lambda s: {"first_name": "First"}),
+    ("diagram-list", "get"): (NO_KWARGS, PAGE),
+    ("diagram-list", "post"): (NO_KWARGS, diagram_data),
+    ("diagram-copy-diagrams", "post"): (
+        NO_KWARGS,
+        lambda s: {"diagram_ids": [str(diagram.pk) for diagram in s.owned]},
+    ),
+    ("diagram-export-diagrams", "get"): (NO_KWARGS, NO_DATA),
+    ("diagram-import-diagrams", "post"): (
+        NO_KWARGS,
+        lambda s: [diagram_data(s) for _ in range(s.size)],
+    ),
+    ("diagram-detail", "get"): (OWNED, NO_DATA),
+    ("diagram-detail", "put"): (OWNED, diagram_data),
+    ("diagram-detail", "patch"): (OWNED, lambda s: {"json": diagram_data(s)["json"]}),
+    ("diagram-detail", "delete"): (OWNED, NO_DATA),
+    ("diagram-copy-diagram", "post"): (OWNED, NO_DATA),
+    ("diagram-invite-collaborator", "post"): (
+        OWNED,
+        lambda s: {
+            "user_email": s.invited_user.email,
+            "permission_level": PermissionLevels.VIEWONLY,
+        },
+    ),
+    ("diagram-invite-collaborators", "post"): (
+        OWNED,
+        lambda s: {
+            "invitations": [
+                {
+                    "user_email": user.email,
+                    "permission_level": PermissionLevels.VIEWONLY,
+                }
+                for user in s.invitees
+            ]
+        },
+    ),
+    ("diagram-invite-team", "post"): (
+        lambda s: {"pk": s.private_owned.pk},
+        lambda s: {
+            "team_id": str(s.team.pk),
+            "permission_level": PermissionLevels.VIEWONLY,
+        },
+    ),
+    ("diagram-remove-all-collaborators", "delete"): (OWNED, NO_DATA),
+    ("diagram-set-diagram-public", "post"): (
+        lambda s: {"pk": s.private_owned.pk},
+        NO_DATA,
+    ),
+    ("diagram-set-diagram-private", "post"): (
+        lambda s: {"pk": s.public_owned.pk},
+        NO_DATA,
+    ),
+    ("shared-diagram-list", "get"): (NO_KWARGS, PAGE),
+    ("shared-diagram-copy-shared-diagrams", "post"): (
+        NO_KWARGS,
+        lambda s: {"diagram_ids": [str(diagram.pk) for diagram in s.shared]},
+    ),
+    ("shared-diagram-detail", "get"): (SHARED, NO_DATA),
+    ("shared-diagram-copy-shared-diagram", "post"): (SHARED, NO_DATA),
+    ("shared-diagram-save-shared-diagram", "patch"): (
+        SHARED,
+        lambda s: {"description": "Changed"},
+    ),
+    ("shared-diagram-unshare-me-from-diagram", "delete"): (SHARED, NO_DATA),
+    ("public-diagram-detail", "get"): (lambda s: {"pk": s.public_other.pk}, NO_DATA),
+    ("collaborator-list", "get"): (NO_KWARGS, PAGE),
+    ("collaborator-detail", "get"): (COLLABORATOR, NO_DATA),
+    ("collaborator-detail", "patch"): (
+        COLLABORATOR,
+        lambda s: {"permission_level": PermissionLevels.VIEWCOPY},
+    ),
+    ("collaborator-detail", "delete"): (COLLABORATOR, NO_DATA),
+    ("collaborator-bulk", "patch"): (
+        NO_KWARGS,
+        lambda s: {
+            "collaborator_ids": [
+                str(collaborator.pk) for collaborator in s.collaborators
+            ],
+            "permission_level": PermissionLevels.VIEWCOPY,
+        },
+    ),
+    ("collaborator-bulk", "delete"): (
+        NO_KWARGS,
+        lambda s: {"filter": {"permission_level": PermissionLevels.VIEWONLY}},
+    ),
+    ("team-list", "get"): (NO_KWARGS, PAGE),
+    ("team-list", "post"): (NO_KWARGS, lambda s: {"name": "Team", **MEMBERS(s)}),
+    ("team-detail", "get"): (TEAM, NO_DATA),
+    ("team-detail", "patch"): (TEAM, MEMBERS),
+    ("team-detail", "delete"): (TEAM, NO_DATA),
+    ("teamcollaborator-list", "get"): (NO_KWARGS, PAGE),
+    ("teamcollaborator-detail", "get"): (TEAM_COLLABORATOR, NO_DATA),
+    ("teamcollaborator-detail", "patch"): (
+        TEAM_COLLABORATOR,
+        lambda s: {"permission_level": PermissionLevels.VIEWCOPY},
+    ),
+    ("teamcollaborator-detail", "delete"): (TEAM_COLLABORATOR, NO_DATA),
+}
+
+
+def iter_patterns(patterns) -> Iterator[URLPattern]:
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern.url_patterns)
+        else:
+            yield pattern
+
+
+def api_routes() -> Iterator[Tuple[str, str, type, str]]:
+    """
+    Yields URL names, methods, view classes and actions (lowercase methods
+    of views which are not viewsets) of all routes of `apps/*/api/v1/urls.py`.
+    """
+    for module_path in sorted((settings.BASE_DIR / "apps").glob("*/api/v1/urls.py")):
+        module = importlib.import_module(f"apps.{module_path.parts[-4]}.api.v1.urls")
+        for pattern in iter_patterns(module.urlpatterns):
+            view_class = pattern.callback.cls
+            actions = getattr(pattern.callback, "actions", None) or {
+                method: method
+                for method in HANDLED_METHODS
+                if hasattr(view_class, method)
+            }
+            for method, action in actions.items():
+                if method in HANDLED_METHODS and method in view_class.http_method_names:
+                    yield pattern.name, method, view_class, action
+
+
+def test_every_api_route_has_query_budget() -> None:
+    """
+    GIVEN all routes of the API
+    WHEN their views are inspected
+    THEN check that every route is covered by the query budget tests
+    and its view declares the query budget
+    """
+    routes = list(api_routes())
+    assert {(url_name, method) for url_name, method, _, _ in routes} == set(ENDPOINTS)
+    for url_name, method, view_class, action in routes:
+        assert get_query_budget(view_class, action) is not None, (url_name, method)
+
+
+@pytest.mark.parametrize("url_name, method", sorted(ENDPOINTS))
+def test_query_budget(url_name: str, method: str) -> None:
+    """
+    GIVEN a logged-in user with 1, 10 and 100 diagrams owned by him, shared
+    to him and collaborators
+    WHEN he requests the endpoint (lists with the same page sizes)
+    THEN check that the number of queries does not exceed the query budget
+    of the endpoint and does not depend on the page size
+    """
+    url_kwargs, data = ENDPOINTS[url_name, method]
+    counts = {}
+    for size in PAGE_SIZES:
+        scenario = build_scenario(size)
+        client = APIClient()
+        token = Token.objects.create(user=scenario.user)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        url = reverse(url_name, kwargs=url_kwargs(scenario))
+        view_class, action = get_view_action(resolve(url), method)
+        budget = get_query_budget(view_class, action)
+
+        # Authentication queries are counted too.
+        token_cache.reset()
+        caches["default"].clear()
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = getattr(client, method)(url, data(scenario), format="json")
+            if response.streaming:
+                # Streamed content is queried while it is being sent.
+                b"".join(response.streaming_content)
+        assert response.status_code < 400, response.content
+        if len(recorder) > budget:
+            pytest.fail(
+                f"{method.upper()} {url} with {size} objects made {len(recorder)} "
+                f"queries, the budget of {view_class.__name__}.{action} is {budget}:\n"
+                f"{recorder.format()}"
+            )
+        counts[size] = (len(recorder), recorder)
+
+    if len({count for count, _ in counts.values()}) > 1:
+        count, recorder = counts[PAGE_SIZES[-1]]
+        pytest.fail(
+            f"{method.upper()} {url_name} query count depends on the page size "
+            f"({', '.join(f'{s}: {c}' for s, (c, _) in counts.items())}):\n"
+            f"{recorder.format()}"
+        )
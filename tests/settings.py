@@ -7,4 +7,14 @@ DATABASES = {
     },
 }
 
+# Tests run in a single process, so the memory cache is shared by all requests.
+TOKEN_AUTH_CACHE = {
+    **TOKEN_AUTH_CACHE,  # noqa: F405
+    "SHARED_CACHE": "default",
+    "TTL": 60,
+}  # noqa: F405
+
 LOGGING = {"version": 1, "disable_existing_loggers": False}
+
+# Covering indexes are PostgreSQL-only, SQLite builds them without non-key columns.
+SILENCED_SYSTEM_CHECKS = ["models.W040"]
@@ -0,0 +1,204 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from prometheus_client import REGISTRY
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from apps.authentication.authentication import (
+    CachedTokenAuthentication,
+    TokenCache,
+    token_cache,
+)
+from apps.users.constants import UserRoles
+from apps.users.models import User
+from tests.factories import UserFactory
+
+
+def lookups(result: str) -> float:
+    return REGISTRY.get_sample_value(
+        "token_auth_cache_lookups_total", {"result": result}
+    )
+
+
+def test_cached_token_authentication_queries_database_on_miss_only(
+    django_assert_num_queries,
+) -> None:
+    """
+    GIVEN a user with a token
+    WHEN the token is authenticated several times
+    THEN check that the database is queried just for the first time,
+    the cached user is returned for the rest, and hits and misses are counted
+    """
+    user = UserFactory()
+    token = Token.objects.create(user=user)
+    authentication = CachedTokenAuthentication()
+    misses, hits = lookups("miss") or 0, lookups("local_hit") or 0
+    with django_assert_num_queries(1):
+        for _ in range(3):
+            cached_user, cached_token = authentication.authenticate_credentials(
+                token.key
+            )
+            assert cached_user == user
+            assert cached_token.key == token.key
+    assert lookups("miss") == misses + 1
+    assert lookups("local_hit") == hits + 2
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda user: user.auth_token.delete(),
+        lambda user: setattr(user, "is_active", False) or user.save(),
+        lambda user: setattr(user, "role", UserRoles.ADMIN) or user.save(),
+        lambda user: Token.objects.filter(user=user).delete(),
+        lambda user: User.objects.filter(pk=user.pk).update(is_active=False),
+        lambda user: User.objects.filter(pk=user.pk).update(role=UserRoles.ADMIN),
+    ],
+    ids=[
+        "token_deleted",
+        "user_deactivated",
+        "role_changed",
+        "tokens_deleted_in_bulk",
+        "users_deactivated_in_bulk",
+        "roles_changed_in_bulk",
+    ],
+)
+def test_cached_token_authentication_is_invalidated(change) -> None:
+    """
+    GIVEN a user which token resolution is cached
+    WHEN the token is deleted, or the user is deactivated or changes role
+    THEN check that the cached resolution is invalidated immediately
+    """
+    user = UserFactory(role=UserRoles.USER)
+    key = Token.objects.create(user=user).key
+    authentication = CachedTokenAuthentication()
+    authentication.authenticate_credentials(key)
+    change(user)
+    user.refresh_from_db()
+    if user.is_active and Token.objects.filter(pk=key).exists():
+        cached_user, _ = authentication.authenticate_credentials(key)
+        assert cached_user.role == UserRoles.ADMIN
+    else:
+        with pytest.raises(AuthenticationFailed):
+            authentication.authenticate_credentials(key)
+
+
+def test_cached_token_authentication_is_kept_on_last_login_update(
+    django_assert_num_queries,
+) -> None:
+    """
+    GIVEN a user which token resolution is cached
+    WHEN just the last login time of the user is updated
+    THEN check that the cached resolution is still used
+    """
+    user = UserFactory()
+    token = Token.objects.create(user=user)
+    authentication = CachedTokenAuthentication()
+    authentication.authenticate_credentials(token.key)
+    user.save(update_fields=["last_login"])
+    with django_assert_num_queries(0):
+        authentication.authenticate_credentials(token.key)
+
+
+def test_cached_token_authentication_shared_cache(django_assert_num_queries) -> None:
+    """
+    GIVEN token authentication cache backed by a shared cache
+    WHEN the in-process cache is dropped (e.g. in another process)
+    THEN check that the token is resolved by the shared cache without queries,
+    and the shared cache entry is invalidated on logout
+    """
+    user = UserFactory()
+    token = Token.objects.create(user=user)
+    authentication = CachedTokenAuthentication()
+    authentication.authenticate_credentials(token.key)
+    token_cache.reset()
+    with django_assert_num_queries(0):
+        cached_user, _ = authentication.authenticate_credentials(token.key)
+    assert cached_user == user
+    key = token.key
+    token.delete()
+    token_cache.reset()
+    with pytest.raises(AuthenticationFailed):
+        authentication.authenticate_credentials(key)
+
+
+def test_cached_token_authentication_caches_authentication_fields_only(
+    django_assert_num_queries,
+) -> None:
+    """
+    GIVEN a user which token resolution is cached
+    WHEN the user changes profile fields
+    THEN check that the shared cache entry has no password hash and profile
+    fields, and profile fields of the cached user are loaded from the database
+    """
+    user = UserFactory()
+    token = Token.objects.create(user=user)
+    authentication = CachedTokenAuthentication()
+    authentication.authenticate_credentials(token.key)
+    entry = token_cache.shared.get(token_cache.shared_key(token.key))
+    assert "password" not in entry[0] and "email" not in entry[0]
+    User.objects.filter(pk=user.pk).update(first_name="Renamed")
+    token_cache.reset()
+    with django_assert_num_queries(0):
+        cached_user, _ = authentication.authenticate_credentials(token.key)
+    assert cached_user.role == user.role and cached_user.is_active
+    with django_assert_num_queries(1):
+        assert cached_user.first_name == "Renamed"
+
+
+def test_cached_token_authentication_is_invalidated_in_other_processes(
+    django_assert_num_queries,
+) -> None:
+    """
+    GIVEN a user which token resolution is cached in the in-process cache
+    WHEN the token is invalidated by another process
+    THEN check that the in-process entry is not used anymore
+    """
+    user = UserFactory()
+    token = Token.objects.create(user=user)
+    authentication = CachedTokenAuthentication()
+    authentication.authenticate_credentials(token.key)
+    TokenCache().invalidate([token.key])
+    with django_assert_num_queries(1):
+        authentication.authenticate_credentials(token.key)
+    with django_assert_num_queries(0):
+        authentication.authenticate_credentials(token.key)
+
+
+def test_token_resolved_while_invalidated_is_not_used() -> None:
+    """
+    GIVEN a token which is not cached
+    WHEN it is invalidated after its version is read and before its resolution
+    from the database is cached
+    THEN check that the cached resolution is not used
+    """
+    user = UserFactory()
+    token = Token.objects.create(user=user)
+    _, version = token_cache.get(token.key)
+    token_cache.invalidate([token.key])
+    token_cache.set(token.key, user, version)
+    cached_user, _ = token_cache.get(token.key)
+    assert cached_user is None
+
+
+def test_token_authentication_without_shared_cache(
+    settings, django_assert_num_queries
+) -> None:
+    """
+    GIVEN token authentication cache without a shared cache
+    WHEN tokens are authenticated
+    THEN check that nothing is cached, and the in-process cache is refused
+    """
+    settings.TOKEN_AUTH_CACHE = {
+        **settings.TOKEN_AUTH_CACHE,
+        "SHARED_CACHE": "",
+        "TTL": 0,
+    }
+    token = Token.objects.create(user=UserFactory())
+    authentication = CachedTokenAuthentication()
+    with django_assert_num_queries(2):
+        for _ in range(2):
+            authentication.authenticate_credentials(token.key)
+    settings.TOKEN_AUTH_CACHE = {**settings.TOKEN_AUTH_CACHE, "TTL": 60}
+    with pytest.raises(ImproperlyConfigured):
+        authentication.authenticate_credentials(token.key)
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import pytest
+
+from apps.core.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used_entries() -> None:
+    """
+    GIVEN an LRU cache of two entries
+    WHEN the first entry is read and a third entry is set
+    THEN check that the second (least recently used) entry is evicted
+    """
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_lru_cache_entries_expire(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    GIVEN an LRU cache with TTL
+    WHEN an entry is read after TTL elapsed
+    THEN check that the entry is expired and removed
+    """
+    clock = iter([100.0, 159.0, 161.0])
+    monkeypatch.setattr(
+        "apps.core.cache.time", SimpleNamespace(monotonic=lambda: next(clock))
+    )
+    cache = LRUCache(max_size=10, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("a", "expired") == "expired"
+    assert len(cache) == 0
+
+
+def test_lru_cache_delete_matching_and_disabled_cache() -> None:
+    """
+    GIVEN LRU caches with entries and a cache with zero TTL
+    WHEN entries are deleted by a predicate or set into the disabled cache
+    THEN check that just the matching entries are deleted and nothing is stored
+    by the disabled cache
+    """
+    cache = LRUCache(max_size=10, ttl=60)
+    for key, value in {"a": 1, "b": 2, "c": 1}.items():
+        cache.set(key, value)
+    cache.delete_matching(lambda value: value == 1)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (None, 2, None)
+    disabled_cache = LRUCache(max_size=10, ttl=0)
+    disabled_cache.set("a", 1)
+    assert disabled_cache.get("a") is None
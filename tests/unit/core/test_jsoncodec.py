@@ -0,0 +1,140 @@
+import io
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.core import jsoncodec
+from apps.core.parsers import FastJSONParser
+from apps.core.renderers import FastJSONRenderer
+
+DATA = {
+    "diagram_id": uuid.UUID("7b0c7f0e-2b4a-4d8f-9a57-0d6f1f0a3c11"),
+    "created_at": datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=timezone.utc),
+    "updated_at": datetime(2024, 5, 6, 9, 8, 9, tzinfo=timezone(timedelta(hours=2))),
+    "naive": datetime(2024, 5, 6, 7, 8, 9),
+    "date": date(2024, 5, 6),
+    "time": time(7, 8, 9),
+    "duration": timedelta(minutes=1, seconds=30),
+    "price": Decimal("12.50"),
+    "json": {
+        "classes": [{"name": "Użytkownik", "x": 1.5, "y": -2, "abstract": False}],
+        "relations": [],
+        "note": "line separator ",
+        "empty": None,
+    },
+    1: "integer key",
+}
+
+
+@pytest.fixture
+def orjson_codec(settings) -> None:
+    pytest.importorskip("orjson")
+    settings.JSON_CODEC = jsoncodec.ORJSON
+
+
+def test_fast_json_renderer_renders_same_json_as_drf(orjson_codec) -> None:
+    """
+    GIVEN data with UUIDs, datetimes, Decimals, non-ASCII text and line
+    separators
+    WHEN it is rendered by the fast JSON renderer with orjson codec
+    THEN check that the output is the same as the output of DRF's renderer
+    """
+    assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+
+def test_fast_json_renderer_renders_long_integers_by_drf(orjson_codec) -> None:
+    """
+    GIVEN data with an integer which does not fit 64 bits (rejected by orjson)
+    WHEN it is rendered by the fast JSON renderer with orjson codec
+    THEN check that it is rendered the same as by DRF's renderer
+    """
+    data = {"json": {"size": 123456789012345678901234567890}}
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_fast_json_renderer_renders_indented_json_by_drf(orjson_codec) -> None:
+    """
+    GIVEN a requested indentation
+    WHEN data is rendered by the fast JSON renderer
+    THEN check that it is rendered by DRF's renderer
+    """
+    media_type = "application/json; indent=4"
+    assert FastJSONRenderer().render(DATA, media_type) == JSONRenderer().render(
+        DATA, media_type
+    )
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b'{"title": "Diagram", "json": {"classes": [{"x": 1.5}]}}',
+        # Integers which do not fit 64 bits are rejected by orjson.
+        b'{"size": 123456789012345678901234567890}',
+    ],
+)
+def test_fast_json_parser_parses_same_data_as_drf(orjson_codec, body: bytes) -> None:
+    """
+    GIVEN a JSON request body
+    WHEN it is parsed by the fast JSON parser with orjson codec
+    THEN check that the data is the same as the data parsed by DRF's parser
+    """
+    assert FastJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(
+        io.BytesIO(body)
+    )
+
+
+@pytest.mark.parametrize("body", [b'{"title": ', b'{"x": NaN}'])
+def test_fast_json_parser_rejects_invalid_json_as_drf(orjson_codec, body) -> None:
+    """
+    GIVEN an invalid JSON body or a body with out of range floats
+    WHEN it is parsed by the fast JSON parser
+    THEN check that it is rejected with the same error as by DRF's parser
+    """
+    with pytest.raises(ParseError) as fast_error:
+        FastJSONParser().parse(io.BytesIO(body))
+    with pytest.raises(ParseError) as drf_error:
+        JSONParser().parse(io.BytesIO(body))
+    assert str(fast_error.value) == str(drf_error.value)
+
+
+def test_fast_json_codec_falls_back_to_json(
+    settings, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    GIVEN `orjson` package which is not installed
+    WHEN data is rendered and parsed by the fast JSON renderer and parser
+    THEN check that stdlib json is used
+    """
+    settings.JSON_CODEC = jsoncodec.ORJSON
+    monkeypatch.setattr(jsoncodec, "orjson", None)
+    assert jsoncodec.resolve(jsoncodec.ORJSON) == jsoncodec.JSON
+    assert not jsoncodec.is_fast()
+    content = FastJSONRenderer().render(DATA)
+    assert content == JSONRenderer().render(DATA)
+    assert FastJSONParser().parse(io.BytesIO(content)) == JSONParser().parse(
+        io.BytesIO(content)
+    )
+    with pytest.raises(ValueError):
+        jsoncodec.resolve("ujson")
+
+
+def test_benchmark_json(orjson_codec) -> None:
+    """
+    GIVEN orjson codec
+    WHEN benchmark_json command is run with small documents
+    THEN check that render and parse times of every size are reported
+    """
+    output = StringIO()
+    call_command(
+        "benchmark_json", "--sizes", "1000", "5000", "--repeat", "1", stdout=output
+    )
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 2
+    assert all(", render: DRF " in line and ", parse: DRF " in line for line in lines)
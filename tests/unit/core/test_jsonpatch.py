@@ -0,0 +1,157 @@
+from typing import Any
+
+import pytest
+
+from apps.core.jsonpatch import (
+    JSONPatchError,
+    JSONPatchTestFailed,
+    apply_json_patch,
+    apply_merge_patch,
+    parse_pointer,
+)
+
+
+class TestJSONPatch:
+    @pytest.mark.parametrize(
+        ("document", "operations", "expected"),
+        [
+            (
+                {"foo": "bar"},
+                [{"op": "add", "path": "/baz", "value": 1}],
+                {"foo": "bar", "baz": 1},
+            ),
+            (
+                {"foo": [1, 3]},
+                [{"op": "add", "path": "/foo/1", "value": 2}],
+                {"foo": [1, 2, 3]},
+            ),
+            (
+                {"foo": [1]},
+                [{"op": "add", "path": "/foo/-", "value": 2}],
+                {"foo": [1, 2]},
+            ),
+            ({"foo": 1, "bar": 2}, [{"op": "remove", "path": "/bar"}], {"foo": 1}),
+            ({"foo": [1, 2, 3]}, [{"op": "remove", "path": "/foo/1"}], {"foo": [1, 3]}),
+            ({"foo": 1}, [{"op": "replace", "path": "/foo", "value": 2}], {"foo": 2}),
+            (
+                {"foo": {"bar": 1}, "qux": {}},
+                [{"op": "move", "from": "/foo/bar", "path": "/qux/thud"}],
+                {"foo": {}, "qux": {"thud": 1}},
+            ),
+            (
+                {"foo": [1, 2, 3, 4]},
+                [{"op": "move", "from": "/foo/1", "path": "/foo/3"}],
+                {"foo": [1, 3, 4, 2]},
+            ),
+            (
+                {"foo": {"bar": [1]}},
+                [{"op": "copy", "from": "/foo", "path": "/baz"}],
+                {"foo": {"bar": [1]}, "baz": {"bar": [1]}},
+            ),
+            (
+                {"a/b": 1, "m~n": 2},
+                [{"op": "remove", "path": "/a~1b"}, {"op": "remove", "path": "/m~0n"}],
+                {},
+            ),
+            (
+                {"foo": [1, "2"]},
+                [{"op": "test", "path": "/foo", "value": [1, "2"]}],
+                {"foo": [1, "2"]},
+            ),
+            ({"foo": 1}, [{"op": "replace", "path": "", "value": [1]}], [1]),
+        ],
+    )
+    def test_apply_json_patch(
+        self, document: Any, operations: list, expected: Any
+    ) -> None:
+        """
+        GIVEN a document and valid JSON Patch operations (RFC 6902 examples)
+        WHEN the patch is applied
+        THEN check that the expected document is returned.
+        """
+        assert apply_json_patch(document, operations) == expected
+
+    def test_apply_json_patch_copies_value(self) -> None:
+        """
+        GIVEN a document and a patch which copies a value and changes the copy
+        WHEN the patch is applied
+        THEN check that the source value is not changed.
+        """
+        operations = [
+            {"op": "copy", "from": "/foo", "path": "/bar"},
+            {"op": "add", "path": "/bar/0", "value": 0},
+        ]
+        assert apply_json_patch({"foo": [1]}, operations) == {"foo": [1], "bar": [0, 1]}
+
+    @pytest.mark.parametrize(
+        "operations",
+        [
+            {"op": "add", "path": "/foo", "value": 1},
+            [{"op": "unknown", "path": "/foo"}],
+            [{"op": "add", "path": "/foo"}],
+            [{"op": "add", "path": "foo", "value": 1}],
+            [{"op": "remove", "path": "/missing"}],
+            [{"op": "replace", "path": "/missing", "value": 1}],
+            [{"op": "add", "path": "/missing/foo", "value": 1}],
+            [{"op": "add", "path": "/list/01", "value": 1}],
+            [{"op": "add", "path": "/list/5", "value": 1}],
+            [{"op": "remove", "path": "/list/-"}],
+            [{"op": "move", "from": "/foo", "path": "/foo/bar"}],
+        ],
+    )
+    def test_apply_json_patch_invalid(self, operations: Any) -> None:
+        """
+        GIVEN a document and an invalid JSON Patch
+        WHEN the patch is applied
+        THEN check that JSONPatchError is raised.
+        """
+        with pytest.raises(JSONPatchError):
+            apply_json_patch({"foo": {}, "list": [1]}, operations)
+
+    @pytest.mark.parametrize(
+        "value", [{"bar": True}, {"bar": 1.5}, {"bar": 1, "baz": 2}, [1]]
+    )
+    def test_apply_json_patch_test_failed(self, value: Any) -> None:
+        """
+        GIVEN a document and a `test` operation with a value which differs
+        from the document value (booleans are not numbers)
+        WHEN the patch is applied
+        THEN check that JSONPatchTestFailed is raised.
+        """
+        with pytest.raises(JSONPatchTestFailed):
+            apply_json_patch(
+                {"foo": {"bar": 1}}, [{"op": "test", "path": "/foo", "value": value}]
+            )
+
+    def test_parse_pointer(self) -> None:
+        """
+        GIVEN JSON pointers
+        WHEN they are parsed
+        THEN check that escaped reference tokens are returned.
+        """
+        assert parse_pointer("") == []
+        assert parse_pointer("/a~1b/~01/") == ["a/b", "~1", ""]
+
+
+class TestJSONMergePatch:
+    @pytest.mark.parametrize(
+        ("target", "patch", "expected"),
+        [
+            ({"a": "b"}, {"a": "c"}, {"a": "c"}),
+            ({"a": "b"}, {"b": "c"}, {"a": "b", "b": "c"}),
+            ({"a": "b", "b": "c"}, {"a": None}, {"b": "c"}),
+            ({"a": [{"b": "c"}]}, {"a": [1]}, {"a": [1]}),
+            ({"a": {"b": "c"}}, {"a": {"b": "d", "c": None}}, {"a": {"b": "d"}}),
+            ({"a": "foo"}, "bar", "bar"),
+            ({"e": None}, {"a": 1}, {"e": None, "a": 1}),
+            ([1, 2], {"a": "b", "c": None}, {"a": "b"}),
+            ({}, {"a": {"bb": {"ccc": None}}}, {"a": {"bb": {}}}),
+        ],
+    )
+    def test_apply_merge_patch(self, target: Any, patch: Any, expected: Any) -> None:
+        """
+        GIVEN a target and a JSON Merge Patch (RFC 7396 examples)
+        WHEN the patch is applied
+        THEN check that the expected document is returned.
+        """
+        assert apply_merge_patch(target, patch) == expected
@@ -0,0 +1,76 @@
+import json
+from io import BytesIO
+
+import pytest
+
+from apps.core.jsonstream import ItemParseError, iter_json_array, iter_ndjson
+
+ITEMS = [
+    {"title": "Zamówienia", "json": {"classes": [{"name": "Order"}] * 3}},
+    [1, 2.5, None, True],
+    'text with ] and , and " and \n',
+    12345678901234567890123,
+    -1.5e3,
+    {},
+]
+
+
+def test_iter_ndjson() -> None:
+    """
+    GIVEN newline delimited JSON with blank lines and an invalid line
+    WHEN its items are iterated
+    THEN check that the items are parsed and the invalid line is reported
+    in its place without stopping the parsing.
+    """
+    lines = [json.dumps(item).encode() for item in ITEMS[:2]]
+    data = b"\n".join([lines[0], b"", b"{invalid", b"  ", lines[1], b""])
+    items = list(iter_ndjson(BytesIO(data)))
+    assert items[0] == ITEMS[0]
+    assert isinstance(items[1], ItemParseError)
+    assert items[2] == ITEMS[1]
+    assert len(items) == 3
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 65536])
+def test_iter_json_array(chunk_size: int) -> None:
+    """
+    GIVEN a JSON array with items of various types
+    WHEN its items are iterated reading chunks of the given size
+    THEN check that all items are parsed, even if they are split across chunks.
+    """
+    data = b" [ " + b" ,\n".join(json.dumps(item).encode() for item in ITEMS) + b" ] \n"
+    assert list(iter_json_array(BytesIO(data), chunk_size)) == ITEMS
+
+
+@pytest.mark.parametrize("data", [b"[]", b" [ \n ] ", b"[5]", b'["x"]'])
+def test_iter_json_array_small(data: bytes) -> None:
+    """
+    GIVEN a JSON array with at most one item
+    WHEN its items are iterated by single bytes
+    THEN check that they are parsed like by the json module.
+    """
+    assert list(iter_json_array(BytesIO(data), 1)) == json.loads(data)
+
+
+@pytest.mark.parametrize(
+    "data, parsed",
+    [
+        (b"", 0),
+        (b'{"title": "x"}', 0),
+        (b"[1, 2", 2),
+        (b"[1 2]", 1),
+        (b"[1, {invalid}]", 1),
+        (b"[1] [2]", 1),
+    ],
+)
+def test_iter_json_array_invalid(data: bytes, parsed: int) -> None:
+    """
+    GIVEN a body which is not a valid JSON array
+    WHEN its items are iterated
+    THEN check that items before the error are parsed and then the error
+    is reported and parsing stops.
+    """
+    items = list(iter_json_array(BytesIO(data), 2))
+    assert len(items) == parsed + 1
+    assert isinstance(items[-1], ItemParseError)
+    assert not any(isinstance(item, ItemParseError) for item in items[:-1])
@@ -0,0 +1,112 @@
+import json
+import random
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F
+from rest_framework.authtoken.models import Token
+
+from apps.core.loadtest import (
+    LoadRequest,
+    Sample,
+    percentile,
+    run_scenario,
+    summarize,
+    uml_document,
+)
+from apps.diagrams.models import Diagram, DiagramContent
+from apps.sharings.models import Collaborator
+from apps.users.models import User
+
+
+def test_uml_document_has_requested_size() -> None:
+    """
+    GIVEN a requested document size
+    WHEN UML documents are generated with different tags
+    THEN check that their JSON is about the requested size and they differ
+    """
+    rng = random.Random(0)
+    first, second = uml_document(rng, 20000, "a"), uml_document(rng, 20000, "b")
+    assert 20000 <= len(json.dumps(first)) < 22000
+    assert len(first["relations"]) == len(first["classes"]) - 1
+    assert first != second
+
+
+def test_run_scenario_sends_requested_number_of_requests() -> None:
+    """
+    GIVEN a scenario and a server which responds with query counts
+    WHEN the scenario is run by concurrent clients for a number of requests
+    THEN check that the number of requests is sent and the summary reports
+    percentiles, errors and queries per request
+    """
+    paths = []
+
+    def send(request: LoadRequest) -> Sample:
+        paths.append(request.path)
+        status = 404 if request.path == "/missing/" else 200
+        return Sample(len(paths) / 1000, status, 3, 0.001)
+
+    def make_request(rng: random.Random) -> LoadRequest:
+        return LoadRequest("GET", rng.choice(["/found/"] * 9 + ["/missing/"]))
+
+    samples, elapsed = run_scenario(send, make_request, 4, requests=100)
+    assert len(samples) == len(paths) == 100
+    result = summarize(samples, elapsed)
+    assert result["requests"] == 100
+    assert result["errors"] == paths.count("/missing/")
+    assert result["statuses"]["200"] == 100 - result["errors"]
+    latency = result["latency_ms"]
+    assert latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
+    assert result["queries_per_request"] == {"mean": 3, "max": 3}
+
+
+def test_percentile() -> None:
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([5.0], 95) == 5.0
+    assert percentile([], 50) is None
+
+
+def test_seed_load_data() -> None:
+    """
+    GIVEN a database without diagrams
+    WHEN seed_load_data command is run with small volumes and then with --delete
+    THEN check that users with tokens, diagrams referring to contents, shares
+    and public flags are created, and the data is deleted afterwards
+    """
+    call_command(
+        "seed_load_data",
+        "--users",
+        "10",
+        "--diagrams",
+        "50",
+        "--contents",
+        "5",
+        "--document-size",
+        "2000",
+        "--shares-per-diagram",
+        "2",
+        "--public-ratio",
+        "0.2",
+        "--batch-size",
+        "20",
+        stdout=StringIO(),
+    )
+    users = User.objects.filter(email__startswith="load-")
+    assert users.count() == Token.objects.filter(user__in=users).count() == 10
+    assert Diagram.objects.filter(owner__in=users).count() == 50
+    contents = DiagramContent.objects.all()
+    assert len(contents) == 5
+    assert sum(content.ref_count for content in contents) == 50
+    assert all(content.ref_count == content.diagrams.count() for content in contents)
+    assert Collaborator.objects.exclude(shared_to=None).count() >= 100
+    assert not Collaborator.objects.filter(diagram__owner=F("shared_to")).exists()
+    assert not Collaborator.objects.inconsistent_public_flags().exists()
+
+    call_command("seed_load_data", "--delete", stdout=StringIO())
+    assert not users.exists()
+    assert not Diagram.objects.exists()
+    assert not Collaborator.objects.exists()
+    assert not DiagramContent.objects.exists()
@@ -0,0 +1,98 @@
+import logging
+
+import pytest
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from pytest_mock import MockerFixture
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from apps.sharings.api.v1.views import CollaboratorViewSet
+from apps.users.constants import UserRoles
+from tests.factories import UserFactory
+
+
+def exceeded(reason: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "query_budget_exceeded_total",
+            {"view": "CollaboratorViewSet", "action": "list", "reason": reason},
+        )
+        or 0
+    )
+
+
+@pytest.fixture
+def client() -> APIClient:
+    user = UserFactory(role=UserRoles.USER)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user)}")
+    return client
+
+
+def test_query_budget_middleware_logs_requests_exceeding_budget(
+    client: APIClient, settings, mocker: MockerFixture, caplog
+) -> None:
+    """
+    GIVEN query budget checks enabled for all requests and an endpoint
+    which query budget is lower than its number of queries
+    WHEN the endpoint is requested
+    THEN check that the request is logged with its SQL and counted
+    """
+    settings.QUERY_BUDGETS = {"ENABLED": True, "SAMPLE_RATE": 1.0, "DB_TIME": 0}
+    mocker.patch.object(CollaboratorViewSet, "query_budgets", {"list": 1})
+    count = exceeded("queries")
+    with caplog.at_level(logging.WARNING, logger="query_budgets"):
+        response = client.get(reverse("collaborator-list"))
+    assert response.status_code == 200
+    [record] = caplog.records
+    message = record.getMessage()
+    assert "GET /api/v1/sharings/ (CollaboratorViewSet.list)" in message
+    assert "(budget: 1)" in message
+    assert "sharings_collaborator" in message
+    assert exceeded("queries") == count + 1
+    assert exceeded("db_time") == 0
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"ENABLED": False, "SAMPLE_RATE": 1.0, "DB_TIME": 0},
+        {"ENABLED": True, "SAMPLE_RATE": 0.0, "DB_TIME": 0},
+    ],
+)
+def test_query_budget_middleware_skips_requests_out_of_sample(
+    client: APIClient, settings, mocker: MockerFixture, caplog, options: dict
+) -> None:
+    """
+    GIVEN query budget checks disabled or with zero sample rate
+    WHEN an endpoint which exceeds its query budget is requested
+    THEN check that the request is not logged
+    """
+    settings.QUERY_BUDGETS = options
+    mocker.patch.object(CollaboratorViewSet, "query_budgets", {"list": 1})
+    with caplog.at_level(logging.WARNING, logger="query_budgets"):
+        response = client.get(reverse("collaborator-list"))
+    assert response.status_code == 200
+    assert not caplog.records
+
+
+def test_query_budget_middleware_returns_query_counts_in_headers(
+    client: APIClient, settings
+) -> None:
+    """
+    GIVEN query budget checks enabled for all requests with response headers
+    WHEN an endpoint is requested
+    THEN check that the number of queries and the database time of the request
+    are returned in the headers
+    """
+    settings.QUERY_BUDGETS = {
+        "ENABLED": True,
+        "SAMPLE_RATE": 1.0,
+        "DB_TIME": 0,
+        "RESPONSE_HEADERS": True,
+    }
+    response = client.get(reverse("collaborator-list"))
+    assert response.status_code == 200
+    assert int(response["X-DB-Queries"]) >= 1
+    assert float(response["X-DB-Time"]) > 0
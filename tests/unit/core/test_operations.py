@@ -0,0 +1,57 @@
+from django.db import models
+from pytest_mock import MockerFixture
+
+from apps.core.operations import AddIndexConcurrently, AddUniqueIndexConcurrently
+
+
+def test_add_index_concurrently_on_postgresql(mocker: MockerFixture) -> None:
+    """
+    GIVEN AddIndexConcurrently operation and PostgreSQL schema editor
+    WHEN the operation is applied and unapplied
+    THEN check that the index is created and removed concurrently
+    """
+    index = models.Index(fields=["owner", "title"], name="diagram_owner_title_idx")
+    operation = AddIndexConcurrently(model_name="diagram", index=index)
+    schema_editor = mocker.MagicMock()
+    schema_editor.connection.vendor = "postgresql"
+    schema_editor.connection.alias = "default"
+    state = mocker.MagicMock()
+    operation.database_forwards("diagrams", schema_editor, state, state)
+    schema_editor.add_index.assert_called_once_with(
+        state.apps.get_model.return_value, index, concurrently=True
+    )
+    operation.database_backwards("diagrams", schema_editor, state, state)
+    schema_editor.remove_index.assert_called_once_with(
+        state.apps.get_model.return_value, index, concurrently=True
+    )
+    assert operation.describe().endswith(" concurrently")
+
+
+def test_add_unique_index_concurrently_on_postgresql(mocker: MockerFixture) -> None:
+    """
+    GIVEN AddUniqueIndexConcurrently operation with a partial unique constraint
+    and PostgreSQL schema editor
+    WHEN the operation is applied
+    THEN check that the unique index is created concurrently
+    """
+    constraint = models.UniqueConstraint(
+        fields=["diagram"],
+        condition=models.Q(shared_to__isnull=True),
+        name="collaborator_single_public_share",
+    )
+    mocker.patch.object(
+        models.UniqueConstraint,
+        "create_sql",
+        return_value='CREATE UNIQUE INDEX "collaborator_single_public_share" ON ...',
+    )
+    operation = AddUniqueIndexConcurrently(
+        model_name="collaborator", constraint=constraint
+    )
+    schema_editor = mocker.MagicMock()
+    schema_editor.connection.vendor = "postgresql"
+    schema_editor.connection.alias = "default"
+    state = mocker.MagicMock()
+    operation.database_forwards("sharings", schema_editor, state, state)
+    schema_editor.execute.assert_called_once_with(
+        'CREATE UNIQUE INDEX CONCURRENTLY "collaborator_single_public_share" ON ...'
+    )
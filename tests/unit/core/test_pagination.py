@@ -0,0 +1,35 @@
+import pytest
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from apps.diagrams.api.v1.pagination import DiagramViewSetPagination
+from apps.diagrams.models import Diagram
+
+
+class TestKeysetPageNumberPagination:
+    @pytest.mark.parametrize(
+        ("ordering", "keyset_ordering"),
+        [
+            (["-updated_at"], ("-updated_at", "-id")),
+            (["title", "-created_at"], ("title", "-created_at", "-id")),
+            (["title", "id"], ("title", "id")),
+            ([], ("id",)),
+        ],
+    )
+    def test_get_keyset_ordering_adds_primary_key_tie_breaker(
+        self, ordering: list, keyset_ordering: tuple
+    ) -> None:
+        queryset = Diagram.objects.order_by(*ordering)
+        pagination = DiagramViewSetPagination()
+        assert pagination.get_keyset_ordering(queryset) == keyset_ordering
+
+    def test_get_keyset_ordering_rejects_not_supported_field(self) -> None:
+        queryset = Diagram.objects.order_by("description")
+        with pytest.raises(ValidationError):
+            DiagramViewSetPagination().get_keyset_ordering(queryset)
+
+    def test_get_keyset_filter_flips_operator_for_descending_fields(self) -> None:
+        condition = DiagramViewSetPagination.get_keyset_filter(
+            ("title", "-id"), ["a", "b"]
+        )
+        assert condition == Q(title__gt="a") | Q(title="a", id__lt="b")
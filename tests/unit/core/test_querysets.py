@@ -0,0 +1,112 @@
+from rest_framework import serializers
+
+from apps.core.querysets import plan_serializer_queryset
+from apps.diagrams.api.v1.serializers import (
+    DiagramSerializer,
+    SharedDiagramListSerializer,
+)
+from apps.diagrams.models import Diagram
+from apps.sharings.api.v1.serializers import CollaboratorSerializer
+from apps.sharings.models import Collaborator
+from apps.users.models import User
+from tests.factories import CollaboratorFactory, DiagramFactory
+
+
+class DiagramWithCollaboratorsSerializer(serializers.ModelSerializer):
+    owner = serializers.SlugRelatedField(slug_field="email", read_only=True)
+    collaborators = CollaboratorSerializer(
+        source="collaborator_set", many=True, read_only=True
+    )
+
+    class Meta:
+        model = Diagram
+        fields = ["id", "title", "owner", "collaborators"]
+
+
+def test_plan_joins_related_objects_and_selects_read_columns() -> None:
+    """
+    GIVEN the serializer of collaborators which reads the diagram title
+    and the email of the user it was shared to
+    WHEN the queryset plan is built for it
+    THEN check that both related objects are joined and just the read columns
+    are selected
+    """
+    plan = plan_serializer_queryset(CollaboratorSerializer, Collaborator)
+    assert plan.select_related == {"diagram", "shared_to"}
+    assert plan.prefetch_related == {}
+    assert plan.only == {
+        "id",
+        "permission_level",
+        "shared_at",
+        "diagram",
+        "diagram__id",
+        "diagram__title",
+        "shared_to",
+        "shared_to__email",
+    }
+
+
+def test_plan_skips_annotations_and_adds_extra_sources() -> None:
+    """
+    GIVEN the shared diagram list serializer which reads `permission_level`
+    annotation
+    WHEN the queryset plan is built for the annotated queryset with an extra
+    source path
+    THEN check that the annotation does not make all columns selected,
+    and the extra source is selected
+    """
+    plan = plan_serializer_queryset(
+        SharedDiagramListSerializer,
+        Diagram,
+        frozenset({"permission_level"}),
+        ("is_public",),
+    )
+    assert plan.select_related == {"owner"}
+    assert plan.only == {
+        "id",
+        "title",
+        "owner",
+        "owner__email",
+        "created_at",
+        "updated_at",
+        "is_public",
+    }
+
+
+def test_plan_selects_all_columns_of_model_read_by_property() -> None:
+    """
+    GIVEN the diagram serializer which reads `json` property of the diagram
+    WHEN the queryset plan is built for it
+    THEN check that all diagram columns are selected and just the email
+    of the joined owner
+    """
+    plan = plan_serializer_queryset(DiagramSerializer, Diagram)
+    assert plan.select_related == {"owner"}
+    diagram_columns = {field.name for field in Diagram._meta.concrete_fields}
+    assert plan.only == diagram_columns | {"owner__email"}
+
+
+def test_plan_prefetches_many_relations_and_reads_slug_fields(
+    django_assert_num_queries,
+) -> None:
+    """
+    GIVEN a serializer which reads the owner email by a slug field
+    and the collaborators of diagrams by a nested serializer
+    WHEN diagrams are serialized from the queryset with the plan applied
+    THEN check that the collaborators are prefetched and the number
+    of queries does not depend on the number of diagrams
+    """
+    plan = plan_serializer_queryset(DiagramWithCollaboratorsSerializer, Diagram)
+    assert plan.select_related == {"owner"}
+    assert set(plan.prefetch_related) == {"collaborator_set"}
+    owner = User.objects.create_user("owner@example.com", "password")
+    for _ in range(3):
+        CollaboratorFactory(diagram=DiagramFactory(owner=owner))
+    queryset = plan.apply(Diagram.objects.all())
+    # Diagrams with owners, collaborators, their diagrams and users are
+    # fetched by separate queries.
+    with django_assert_num_queries(2):
+        data = DiagramWithCollaboratorsSerializer(queryset, many=True).data
+    assert len(data) == 3
+    assert all(diagram["owner"] == owner.email for diagram in data)
+    assert all(len(diagram["collaborators"]) == 1 for diagram in data)
@@ -0,0 +1,30 @@
+import json
+
+from apps.core.renderers import PassthroughJSONRenderer, RawJSON
+
+
+class TestPassthroughJSONRenderer:
+    def test_render_splices_raw_json_values(self) -> None:
+        """
+        GIVEN data containing a raw JSON document as text
+        WHEN it is rendered
+        THEN check that the document is put into the body as it is.
+        """
+        raw_document = '{"classes": [{"name": "User"}], "links": []}'
+        data = {"diagram_id": "id", "json": RawJSON(raw_document), "title": "t"}
+        content = PassthroughJSONRenderer().render(data)
+        assert raw_document.encode() in content
+        assert json.loads(content) == {
+            "diagram_id": "id",
+            "json": json.loads(raw_document),
+            "title": "t",
+        }
+
+    def test_render_data_without_raw_json_values(self) -> None:
+        """
+        GIVEN data without raw JSON values
+        WHEN it is rendered
+        THEN check that it is rendered as by the default JSON renderer.
+        """
+        data = {"json": '{"name": "not raw"}', "items": [1, 2]}
+        assert json.loads(PassthroughJSONRenderer().render(data)) == data
@@ -0,0 +1,161 @@
+import uuid
+from datetime import datetime, timezone
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone as django_timezone
+
+from apps.core.serializers import drf_serializer
+from apps.diagrams.api.v1.projections import DiagramListRow
+from apps.diagrams.api.v1.serializers import (
+    DiagramListSerializerWithPublicFlag,
+    DiagramSerializer,
+    SharedDiagramListSerializer,
+)
+from apps.diagrams.models import Diagram
+from apps.sharings.api.v1.serializers import CollaboratorSerializer
+from apps.sharings.constants import PermissionLevels
+from apps.sharings.models import Collaborator
+from tests.factories import CollaboratorFactory, DiagramFactory, UserFactory
+
+TIMESTAMP = datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=timezone.utc)
+
+
+def list_row(**annotations) -> DiagramListRow:
+    return DiagramListRow(
+        id=uuid.uuid4(),
+        title="Diagram",
+        owner_id=uuid.uuid4(),
+        owner_email="owner@example.com",
+        created_at=TIMESTAMP,
+        updated_at=TIMESTAMP,
+        **annotations,
+    )
+
+
+def orphan_row(**annotations) -> DiagramListRow:
+    return DiagramListRow(
+        id=uuid.uuid4(),
+        title="Diagram",
+        owner_id=None,
+        owner_email=None,
+        created_at=TIMESTAMP,
+        updated_at=TIMESTAMP,
+        **annotations,
+    )
+
+
+def assert_same_representation(serializer_class, instances) -> list:
+    data = serializer_class(instances, many=True).data
+    expected = drf_serializer(serializer_class)(instances, many=True).data
+    assert data == expected
+    assert [list(item) for item in data] == [list(item) for item in expected]
+    return data
+
+
+@pytest.mark.parametrize("time_zone", ["UTC", "Europe/Berlin"])
+def test_fast_path_serializers_output_same_data_as_drf(time_zone: str) -> None:
+    """
+    GIVEN diagrams, list rows and collaborators with and without owners,
+    shared to users and publicly
+    WHEN they are serialized by the fast path of the serializers
+    in the active timezone
+    THEN check that the output is the same as DRF's one and the fields
+    are the same as before
+    """
+    diagram = DiagramFactory(json={"classes": []})
+    orphan = DiagramFactory(json={"classes": []}, owner=None)
+    shared = CollaboratorFactory(
+        diagram=diagram, permission_level=PermissionLevels.VIEWEDIT
+    )
+    public = CollaboratorFactory(
+        diagram=diagram, shared_to=None, permission_level=PermissionLevels.VIEWONLY
+    )
+    base_fields = [
+        "diagram_id",
+        "title",
+        "owner_id",
+        "owner_email",
+        "created_at",
+        "updated_at",
+    ]
+    with django_timezone.override(time_zone):
+        data = assert_same_representation(
+            DiagramSerializer, list(Diagram.objects.order_by("title"))
+        )
+        assert {tuple(item) for item in data} == {
+            (*base_fields[:2], "json", "description", *base_fields[2:]),
+            # The owner email of diagrams without owners is skipped.
+            ("diagram_id", "title", "json", "description", "owner_id")
+            + ("created_at", "updated_at"),
+        }
+        assert {item["owner_id"] for item in data} == {diagram.owner_id, None}
+        assert orphan.pk in {item["diagram_id"] for item in data}
+
+        data = assert_same_representation(
+            DiagramListSerializerWithPublicFlag,
+            [list_row(is_public=True), list_row(is_public=False), orphan_row()],
+        )
+        assert list(data[0]) == base_fields + ["is_public"]
+        # Missing annotations are skipped like on model instances.
+        assert "is_public" not in data[2]
+
+        data = assert_same_representation(
+            SharedDiagramListSerializer,
+            [list_row(permission_level=PermissionLevels.VIEWCOPY)],
+        )
+        assert list(data[0]) == base_fields + ["permission_level"]
+        created_at = django_timezone.localtime(TIMESTAMP).isoformat()
+        assert data[0]["created_at"] == created_at.replace("+00:00", "Z")
+
+        collaborators = Collaborator.objects.filter(pk__in=[shared.pk, public.pk])
+        data = assert_same_representation(
+            CollaboratorSerializer, list(collaborators.order_by("shared_at"))
+        )
+        assert list(data[0]) == [
+            "collaborator_id",
+            "diagram_id",
+            "diagram_title",
+            "shared_to",
+            "permission_level",
+            "shared_at",
+        ]
+        assert {item["shared_to"] for item in data} == {shared.shared_to.email, None}
+
+
+def test_fast_path_serializer_falls_back_to_fields_for_mappings() -> None:
+    """
+    GIVEN a row which is a mapping instead of an object
+    WHEN it is serialized by the fast path of the list serializer
+    THEN check that its values are got by the fields as DRF does
+    """
+    owner = UserFactory()
+    row = {
+        "id": uuid.uuid4(),
+        "title": "Diagram",
+        "owner": owner,
+        "created_at": TIMESTAMP,
+        "updated_at": TIMESTAMP,
+        "is_public": True,
+    }
+    data = DiagramListSerializerWithPublicFlag(row).data
+    assert data == drf_serializer(DiagramListSerializerWithPublicFlag)(row).data
+    assert data["owner_email"] == owner.email
+    assert data["created_at"] == "2024-05-06T07:08:09.123456Z"
+
+
+def test_benchmark_serializers() -> None:
+    """
+    GIVEN the fast path serializers
+    WHEN benchmark_serializers command is run with small numbers of rows
+    THEN check that times of every serializer and number of rows are reported
+    """
+    output = StringIO()
+    call_command(
+        "benchmark_serializers", "--rows", "1", "3", "--repeat", "1", stdout=output
+    )
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 8
+    assert lines[0].startswith("DiagramSerializer, rows: 1, DRF: ")
+    assert lines[-1].startswith("CollaboratorSerializer, rows: 3, DRF: ")
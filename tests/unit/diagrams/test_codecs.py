@@ -0,0 +1,59 @@
+import pytest
+
+from apps.diagrams import codecs
+
+
+@pytest.mark.parametrize("codec", [codecs.ZLIB, codecs.ZSTD])
+def test_codec_round_trip(codec: str) -> None:
+    """
+    GIVEN a JSON text
+    WHEN it is compressed and decompressed by an available codec
+    THEN check that the same text is returned and the compressed data is smaller
+    """
+    codec = codecs.resolve(codec)
+    data = '{"classes":[{"name":"Class","fields":[]}]}'.encode() * 10
+    compressed = codecs.compress(data, codec)
+    assert len(compressed) < len(data)
+    assert codecs.decompress(compressed, codec) == data
+
+
+def test_codec_zstd_falls_back_to_zlib(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    GIVEN `zstandard` package which is not installed
+    WHEN zstd codec is requested
+    THEN check that zlib codec is used instead
+    """
+    monkeypatch.setattr(codecs, "zstandard", None)
+    assert codecs.resolve(codecs.ZSTD) == codecs.ZLIB
+    assert not codecs.is_available(codecs.ZSTD)
+    with pytest.raises(codecs.CodecError):
+        codecs.train_dictionary([b"{}"], 1024)
+
+
+def test_codec_unknown() -> None:
+    """
+    GIVEN an unknown codec name
+    WHEN it is requested
+    THEN check that CodecError is raised
+    """
+    with pytest.raises(codecs.CodecError):
+        codecs.resolve("lz4")
+    with pytest.raises(codecs.CodecError):
+        codecs.compress(b"{}", "lz4")
+
+
+def test_codec_zstd_with_dictionary() -> None:
+    """
+    GIVEN a zstd dictionary trained on samples of documents
+    WHEN a similar document is compressed with the dictionary
+    THEN check that it is decompressed with the dictionary to the same text
+    """
+    pytest.importorskip("zstandard")
+    samples = [
+        f'{{"classes":[{{"name":"Class{i}","fields":["id","name{i}"]}}]}}'.encode()
+        for i in range(500)
+    ]
+    dictionary = codecs.train_dictionary(samples, 4096)
+    data = samples[0]
+    compressed = codecs.compress(data, codecs.ZSTD, dictionary)
+    assert codecs.decompress(compressed, codecs.ZSTD, dictionary) == data
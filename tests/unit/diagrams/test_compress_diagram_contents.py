@@ -0,0 +1,81 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from apps.diagrams.models import Diagram, DiagramContent
+from tests.factories import DiagramFactory
+
+
+@pytest.mark.django_db
+def test_compress_diagram_contents_and_decompress_them_back() -> None:
+    """
+    GIVEN diagrams which contents are not compressed
+    WHEN compress_diagram_contents command is run with zlib codec and then
+    with none codec
+    THEN check that the contents are compressed in batches, compression ratio
+    is reported, documents are read back transparently, and then the contents
+    are stored uncompressed again
+    """
+    documents = [
+        {"classes": [{"name": f"Class{i}", "fields": ["id", "name"]}] * 20}
+        for i in range(3)
+    ]
+    diagrams = [DiagramFactory(json=document) for document in documents]
+    output = StringIO()
+    call_command("compress_diagram_contents", codec="zlib", batch_size=2, stdout=output)
+    assert "Processed 2 contents." in output.getvalue()
+    assert "Codec: zlib, contents: 3" in output.getvalue()
+    assert "compression ratio" in output.getvalue()
+    assert set(DiagramContent.objects.values_list("codec", flat=True)) == {"zlib"}
+    for diagram, document in zip(diagrams, documents):
+        assert Diagram.objects.get(pk=diagram.pk).json == document
+
+    call_command("compress_diagram_contents", codec="none", stdout=StringIO())
+    assert set(DiagramContent.objects.values_list("codec", flat=True)) == {""}
+    for diagram, document in zip(diagrams, documents):
+        assert DiagramContent.objects.get(pk=diagram.content_id).json == document
+
+
+@pytest.mark.django_db
+def test_compress_diagram_contents_skips_contents_tried_before() -> None:
+    """
+    GIVEN a diagram which content compression does not make smaller
+    WHEN compress_diagram_contents command is run with zlib codec twice
+    THEN check that the content is stored uncompressed and marked as tried
+    by the first run, and the second run skips it
+    """
+    diagram = DiagramFactory(json={"a": 1})
+    output = StringIO()
+    call_command("compress_diagram_contents", codec="zlib", stdout=output)
+    assert "Codec: zlib, contents: 1" in output.getvalue()
+    content = DiagramContent.objects.get(pk=diagram.content_id)
+    assert (content.codec, content.compression_tried) == ("", "zlib:")
+    output = StringIO()
+    call_command("compress_diagram_contents", codec="zlib", stdout=output)
+    assert "Codec: zlib, contents: 0" in output.getvalue()
+
+
+@pytest.mark.django_db
+def test_compress_diagram_contents_dry_run() -> None:
+    """
+    GIVEN a diagram which content is not compressed
+    WHEN compress_diagram_contents command is run with --dry-run option
+    THEN check that the compression ratio is reported, but the content is unchanged
+    """
+    diagram = DiagramFactory(json={"classes": [{"name": "Class"}] * 50})
+    output = StringIO()
+    call_command("compress_diagram_contents", codec="zlib", dry_run=True, stdout=output)
+    assert "Codec: zlib, contents: 1" in output.getvalue()
+    assert DiagramContent.objects.get(pk=diagram.content_id).codec == ""
+
+
+@pytest.mark.django_db
+def test_compress_diagram_contents_dictionary_requires_zstd() -> None:
+    """
+    GIVEN compress_diagram_contents command
+    WHEN it is run with --train-dictionary option and zlib codec
+    THEN check that CommandError is raised
+    """
+    with pytest.raises(CommandError):
+        call_command("compress_diagram_contents", codec="zlib", train_dictionary=True)
@@ -0,0 +1,116 @@
+import gzip
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import QuerySet
+from pytest_mock import MockerFixture
+
+from apps.diagrams import codecs, export
+from apps.diagrams.constants import ExportScopes
+from apps.users.constants import UserRoles
+from tests.factories import DiagramFactory, UserFactory
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, encoding",
+    [
+        ("", None),
+        ("identity", None),
+        ("br", None),
+        ("gzip", export.GZIP),
+        ("deflate, GZIP;q=0.8", export.GZIP),
+        ("gzip;q=0", None),
+        ("gzip;q=invalid", None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding: str, encoding: str) -> None:
+    """
+    GIVEN Accept-Encoding header
+    WHEN the encoding of the export stream is negotiated
+    THEN check that gzip is used just if it is accepted.
+    """
+    assert export.negotiate_encoding(accept_encoding) == encoding
+
+
+def test_negotiate_encoding_prefers_available_zstd(monkeypatch) -> None:
+    """
+    GIVEN Accept-Encoding header which accepts gzip and zstd
+    WHEN the encoding of the export stream is negotiated
+    THEN check that zstd is used just if `zstandard` package is installed.
+    """
+    monkeypatch.setattr(codecs, "zstandard", None)
+    assert export.negotiate_encoding("gzip, zstd") == export.GZIP
+    monkeypatch.setattr(codecs, "zstandard", object())
+    assert export.negotiate_encoding("gzip, zstd") == export.ZSTD
+
+
+@pytest.mark.django_db
+def test_export_lines_reads_diagrams_in_chunks(mocker: MockerFixture) -> None:
+    """
+    GIVEN diagrams of a user
+    WHEN their export lines are made
+    THEN check that the diagrams are read by a chunked iterator.
+    """
+    user = UserFactory(role=UserRoles.USER)
+    diagrams = [DiagramFactory(owner=user) for _ in range(5)]
+    iterator = mocker.spy(QuerySet, "iterator")
+    queryset = export.get_export_queryset(ExportScopes.OWNED, user)
+    lines = [json.loads(line) for line in export.export_lines(queryset, 2)]
+    iterator.assert_called_once_with(queryset, chunk_size=2)
+    assert {line["diagram_id"] for line in lines} == {
+        str(diagram.id) for diagram in diagrams
+    }
+
+
+@pytest.mark.django_db
+def test_export_diagrams_command(tmp_path: Path) -> None:
+    """
+    GIVEN diagrams of a user and of another user
+    WHEN export_diagrams command is run for the user and for all diagrams
+    with gzip compression
+    THEN check that the diagrams of the scope are written as NDJSON lines.
+    """
+    user = UserFactory(role=UserRoles.USER)
+    owned = DiagramFactory(owner=user)
+    other = DiagramFactory()
+    output = tmp_path / "owned.ndjson"
+    stdout = StringIO()
+    call_command("export_diagrams", user=user.email, output=str(output), stdout=stdout)
+    assert f"Exported 1 diagrams to {output}." in stdout.getvalue()
+    [line] = output.read_bytes().splitlines()
+    assert json.loads(line)["json"] == owned.json
+
+    output = tmp_path / "all.ndjson.gz"
+    call_command(
+        "export_diagrams",
+        scope=ExportScopes.ALL,
+        compression=export.GZIP,
+        output=str(output),
+        stdout=StringIO(),
+    )
+    lines = gzip.decompress(output.read_bytes()).splitlines()
+    assert {json.loads(line)["diagram_id"] for line in lines} == {
+        str(owned.id),
+        str(other.id),
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        ({}, "--user is required"),
+        ({"user": "nobody@example.com"}, "does not exist"),
+    ],
+)
+def test_export_diagrams_command_requires_user(options: dict, message: str) -> None:
+    """
+    GIVEN export_diagrams command options without an existing user
+    WHEN the command is run for owned diagrams
+    THEN check that the command fails.
+    """
+    with pytest.raises(CommandError, match=message):
+        call_command("export_diagrams", **options, stdout=StringIO())
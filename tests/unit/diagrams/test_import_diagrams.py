@@ -0,0 +1,92 @@
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from apps.core.jsonstream import ItemParseError
+from apps.diagrams import imports
+from apps.diagrams.models import Diagram
+from apps.users.constants import UserRoles
+from tests.factories import UserFactory
+
+
+@pytest.mark.django_db
+def test_import_diagrams_in_batches(django_assert_num_queries) -> None:
+    """
+    GIVEN valid and invalid items
+    WHEN they are imported with a batch size of 2
+    THEN check that results of invalid items are yielded at once, results of
+    valid items when their batch is inserted, and each batch takes the same
+    number of queries.
+    """
+    user = UserFactory(role=UserRoles.USER)
+    items = [
+        {"title": "A", "json": {}},
+        ItemParseError("JSON parse error"),
+        {"title": "B", "json": {}},
+        {"title": "C", "json": {"c": 1}},
+    ]
+    results = imports.import_diagrams(items, user, batch_size=2)
+    assert next(results) == {
+        "index": 1,
+        "errors": {"non_field_errors": ["JSON parse error"]},
+    }
+    with django_assert_num_queries(8):
+        assert [next(results)["index"] for _ in range(2)] == [0, 2]
+    with django_assert_num_queries(8):
+        assert [result["index"] for result in results] == [3]
+    assert Diagram.objects.filter(owner=user).count() == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "file_name, options",
+    [("diagrams.ndjson", {}), ("diagrams.txt", {"format": "json"})],
+)
+def test_import_diagrams_command(tmp_path: Path, file_name: str, options: dict) -> None:
+    """
+    GIVEN a file with a valid and an invalid item
+    WHEN import_diagrams command is run for a user
+    THEN check that the valid diagram is imported and the invalid one reported.
+    """
+    user = UserFactory(role=UserRoles.USER)
+    items = [{"title": "A", "json": {"a": 1}}, {"json": {}}]
+    path = tmp_path / file_name
+    if options.get("format") == "json":
+        path.write_text(json.dumps(items))
+    else:
+        path.write_text("\n".join(json.dumps(item) for item in items))
+    stdout, stderr = StringIO(), StringIO()
+    call_command(
+        "import_diagrams",
+        user=user.email,
+        input=str(path),
+        **options,
+        stdout=stdout,
+        stderr=stderr,
+    )
+    assert "Imported 1 diagrams, 1 failed." in stdout.getvalue()
+    assert "Item 1:" in stderr.getvalue() and "title" in stderr.getvalue()
+    assert Diagram.objects.get(owner=user).json == {"a": 1}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        ({"user": "nobody@example.com"}, "does not exist"),
+        ({"batch_size": 0}, "must be positive"),
+        ({"input": "/nonexistent/diagrams.ndjson"}, "Cannot read"),
+    ],
+)
+def test_import_diagrams_command_errors(options: dict, message: str) -> None:
+    """
+    GIVEN import_diagrams command options which are not valid
+    WHEN the command is run
+    THEN check that the command fails.
+    """
+    options = {"user": UserFactory().email, **options}
+    with pytest.raises(CommandError, match=message):
+        call_command("import_diagrams", **options, stdout=StringIO())
@@ -0,0 +1,282 @@
+import json
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.diagrams import codecs
+from apps.diagrams.models import Diagram, DiagramContent, DiagramContentDictionary
+from apps.sharings.constants import PermissionLevels
+from tests.factories import (
+    CollaboratorFactory,
+    DiagramFactory,
+    TeamCollaboratorFactory,
+    TeamMemberFactory,
+    UserFactory,
+)
+
+
+@pytest.mark.django_db
+def test_diagram_content_is_switched_on_save() -> None:
+    """
+    GIVEN a diagram
+    WHEN its json is changed and saved
+    THEN check that the diagram refers to the content with the digest of the new
+    json, keys order does not matter, and the previous content is deleted
+    """
+    diagram = DiagramFactory(json={"a": 1, "b": [1, 2]})
+    previous_content_id = diagram.content_id
+    assert previous_content_id == DiagramContent.hash_json({"b": [1, 2], "a": 1})
+    diagram.json = {"a": 2}
+    diagram.save(update_fields=["json"])
+    diagram.refresh_from_db()
+    assert diagram.content_id == DiagramContent.hash_json({"a": 2})
+    assert diagram.json == {"a": 2}
+    assert not DiagramContent.objects.filter(pk=previous_content_id).exists()
+
+
+@pytest.mark.django_db
+def test_diagram_contents_are_deduplicated() -> None:
+    """
+    GIVEN diagrams with the same json and their copies
+    WHEN one of them is edited and then diagrams are deleted
+    THEN check that the json is stored once, the edited diagram refers
+    to a new content (copy-on-write) and reference counts are maintained
+    """
+    diagrams = [DiagramFactory(json={"classes": []}) for _ in range(2)]
+    owner = UserFactory()
+    copy_ids = {diagrams[0].id: uuid.uuid4()}
+    assert Diagram.objects.all().insert_copies(copy_ids, owner_id=owner.id) == 1
+    content = DiagramContent.objects.get()
+    assert content.ref_count == 3
+
+    diagrams[1].json = {"classes": [{"name": "User"}]}
+    diagrams[1].save()
+    content.refresh_from_db()
+    assert content.ref_count == 2
+    assert Diagram.objects.get(id=copy_ids[diagrams[0].id]).json == {"classes": []}
+    assert DiagramContent.objects.count() == 2
+
+    diagrams[0].delete()
+    Diagram.objects.filter(id__in=[diagrams[1].id]).delete()
+    content.refresh_from_db()
+    assert content.ref_count == 1
+    assert DiagramContent.objects.get() == content
+
+
+@pytest.mark.django_db
+def test_diagram_etag_round_trip() -> None:
+    """
+    GIVEN a diagram
+    WHEN its ETags of JSON and another representation are parsed
+    THEN check that the modification time and the content digest prefix
+    are returned
+    """
+    diagram = DiagramFactory()
+    updated_at, hash_prefix = Diagram.parse_etag(diagram.etag)
+    assert updated_at == diagram.updated_at
+    assert diagram.content_id.startswith(hash_prefix)
+    assert Diagram.parse_etag(diagram.get_etag("msgpack")) == (
+        updated_at,
+        hash_prefix,
+    )
+    assert diagram.get_etag("msgpack") != diagram.etag
+    diagram.updated_at += timedelta(microseconds=1)
+    assert Diagram.parse_etag(diagram.etag)[0] != updated_at
+
+
+@pytest.mark.parametrize(
+    "etag", ["", "*", '"abc"', 'W/"1-abc"', '"1-xyz"', '"1-0123456789abcdef-"']
+)
+def test_diagram_parse_etag_invalid(etag: str) -> None:
+    """
+    GIVEN a malformed or weak ETag
+    WHEN it is parsed
+    THEN check that None is returned
+    """
+    assert Diagram.parse_etag(etag) is None
+
+
+@pytest.mark.django_db
+def test_diagram_save_if_match() -> None:
+    """
+    GIVEN a diagram and two its copies loaded by concurrent writers
+    WHEN both of them are saved with the ETag they were loaded with
+    THEN check that just the first write is applied
+    """
+    diagram = DiagramFactory(json={"version": 0})
+    first, second = Diagram.objects.get(pk=diagram.pk), Diagram.objects.get(
+        pk=diagram.pk
+    )
+    first.json, second.json = {"version": 1}, {"version": 2}
+    assert first.save_if_match([diagram.etag]) is True
+    assert second.save_if_match(["*", diagram.etag]) is False
+    diagram.refresh_from_db()
+    assert diagram.json == {"version": 1}
+    assert diagram.etag == first.etag
+
+
+@pytest.mark.django_db
+def test_diagram_content_is_compressed(settings) -> None:
+    """
+    GIVEN DIAGRAM_CONTENT_CODEC setting set to zlib
+    WHEN diagrams with a large and a small json are created
+    THEN check that the large json is stored compressed, the small one is stored
+    as it is because compression does not make it smaller, and both documents
+    are read back transparently
+    """
+    settings.DIAGRAM_CONTENT_CODEC = "zlib"
+    document = {"classes": [{"name": "Class", "fields": ["id", "name"]}] * 50}
+    large, small = DiagramFactory(json=document), DiagramFactory(json={"a": 1})
+    large_content = DiagramContent.objects.get(pk=large.content_id)
+    assert large_content.codec == "zlib"
+    assert large_content.json is None
+    assert len(large_content.data) < len(json.dumps(document))
+    assert large_content.value == document
+    assert DiagramContent.objects.get(pk=small.content_id).codec == ""
+    assert Diagram.objects.get(pk=large.pk).json == document
+    assert Diagram.objects.get(pk=small.pk).json == {"a": 1}
+    # The digest does not depend on the codec.
+    assert large.content_id == DiagramContent.hash_json(document)
+
+
+@pytest.mark.django_db
+def test_diagrams_shared_to_user() -> None:
+    """
+    GIVEN diagrams shared to a user, to another user, publicly and to a team
+    of the user, one of them also directly
+    WHEN the diagrams shared to the user are queried
+    THEN check that just his diagrams are returned once with the highest
+    permission levels they were shared with, which are read by a single join
+    of the grants grouped by diagram
+    """
+    user = UserFactory()
+    edit = CollaboratorFactory(
+        shared_to=user, permission_level=PermissionLevels.VIEWEDIT
+    )
+    view = CollaboratorFactory(
+        shared_to=user, permission_level=PermissionLevels.VIEWONLY
+    )
+    CollaboratorFactory(diagram=edit.diagram)
+    CollaboratorFactory(
+        diagram=view.diagram, shared_to=None, permission_level=PermissionLevels.VIEWONLY
+    )
+    member = TeamMemberFactory(user=user)
+    team_copy = TeamCollaboratorFactory(
+        team=member.team, permission_level=PermissionLevels.VIEWCOPY
+    )
+    TeamCollaboratorFactory(
+        team=member.team,
+        diagram=view.diagram,
+        permission_level=PermissionLevels.VIEWCOPY,
+    )
+    TeamCollaboratorFactory(
+        team=member.team,
+        diagram=edit.diagram,
+        permission_level=PermissionLevels.VIEWONLY,
+    )
+    TeamCollaboratorFactory()
+    queryset = Diagram.objects.shared_to(user)
+    sql = str(queryset.query)
+    assert sql.count("JOIN") == 1
+    assert sql.count("GROUP BY") == 1
+    assert sorted(queryset.values_list("id", "permission_level")) == sorted(
+        [
+            (edit.diagram_id, PermissionLevels.VIEWEDIT),
+            (view.diagram_id, PermissionLevels.VIEWCOPY),
+            (team_copy.diagram_id, PermissionLevels.VIEWCOPY),
+        ]
+    )
+    assert queryset.count() == 3
+    assert set(
+        queryset.filter(permission_level=PermissionLevels.VIEWCOPY).values_list(
+            "id", flat=True
+        )
+    ) == {view.diagram_id, team_copy.diagram_id}
+    # Aliases of the join are relabeled when the query is nested.
+    nested = Diagram.objects.shared_to(user).filter(
+        pk__in=queryset.exclude(pk=view.diagram_id).values("pk")
+    )
+    assert sorted(nested.values_list("id", "permission_level")) == sorted(
+        [
+            (edit.diagram_id, PermissionLevels.VIEWEDIT),
+            (team_copy.diagram_id, PermissionLevels.VIEWCOPY),
+        ]
+    )
+
+
+@pytest.mark.django_db
+def test_diagram_contents_are_acquired_in_bulk(django_assert_max_num_queries) -> None:
+    """
+    GIVEN a stored diagram and JSON values of new diagrams, some of them equal
+    WHEN contents of the values are acquired at once
+    THEN check that digests are returned in the order of values, each json
+    is stored once and reference counts include all the values.
+    """
+    diagram = DiagramFactory(json={"classes": []})
+    values = [{"classes": []}, {"a": 1}, {"a": 1}, {"b": 2}, {"a": 1}]
+    with django_assert_max_num_queries(5):
+        digests = DiagramContent.objects.acquire_many(values)
+    assert digests == [DiagramContent.hash_json(value) for value in values]
+    assert dict(DiagramContent.objects.values_list("digest", "ref_count")) == {
+        diagram.content_id: 2,
+        DiagramContent.hash_json({"a": 1}): 3,
+        DiagramContent.hash_json({"b": 2}): 1,
+    }
+    assert DiagramContent.objects.get(pk=digests[3]).value == {"b": 2}
+    assert DiagramContent.objects.acquire_many([]) == []
+
+
+@pytest.mark.django_db
+def test_diagram_contents_are_released_in_bulk(django_assert_num_queries) -> None:
+    """
+    GIVEN contents referred to by several diagrams
+    WHEN references to several contents are released at once
+    THEN check that they are removed by a single update whatever the number
+    of contents is, and just the contents not referred anymore are deleted
+    """
+    values = [{"a": 1}, {"a": 1}, {"a": 1}, {"b": 2}, {"c": 3}, {"c": 3}]
+    a, _, _, b, c, _ = DiagramContent.objects.acquire_many(values)
+    with CaptureQueriesContext(connection) as queries:
+        DiagramContent.objects.release({a: 2, b: 1, c: 2})
+    updates = [
+        query for query in queries.captured_queries if query["sql"].startswith("UPDATE")
+    ]
+    assert len(updates) == 1
+    assert dict(DiagramContent.objects.values_list("digest", "ref_count")) == {a: 1}
+    with django_assert_num_queries(0):
+        DiagramContent.objects.release({})
+
+
+@pytest.mark.django_db
+def test_diagram_contents_acquired_in_bulk_resolve_dictionary_once(settings) -> None:
+    """
+    GIVEN zstd codec with a trained dictionary
+    WHEN contents of several JSON values are acquired at once
+    THEN check that the latest dictionary is looked up by a single query,
+    and the contents are compressed with it
+    """
+    pytest.importorskip("zstandard")
+    settings.DIAGRAM_CONTENT_CODEC = "zstd"
+    values = [{"classes": [{"name": f"Class{i}"}] * 20} for i in range(3)]
+    samples = [json.dumps(value).encode() for value in values * 100]
+    dictionary = DiagramContentDictionary.objects.create(
+        data=codecs.train_dictionary(samples, 1024)
+    )
+    with CaptureQueriesContext(connection) as queries:
+        digests = DiagramContent.objects.acquire_many(values)
+    lookups = [
+        query
+        for query in queries.captured_queries
+        if "diagramcontentdictionary" in query["sql"] and "ORDER BY" in query["sql"]
+    ]
+    assert len(lookups) == 1
+    contents = DiagramContent.objects.filter(pk__in=digests)
+    assert {content.dictionary_id for content in contents} == {dictionary.pk}
+    assert sorted(content.value["classes"][0]["name"] for content in contents) == [
+        "Class0",
+        "Class1",
+        "Class2",
+    ]
@@ -0,0 +1,70 @@
+import pytest
+from django.db.models import F
+
+from apps.diagrams.api.v1.projections import DiagramListRow
+from apps.diagrams.api.v1.serializers import (
+    DiagramListSerializer,
+    DiagramListSerializerWithPublicFlag,
+    SharedDiagramListSerializer,
+)
+from apps.diagrams.models import Diagram
+from apps.sharings.constants import PermissionLevels
+from tests.factories import DiagramFactory
+
+
+def get_diagram_list_row(diagram: Diagram, **annotations) -> DiagramListRow:
+    values = (
+        Diagram.objects.annotate(owner_email=F("owner__email"))
+        .values(*DiagramListRow.fields)
+        .get(id=diagram.id)
+    )
+    return DiagramListRow(**values, **annotations)
+
+
+class TestDiagramListRow:
+    @pytest.mark.parametrize(
+        ("serializer_class", "annotations"),
+        [
+            (DiagramListSerializer, {}),
+            (DiagramListSerializerWithPublicFlag, {"is_public": True}),
+            (
+                SharedDiagramListSerializer,
+                {"permission_level": PermissionLevels.VIEWEDIT},
+            ),
+        ],
+    )
+    def test_diagram_list_row_serialized_as_diagram(
+        self, serializer_class: DiagramListSerializer, annotations: dict
+    ) -> None:
+        """
+        GIVEN a diagram object and its list row built from `values()`
+        WHEN both are serialized by a list serializer
+        THEN check that the serialized data is the same.
+        """
+        diagram = DiagramFactory()
+        for name, value in annotations.items():
+            setattr(diagram, name, value)
+        row = get_diagram_list_row(diagram, **annotations)
+        assert serializer_class(row).data == serializer_class(diagram).data
+
+    def test_diagram_list_row_without_owner(self) -> None:
+        """
+        GIVEN a diagram which owner was deleted
+        WHEN its list row is serialized
+        THEN check that the owner fields are serialized the same way as for the
+        diagram object.
+        """
+        diagram = DiagramFactory(owner=None)
+        row = get_diagram_list_row(diagram)
+        assert row.owner is None
+        assert DiagramListSerializer(row).data == DiagramListSerializer(diagram).data
+
+    def test_diagram_list_row_misses_not_provided_annotation(self) -> None:
+        """
+        GIVEN a diagram list row built without the "is_public" annotation
+        (as for admin users)
+        WHEN it is serialized by a serializer with public flag
+        THEN check that the "is_public" field is skipped.
+        """
+        row = get_diagram_list_row(DiagramFactory())
+        assert "is_public" not in DiagramListSerializerWithPublicFlag(row).data
@@ -0,0 +1,209 @@
+import inspect
+
+import django
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db.models.sql import Query
+from django.db.models.sql.datastructures import Join
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from apps.diagrams.models import Diagram
+from apps.sharings.access import GrantsJoin, annotate_access, get_diagram_access
+from apps.sharings.api.v1.permissions import (
+    IsCollaborator,
+    IsCollaboratorAndHasViewCopyPermission,
+    IsCollaboratorAndHasViewEditPermission,
+    IsPublicDiagram,
+)
+from apps.sharings.constants import PermissionLevels
+from apps.users.constants import UserRoles
+from tests.factories import (
+    CollaboratorFactory,
+    DiagramFactory,
+    TeamCollaboratorFactory,
+    TeamMemberFactory,
+    UserFactory,
+)
+
+
+def test_annotate_access_resolves_access_without_queries(
+    django_assert_num_queries,
+) -> None:
+    """
+    GIVEN a diagram shared to a user with "view-edit" permission and shared publicly
+    WHEN the diagram is loaded with access annotations for the user
+    THEN check that the permission classes combined by `|` are checked
+    without queries
+    """
+    collaborator = CollaboratorFactory(
+        shared_to=UserFactory(role=UserRoles.USER),
+        permission_level=PermissionLevels.VIEWEDIT,
+    )
+    CollaboratorFactory(
+        diagram=collaborator.diagram,
+        shared_to=None,
+        permission_level=PermissionLevels.VIEWONLY,
+    )
+    request = APIRequestFactory().get("/")
+    request.user = collaborator.shared_to
+    diagram = annotate_access(Diagram.objects.all(), request.user).get(
+        pk=collaborator.diagram.pk
+    )
+    permission = (
+        IsCollaboratorAndHasViewCopyPermission | IsCollaboratorAndHasViewEditPermission
+    )()
+    with django_assert_num_queries(0):
+        assert permission.has_object_permission(request, APIView(), diagram)
+        assert IsPublicDiagram().has_object_permission(request, APIView(), diagram)
+        access = get_diagram_access(request, diagram)
+        assert not access.is_owner and not access.is_admin
+
+
+def test_annotate_access_for_anonymous_user() -> None:
+    """
+    GIVEN a diagram shared publicly
+    WHEN the diagram is loaded with access annotations for an anonymous user
+    THEN check that the diagram is public, but the user is not a collaborator
+    """
+    collaborator = CollaboratorFactory(
+        shared_to=None, permission_level=PermissionLevels.VIEWONLY
+    )
+    request = APIRequestFactory().get("/")
+    request.user = AnonymousUser()
+    diagram = annotate_access(Diagram.objects.all(), request.user).get(
+        pk=collaborator.diagram.pk
+    )
+    assert IsPublicDiagram().has_object_permission(request, APIView(), diagram)
+    assert not IsCollaborator().has_object_permission(request, APIView(), diagram)
+
+
+def test_diagram_access_is_resolved_once_per_request(
+    django_assert_num_queries,
+) -> None:
+    """
+    GIVEN a diagram shared to a user and loaded without access annotations
+    WHEN several permission classes are checked within the same request
+    THEN check that the sharing details are fetched by a single query
+    """
+    user = UserFactory()
+    diagram = DiagramFactory()
+    CollaboratorFactory(
+        diagram=diagram, shared_to=user, permission_level=PermissionLevels.VIEWCOPY
+    )
+    request = APIRequestFactory().get("/")
+    request.user = user
+    with django_assert_num_queries(1):
+        for permission in (
+            IsCollaborator(),
+            IsCollaboratorAndHasViewCopyPermission(),
+            IsPublicDiagram(),
+        ):
+            permission.has_object_permission(request, APIView(), diagram)
+    access = get_diagram_access(request, diagram)
+    assert access.permission_level == PermissionLevels.VIEWCOPY
+    assert not access.is_public
+
+
+@pytest.mark.parametrize(
+    "direct, team, expected",
+    [
+        (None, PermissionLevels.VIEWCOPY, PermissionLevels.VIEWCOPY),
+        (
+            PermissionLevels.VIEWONLY,
+            PermissionLevels.VIEWEDIT,
+            PermissionLevels.VIEWEDIT,
+        ),
+        (
+            PermissionLevels.VIEWEDIT,
+            PermissionLevels.VIEWCOPY,
+            PermissionLevels.VIEWEDIT,
+        ),
+    ],
+)
+@pytest.mark.parametrize("django_versions", [GrantsJoin.django_versions, ()])
+def test_team_grants_are_resolved_like_direct_grants(
+    monkeypatch, django_versions: tuple, direct: str, team: str, expected: str
+) -> None:
+    """
+    GIVEN a diagram shared to a team of a user (with a lower level to another
+    team of him) and possibly to him directly
+    WHEN his access to the diagram is resolved by the annotation, by the query
+    and by the list of diagrams shared to him, with the grants join and
+    with the subqueries it falls back to
+    THEN check that the highest permission level of the grants applies
+    """
+    monkeypatch.setattr(GrantsJoin, "django_versions", django_versions)
+    user = UserFactory(role=UserRoles.USER)
+    diagram = DiagramFactory()
+    if direct:
+        CollaboratorFactory(diagram=diagram, shared_to=user, permission_level=direct)
+    TeamCollaboratorFactory(
+        diagram=diagram, team=TeamMemberFactory(user=user).team, permission_level=team
+    )
+    TeamCollaboratorFactory(
+        diagram=diagram,
+        team=TeamMemberFactory(user=user).team,
+        permission_level=PermissionLevels.VIEWONLY,
+    )
+    TeamCollaboratorFactory(
+        diagram=diagram,
+        team=TeamMemberFactory().team,
+        permission_level=PermissionLevels.VIEWEDIT,
+    )
+    request = APIRequestFactory().get("/")
+    request.user = user
+    annotated = annotate_access(Diagram.objects.all(), user).get(pk=diagram.pk)
+    assert get_diagram_access(request, annotated).permission_level == expected
+    request._diagram_access = {}
+    assert get_diagram_access(request, diagram).permission_level == expected
+    shared = Diagram.objects.shared_to(user).get(pk=diagram.pk)
+    assert shared.permission_level == expected
+
+
+def test_grants_join_implements_join_of_django() -> None:
+    """
+    GIVEN the private `Join` of the installed Django
+    WHEN it is compared with `GrantsJoin`
+    THEN check that `GrantsJoin` was checked with this Django version,
+    and `Join` and `Query.join()` have the interface it implements
+    """
+    assert GrantsJoin.is_supported(), (
+        f"GrantsJoin was not checked with Django {django.get_version()}: compare "
+        "it with django.db.models.sql.datastructures.Join and add the version "
+        "to GrantsJoin.django_versions."
+    )
+    join_attributes = set(inspect.signature(Join.__init__).parameters)
+    assert join_attributes == {
+        "self",
+        "table_name",
+        "parent_alias",
+        "table_alias",
+        "join_type",
+        "join_field",
+        "nullable",
+        "filtered_relation",
+    }
+    assert list(inspect.signature(Query.join).parameters) == ["self", "join", "reuse"]
+    for name in GrantsJoin.interface:
+        member = getattr(Join, name, None)
+        assert (
+            name in join_attributes or callable(member) or isinstance(member, property)
+        ), f"Join has no {name}"
+
+
+def test_team_grant_of_former_member_is_not_resolved() -> None:
+    """
+    GIVEN a diagram shared to a team which a user has left
+    WHEN his access to the diagram is resolved
+    THEN check that he is not a collaborator anymore
+    """
+    member = TeamMemberFactory()
+    collaborator = TeamCollaboratorFactory(team=member.team)
+    member.delete()
+    request = APIRequestFactory().get("/")
+    request.user = member.user
+    diagram = annotate_access(Diagram.objects.all(), member.user).get(
+        pk=collaborator.diagram_id
+    )
+    assert not IsCollaborator().has_object_permission(request, APIView(), diagram)
@@ -0,0 +1,44 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from apps.diagrams.models import Diagram, DiagramContent
+from apps.sharings.models import Collaborator, Team, TeamCollaborator
+from apps.users.models import User
+
+
+def test_benchmark_shared_with_me() -> None:
+    """
+    GIVEN a database without diagrams
+    WHEN benchmark_shared_with_me command is run with small numbers of shares
+    THEN check that every number of shares is reported with scans of direct
+    and team shares and the benchmark data is deleted afterwards
+    """
+    users = User.objects.count()
+    output = StringIO()
+    call_command(
+        "benchmark_shared_with_me",
+        "--shares",
+        "20",
+        "5",
+        "--other-shares",
+        "30",
+        "--other-users",
+        "3",
+        "--teams",
+        "2",
+        "--repeat",
+        "1",
+        stdout=output,
+    )
+    lines = output.getvalue().splitlines()
+    assert lines[0].startswith("Shares: 5, collaborator scans: ")
+    assert lines[1].startswith("Shares: 20, collaborator scans: ")
+    assert "sharings_collaborator" in lines[1]
+    assert "sharings_teamcollaborator" in lines[1]
+    assert User.objects.count() == users
+    assert not Diagram.objects.exists()
+    assert not Collaborator.objects.exists()
+    assert not TeamCollaborator.objects.exists()
+    assert not Team.objects.exists()
+    assert not DiagramContent.objects.exists()
@@ -0,0 +1,45 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from apps.diagrams.models import Diagram
+from apps.sharings.constants import PermissionLevels
+from tests.factories import CollaboratorFactory, DiagramFactory
+
+
+def test_check_public_flags_consistent() -> None:
+    """
+    GIVEN a public and a private diagram
+    WHEN check_public_flags command is run
+    THEN check that the flags are reported as consistent
+    """
+    DiagramFactory()
+    CollaboratorFactory(shared_to=None, permission_level=PermissionLevels.VIEWONLY)
+    output = StringIO()
+    call_command("check_public_flags", stdout=output)
+    assert "Public flags are consistent." in output.getvalue()
+
+
+def test_check_public_flags_inconsistent_and_fixed() -> None:
+    """
+    GIVEN diagrams which public flags were changed bypassing public shares
+    WHEN check_public_flags command is run without and with --fix option
+    THEN check that CommandError listing the diagrams is raised first, and then
+    the flags are fixed
+    """
+    private_diagram = DiagramFactory()
+    public_diagram = CollaboratorFactory(
+        shared_to=None, permission_level=PermissionLevels.VIEWONLY
+    ).diagram
+    Diagram.objects.filter(pk=private_diagram.pk).update(is_public=True)
+    Diagram.objects.filter(pk=public_diagram.pk).update(is_public=False)
+    with pytest.raises(CommandError) as ex:
+        call_command("check_public_flags")
+    assert str(private_diagram.pk) in str(ex.value)
+    assert str(public_diagram.pk) in str(ex.value)
+    output = StringIO()
+    call_command("check_public_flags", fix=True, stdout=output)
+    assert "Fixed public flags of 2 diagrams." in output.getvalue()
+    assert not Diagram.objects.get(pk=private_diagram.pk).is_public
+    assert Diagram.objects.get(pk=public_diagram.pk).is_public
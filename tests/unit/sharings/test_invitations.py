@@ -0,0 +1,29 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from apps.sharings.invitations import invite_collaborators
+from apps.sharings.models import Collaborator, CollaboratorQuerySet
+from tests.factories import DiagramFactory, UserFactory
+
+
+@pytest.mark.django_db
+def test_invite_collaborators_shared_concurrently(mocker: MockerFixture) -> None:
+    """
+    GIVEN invitations of users who the diagram is shared to by a concurrent
+    request after the validation, so their shares are not inserted
+    WHEN the diagram is shared to the users
+    THEN check that the invitations are reported as non-unique sharings.
+    """
+    diagram = DiagramFactory()
+    users = [UserFactory() for _ in range(2)]
+    mocker.patch.object(CollaboratorQuerySet, "bulk_create")
+    results = invite_collaborators(
+        diagram,
+        [{"user_email": user.email, "permission_level": "view-only"} for user in users],
+    )
+    assert [result["index"] for result in results] == [0, 1]
+    assert all(
+        result["codes"] == {"non_field_errors": ["non_unique_sharing"]}
+        for result in results
+    )
+    assert not Collaborator.objects.exists()
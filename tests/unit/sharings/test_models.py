@@ -1,11 +1,14 @@
+import uuid
 from random import choice
 
 import pytest
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
 
+from apps.diagrams.models import Diagram
 from apps.sharings.constants import PermissionLevels
-from tests.factories import CollaboratorFactory, DiagramFactory
+from apps.sharings.models import Collaborator
+from tests.factories import CollaboratorFactory, DiagramFactory, UserFactory
 
 
 def test_collaborator_model_check_constraint_prevents_instance_creation() -> None:
@@ -58,15 +61,79 @@ def test_collaborator_model_prevents_multiple_public_shares_for_the_same_diagram
     """
     GIVEN a diagram which is tried to be shared publicly twice
     WHEN collaborator model is used to create such a sharing second time
-    THEN check that collaborator model clean() methods raise an exception.
+    THEN check that collaborator model validation raises an exception and
+    the unique index prevents the sharing from being saved.
     """
     diagram = DiagramFactory()
+    CollaboratorFactory(
+        diagram=diagram, shared_to=None, permission_level=PermissionLevels.VIEWONLY
+    )
+    public_sharing = CollaboratorFactory.build(
+        diagram=diagram, shared_to=None, permission_level=PermissionLevels.VIEWONLY
+    )
     with pytest.raises(ValidationError) as ex:
-        for _ in range(2):
-            public_sharing = CollaboratorFactory(
-                diagram=diagram,
-                shared_to=None,
-                permission_level=PermissionLevels.VIEWONLY,
-            )
-        public_sharing.clean()
-    assert ex.value.code == "multiple_public_shares"
+        public_sharing.full_clean()
+    assert ex.value.error_dict["__all__"][0].code == "multiple_public_shares"
+    with pytest.raises(IntegrityError):
+        public_sharing.save()
+
+
+def test_collaborator_model_prevents_sharing_diagram_to_the_same_user_twice() -> None:
+    """
+    GIVEN a diagram shared to a user
+    WHEN collaborator model is used to share it to him second time
+    THEN check that the unique constraint prevents the sharing from being saved.
+    """
+    collaborator = CollaboratorFactory()
+    with pytest.raises(IntegrityError):
+        Collaborator.objects.create(
+            diagram=collaborator.diagram, shared_to=collaborator.shared_to
+        )
+
+
+def test_collaborator_model_maintains_diagram_public_flag() -> None:
+    """
+    GIVEN a diagram
+    WHEN it is shared publicly, the public share is changed to a share to a user
+    by admin, the diagram is shared publicly again and all its shares are deleted
+    THEN check that `is_public` flag of the diagram follows its public share
+    """
+    diagram = DiagramFactory()
+    public_share = CollaboratorFactory(
+        diagram=diagram, shared_to=None, permission_level=PermissionLevels.VIEWONLY
+    )
+    assert Diagram.objects.get(pk=diagram.pk).is_public
+    public_share = Collaborator.objects.get(pk=public_share.pk)
+    public_share.shared_to = UserFactory()
+    public_share.save()
+    assert not Diagram.objects.get(pk=diagram.pk).is_public
+    CollaboratorFactory(
+        diagram=diagram, shared_to=None, permission_level=PermissionLevels.VIEWONLY
+    )
+    assert Diagram.objects.get(pk=diagram.pk).is_public
+    Collaborator.objects.filter(diagram=diagram).delete()
+    assert not Diagram.objects.get(pk=diagram.pk).is_public
+
+
+def test_collaborator_model_public_flag_is_not_overwritten_by_diagram_save() -> None:
+    """
+    GIVEN a diagram loaded before it was shared publicly
+    WHEN the loaded diagram is changed and saved
+    THEN check that the public flag is not overwritten by the stale value,
+    and a copy of the public diagram is not public
+    """
+    diagram = DiagramFactory()
+    stale_diagram = Diagram.objects.get(pk=diagram.pk)
+    CollaboratorFactory(
+        diagram=diagram, shared_to=None, permission_level=PermissionLevels.VIEWONLY
+    )
+    stale_diagram.title = "New title"
+    stale_diagram.json = {"a": 1}
+    stale_diagram.save()
+    diagram = Diagram.objects.get(pk=diagram.pk)
+    assert diagram.is_public
+    assert diagram.title == "New title"
+    assert diagram.json == {"a": 1}
+    copy_ids = {diagram.id: uuid.uuid4()}
+    Diagram.objects.all().insert_copies(copy_ids, owner_id=diagram.owner_id)
+    assert not Diagram.objects.get(pk=copy_ids[diagram.id]).is_public
@@ -1,5 +1,7 @@
 import pytest
+from rest_framework.exceptions import ValidationError
 
+from apps.diagrams.models import Diagram
 from apps.sharings.api.v1.serializers import (
     CollaboratorSerializer,
     InviteCollaboratorSerializer,
@@ -219,3 +221,31 @@ class TestPublicDiagramSharingSerializer:
         assert not serializer.is_valid()
         assert "non_field_errors" in serializer.errors
         assert serializer.errors["non_field_errors"][0].code == "multiple_public_shares"
+
+    def test_public_diagram_sharing_serializer_concurrent_public_shares(
+        self,
+    ) -> None:
+        """
+        GIVEN a diagram which was shared publicly by a concurrent request
+        after it had been loaded
+        WHEN the serializer is validated and saved for the loaded diagram
+        THEN check that the unique index prevents the second public share and
+        the same validation error is raised.
+        """
+        diagram = DiagramFactory()
+        stale_diagram = Diagram.objects.get(pk=diagram.pk)
+        CollaboratorFactory(
+            diagram=diagram, shared_to=None, permission_level=PermissionLevels.VIEWONLY
+        )
+        serializer = PublicDiagramSharingSerializer(
+            data={}, context={"diagram": stale_diagram}
+        )
+        assert serializer.is_valid()
+        with pytest.raises(ValidationError) as ex:
+            serializer.save(
+                diagram=stale_diagram,
+                shared_to=None,
+                permission_level=PermissionLevels.VIEWONLY,
+            )
+        assert ex.value.detail[0].code == "multiple_public_shares"
+        assert Collaborator.objects.filter(diagram=diagram, shared_to=None).count() == 1